@@ -14,6 +14,8 @@ from functools import wraps
 from typing import Dict, Any, Optional
 import traceback
 
+from request_instrumentation import install_queue_logging
+
 class BackendLogger:
     """Enhanced logging system for backend services"""
     
@@ -78,6 +80,13 @@ class BackendLogger:
         # Add custom handlers for structured logging
         self.json_handler = json_handler
         self.perf_handler = perf_handler
+        json_logger = logging.getLogger(f"{self.service_name}_json")
+        json_logger.addHandler(json_handler)
+        json_logger.setLevel(logging.INFO)
+        
+        # File I/O happens on a background listener thread, not in request handlers
+        install_queue_logging(logger)
+        install_queue_logging(json_logger)
         
     def log_request(self, method: str, path: str, headers: Dict, body: Any = None, 
                    user_id: Optional[str] = None, ip: Optional[str] = None):
@@ -201,11 +210,7 @@ class BackendLogger:
         """Log structured JSON data"""
         try:
             json_str = json.dumps(data, default=str)
-            # Create a custom logger for JSON output
-            json_logger = logging.getLogger(f"{self.service_name}_json")
-            json_logger.addHandler(self.json_handler)
-            json_logger.setLevel(logging.INFO)
-            json_logger.info(json_str)
+            logging.getLogger(f"{self.service_name}_json").info(json_str)
         except Exception as e:
             self.logger.error(f"Failed to log JSON data: {e}")
 
@@ -0,0 +1,473 @@
+#!/usr/bin/env python3
+"""
+Backtest Engine
+Replays historical OHLCV bars through the live signal generators and reports milestone metrics
+"""
+
+import os
+import sys
+import time
+import logging
+import argparse
+from abc import ABC, abstractmethod
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from dataclasses import dataclass
+from typing import Dict, Iterator, List, Optional
+
+import numpy as np
+import pandas as pd
+
+# The candle store and the forex bot live in the forex data service
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), 'forex_data_service'))
+from candle_store import CandleStore, frame_to_bars
+from forex_bot_system import ForexBotSystem, ForexPair
+from crypto_trading_bot import CryptoTradingBot, CryptoAsset
+
+from milestone_backtest import MILESTONES, MilestoneBacktester, MilestoneThresholds, SignalResult
+
+logger = logging.getLogger(__name__)
+
+STRATEGIES = ('forex', 'crypto', 'smc')
+DAY_NS = 24 * 3600 * 10**9
+DEFAULT_CHUNK_BARS = 100000
+
+# Neutral for CryptoTradingBot.generate_signal: neither the >$10B bonus nor the <$100M risk flag
+DEFAULT_MARKET_CAP = 1e10
+
+# Same window the /api/analyze endpoints hand to perform_smc_analysis
+SMC_WINDOW_BARS = 500
+
+
+@dataclass
+class BarSource:
+    """Where a symbol's bars come from: the candle store or one CSV file per symbol.
+
+    Bars are yielded in chunks of ``chunk_bars`` so a backtest never holds more
+    than one chunk of a series in memory. The candle store is memory-mapped;
+    CSV files (``<csv_dir>/<SYMBOL>.csv`` with time/open/high/low/close[/volume]
+    columns, oldest first) are read with a chunked parser, which suits
+    multi-year minute data the store does not keep.
+    """
+    interval: str = '1h'
+    store_dir: Optional[str] = None
+    csv_dir: Optional[str] = None
+    start: Optional[str] = None
+    end: Optional[str] = None
+    chunk_bars: int = DEFAULT_CHUNK_BARS
+
+    def symbols(self) -> List[str]:
+        """Every symbol available for this source's interval"""
+        if self.csv_dir:
+            return sorted(f[:-4] for f in os.listdir(self.csv_dir) if f.endswith('.csv'))
+        suffix = f"__{self.interval}.npy"
+        return sorted(f[:-len(suffix)] for f in os.listdir(self.store_dir) if f.endswith(suffix))
+
+    def chunks(self, symbol: str) -> Iterator[np.ndarray]:
+        start = pd.Timestamp(self.start).value if self.start else None
+        end = pd.Timestamp(self.end).value if self.end else None
+        for bars in (self._csv_chunks(symbol) if self.csv_dir else self._store_chunks(symbol)):
+            if start is not None:
+                bars = bars[bars['time'] >= start]
+            if end is not None:
+                bars = bars[bars['time'] <= end]
+            if len(bars):
+                yield bars
+
+    def _store_chunks(self, symbol: str) -> Iterator[np.ndarray]:
+        bars = CandleStore(self.store_dir).load(symbol, self.interval)
+        for lo in range(0, len(bars), self.chunk_bars):
+            yield np.array(bars[lo:lo + self.chunk_bars])
+
+    def _csv_chunks(self, symbol: str) -> Iterator[np.ndarray]:
+        path = os.path.join(self.csv_dir, f"{symbol}.csv")
+        for frame in pd.read_csv(path, chunksize=self.chunk_bars):
+            frame.columns = [str(col).strip().lower() for col in frame.columns]
+            frame = frame.rename(columns={'timestamp': 'time', 'datetime': 'time', 'date': 'time'})
+            yield frame_to_bars(frame)
+
+
+@dataclass
+class Order:
+    """An entry produced by a strategy at a bar's close"""
+    direction: str  # 'LONG' or 'SHORT'
+    entry_price: float
+    stop_loss: float
+    take_profit: float
+    confidence: float  # 0.0 to 1.0
+    confirmations: List[str]
+
+
+class TrailingDay:
+    """Trailing 24h change, high, low and volume over a bar stream, amortized O(1) per bar"""
+
+    def __init__(self, span_ns: int = DAY_NS):
+        self.span_ns = span_ns
+        self.bars = deque()   # (time, close, volume)
+        self.highs = deque()  # (time, high), decreasing
+        self.lows = deque()   # (time, low), increasing
+        self.volume = 0.0
+        self.reference = None  # last close that has left the window
+
+    def update(self, t: int, high: float, low: float, close: float, volume: float):
+        self.bars.append((t, close, volume))
+        self.volume += volume
+        while self.highs and self.highs[-1][1] <= high:
+            self.highs.pop()
+        self.highs.append((t, high))
+        while self.lows and self.lows[-1][1] >= low:
+            self.lows.pop()
+        self.lows.append((t, low))
+
+        cutoff = t - self.span_ns
+        while self.bars[0][0] <= cutoff:
+            _, self.reference, old_volume = self.bars.popleft()
+            self.volume -= old_volume
+        while self.highs[0][0] <= cutoff:
+            self.highs.popleft()
+        while self.lows[0][0] <= cutoff:
+            self.lows.popleft()
+
+    @property
+    def previous_close(self) -> float:
+        return self.reference if self.reference is not None else self.bars[0][1]
+
+    @property
+    def change_percent(self) -> float:
+        previous = self.previous_close
+        return (self.bars[-1][1] - previous) / previous * 100 if previous else 0.0
+
+    @property
+    def high(self) -> float:
+        return self.highs[0][1]
+
+    @property
+    def low(self) -> float:
+        return self.lows[0][1]
+
+
+def percent_levels(direction: str, price: float, stop_loss_percent: float, take_profit_percent: float):
+    """Stop loss and take profit at the bots' configured percentage distances"""
+    if direction == 'LONG':
+        return price * (1 - stop_loss_percent), price * (1 + take_profit_percent)
+    return price * (1 + stop_loss_percent), price * (1 - take_profit_percent)
+
+
+class BotStrategy(ABC):
+    """Feeds bars to a bot's incremental indicator engine and calls its generate_signal"""
+
+    def __init__(self, bot, symbol: str):
+        self.bot = bot
+        self.symbol = symbol
+        self.day = TrailingDay()
+
+    def indicators(self) -> Dict:
+        return self.bot.indicators.snapshot(self.symbol)
+
+    @abstractmethod
+    def market(self, t: int, close: float):
+        """The ForexPair / CryptoAsset the bot's generate_signal expects"""
+
+    def on_bar(self, t, open_, high, low, close, volume) -> Optional[Order]:
+        self.day.update(t, high, low, close, volume)
+        self.bot.indicators.update(self.symbol, close)
+        indicators = self.indicators()
+        if not indicators:
+            return None
+        signal = self.bot.generate_signal(self.symbol, self.market(t, close), indicators)
+        return signal_order(signal, self.bot.config)
+
+    def close(self):
+        self.bot.indicators.remove(self.symbol)
+
+
+class ForexBotStrategy(BotStrategy):
+    def market(self, t: int, close: float) -> ForexPair:
+        return ForexPair(
+            symbol=self.symbol,
+            base_currency=self.symbol[:3],
+            quote_currency=self.symbol[3:6],
+            current_rate=close,
+            previous_rate=self.day.previous_close,
+            change_percent=self.day.change_percent,
+            high_24h=self.day.high,
+            low_24h=self.day.low,
+            volume_24h=self.day.volume,
+            last_updated=pd.Timestamp(t).to_pydatetime()
+        )
+
+
+class CryptoBotStrategy(BotStrategy):
+    def __init__(self, bot, symbol: str, market_cap: float = DEFAULT_MARKET_CAP):
+        super().__init__(bot, symbol)
+        self.market_cap = market_cap
+
+    def indicators(self) -> Dict:
+        return self.bot.with_crypto_indicators(super().indicators())
+
+    def market(self, t: int, close: float) -> CryptoAsset:
+        return CryptoAsset(
+            symbol=self.symbol,
+            name=self.symbol,
+            current_price=close,
+            previous_price=self.day.previous_close,
+            change_percent=self.day.change_percent,
+            market_cap=self.market_cap,
+            volume_24h=self.day.volume,
+            high_24h=self.day.high,
+            low_24h=self.day.low,
+            circulating_supply=0.0,
+            last_updated=pd.Timestamp(t).to_pydatetime()
+        )
+
+
+def signal_order(signal, config: Dict) -> Optional[Order]:
+    """Turn a bot's buy/sell signal into an order at its configured SL/TP distances"""
+    if signal is None or signal.signal_type not in ('buy', 'sell'):
+        return None
+    direction = 'LONG' if signal.signal_type == 'buy' else 'SHORT'
+    stop_loss, take_profit = percent_levels(direction, signal.price, config['stop_loss_percent'],
+                                            config['take_profit_percent'])
+    return Order(direction, signal.price, stop_loss, take_profit, signal.confidence,
+                 [reason for reason in signal.reasoning.split('; ') if reason])
+
+
+class SMCStrategy:
+    """Runs perform_smc_analysis over a rolling window of the latest bars.
+
+    The analysis looks at the whole window each call, so ``every`` can thin it
+    out to one call per N bars on long minute-level replays.
+    """
+
+    def __init__(self, symbol: str, interval: str, window: int = SMC_WINDOW_BARS, every: int = 1):
+        from server import perform_smc_analysis
+        self.analyze = perform_smc_analysis
+        self.symbol = symbol
+        self.interval = interval
+        self.every = max(every, 1)
+        self.bars = deque(maxlen=window)
+        self.seen = 0
+
+    def on_bar(self, t, open_, high, low, close, volume) -> Optional[Order]:
+        self.bars.append((open_, high, low, close, volume))
+        self.seen += 1
+        if len(self.bars) < 100 or self.seen % self.every:
+            return None
+
+        data = pd.DataFrame(list(self.bars), columns=['open', 'high', 'low', 'close', 'volume'])
+        analysis = self.analyze(data, self.symbol, self.interval)
+        signal_type = analysis.get('signalType')
+        if signal_type not in ('BUY', 'SELL'):
+            return None
+
+        direction = 'LONG' if signal_type == 'BUY' else 'SHORT'
+        stop_loss, take_profit = analysis['stopLoss'], analysis['takeProfit']
+        if direction == 'LONG' and not stop_loss < close < take_profit:
+            return None
+        if direction == 'SHORT' and not take_profit < close < stop_loss:
+            return None
+        return Order(direction, close, stop_loss, take_profit, analysis['confidence'] / 100,
+                     list(analysis.get('confirmations', [])))
+
+    def close(self):
+        self.bars.clear()
+
+
+class TradeSimulator:
+    """One position at a time per symbol, filled against later bars' ranges.
+
+    A position opens at the close of its signal bar. On each following bar a
+    stop is checked before the target, so a bar that spans both counts as a
+    loss; bars that gap through a level fill at the open. Positions still open
+    after ``max_hold_bars`` (or at the end of the data) close at market and
+    count as won, lost or breakeven by the sign of their pnl.
+    """
+
+    def __init__(self, symbol: str, strategy: str, max_hold_bars: Optional[int] = None):
+        self.symbol = symbol
+        self.strategy = strategy
+        self.max_hold_bars = max_hold_bars
+        self.order: Optional[Order] = None
+        self.opened_at = None
+        self.bars_held = 0
+        self.trades: List[SignalResult] = []
+
+    @property
+    def in_trade(self) -> bool:
+        return self.order is not None
+
+    def open(self, order: Order, t: int):
+        self.order = order
+        self.opened_at = t
+        self.bars_held = 0
+
+    def on_bar(self, open_: float, high: float, low: float, close: float):
+        if self.order is None:
+            return
+        order = self.order
+        self.bars_held += 1
+        if order.direction == 'LONG':
+            if low <= order.stop_loss:
+                self._close(min(open_, order.stop_loss), 'lost')
+            elif high >= order.take_profit:
+                self._close(max(open_, order.take_profit), 'won')
+        else:
+            if high >= order.stop_loss:
+                self._close(max(open_, order.stop_loss), 'lost')
+            elif low <= order.take_profit:
+                self._close(min(open_, order.take_profit), 'won')
+
+        if self.order is not None and self.max_hold_bars and self.bars_held >= self.max_hold_bars:
+            self._close_at_market(close)
+
+    def finish(self, close: float):
+        if self.order is not None:
+            self._close_at_market(close)
+
+    def _close_at_market(self, close: float):
+        sign = 1 if self.order.direction == 'LONG' else -1
+        move = sign * (close - self.order.entry_price)
+        self._close(close, 'won' if move > 0 else 'lost' if move < 0 else 'breakeven')
+
+    def _close(self, exit_price: float, outcome: str):
+        order = self.order
+        sign = 1 if order.direction == 'LONG' else -1
+        self.trades.append(SignalResult(
+            signal_id=f"{self.strategy}-{self.symbol}-{len(self.trades):06d}",
+            pair=self.symbol,
+            direction=order.direction,
+            entry_price=order.entry_price,
+            stop_loss=order.stop_loss,
+            take_profit=order.take_profit,
+            confidence_score=order.confidence,
+            secondary_matches=order.confirmations,
+            secondary_count=len(order.confirmations),
+            assigned_milestone='M4',
+            outcome=outcome,
+            pnl=sign * (exit_price - order.entry_price) / order.entry_price * 100,  # percent return
+            timestamp=pd.Timestamp(self.opened_at).to_pydatetime()
+        ))
+        self.order = None
+
+
+# Bots are built once per worker process: each one opens a database and a monitoring thread
+_worker_bots: Dict[str, object] = {}
+
+
+def _worker_bot(strategy: str):
+    bot = _worker_bots.get(strategy)
+    if bot is None:
+        bot = ForexBotSystem(':memory:') if strategy == 'forex' else CryptoTradingBot(':memory:')
+        _worker_bots[strategy] = bot
+    return bot
+
+
+def make_strategy(strategy: str, symbol: str, interval: str, smc_every: int = 1):
+    if strategy == 'forex':
+        return ForexBotStrategy(_worker_bot('forex'), symbol)
+    if strategy == 'crypto':
+        return CryptoBotStrategy(_worker_bot('crypto'), symbol)
+    if strategy == 'smc':
+        return SMCStrategy(symbol, interval, every=smc_every)
+    raise ValueError(f"Unknown strategy: {strategy}")
+
+
+def backtest_symbol(symbol: str, strategy: str, source: BarSource, max_hold_bars: Optional[int] = None,
+                    smc_every: int = 1) -> List[SignalResult]:
+    """Replay one symbol bar by bar and return its closed trades"""
+    runner = make_strategy(strategy, symbol, source.interval, smc_every)
+    simulator = TradeSimulator(symbol, strategy, max_hold_bars)
+    last_close = None
+    try:
+        for chunk in source.chunks(symbol):
+            for t, open_, high, low, close, volume in chunk.tolist():
+                if close != close:  # NaN bar
+                    continue
+                volume = 0.0 if volume != volume else volume
+                simulator.on_bar(open_, high, low, close)
+                order = runner.on_bar(t, open_, high, low, close, volume)
+                if order is not None and not simulator.in_trade:
+                    simulator.open(order, t)
+                last_close = close
+        if last_close is not None:
+            simulator.finish(last_close)
+    finally:
+        runner.close()
+    return simulator.trades
+
+
+def run_backtest(symbols: List[str], strategy: str, source: BarSource, workers: int = 1,
+                 max_hold_bars: Optional[int] = None, smc_every: int = 1) -> List[SignalResult]:
+    """Backtest every symbol, sharding symbols across worker processes"""
+    trades: List[SignalResult] = []
+    if workers <= 1 or len(symbols) <= 1:
+        for symbol in symbols:
+            trades.extend(backtest_symbol(symbol, strategy, source, max_hold_bars, smc_every))
+        return trades
+
+    with ProcessPoolExecutor(max_workers=min(workers, len(symbols))) as pool:
+        futures = {
+            pool.submit(backtest_symbol, symbol, strategy, source, max_hold_bars, smc_every): symbol
+            for symbol in symbols
+        }
+        for future in as_completed(futures):
+            try:
+                trades.extend(future.result())
+            except Exception as e:
+                logger.error(f"Backtest of {futures[future]} failed: {e}")
+    return trades
+
+
+def print_report(results: Dict, trades: List[SignalResult], elapsed: float):
+    print(f"\n{len(trades)} trades in {elapsed:.1f}s "
+          f"({sum(t.outcome == 'won' for t in trades)} won, {sum(t.outcome == 'lost' for t in trades)} lost, "
+          f"{sum(t.outcome == 'breakeven' for t in trades)} breakeven)")
+    print(f"{'Milestone':<10} {'Trades':<8} {'Win Rate':<10} {'Target':<8} {'Total %':<10} "
+          f"{'Profit Factor':<14} {'Max DD':<8}")
+    print("-" * 72)
+    for milestone in MILESTONES:
+        r = results[milestone]
+        print(f"{milestone:<10} {r['total_signals']:<8} {r['win_rate']:<10.1%} {r['target_win_rate']:<8.1%} "
+              f"{r['total_pnl']:<+10.2f} {r['profit_factor']:<14.2f} {r['max_drawdown']:<8.1%}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Replay historical bars through the live signal generators')
+    parser.add_argument('--strategy', choices=STRATEGIES, default='forex',
+                        help='Signal generator to drive (default: forex)')
+    parser.add_argument('--symbols', nargs='*', help='Symbols to replay (default: all in the source)')
+    parser.add_argument('--interval', default='1h', help='Candle store interval (default: 1h)')
+    parser.add_argument('--store-dir', default=os.path.join('forex_data_service', 'instance', 'candles'),
+                        help='Candle store directory')
+    parser.add_argument('--csv-dir', help='Read <SYMBOL>.csv files from this directory instead of the store')
+    parser.add_argument('--start', help='First bar time (UTC)')
+    parser.add_argument('--end', help='Last bar time (UTC)')
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1,
+                        help='Processes to shard symbols across (default: CPU count)')
+    parser.add_argument('--max-hold-bars', type=int, help='Close positions at market after this many bars')
+    parser.add_argument('--smc-every', type=int, default=1, help='Run SMC analysis every N bars (default: 1)')
+    parser.add_argument('--output', help='Export milestone results and trades to this CSV file')
+    args = parser.parse_args()
+
+    source = BarSource(interval=args.interval, store_dir=args.store_dir, csv_dir=args.csv_dir,
+                       start=args.start, end=args.end)
+    symbols = args.symbols or source.symbols()
+    if not symbols:
+        print("No symbols to backtest")
+        return
+
+    print(f"Backtesting {len(symbols)} symbol(s) with the {args.strategy} strategy on {args.workers} worker(s)...")
+    started = time.perf_counter()
+    trades = run_backtest(symbols, args.strategy, source, args.workers, args.max_hold_bars, args.smc_every)
+    elapsed = time.perf_counter() - started
+
+    backtester = MilestoneBacktester()
+    results = backtester.calculate_milestone_performance(trades, MilestoneThresholds())
+    print_report(results, trades, elapsed)
+
+    if args.output:
+        backtester.export_results_to_csv(trades, results, args.output)
+
+
+if __name__ == '__main__':
+    main()
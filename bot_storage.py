@@ -0,0 +1,132 @@
+#!/usr/bin/env python3
+"""
+Bot Storage
+Shared SQLite access layer for the forex and crypto trading bots
+"""
+
+import queue
+import sqlite3
+import logging
+import threading
+from contextlib import contextmanager
+from typing import Iterable, List, Optional, Sequence
+
+logger = logging.getLogger(__name__)
+
+
+class BotStorage:
+    """A bounded pool of SQLite connections in WAL mode.
+
+    Each call borrows a long-lived connection and hands it back when done, so
+    the monitoring loop and any number of request threads share at most
+    ``max_connections`` open connections instead of one per thread. WAL lets
+    readers run while the ingest path writes, and SQLite's per-connection
+    statement cache means the fixed SQL strings below are prepared once.
+    """
+
+    def __init__(self, db_path: str, max_connections: int = 8, busy_timeout_ms: int = 5000,
+                 cached_statements: int = 256):
+        self.db_path = db_path
+        self.max_connections = max_connections
+        self.busy_timeout_ms = busy_timeout_ms
+        self.cached_statements = cached_statements
+        self._idle: queue.LifoQueue = queue.LifoQueue()
+        self._connections: List[sqlite3.Connection] = []
+        self._connections_lock = threading.Lock()
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(
+            self.db_path,
+            timeout=self.busy_timeout_ms / 1000,
+            check_same_thread=False,
+            cached_statements=self.cached_statements
+        )
+        conn.execute('PRAGMA journal_mode=WAL')
+        conn.execute('PRAGMA synchronous=NORMAL')
+        conn.execute(f'PRAGMA busy_timeout={int(self.busy_timeout_ms)}')
+        return conn
+
+    def _checkout(self) -> sqlite3.Connection:
+        """An idle connection, a new one while under max_connections, or the next one released"""
+        try:
+            return self._idle.get_nowait()
+        except queue.Empty:
+            pass
+        with self._connections_lock:
+            if len(self._connections) < self.max_connections:
+                conn = self._connect()
+                self._connections.append(conn)
+                return conn
+        try:
+            return self._idle.get(timeout=self.busy_timeout_ms / 1000)
+        except queue.Empty:
+            raise sqlite3.OperationalError(f'No pooled connection to {self.db_path} became available')
+
+    def _release(self, conn: sqlite3.Connection):
+        """Return a connection, rolling back anything its borrower left uncommitted"""
+        try:
+            if conn.in_transaction:
+                conn.rollback()
+        except sqlite3.Error as e:
+            logger.warning(f"Discarding broken connection to {self.db_path}: {e}")
+            with self._connections_lock:
+                if conn in self._connections:
+                    self._connections.remove(conn)
+            return
+        self._idle.put(conn)
+
+    @contextmanager
+    def connection(self):
+        """Borrow a connection for the duration of a block"""
+        conn = self._checkout()
+        try:
+            yield conn
+        finally:
+            self._release(conn)
+
+    @property
+    def open_connections(self) -> int:
+        with self._connections_lock:
+            return len(self._connections)
+
+    @contextmanager
+    def transaction(self):
+        """Run a block in one transaction, committing on success"""
+        with self.connection() as conn:
+            try:
+                yield conn
+                conn.commit()
+            except Exception:
+                conn.rollback()
+                raise
+
+    def execute(self, sql: str, params: Sequence = ()):
+        with self.transaction() as conn:
+            return conn.execute(sql, params)
+
+    def executemany(self, sql: str, rows: Iterable[Sequence]):
+        with self.transaction() as conn:
+            conn.executemany(sql, rows)
+
+    def executescript(self, script: str):
+        with self.transaction() as conn:
+            conn.executescript(script)
+
+    def fetchall(self, sql: str, params: Sequence = ()) -> list:
+        with self.connection() as conn:
+            return conn.execute(sql, params).fetchall()
+
+    def fetchone(self, sql: str, params: Sequence = ()) -> Optional[tuple]:
+        with self.connection() as conn:
+            return conn.execute(sql, params).fetchone()
+
+    def close(self):
+        """Close every connection opened through this storage"""
+        with self._connections_lock:
+            for conn in self._connections:
+                try:
+                    conn.close()
+                except sqlite3.Error as e:
+                    logger.warning(f"Error closing connection to {self.db_path}: {e}")
+            self._connections = []
+        self._idle = queue.LifoQueue()
@@ -10,16 +10,20 @@ import logging
 import threading
 import time
 from datetime import datetime, timedelta
-from typing import Dict, List, Optional, Tuple
+from typing import Dict, List, Optional
 import requests
-import sqlite3
-import numpy as np
 from dataclasses import dataclass
 
+from bot_storage import BotStorage
+from indicator_engine import IndicatorEngine
+
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Volatility is measured over the last 100 prices (99 returns)
+INDICATOR_OPTIONS = {'sma_periods': (20, 50, 200), 'volatility_window': 99}
+
 @dataclass
 class CryptoAsset:
     """Cryptocurrency asset data structure"""
@@ -62,14 +66,19 @@ class CryptoTradingBot:
             'max_position_size': 0.1,  # 10% of portfolio
             'volatility_threshold': 0.03  # 3% daily volatility
         }
+        self.indicators = IndicatorEngine(**INDICATOR_OPTIONS)
+        self.storage = BotStorage(db_path)
         self.init_database()
         self.start_monitoring()
     
     def init_database(self):
         """Initialize database for crypto data and signals"""
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        
+        with self.storage.transaction() as conn:
+            self._create_tables(conn.cursor())
+        logger.info("Crypto trading bot database initialized")
+    
+    def _create_tables(self, cursor):
+        """Create tables and indexes if they don't exist"""
         # Create crypto assets table
         cursor.execute('''
             CREATE TABLE IF NOT EXISTS crypto_assets (
@@ -128,36 +137,44 @@ class CryptoTradingBot:
             )
         ''')
         
-        conn.commit()
-        conn.close()
-        logger.info("Crypto trading bot database initialized")
+        # Covering index for the latest-prices-per-symbol lookup
+        cursor.execute('''
+            CREATE INDEX IF NOT EXISTS idx_crypto_price_history_symbol_timestamp
+            ON crypto_price_history (symbol, timestamp, price)
+        ''')
     
     def add_crypto_asset(self, asset: CryptoAsset):
         """Add or update a cryptocurrency asset"""
-        self.crypto_assets[asset.symbol] = asset
+        self.add_crypto_assets([asset])
+    
+    def add_crypto_assets(self, assets: List[CryptoAsset]):
+        """Add or update several cryptocurrency assets in a single transaction"""
+        for asset in assets:
+            self.crypto_assets[asset.symbol] = asset
+            self.indicators.update(
+                asset.symbol, asset.current_price,
+                history_loader=lambda symbol=asset.symbol: self.get_price_history(
+                    symbol, limit=self.indicators.history_size)
+            )
         
         # Save to database
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        
-        cursor.execute('''
-            INSERT OR REPLACE INTO crypto_assets 
-            (symbol, name, current_price, previous_price, change_percent, 
-             market_cap, volume_24h, high_24h, low_24h, circulating_supply, last_updated)
-            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-        ''', (asset.symbol, asset.name, asset.current_price, asset.previous_price,
-              asset.change_percent, asset.market_cap, asset.volume_24h,
-              asset.high_24h, asset.low_24h, asset.circulating_supply,
-              asset.last_updated.isoformat()))
-        
-        # Add to price history
-        cursor.execute('''
-            INSERT INTO crypto_price_history (symbol, price, volume, timestamp)
-            VALUES (?, ?, ?, ?)
-        ''', (asset.symbol, asset.current_price, asset.volume_24h, asset.last_updated.isoformat()))
-        
-        conn.commit()
-        conn.close()
+        with self.storage.transaction() as conn:
+            conn.executemany('''
+                INSERT OR REPLACE INTO crypto_assets 
+                (symbol, name, current_price, previous_price, change_percent, 
+                 market_cap, volume_24h, high_24h, low_24h, circulating_supply, last_updated)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+            ''', [(asset.symbol, asset.name, asset.current_price, asset.previous_price,
+                   asset.change_percent, asset.market_cap, asset.volume_24h,
+                   asset.high_24h, asset.low_24h, asset.circulating_supply,
+                   asset.last_updated.isoformat()) for asset in assets])
+            
+            # Add to price history
+            conn.executemany('''
+                INSERT INTO crypto_price_history (symbol, price, volume, timestamp)
+                VALUES (?, ?, ?, ?)
+            ''', [(asset.symbol, asset.current_price, asset.volume_24h, asset.last_updated.isoformat())
+                  for asset in assets])
     
     def get_crypto_asset(self, symbol: str) -> Optional[CryptoAsset]:
         """Get crypto asset by symbol"""
@@ -173,14 +190,11 @@ class CryptoTradingBot:
         if not asset:
             return None
         
-        # Get price history for analysis
-        prices = self.get_price_history(symbol, limit=100)
-        if len(prices) < 20:
+        # Technical indicators are maintained incrementally as prices arrive
+        indicators = self.with_crypto_indicators(self.indicators.snapshot(symbol))
+        if not indicators:
             return None
         
-        # Calculate technical indicators
-        indicators = self.calculate_indicators(prices)
-        
         # Generate signal based on indicators
         signal = self.generate_signal(symbol, asset, indicators)
         
@@ -190,100 +204,11 @@ class CryptoTradingBot:
         
         return None
     
-    def calculate_indicators(self, prices: List[float]) -> Dict:
-        """Calculate technical indicators from price data"""
-        if len(prices) < 20:
-            return {}
-        
-        prices_array = np.array(prices)
-        
-        # Simple Moving Averages
-        sma_20 = np.mean(prices_array[-20:])
-        sma_50 = np.mean(prices_array[-50:]) if len(prices) >= 50 else sma_20
-        sma_200 = np.mean(prices_array[-200:]) if len(prices) >= 200 else sma_50
-        
-        # Exponential Moving Averages
-        ema_12 = self.calculate_ema(prices_array, 12)
-        ema_26 = self.calculate_ema(prices_array, 26)
-        
-        # RSI
-        rsi = self.calculate_rsi(prices_array)
-        
-        # MACD
-        macd_line = ema_12 - ema_26
-        signal_line = self.calculate_ema(np.array([macd_line]), 9)[0] if len(prices) >= 35 else 0
-        
-        # Bollinger Bands
-        bb_upper, bb_lower = self.calculate_bollinger_bands(prices_array, 20)
-        
-        # Volume analysis
-        volume_sma = np.mean(prices_array[-20:]) if len(prices) >= 20 else prices_array[-1]
-        
-        # Volatility calculation
-        returns = np.diff(np.log(prices_array))
-        volatility = np.std(returns) * np.sqrt(252)  # Annualized volatility
-        
-        return {
-            'sma_20': float(sma_20),
-            'sma_50': float(sma_50),
-            'sma_200': float(sma_200),
-            'ema_12': float(ema_12),
-            'ema_26': float(ema_26),
-            'rsi': float(rsi),
-            'macd': float(macd_line),
-            'macd_signal': float(signal_line),
-            'bb_upper': float(bb_upper),
-            'bb_lower': float(bb_lower),
-            'current_price': float(prices[-1]),
-            'volume_sma': float(volume_sma),
-            'volatility': float(volatility)
-        }
-    
-    def calculate_ema(self, prices: np.ndarray, period: int) -> float:
-        """Calculate Exponential Moving Average"""
-        if len(prices) < period:
-            return float(prices[-1])
-        
-        alpha = 2 / (period + 1)
-        ema = prices[0]
-        
-        for price in prices[1:]:
-            ema = alpha * price + (1 - alpha) * ema
-        
-        return ema
-    
-    def calculate_rsi(self, prices: np.ndarray, period: int = 14) -> float:
-        """Calculate Relative Strength Index"""
-        if len(prices) < period + 1:
-            return 50.0
-        
-        deltas = np.diff(prices)
-        gains = np.where(deltas > 0, deltas, 0)
-        losses = np.where(deltas < 0, -deltas, 0)
-        
-        avg_gain = np.mean(gains[-period:])
-        avg_loss = np.mean(losses[-period:])
-        
-        if avg_loss == 0:
-            return 100.0
-        
-        rs = avg_gain / avg_loss
-        rsi = 100 - (100 / (1 + rs))
-        
-        return rsi
-    
-    def calculate_bollinger_bands(self, prices: np.ndarray, period: int = 20) -> Tuple[float, float]:
-        """Calculate Bollinger Bands"""
-        if len(prices) < period:
-            return prices[-1], prices[-1]
-        
-        sma = np.mean(prices[-period:])
-        std = np.std(prices[-period:])
-        
-        upper_band = sma + (2 * std)
-        lower_band = sma - (2 * std)
-        
-        return upper_band, lower_band
+    def with_crypto_indicators(self, indicators: Dict) -> Dict:
+        """Add the crypto-specific fields to an indicator snapshot"""
+        if indicators:
+            indicators['volume_sma'] = indicators['sma_20']
+        return indicators
     
     def generate_signal(self, symbol: str, asset: CryptoAsset, indicators: Dict) -> Optional[CryptoSignal]:
         """Generate trading signal based on indicators"""
@@ -316,9 +241,10 @@ class CryptoTradingBot:
         
         # Moving average analysis
         current_price = indicators.get('current_price', asset.current_price)
+        # Longer SMAs stand in for each other the way the indicator engine does until their window fills
         sma_20 = indicators.get('sma_20', current_price)
-        sma_50 = indicators.get('sma_50', current_price)
-        sma_200 = indicators.get('sma_200', current_price)
+        sma_50 = indicators.get('sma_50', sma_20)
+        sma_200 = indicators.get('sma_200', sma_50)
         
         # Golden Cross (SMA 20 > SMA 50)
         if sma_20 > sma_50 and signal_type == 'buy':
@@ -404,19 +330,13 @@ class CryptoTradingBot:
         self.signals.append(signal)
         
         # Save to database
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        
-        cursor.execute('''
+        self.storage.execute('''
             INSERT INTO crypto_signals 
             (symbol, signal_type, confidence, price, indicators, reasoning, risk_level)
             VALUES (?, ?, ?, ?, ?, ?, ?)
         ''', (signal.symbol, signal.signal_type, signal.confidence, signal.price,
               json.dumps(signal.indicators), signal.reasoning, signal.risk_level))
         
-        conn.commit()
-        conn.close()
-        
         logger.info(f"New crypto signal: {signal.signal_type.upper()} {signal.symbol} "
                    f"(confidence: {signal.confidence:.2f}, risk: {signal.risk_level})")
     
@@ -426,18 +346,14 @@ class CryptoTradingBot:
     
     def get_price_history(self, symbol: str, limit: int = 100) -> List[float]:
         """Get price history for a symbol"""
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        
-        cursor.execute('''
+        rows = self.storage.fetchall('''
             SELECT price FROM crypto_price_history 
             WHERE symbol = ? 
             ORDER BY timestamp DESC 
             LIMIT ?
         ''', (symbol, limit))
         
-        prices = [row[0] for row in cursor.fetchall()]
-        conn.close()
+        prices = [row[0] for row in rows]
         
         return prices[::-1]  # Return in chronological order
     
@@ -461,6 +377,7 @@ class CryptoTradingBot:
     
     def update_crypto_data(self, crypto_data: List[Dict]):
         """Update crypto data from external source"""
+        assets = []
         for data in crypto_data:
             try:
                 asset = CryptoAsset(
@@ -478,10 +395,16 @@ class CryptoTradingBot:
                 )
                 
                 if asset.symbol:
-                    self.add_crypto_asset(asset)
+                    assets.append(asset)
                     
             except Exception as e:
                 logger.error(f"Error processing crypto data: {e}")
+        
+        if assets:
+            try:
+                self.add_crypto_assets(assets)
+            except Exception as e:
+                logger.error(f"Error saving crypto data: {e}")
     
     def get_system_status(self) -> Dict:
         """Get system status"""
@@ -496,10 +419,7 @@ class CryptoTradingBot:
     
     def get_portfolio_summary(self) -> Dict:
         """Get portfolio summary"""
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        
-        cursor.execute('''
+        rows = self.storage.fetchall('''
             SELECT symbol, quantity, avg_price, current_value, pnl
             FROM crypto_portfolio
         ''')
@@ -508,7 +428,7 @@ class CryptoTradingBot:
         total_value = 0
         total_pnl = 0
         
-        for row in cursor.fetchall():
+        for row in rows:
             symbol, quantity, avg_price, current_value, pnl = row
             portfolio.append({
                 'symbol': symbol,
@@ -520,8 +440,6 @@ class CryptoTradingBot:
             total_value += current_value or 0
             total_pnl += pnl or 0
         
-        conn.close()
-        
         return {
             'portfolio': portfolio,
             'total_value': total_value,
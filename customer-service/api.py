@@ -1,4 +1,4 @@
-from flask import Flask, request, jsonify, send_from_directory
+from flask import Flask, request, jsonify, send_from_directory, g
 from flask_cors import CORS
 import sqlite3
 import json
@@ -8,12 +8,26 @@ from datetime import datetime
 import uuid
 import hashlib
 import re
+import sys
+
+from db_pool import ConnectionPool, AuditWriteQueue
+from customer_search import CustomerSearch
+from customer_profiles import CustomerProfiles, fetch_child_page, CHILD_MAX_PER_PAGE
+from dashboard_stats import DashboardStats
+
+# Shared instrumentation lives at the repository root
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from request_instrumentation import RequestInstrumentation, install_queue_logging
 
 app = Flask(__name__)
 CORS(app)
 
+# Per-route latency histograms and pool checkout timings, served at /metrics
+instrumentation = RequestInstrumentation(app, service='customer-service')
+
 # Configure logging
 logging.basicConfig(level=logging.INFO)
+install_queue_logging()
 logger = logging.getLogger(__name__)
 
 # ============================================
@@ -23,8 +37,9 @@ logger = logging.getLogger(__name__)
 class UserRegistrationService:
     """Enhanced user registration with email normalization and audit trails"""
     
-    def __init__(self, db_connection):
+    def __init__(self, db_connection, audit_writer=None):
         self.db = db_connection
+        self.audit_writer = audit_writer
     
     def normalize_email(self, email):
         """Normalize email to prevent duplicates (Gmail dot removal, etc.)"""
@@ -81,11 +96,11 @@ class UserRegistrationService:
                   user_data.get('account_type', 'Unknown'), user_data.get('prop_firm', 'Unknown'),
                   user_data.get('account_size', 0)))
             
-            # Log the registration
-            self.audit_log('customers', user_id, 'CREATE', None, {'email': email, 'unique_id': unique_id})
-            
             self.db.commit()
             
+            # Log the registration once it is committed
+            self.audit_log('customers', user_id, 'CREATE', None, {'email': email, 'unique_id': unique_id})
+            
             return {
                 'success': True,
                 'user_id': user_id,
@@ -102,17 +117,21 @@ class UserRegistrationService:
             }
     
     def audit_log(self, table_name, user_id, action, old_data, new_data):
-        """Log all changes for audit trail"""
+        """Log all changes for audit trail, through the audit writer when one is configured"""
         try:
-            cursor = self.db.cursor()
-            cursor.execute('''
+            sql = '''
                 INSERT INTO audit_log (table_name, user_id, action, old_data, new_data, timestamp)
                 VALUES (?, ?, ?, ?, ?, ?)
-            ''', (table_name, user_id, action, 
-                  json.dumps(old_data) if old_data else None,
-                  json.dumps(new_data) if new_data else None,
-                  datetime.now().isoformat()))
-            self.db.commit()
+            '''
+            params = (table_name, user_id, action, 
+                      json.dumps(old_data) if old_data else None,
+                      json.dumps(new_data) if new_data else None,
+                      datetime.now().isoformat())
+            if self.audit_writer is not None:
+                self.audit_writer.submit(sql, params)
+            else:
+                self.db.execute(sql, params)
+                self.db.commit()
         except Exception as e:
             logger.error(f"Audit log error: {e}")
 
@@ -459,16 +478,14 @@ class SecureDatabaseDashboard:
 class AuditTrailService:
     """Service for comprehensive audit logging and permanent data storage"""
     
-    def __init__(self, db_path):
-        self.db_path = db_path
+    def __init__(self, pool, writer):
+        self.pool = pool
+        self.writer = writer
     
     def log_action(self, table_name, record_id, action, old_data=None, new_data=None, user_id=None, ip_address=None, user_agent=None, details=None):
-        """Log any action to the audit trail"""
+        """Queue an action for the audit trail; it is committed with the writer's next batch"""
         try:
-            conn = sqlite3.connect(self.db_path)
-            cursor = conn.cursor()
-            
-            cursor.execute('''
+            self.writer.submit('''
                 INSERT INTO audit_logs (table_name, record_id, action, user_id, old_data, new_data, ip_address, user_agent, details)
                 VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
             ''', (
@@ -482,21 +499,15 @@ class AuditTrailService:
                 user_agent,
                 json.dumps(details) if details else None
             ))
-            
-            conn.commit()
-            conn.close()
             return True
         except Exception as e:
             logger.error(f"Error logging audit action: {e}")
             return False
     
     def log_user_change(self, user_id, action, field_name=None, old_value=None, new_value=None, ip_address=None, user_agent=None):
-        """Log user-specific changes to the audit trail"""
+        """Queue a user-specific change for the audit trail"""
         try:
-            conn = sqlite3.connect(self.db_path)
-            cursor = conn.cursor()
-            
-            cursor.execute('''
+            self.writer.submit('''
                 INSERT INTO user_audit_trail (user_id, action, field_name, old_value, new_value, ip_address, user_agent)
                 VALUES (?, ?, ?, ?, ?, ?, ?)
             ''', (
@@ -508,24 +519,18 @@ class AuditTrailService:
                 ip_address,
                 user_agent
             ))
-            
-            conn.commit()
-            conn.close()
             return True
         except Exception as e:
             logger.error(f"Error logging user change: {e}")
             return False
     
     def create_permanent_record(self, user_data):
-        """Create a permanent record that can never be deleted"""
+        """Queue a permanent record that can never be deleted"""
         try:
-            conn = sqlite3.connect(self.db_path)
-            cursor = conn.cursor()
-            
             # Create hash of email for uniqueness
             email_hash = hashlib.sha256(user_data['email'].encode()).hexdigest()
             
-            cursor.execute('''
+            self.writer.submit('''
                 INSERT INTO permanent_user_records (original_user_id, email, email_hash, name, membership_tier, join_date, status)
                 VALUES (?, ?, ?, ?, ?, ?, ?)
             ''', (
@@ -537,9 +542,6 @@ class AuditTrailService:
                 user_data['join_date'],
                 user_data['status']
             ))
-            
-            conn.commit()
-            conn.close()
             return True
         except Exception as e:
             logger.error(f"Error creating permanent record: {e}")
@@ -548,9 +550,6 @@ class AuditTrailService:
     def get_audit_logs(self, table_name=None, record_id=None, limit=100):
         """Retrieve audit logs with optional filtering"""
         try:
-            conn = sqlite3.connect(self.db_path)
-            cursor = conn.cursor()
-            
             query = "SELECT * FROM audit_logs WHERE 1=1"
             params = []
             
@@ -565,11 +564,10 @@ class AuditTrailService:
             query += " ORDER BY timestamp DESC LIMIT ?"
             params.append(limit)
             
-            cursor.execute(query, params)
-            logs = cursor.fetchall()
-            conn.close()
-            
-            return logs
+            # Make entries queued by earlier requests visible
+            self.writer.flush()
+            with self.pool.connection() as conn:
+                return conn.execute(query, params).fetchall()
         except Exception as e:
             logger.error(f"Error retrieving audit logs: {e}")
             return []
@@ -577,20 +575,14 @@ class AuditTrailService:
     def get_user_audit_trail(self, user_id, limit=50):
         """Retrieve audit trail for a specific user"""
         try:
-            conn = sqlite3.connect(self.db_path)
-            cursor = conn.cursor()
-            
-            cursor.execute('''
-                SELECT * FROM user_audit_trail 
-                WHERE user_id = ? 
-                ORDER BY timestamp DESC 
-                LIMIT ?
-            ''', (user_id, limit))
-            
-            trail = cursor.fetchall()
-            conn.close()
-            
-            return trail
+            self.writer.flush()
+            with self.pool.connection() as conn:
+                return conn.execute('''
+                    SELECT * FROM user_audit_trail 
+                    WHERE user_id = ? 
+                    ORDER BY timestamp DESC 
+                    LIMIT ?
+                ''', (user_id, limit)).fetchall()
         except Exception as e:
             logger.error(f"Error retrieving user audit trail: {e}")
             return []
@@ -602,6 +594,35 @@ class AuditTrailService:
 # Database setup
 DATABASE_PATH = 'customer_service.db'
 
+# Pooled connections (one checked out per request via get_db) and the batching audit writer;
+# AUDIT_FSYNC=batch syncs every audit commit to disk, =checkpoint leaves it to WAL checkpoints
+db_pool = ConnectionPool(DATABASE_PATH, max_size=int(os.environ.get('DB_POOL_SIZE', 16)))
+audit_writer = AuditWriteQueue(db_pool, fsync=os.environ.get('AUDIT_FSYNC', 'batch'))
+
+def get_db():
+    """The current request's pooled connection, checked out on first use"""
+    if 'db' not in g:
+        with instrumentation.upstream('sqlite', 'checkout'):
+            g.db = db_pool.checkout()
+    return g.db
+
+@app.teardown_appcontext
+def release_db(exception):
+    """Return the request's connection to the pool, rolling back anything left uncommitted"""
+    conn = g.pop('db', None)
+    if conn is not None:
+        db_pool.release(conn)
+
+# Customer listing and search (FTS5 trigram index + keyset pagination)
+CUSTOMERS_MAX_PER_PAGE = 200
+customer_search = CustomerSearch()
+
+# Materialized customer detail snapshots, patched by the write endpoints
+customer_profiles = CustomerProfiles()
+
+# Trigger-maintained counters for the dashboard stats and compliance report
+dashboard_stats = DashboardStats()
+
 def init_enhanced_database():
     """Initialize enhanced database with new tables"""
     conn = sqlite3.connect(DATABASE_PATH)
@@ -769,7 +790,7 @@ customer_sync_service = CustomerDataSyncService(sqlite3.connect(DATABASE_PATH))
 signal_service = SignalPropagationService(sqlite3.connect(DATABASE_PATH))
 bot_manager = BotStateManager(sqlite3.connect(DATABASE_PATH))
 dashboard_service = SecureDatabaseDashboard()
-audit_service = AuditTrailService(DATABASE_PATH)
+audit_service = AuditTrailService(db_pool, audit_writer)
 
 def init_database():
     """Initialize the customer service database"""
@@ -859,6 +880,11 @@ def init_database():
     ''')
     
     conn.commit()
+    
+    # Search index over customers, kept in sync by triggers
+    customer_search.init_index(conn)
+    customer_profiles.init_schema(conn)
+    dashboard_stats.init_schema(conn)
     conn.close()
 
 def create_sample_data():
@@ -936,10 +962,9 @@ def enhanced_user_registration():
             return jsonify({'error': 'Email and password are required'}), 400
         
         # Use the enhanced registration service
-        conn = sqlite3.connect(DATABASE_PATH)
-        user_service = UserRegistrationService(conn)
+        conn = get_db()
+        user_service = UserRegistrationService(conn, audit_writer)
         result = user_service.register_user(email, password, user_data)
-        conn.close()
         
         if result['success']:
             return jsonify({
@@ -965,10 +990,9 @@ def sync_customer_data(customer_id):
     try:
         data = request.get_json()
         
-        conn = sqlite3.connect(DATABASE_PATH)
+        conn = get_db()
         sync_service = CustomerDataSyncService(conn)
         result = sync_service.sync_questionnaire_data(customer_id, data)
-        conn.close()
         
         if result['success']:
             return jsonify({
@@ -990,10 +1014,9 @@ def sync_customer_data(customer_id):
 def get_comprehensive_customer_data(customer_id):
     """Get comprehensive customer data from all tables"""
     try:
-        conn = sqlite3.connect(DATABASE_PATH)
+        conn = get_db()
         sync_service = CustomerDataSyncService(conn)
         data = sync_service.get_accurate_user_data(customer_id)
-        conn.close()
         
         if data:
             return jsonify({
@@ -1013,10 +1036,9 @@ def create_trading_signal():
     try:
         data = request.get_json()
         
-        conn = sqlite3.connect(DATABASE_PATH)
+        conn = get_db()
         signal_service = SignalPropagationService(conn)
         signal = signal_service.propagate_signal_to_users(data)
-        conn.close()
         
         if signal:
             return jsonify({
@@ -1037,10 +1059,9 @@ def get_trading_signals():
     try:
         filters = request.args.to_dict()
         
-        conn = sqlite3.connect(DATABASE_PATH)
+        conn = get_db()
         signal_service = SignalPropagationService(conn)
         signals = signal_service.get_user_signals(filters)
-        conn.close()
         
         return jsonify({
             'success': True,
@@ -1059,10 +1080,9 @@ def toggle_bot_status(bot_type):
         data = request.get_json()
         is_active = data.get('active', False)
         
-        conn = sqlite3.connect(DATABASE_PATH)
+        conn = get_db()
         bot_manager = BotStateManager(conn)
         result = bot_manager.toggle_bot_status(bot_type, is_active)
-        conn.close()
         
         if result:
             return jsonify({
@@ -1082,10 +1102,9 @@ def toggle_bot_status(bot_type):
 def get_bot_status(bot_type):
     """Get current bot status"""
     try:
-        conn = sqlite3.connect(DATABASE_PATH)
+        conn = get_db()
         bot_manager = BotStateManager(conn)
         status = bot_manager.check_bot_status(bot_type)
-        conn.close()
         
         return jsonify({
             'success': True,
@@ -1108,12 +1127,11 @@ def get_secure_trading_data():
         if not pin:
             return jsonify({'error': 'PIN is required'}), 400
         
-        conn = sqlite3.connect(DATABASE_PATH)
+        conn = get_db()
         dashboard_service = SecureDatabaseDashboard()
         
         try:
             trading_data = dashboard_service.get_trading_data(pin, conn, filters)
-            conn.close()
             
             return jsonify({
                 'success': True,
@@ -1122,7 +1140,6 @@ def get_secure_trading_data():
             }), 200
             
         except Exception as auth_error:
-            conn.close()
             if 'Invalid PIN' in str(auth_error):
                 return jsonify({'error': 'Invalid PIN'}), 401
             else:
@@ -1146,18 +1163,16 @@ def store_bot_trading_data():
         if not pin:
             return jsonify({'error': 'PIN is required'}), 400
         
-        conn = sqlite3.connect(DATABASE_PATH)
+        conn = get_db()
         dashboard_service = SecureDatabaseDashboard()
         
         try:
             # Authenticate PIN first
             if not dashboard_service.authenticate_pin(pin):
-                conn.close()
                 return jsonify({'error': 'Invalid PIN'}), 401
             
             # Store the data
             result = dashboard_service.store_bot_data(conn, bot_type, pair, ohlcv, indicators)
-            conn.close()
             
             if result:
                 return jsonify({
@@ -1168,7 +1183,6 @@ def store_bot_trading_data():
                 return jsonify({'error': 'Failed to store bot data'}), 500
                 
         except Exception as auth_error:
-            conn.close()
             raise auth_error
                 
     except Exception as e:
@@ -1185,7 +1199,8 @@ def get_audit_log():
         action = request.args.get('action')
         limit = min(int(request.args.get('limit', 100)), 1000)  # Max 1000 records
         
-        conn = sqlite3.connect(DATABASE_PATH)
+        audit_writer.flush()
+        conn = get_db()
         cursor = conn.cursor()
         
         # Build query with filters
@@ -1208,7 +1223,6 @@ def get_audit_log():
         params.append(limit)
         
         audit_records = cursor.execute(query, params).fetchall()
-        conn.close()
         
         # Format the response
         formatted_records = []
@@ -1243,19 +1257,17 @@ def validate_email_uniqueness():
         if not email:
             return jsonify({'error': 'Email is required'}), 400
         
-        conn = sqlite3.connect(DATABASE_PATH)
-        user_service = UserRegistrationService(conn)
+        conn = get_db()
+        user_service = UserRegistrationService(conn, audit_writer)
         normalized_email = user_service.normalize_email(email)
-        conn.close()
         
         # Check if normalized email already exists
-        conn = sqlite3.connect(DATABASE_PATH)
+        conn = get_db()
         cursor = conn.cursor()
         existing_user = cursor.execute(
             'SELECT id, email FROM customers WHERE email = ? OR email = ? LIMIT 1',
             (normalized_email, email)
         ).fetchone()
-        conn.close()
         
         if existing_user:
             return jsonify({
@@ -1284,7 +1296,7 @@ def validate_email_uniqueness():
 def get_tickets():
     """Get all support tickets"""
     try:
-        conn = sqlite3.connect(DATABASE_PATH)
+        conn = get_db()
         cursor = conn.cursor()
         
         # Get tickets with customer information
@@ -1307,7 +1319,6 @@ def get_tickets():
         ''')
         
         tickets = cursor.fetchall()
-        conn.close()
         
         # Format tickets
         formatted_tickets = []
@@ -1345,7 +1356,7 @@ def create_ticket():
         if not data or not data.get('customer_id') or not data.get('subject'):
             return jsonify({'error': 'Customer ID and subject are required'}), 400
         
-        conn = sqlite3.connect(DATABASE_PATH)
+        conn = get_db()
         cursor = conn.cursor()
         
         cursor.execute('''
@@ -1362,7 +1373,6 @@ def create_ticket():
         
         ticket_id = cursor.lastrowid
         conn.commit()
-        conn.close()
         
         return jsonify({
             'success': True,
@@ -1380,7 +1390,7 @@ def update_ticket(ticket_id):
     try:
         data = request.get_json()
         
-        conn = sqlite3.connect(DATABASE_PATH)
+        conn = get_db()
         cursor = conn.cursor()
         
         # Build update query dynamically
@@ -1402,11 +1412,9 @@ def update_ticket(ticket_id):
         cursor.execute(query, params)
         
         if cursor.rowcount == 0:
-            conn.close()
             return jsonify({'error': 'Ticket not found'}), 404
         
         conn.commit()
-        conn.close()
         
         return jsonify({
             'success': True,
@@ -1421,7 +1429,7 @@ def update_ticket(ticket_id):
 def get_notifications():
     """Get system notifications"""
     try:
-        conn = sqlite3.connect(DATABASE_PATH)
+        conn = get_db()
         cursor = conn.cursor()
         
         # Get recent system events as notifications
@@ -1449,7 +1457,6 @@ def get_notifications():
         ''')
         
         notifications = cursor.fetchall()
-        conn.close()
         
         # Format notifications
         formatted_notifications = []
@@ -1477,36 +1484,21 @@ def get_notifications():
 def get_dashboard_stats():
     """Get comprehensive dashboard statistics"""
     try:
-        conn = sqlite3.connect(DATABASE_PATH)
-        cursor = conn.cursor()
-        
-        # Get customer stats
-        cursor.execute('SELECT COUNT(*) FROM customers')
-        total_customers = cursor.fetchone()[0]
-        
-        cursor.execute('SELECT COUNT(*) FROM customers WHERE created_at > datetime("now", "-1 day")')
-        new_customers_today = cursor.fetchone()[0]
-        
-        # Get ticket stats
-        cursor.execute('SELECT COUNT(*) FROM tickets WHERE status = "open"')
-        open_tickets = cursor.fetchone()[0]
-        
-        cursor.execute('SELECT COUNT(*) FROM tickets WHERE status = "resolved" AND updated_at > datetime("now", "-1 day")')
-        resolved_tickets_today = cursor.fetchone()[0]
+        # Customer and ticket counts come from the precomputed counters
+        counts = dashboard_stats.dashboard(get_db())
         
         # Get chat stats (simulated)
-        active_chats = min(3, total_customers)  # Simulate active chats
+        active_chats = min(3, counts['total_customers'])  # Simulate active chats
         
-        conn.close()
         
         stats = {
-            'totalCustomers': total_customers,
+            'totalCustomers': counts['total_customers'],
             'activeChats': active_chats,
-            'openTickets': open_tickets,
+            'openTickets': counts['open_tickets'],
             'avgResponseTime': '2m 30s',
             'satisfactionScore': 94,
-            'newCustomersToday': new_customers_today,
-            'resolvedTicketsToday': resolved_tickets_today
+            'newCustomersToday': counts['new_customers_today'],
+            'resolvedTicketsToday': counts['resolved_tickets_today']
         }
         
         return jsonify({
@@ -1526,11 +1518,10 @@ def get_dashboard_stats():
 def health_check():
     """Health check endpoint"""
     try:
-        conn = sqlite3.connect(DATABASE_PATH)
+        conn = get_db()
         cursor = conn.cursor()
         cursor.execute('SELECT COUNT(*) FROM customers')
         customer_count = cursor.fetchone()[0]
-        conn.close()
         
         return jsonify({
             'status': 'healthy',
@@ -1547,54 +1538,38 @@ def health_check():
 
 @app.route('/api/customers', methods=['GET'])
 def get_customers():
-    """Get all customers with pagination and search"""
+    """Get customers with keyset pagination and optional search"""
     try:
         search = request.args.get('search', '')
-        page = int(request.args.get('page', 1))
-        per_page = int(request.args.get('per_page', 50))
-        offset = (page - 1) * per_page
+        page = max(int(request.args.get('page', 1)), 1)
+        per_page = min(max(int(request.args.get('per_page', 50)), 1), CUSTOMERS_MAX_PER_PAGE)
+        cursor = request.args.get('cursor')
+        # page is kept for older clients; next_cursor avoids the OFFSET scan
+        offset = 0 if cursor else (page - 1) * per_page
         
-        conn = sqlite3.connect(DATABASE_PATH)
+        conn = get_db()
         conn.row_factory = sqlite3.Row
-        cursor = conn.cursor()
-        
         if search:
-            cursor.execute('''
-                SELECT * FROM customers 
-                WHERE unique_id LIKE ? OR name LIKE ? OR email LIKE ?
-                ORDER BY created_at DESC
-                LIMIT ? OFFSET ?
-            ''', (f'%{search}%', f'%{search}%', f'%{search}%', per_page, offset))
-        else:
-            cursor.execute('''
-                SELECT * FROM customers 
-                ORDER BY created_at DESC
-                LIMIT ? OFFSET ?
-            ''', (per_page, offset))
-        
-        customers = [dict(row) for row in cursor.fetchall()]
-        
-        # Get total count
-        if search:
-            cursor.execute('''
-                SELECT COUNT(*) FROM customers 
-                WHERE unique_id LIKE ? OR name LIKE ? OR email LIKE ?
-            ''', (f'%{search}%', f'%{search}%', f'%{search}%'))
+            result = customer_search.search(conn, search, per_page, cursor, offset)
         else:
-            cursor.execute('SELECT COUNT(*) FROM customers')
-        
-        total_count = cursor.fetchone()[0]
+            result = customer_search.list(conn, per_page, cursor, offset)
         
-        conn.close()
-        
-        return jsonify({
-            'customers': customers,
-            'total': total_count,
+        response = {
+            'customers': result['customers'],
+            'next_cursor': result['next_cursor'],
             'page': page,
-            'per_page': per_page,
-            'total_pages': (total_count + per_page - 1) // per_page
-        })
+            'per_page': per_page
+        }
+        if 'total' in result:
+            response['total'] = result['total']
+            response['total_pages'] = (result['total'] + per_page - 1) // per_page
+        if result.get('fuzzy'):
+            response['fuzzy'] = True
+        
+        return jsonify(response)
         
+    except (ValueError, KeyError) as e:
+        return jsonify({'error': f'Invalid pagination parameters: {e}'}), 400
     except Exception as e:
         logger.error(f"Error fetching customers: {str(e)}")
         return jsonify({'error': str(e)}), 500
@@ -1607,96 +1582,39 @@ def search_customers():
         if not search:
             return jsonify({'customers': []})
         
-        conn = sqlite3.connect(DATABASE_PATH)
-        conn.row_factory = sqlite3.Row
-        cursor = conn.cursor()
+        limit = min(max(int(request.args.get('limit', 100)), 1), CUSTOMERS_MAX_PER_PAGE)
+        cursor = request.args.get('cursor')
         
-        cursor.execute('''
-            SELECT * FROM customers 
-            WHERE unique_id LIKE ? OR name LIKE ? OR email LIKE ?
-            ORDER BY created_at DESC
-            LIMIT 100
-        ''', (f'%{search}%', f'%{search}%', f'%{search}%'))
-        
-        customers = [dict(row) for row in cursor.fetchall()]
-        conn.close()
+        conn = get_db()
+        conn.row_factory = sqlite3.Row
+        result = customer_search.search(conn, search, limit, cursor)
         
-        return jsonify({'customers': customers})
+        return jsonify({
+            'customers': result['customers'],
+            'next_cursor': result['next_cursor'],
+            'fuzzy': result.get('fuzzy', False)
+        })
         
+    except (ValueError, KeyError) as e:
+        return jsonify({'error': f'Invalid search parameters: {e}', 'customers': []}), 400
     except Exception as e:
         logger.error(f"Error searching customers: {str(e)}")
         return jsonify({'error': str(e), 'customers': []}), 500
 
 @app.route('/api/customers/<customer_id>', methods=['GET'])
 def get_customer_details(customer_id):
-    """Get detailed customer information"""
+    """Get detailed customer information from the customer's profile snapshot"""
     try:
-        conn = sqlite3.connect(DATABASE_PATH)
-        conn.row_factory = sqlite3.Row
-        cursor = conn.cursor()
-        
-        # Get customer basic info
-        cursor.execute('SELECT * FROM customers WHERE unique_id = ?', (customer_id,))
-        customer = cursor.fetchone()
+        conn = get_db()
+        profile = customer_profiles.get(conn, customer_id)
         
-        if not customer:
+        if not profile:
             return jsonify({'error': 'Customer not found'}), 404
         
-        customer_dict = dict(customer)
-        
-        # Get activities
-        cursor.execute('''
-            SELECT * FROM customer_activities 
-            WHERE customer_id = ? 
-            ORDER BY timestamp DESC 
-            LIMIT 50
-        ''', (customer['id'],))
-        activities = [dict(row) for row in cursor.fetchall()]
-        
-        # Get screenshots
-        cursor.execute('''
-            SELECT * FROM customer_screenshots 
-            WHERE customer_id = ? 
-            ORDER BY upload_date DESC
-        ''', (customer['id'],))
-        screenshots = [dict(row) for row in cursor.fetchall()]
-        
-        # Get questionnaire responses
-        cursor.execute('''
-            SELECT * FROM questionnaire_responses 
-            WHERE customer_id = ? 
-            ORDER BY response_date DESC
-        ''', (customer['id'],))
-        questionnaire_responses = [dict(row) for row in cursor.fetchall()]
-        
-        # Get risk management plan
-        cursor.execute('''
-            SELECT * FROM risk_management_plans 
-            WHERE customer_id = ? 
-            ORDER BY updated_date DESC 
-            LIMIT 1
-        ''', (customer['id'],))
-        risk_plan = cursor.fetchone()
-        risk_plan_dict = dict(risk_plan) if risk_plan else None
-        
-        # Get dashboard data
-        cursor.execute('''
-            SELECT * FROM dashboard_data 
-            WHERE customer_id = ? 
-            ORDER BY last_updated DESC
-        ''', (customer['id'],))
-        dashboard_data = [dict(row) for row in cursor.fetchall()]
-        
-        conn.close()
-        
-        return jsonify({
-            'customer': customer_dict,
-            'activities': activities,
-            'screenshots': screenshots,
-            'questionnaire_responses': questionnaire_responses,
-            'risk_management_plan': risk_plan_dict,
-            'dashboard_data': dashboard_data
-        })
+        snapshot, etag = profile
+        response = app.response_class(snapshot, mimetype='application/json')
+        response.set_etag(etag)
+        return response.make_conditional(request)
         
     except Exception as e:
         logger.error(f"Error fetching customer details: {str(e)}")
@@ -1706,7 +1624,7 @@ def get_customer_details(customer_id):
 def delete_customer(customer_id):
     """Attempt to delete customer (BLOCKED - No-delete policy enforced)"""
     try:
-        conn = sqlite3.connect(DATABASE_PATH)
+        conn = get_db()
         cursor = conn.cursor()
         
         # Get customer ID first
@@ -1714,7 +1632,6 @@ def delete_customer(customer_id):
         customer_result = cursor.fetchone()
         
         if not customer_result:
-            conn.close()
             return jsonify({'error': 'Customer not found'}), 404
         
         customer_db_id = customer_result[0]
@@ -1724,7 +1641,6 @@ def delete_customer(customer_id):
         customer = cursor.fetchone()
         
         if not customer:
-            conn.close()
             return jsonify({'error': 'Customer not found'}), 404
         
         # Instead of deleting, create a permanent record and mark as inactive
@@ -1746,6 +1662,7 @@ def delete_customer(customer_id):
             SET status = 'inactive', updated_at = ? 
             WHERE id = ?
         ''', (datetime.now().isoformat(), customer_db_id))
+        customer_profiles.record_customer(conn, customer_db_id)
         
         # Log the deletion attempt (blocked)
         audit_service.log_action(
@@ -1777,7 +1694,6 @@ def delete_customer(customer_id):
         )
         
         conn.commit()
-        conn.close()
         
         return jsonify({
             'success': False,
@@ -1806,7 +1722,7 @@ def create_customer():
         # Generate unique ID
         unique_id = str(uuid.uuid4())[:8].upper()
         
-        conn = sqlite3.connect(DATABASE_PATH)
+        conn = get_db()
         cursor = conn.cursor()
         
         cursor.execute('''
@@ -1824,7 +1740,6 @@ def create_customer():
         ))
         
         conn.commit()
-        conn.close()
         
         logger.info(f"Customer {unique_id} created successfully")
         return jsonify({'message': 'Customer created successfully', 'unique_id': unique_id}), 201
@@ -1842,7 +1757,7 @@ def update_customer(unique_id):
         if not data:
             return jsonify({'error': 'No data provided'}), 400
         
-        conn = sqlite3.connect(DATABASE_PATH)
+        conn = get_db()
         cursor = conn.cursor()
         
         # Get customer ID first
@@ -1850,7 +1765,6 @@ def update_customer(unique_id):
         customer_result = cursor.fetchone()
         
         if not customer_result:
-            conn.close()
             return jsonify({'error': 'Customer not found'}), 404
         
         customer_id = customer_result[0]
@@ -1860,7 +1774,6 @@ def update_customer(unique_id):
         current_customer = cursor.fetchone()
         
         if not current_customer:
-            conn.close()
             return jsonify({'error': 'Customer not found'}), 404
         
         # Check if email is being modified (PREVENT EMAIL CHANGES)
@@ -1878,7 +1791,6 @@ def update_customer(unique_id):
                 details={'blocked': True, 'reason': 'Email modification not allowed'}
             )
             
-            conn.close()
             return jsonify({
                 'error': 'EMAIL_MODIFICATION_BLOCKED',
                 'message': 'Email addresses cannot be modified once created for security reasons'
@@ -1897,7 +1809,6 @@ def update_customer(unique_id):
                 params.append(data[field])
         
         if not update_fields:
-            conn.close()
             return jsonify({'error': 'No valid fields to update'}), 400
         
         # Add timestamp and unique_id
@@ -1949,8 +1860,8 @@ def update_customer(unique_id):
                     user_agent=request.headers.get('User-Agent')
                 )
         
+        customer_profiles.record_customer(conn, customer_id)
         conn.commit()
-        conn.close()
         
         return jsonify({
             'success': True,
@@ -1972,112 +1883,114 @@ def update_customer(unique_id):
         logger.error(f"Error updating customer {unique_id}: {e}")
         return jsonify({'error': 'Failed to update customer'}), 500
 
+def _customer_child_page(unique_id, collection):
+    """One cursor page of a customer's child collection as (rows, next_cursor); None if the customer is unknown.
+    
+    Raises ValueError for a bad limit or cursor.
+    """
+    limit = min(request.args.get('limit', 50, type=int), CHILD_MAX_PER_PAGE)
+    if limit < 1:
+        raise ValueError('limit must be positive')
+    
+    conn = get_db()
+    customer = conn.execute('SELECT id FROM customers WHERE unique_id = ?', (unique_id,)).fetchone()
+    if not customer:
+        return None
+    try:
+        return fetch_child_page(conn, customer[0], collection, limit, request.args.get('cursor'))
+    except KeyError as e:
+        raise ValueError(f'cursor is missing {e}')
+
 @app.route('/api/customers/<unique_id>/activities', methods=['GET'])
 def get_customer_activities(unique_id):
-    """Get customer activities"""
+    """Get customer activities, newest first, paged by cursor"""
     try:
-        conn = sqlite3.connect(DATABASE_PATH)
-        cursor = conn.cursor()
-        
-        cursor.execute('''
-            SELECT ca.id, ca.activity_type, ca.activity_details, ca.timestamp, 
-                   ca.ip_address, ca.user_agent
-            FROM customer_activities ca
-            JOIN customers c ON ca.customer_id = c.id
-            WHERE c.unique_id = ?
-            ORDER BY ca.timestamp DESC
-        ''', (unique_id,))
+        try:
+            page = _customer_child_page(unique_id, 'activities')
+        except ValueError as e:
+            return jsonify({'error': f'Invalid pagination parameters: {e}'}), 400
+        if page is None:
+            return jsonify({'error': 'Customer not found'}), 404
+        rows, next_cursor = page
         
         activities = []
-        for row in cursor.fetchall():
+        for row in rows:
             activities.append({
-                'id': row[0],
-                'type': row[1],
-                'details': row[2],
-                'timestamp': row[3],
-                'ip_address': row[4],
-                'user_agent': row[5]
+                'id': row['id'],
+                'type': row['activity_type'],
+                'details': row['activity_details'],
+                'timestamp': row['timestamp'],
+                'ip_address': row['ip_address'],
+                'user_agent': row['user_agent']
             })
         
-        return jsonify({'activities': activities}), 200
+        return jsonify({'activities': activities, 'next_cursor': next_cursor}), 200
         
     except Exception as e:
         logger.error(f"Error fetching customer activities: {e}")
         return jsonify({'error': 'Internal server error'}), 500
-    finally:
-        conn.close()
 
 @app.route('/api/customers/<unique_id>/screenshots', methods=['GET'])
 def get_customer_screenshots(unique_id):
-    """Get customer screenshots"""
+    """Get customer screenshots, newest first, paged by cursor"""
     try:
-        conn = sqlite3.connect(DATABASE_PATH)
-        cursor = conn.cursor()
-        
-        cursor.execute('''
-            SELECT cs.id, cs.screenshot_url, cs.screenshot_type, cs.upload_date, cs.description
-            FROM customer_screenshots cs
-            JOIN customers c ON cs.customer_id = c.id
-            WHERE c.unique_id = ?
-            ORDER BY cs.upload_date DESC
-        ''', (unique_id,))
+        try:
+            page = _customer_child_page(unique_id, 'screenshots')
+        except ValueError as e:
+            return jsonify({'error': f'Invalid pagination parameters: {e}'}), 400
+        if page is None:
+            return jsonify({'error': 'Customer not found'}), 404
+        rows, next_cursor = page
         
         screenshots = []
-        for row in cursor.fetchall():
+        for row in rows:
             screenshots.append({
-                'id': row[0],
-                'url': row[1],
-                'type': row[2],
-                'upload_date': row[3],
-                'description': row[4]
+                'id': row['id'],
+                'url': row['screenshot_url'],
+                'type': row['screenshot_type'],
+                'upload_date': row['upload_date'],
+                'description': row['description']
             })
         
-        return jsonify({'screenshots': screenshots}), 200
+        return jsonify({'screenshots': screenshots, 'next_cursor': next_cursor}), 200
         
     except Exception as e:
         logger.error(f"Error fetching customer screenshots: {e}")
         return jsonify({'error': 'Internal server error'}), 500
-    finally:
-        conn.close()
 
 @app.route('/api/customers/<unique_id>/questionnaire', methods=['GET'])
 def get_customer_questionnaire(unique_id):
-    """Get customer questionnaire responses"""
+    """Get customer questionnaire responses, newest first, paged by cursor"""
     try:
-        conn = sqlite3.connect(DATABASE_PATH)
-        cursor = conn.cursor()
-        
-        cursor.execute('''
-            SELECT qr.id, qr.question, qr.answer, qr.response_date, qr.questionnaire_type
-            FROM questionnaire_responses qr
-            JOIN customers c ON qr.customer_id = c.id
-            WHERE c.unique_id = ?
-            ORDER BY qr.response_date DESC
-        ''', (unique_id,))
+        try:
+            page = _customer_child_page(unique_id, 'questionnaire_responses')
+        except ValueError as e:
+            return jsonify({'error': f'Invalid pagination parameters: {e}'}), 400
+        if page is None:
+            return jsonify({'error': 'Customer not found'}), 404
+        rows, next_cursor = page
         
         responses = []
-        for row in cursor.fetchall():
+        for row in rows:
             responses.append({
-                'id': row[0],
-                'question': row[1],
-                'answer': row[2],
-                'response_date': row[3],
-                'questionnaire_type': row[4]
+                'id': row['id'],
+                'question': row['question'],
+                'answer': row['answer'],
+                'response_date': row['response_date'],
+                'questionnaire_type': row['questionnaire_type']
             })
         
-        return jsonify({'questionnaire_responses': responses}), 200
+        return jsonify({'questionnaire_responses': responses, 'next_cursor': next_cursor}), 200
         
     except Exception as e:
         logger.error(f"Error fetching customer questionnaire: {e}")
         return jsonify({'error': 'Internal server error'}), 500
-    finally:
-        conn.close()
 
 @app.route('/api/customers/<unique_id>/risk-plan', methods=['GET'])
 def get_customer_risk_plan(unique_id):
     """Get customer risk management plan"""
     try:
-        conn = sqlite3.connect(DATABASE_PATH)
+        conn = get_db()
         cursor = conn.cursor()
         
         cursor.execute('''
@@ -2104,40 +2017,33 @@ def get_customer_risk_plan(unique_id):
     except Exception as e:
         logger.error(f"Error fetching customer risk plan: {e}")
         return jsonify({'error': 'Internal server error'}), 500
-    finally:
-        conn.close()
 
 @app.route('/api/customers/<unique_id>/dashboard-data', methods=['GET'])
 def get_customer_dashboard_data(unique_id):
-    """Get customer dashboard data"""
+    """Get customer dashboard data, most recently updated first, paged by cursor"""
     try:
-        conn = sqlite3.connect(DATABASE_PATH)
-        cursor = conn.cursor()
-        
-        cursor.execute('''
-            SELECT dd.id, dd.data_type, dd.data_content, dd.last_updated
-            FROM dashboard_data dd
-            JOIN customers c ON dd.customer_id = c.id
-            WHERE c.unique_id = ?
-            ORDER BY dd.last_updated DESC
-        ''', (unique_id,))
+        try:
+            page = _customer_child_page(unique_id, 'dashboard_data')
+        except ValueError as e:
+            return jsonify({'error': f'Invalid pagination parameters: {e}'}), 400
+        if page is None:
+            return jsonify({'error': 'Customer not found'}), 404
+        rows, next_cursor = page
         
         dashboard_data = []
-        for row in cursor.fetchall():
+        for row in rows:
             dashboard_data.append({
-                'id': row[0],
-                'data_type': row[1],
-                'data_content': json.loads(row[2]),
-                'created_date': row[3]
+                'id': row['id'],
+                'data_type': row['data_type'],
+                'data_content': json.loads(row['data_content']),
+                'created_date': row['last_updated']
             })
         
-        return jsonify({'dashboard_data': dashboard_data}), 200
+        return jsonify({'dashboard_data': dashboard_data, 'next_cursor': next_cursor}), 200
         
     except Exception as e:
         logger.error(f"Error fetching customer dashboard data: {e}")
         return jsonify({'error': 'Internal server error'}), 500
-    finally:
-        conn.close()
 
 @app.route('/api/customers/<customer_id>/activities', methods=['POST'])
 def add_customer_activity(customer_id):
@@ -2148,7 +2054,7 @@ def add_customer_activity(customer_id):
         if not data or not data.get('activity_type'):
             return jsonify({'error': 'Activity type is required'}), 400
         
-        conn = sqlite3.connect(DATABASE_PATH)
+        conn = get_db()
         cursor = conn.cursor()
         
         # Get customer ID
@@ -2168,9 +2074,9 @@ def add_customer_activity(customer_id):
             data.get('ip_address', ''),
             data.get('user_agent', '')
         ))
+        customer_profiles.record_child(conn, customer[0], 'activities', cursor.lastrowid)
         
         conn.commit()
-        conn.close()
         
         return jsonify({'message': 'Activity added successfully'}), 201
         
@@ -2187,7 +2093,7 @@ def add_customer_screenshot(customer_id):
         if not data or not data.get('screenshot_url'):
             return jsonify({'error': 'Screenshot URL is required'}), 400
         
-        conn = sqlite3.connect(DATABASE_PATH)
+        conn = get_db()
         cursor = conn.cursor()
         
         # Get customer ID
@@ -2206,9 +2112,9 @@ def add_customer_screenshot(customer_id):
             data.get('screenshot_type', 'general'),
             data.get('description', '')
         ))
+        customer_profiles.record_child(conn, customer[0], 'screenshots', cursor.lastrowid)
         
         conn.commit()
-        conn.close()
         
         return jsonify({'message': 'Screenshot added successfully'}), 201
         
@@ -2225,7 +2131,7 @@ def add_questionnaire_response(customer_id):
         if not data or not data.get('responses'):
             return jsonify({'error': 'Questionnaire responses are required'}), 400
         
-        conn = sqlite3.connect(DATABASE_PATH)
+        conn = get_db()
         cursor = conn.cursor()
         
         # Get customer ID
@@ -2246,9 +2152,9 @@ def add_questionnaire_response(customer_id):
                 response['answer'],
                 data.get('questionnaire_type', 'risk_assessment')
             ))
+            customer_profiles.record_child(conn, customer[0], 'questionnaire_responses', cursor.lastrowid)
         
         conn.commit()
-        conn.close()
         
         return jsonify({'message': 'Questionnaire responses added successfully'}), 201
         
@@ -2265,7 +2171,7 @@ def add_risk_management_plan(customer_id):
         if not data or not data.get('plan_data'):
             return jsonify({'error': 'Risk plan data is required'}), 400
         
-        conn = sqlite3.connect(DATABASE_PATH)
+        conn = get_db()
         cursor = conn.cursor()
         
         # Get customer ID
@@ -2292,9 +2198,9 @@ def add_risk_management_plan(customer_id):
                 INSERT INTO risk_management_plans (customer_id, plan_data)
                 VALUES (?, ?)
             ''', (customer[0], json.dumps(data['plan_data'])))
+        customer_profiles.record_risk_plan(conn, customer[0])
         
         conn.commit()
-        conn.close()
         
         return jsonify({'message': 'Risk management plan saved successfully'}), 201
         
@@ -2311,7 +2217,7 @@ def add_dashboard_data(customer_id):
         if not data or not data.get('data_type') or not data.get('data_content'):
             return jsonify({'error': 'Data type and content are required'}), 400
         
-        conn = sqlite3.connect(DATABASE_PATH)
+        conn = get_db()
         cursor = conn.cursor()
         
         # Get customer ID
@@ -2333,15 +2239,17 @@ def add_dashboard_data(customer_id):
                 SET data_content = ?, last_updated = CURRENT_TIMESTAMP
                 WHERE customer_id = ? AND data_type = ?
             ''', (json.dumps(data['data_content']), customer[0], data['data_type']))
+            customer_profiles.record_child(conn, customer[0], 'dashboard_data', existing_data[0],
+                                           replaces=existing_data[0])
         else:
             # Create new data entry
             cursor.execute('''
                 INSERT INTO dashboard_data (customer_id, data_type, data_content)
                 VALUES (?, ?, ?)
             ''', (customer[0], data['data_type'], json.dumps(data['data_content'])))
+            customer_profiles.record_child(conn, customer[0], 'dashboard_data', cursor.lastrowid)
         
         conn.commit()
-        conn.close()
         
         return jsonify({'message': 'Dashboard data saved successfully'}), 201
         
@@ -2405,7 +2313,8 @@ def get_user_audit_trail(user_id):
 def get_permanent_records():
     """Get all permanent user records"""
     try:
-        conn = sqlite3.connect(DATABASE_PATH)
+        audit_writer.flush()
+        conn = get_db()
         cursor = conn.cursor()
         
         cursor.execute('''
@@ -2414,7 +2323,6 @@ def get_permanent_records():
         ''')
         
         records = cursor.fetchall()
-        conn.close()
         
         formatted_records = []
         for record in records:
@@ -2447,46 +2355,10 @@ def get_permanent_records():
 def get_compliance_report():
     """Get compliance report with audit summary"""
     try:
-        conn = sqlite3.connect(DATABASE_PATH)
-        cursor = conn.cursor()
-        
-        # Get audit summary
-        cursor.execute('''
-            SELECT 
-                action,
-                COUNT(*) as count,
-                MIN(timestamp) as first_occurrence,
-                MAX(timestamp) as last_occurrence
-            FROM audit_logs 
-            GROUP BY action
-        ''')
-        
-        audit_summary = cursor.fetchall()
-        
-        # Get user change summary
-        cursor.execute('''
-            SELECT 
-                action,
-                COUNT(*) as count
-            FROM user_audit_trail 
-            GROUP BY action
-        ''')
-        
-        user_changes = cursor.fetchall()
-        
-        # Get permanent records count
-        cursor.execute('SELECT COUNT(*) FROM permanent_user_records')
-        permanent_records_count = cursor.fetchone()[0]
-        
-        # Get blocked operations count
-        cursor.execute('''
-            SELECT COUNT(*) FROM audit_logs 
-            WHERE action IN ('DELETE_ATTEMPTED', 'EMAIL_CHANGE_ATTEMPTED')
-        ''')
-        
-        blocked_operations = cursor.fetchone()[0]
+        audit_writer.flush()
         
-        conn.close()
+        # Per-action audit counters are maintained by triggers as entries are written
+        summary = dashboard_stats.compliance(get_db())
         
         report = {
             'audit_summary': [
@@ -2495,16 +2367,16 @@ def get_compliance_report():
                     'count': row[1],
                     'first_occurrence': row[2],
                     'last_occurrence': row[3]
-                } for row in audit_summary
+                } for row in summary['audit_summary']
             ],
             'user_changes': [
                 {
                     'action': row[0],
                     'count': row[1]
-                } for row in user_changes
+                } for row in summary['user_changes']
             ],
-            'permanent_records_count': permanent_records_count,
-            'blocked_operations': blocked_operations,
+            'permanent_records_count': summary['permanent_records_count'],
+            'blocked_operations': summary['blocked_operations'],
             'compliance_status': 'COMPLIANT',
             'last_updated': datetime.now().isoformat()
         }
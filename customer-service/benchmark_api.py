@@ -0,0 +1,174 @@
+#!/usr/bin/env python3
+"""
+Benchmark for the customer service API
+Drives a concurrent read/write mix through the Flask endpoints with connect-per-request SQLite
+and with the pooled WAL connections plus batched audit writer
+"""
+
+import os
+import sys
+import time
+import random
+import sqlite3
+import logging
+import argparse
+import tempfile
+import threading
+from collections import defaultdict
+
+from db_pool import ConnectionPool, AuditWriteQueue
+
+logging.disable(logging.INFO)
+
+
+class ConnectPerRequest(ConnectionPool):
+    """The previous behaviour: a fresh rollback-journal connection per checkout, closed on release"""
+
+    def checkout(self, timeout=None):
+        return sqlite3.connect(self.db_path, check_same_thread=False)
+
+    def release(self, conn):
+        conn.close()
+
+
+class SynchronousAudit(AuditWriteQueue):
+    """The previous behaviour: one connection and commit per audit entry, on the request thread"""
+
+    def submit(self, sql, params):
+        conn = sqlite3.connect(self.pool.db_path)
+        try:
+            conn.execute(sql, tuple(params))
+            conn.commit()
+        finally:
+            conn.close()
+
+
+def configure(api, db_path, pooled):
+    """Point the API module at a fresh database using either connection strategy"""
+    api.DATABASE_PATH = db_path
+    if pooled:
+        api.db_pool = ConnectionPool(db_path)
+        api.audit_writer = AuditWriteQueue(api.db_pool)
+    else:
+        api.db_pool = ConnectPerRequest(db_path)
+        api.audit_writer = SynchronousAudit(api.db_pool)
+    api.audit_service = api.AuditTrailService(api.db_pool, api.audit_writer)
+    api.init_enhanced_database()
+    api.init_database()
+
+
+def seed(db_path, customers, activities):
+    conn = sqlite3.connect(db_path)
+    conn.executemany('''
+        INSERT INTO customers (unique_id, name, email, join_date, phone, status)
+        VALUES (?, ?, ?, ?, ?, 'active')
+    ''', [(f'BENCH{i:06d}', f'Customer {i} Lastname{i % 53}', f'customer{i}@example{i % 7}.com',
+           '2024-01-01', '555-0100') for i in range(customers)])
+    conn.executemany('''
+        INSERT INTO customer_activities (customer_id, activity_type, activity_details)
+        SELECT id, ?, ? FROM customers WHERE unique_id = ?
+    ''', [('login', f'session {j}', f'BENCH{random.randrange(customers):06d}') for j in range(activities)])
+    conn.commit()
+    conn.close()
+
+
+def make_operations(customers):
+    def uid():
+        return f'BENCH{random.randrange(customers):06d}'
+
+    return [
+        (35, 'list', lambda c: c.get('/api/customers?per_page=50')),
+        (20, 'detail', lambda c: c.get(f'/api/customers/{uid()}')),
+        (15, 'search', lambda c: c.get(f'/api/customers/search?search=Lastname{random.randrange(53)}')),
+        (10, 'activities', lambda c: c.get(f'/api/customers/{uid()}/activities?limit=20')),
+        (12, 'add activity', lambda c: c.post(f'/api/customers/{uid()}/activities',
+                                              json={'activity_type': 'page_view', 'activity_details': 'bench'})),
+        (8, 'update', lambda c: c.put(f'/api/customers/{uid()}',
+                                      json={'phone': str(random.randrange(10 ** 9)), 'status': 'active'})),
+    ]
+
+
+def run_load(api, operations, threads, requests_per_thread):
+    weights = [weight for weight, _, _ in operations]
+    latencies = defaultdict(list)
+    errors = defaultdict(int)
+    lock = threading.Lock()
+
+    def worker(seed_value):
+        rng = random.Random(seed_value)
+        client = api.app.test_client()
+        local_latencies = defaultdict(list)
+        local_errors = defaultdict(int)
+        for _ in range(requests_per_thread):
+            _, name, call = rng.choices(operations, weights)[0]
+            started = time.perf_counter()
+            response = call(client)
+            local_latencies[name].append(time.perf_counter() - started)
+            if response.status_code >= 500:
+                local_errors[name] += 1
+        with lock:
+            for name, values in local_latencies.items():
+                latencies[name].extend(values)
+            for name, count in local_errors.items():
+                errors[name] += count
+
+    workers = [threading.Thread(target=worker, args=(i,)) for i in range(threads)]
+    started = time.perf_counter()
+    for thread in workers:
+        thread.start()
+    for thread in workers:
+        thread.join()
+    api.audit_writer.flush(timeout=120)
+    return time.perf_counter() - started, latencies, errors
+
+
+def percentile(values, fraction):
+    ordered = sorted(values)
+    return ordered[min(int(len(ordered) * fraction), len(ordered) - 1)]
+
+
+def count_audit_rows(db_path):
+    conn = sqlite3.connect(db_path)
+    try:
+        return conn.execute('SELECT COUNT(*) FROM audit_logs').fetchone()[0]
+    finally:
+        conn.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark customer service API connection handling')
+    parser.add_argument('--customers', type=int, default=5000)
+    parser.add_argument('--activities', type=int, default=20000)
+    parser.add_argument('--threads', type=int, default=8)
+    parser.add_argument('--requests', type=int, default=60, help='Requests per thread')
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        # api initialises DATABASE_PATH relative to the working directory on import
+        os.chdir(tmp)
+        sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+        import api
+
+        for label, pooled in [('connect per request', False), ('pooled + audit queue', True)]:
+            random.seed(11)
+            db_path = os.path.join(tmp, f"{'pooled' if pooled else 'unpooled'}.db")
+            configure(api, db_path, pooled)
+            seed(db_path, args.customers, args.activities)
+
+            elapsed, latencies, errors = run_load(api, make_operations(args.customers), args.threads, args.requests)
+            total = sum(len(values) for values in latencies.values())
+            print(f"\n{label}: {total} requests on {args.threads} threads in {elapsed:.2f}s "
+                  f"-> {total / elapsed:.0f} req/s, {sum(errors.values())} errors, "
+                  f"{count_audit_rows(db_path)} audit rows")
+            print(f"  {'endpoint':14s} {'count':>6s} {'p50 ms':>8s} {'p95 ms':>8s} {'p99 ms':>8s} {'errors':>7s}")
+            for name in sorted(latencies):
+                values = latencies[name]
+                print(f"  {name:14s} {len(values):6d} {percentile(values, 0.5) * 1e3:8.2f} "
+                      f"{percentile(values, 0.95) * 1e3:8.2f} {percentile(values, 0.99) * 1e3:8.2f} "
+                      f"{errors[name]:7d}")
+            api.audit_writer.close()
+            api.db_pool.close()
+
+
+if __name__ == '__main__':
+    main()
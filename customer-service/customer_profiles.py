@@ -0,0 +1,204 @@
+"""
+Customer Profiles
+Materialized per-customer profile snapshots and cursor pagination for their child collections
+"""
+
+import json
+import hashlib
+import sqlite3
+import logging
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+
+from customer_search import encode_cursor, decode_cursor
+
+logger = logging.getLogger(__name__)
+
+# Rows of each child collection embedded in a snapshot; the rest is paged via the child endpoints
+PROFILE_PAGE_SIZE = 50
+CHILD_MAX_PER_PAGE = 200
+
+# collection name -> (table, sort column); every collection is ordered by (sort column DESC, id DESC)
+CHILD_COLLECTIONS = {
+    'activities': ('customer_activities', 'timestamp'),
+    'screenshots': ('customer_screenshots', 'upload_date'),
+    'questionnaire_responses': ('questionnaire_responses', 'response_date'),
+    'dashboard_data': ('dashboard_data', 'last_updated'),
+}
+
+
+def _dicts(cursor: sqlite3.Cursor) -> List[Dict]:
+    """Rows as dicts regardless of the connection's row_factory"""
+    columns = [column[0] for column in cursor.description]
+    return [dict(zip(columns, row)) for row in cursor.fetchall()]
+
+
+def fetch_child_page(conn: sqlite3.Connection, customer_id: int, collection: str, limit: int,
+                     cursor: Optional[str] = None) -> Tuple[List[Dict], Optional[str]]:
+    """One page of a child collection, newest first, plus the cursor for the next page"""
+    table, sort_column = CHILD_COLLECTIONS[collection]
+    params: List[Any] = [customer_id]
+    keyset = ''
+    if cursor:
+        after = decode_cursor(cursor)
+        keyset = f'AND ({sort_column} < ? OR ({sort_column} = ? AND id < ?))'
+        params += [after['sort'], after['sort'], after['id']]
+    params.append(limit + 1)
+
+    rows = _dicts(conn.execute(f'''
+        SELECT * FROM {table}
+        WHERE customer_id = ? {keyset}
+        ORDER BY {sort_column} DESC, id DESC
+        LIMIT ?
+    ''', params))
+
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = encode_cursor({'sort': rows[-1][sort_column], 'id': rows[-1]['id']})
+    return rows, next_cursor
+
+
+class CustomerProfiles:
+    """Per-customer profile snapshots stored as ready-to-serve JSON.
+
+    A snapshot holds the customer row, the first page of each child
+    collection with its ``next_cursor`` and row count, and the latest risk
+    plan. It is built on first read, then patched in the same transaction
+    by every write endpoint, so a detail read is one primary-key lookup.
+    The stored ``etag`` is a hash of the JSON and backs If-None-Match.
+    """
+
+    def init_schema(self, conn: sqlite3.Connection):
+        """Create the snapshot table and the indexes child pagination relies on"""
+        cursor = conn.cursor()
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS customer_profile_snapshots (
+                customer_id INTEGER PRIMARY KEY,
+                unique_id TEXT UNIQUE NOT NULL,
+                snapshot TEXT NOT NULL,
+                etag TEXT NOT NULL,
+                updated_at TEXT NOT NULL,
+                FOREIGN KEY (customer_id) REFERENCES customers (id)
+            )
+        ''')
+        for table, sort_column in CHILD_COLLECTIONS.values():
+            cursor.execute(f'CREATE INDEX IF NOT EXISTS idx_{table}_customer_{sort_column} '
+                           f'ON {table}(customer_id, {sort_column}, id)')
+        conn.commit()
+
+    def get(self, conn: sqlite3.Connection, unique_id: str) -> Optional[Tuple[str, str]]:
+        """(snapshot JSON, etag) for a customer, building the snapshot if needed; None if no such customer"""
+        row = conn.execute('SELECT snapshot, etag FROM customer_profile_snapshots WHERE unique_id = ?',
+                           (unique_id,)).fetchone()
+        if row:
+            return row[0], row[1]
+
+        # Build and store under the write lock: a child write either commits before the build reads it or
+        # runs after the snapshot exists and patches it, instead of being lost between the two
+        owns_transaction = not conn.in_transaction
+        if owns_transaction:
+            conn.execute('BEGIN IMMEDIATE')
+        try:
+            row = conn.execute('SELECT snapshot, etag FROM customer_profile_snapshots WHERE unique_id = ?',
+                               (unique_id,)).fetchone()
+            if row:
+                result = row[0], row[1]
+            else:
+                customers = _dicts(conn.execute('SELECT * FROM customers WHERE unique_id = ?', (unique_id,)))
+                result = None
+                if customers:
+                    snapshot = self._build(conn, customers[0])
+                    result = self._store(conn, customers[0]['id'], unique_id, snapshot)
+            if owns_transaction:
+                conn.commit()
+            return result
+        except Exception:
+            if owns_transaction:
+                conn.rollback()
+            raise
+
+    def _build(self, conn: sqlite3.Connection, customer: Dict) -> Dict:
+        snapshot = {'customer': customer, 'next_cursors': {}, 'counts': {}}
+        for collection, (table, _) in CHILD_COLLECTIONS.items():
+            rows, next_cursor = fetch_child_page(conn, customer['id'], collection, PROFILE_PAGE_SIZE)
+            snapshot[collection] = rows
+            snapshot['next_cursors'][collection] = next_cursor
+            snapshot['counts'][collection] = conn.execute(
+                f'SELECT COUNT(*) FROM {table} WHERE customer_id = ?', (customer['id'],)).fetchone()[0]
+        snapshot['risk_management_plan'] = self._latest_risk_plan(conn, customer['id'])
+        return snapshot
+
+    def _latest_risk_plan(self, conn: sqlite3.Connection, customer_id: int) -> Optional[Dict]:
+        plans = _dicts(conn.execute('''
+            SELECT * FROM risk_management_plans
+            WHERE customer_id = ?
+            ORDER BY updated_date DESC
+            LIMIT 1
+        ''', (customer_id,)))
+        return plans[0] if plans else None
+
+    def _store(self, conn: sqlite3.Connection, customer_id: int, unique_id: str,
+               snapshot: Dict) -> Tuple[str, str]:
+        body = json.dumps(snapshot, separators=(',', ':'), default=str)
+        etag = hashlib.sha1(body.encode()).hexdigest()
+        conn.execute('''
+            INSERT OR REPLACE INTO customer_profile_snapshots (customer_id, unique_id, snapshot, etag, updated_at)
+            VALUES (?, ?, ?, ?, ?)
+        ''', (customer_id, unique_id, body, etag, datetime.now().isoformat()))
+        return body, etag
+
+    def _load(self, conn: sqlite3.Connection, customer_id: int) -> Optional[Tuple[str, Dict]]:
+        row = conn.execute('SELECT unique_id, snapshot FROM customer_profile_snapshots WHERE customer_id = ?',
+                           (customer_id,)).fetchone()
+        return (row[0], json.loads(row[1])) if row else None
+
+    def record_child(self, conn: sqlite3.Connection, customer_id: int, collection: str, row_id: int,
+                     replaces: Optional[int] = None):
+        """Place a freshly written child row in its snapshot page.
+
+        ``replaces`` is the id of the row an upsert overwrote (the same as
+        ``row_id`` for an UPDATE); it is dropped from the page and the count
+        is left unchanged. Call inside the write's transaction.
+        """
+        loaded = self._load(conn, customer_id)
+        if not loaded:
+            return
+        unique_id, snapshot = loaded
+        table, sort_column = CHILD_COLLECTIONS[collection]
+        rows = _dicts(conn.execute(f'SELECT * FROM {table} WHERE id = ?', (row_id,)))
+        if not rows:
+            return
+
+        row = rows[0]
+        key = (row[sort_column], row['id'])
+        page = [item for item in snapshot[collection] if item['id'] != replaces]
+        if replaces is None:
+            snapshot['counts'][collection] += 1
+
+        # Rows are ordered by (sort column, id) descending; a row sorting after a full page belongs to a later one
+        position = next((i for i, item in enumerate(page) if (item[sort_column], item['id']) < key), len(page))
+        if position < len(page) or snapshot['next_cursors'][collection] is None:
+            page.insert(position, row)
+        if len(page) > PROFILE_PAGE_SIZE:
+            page = page[:PROFILE_PAGE_SIZE]
+            snapshot['next_cursors'][collection] = encode_cursor({'sort': page[-1][sort_column],
+                                                                  'id': page[-1]['id']})
+        snapshot[collection] = page
+        self._store(conn, customer_id, unique_id, snapshot)
+
+    def record_risk_plan(self, conn: sqlite3.Connection, customer_id: int):
+        """Refresh the snapshot's risk plan after it was saved; call inside the write's transaction"""
+        loaded = self._load(conn, customer_id)
+        if loaded:
+            unique_id, snapshot = loaded
+            snapshot['risk_management_plan'] = self._latest_risk_plan(conn, customer_id)
+            self._store(conn, customer_id, unique_id, snapshot)
+
+    def record_customer(self, conn: sqlite3.Connection, customer_id: int):
+        """Refresh the snapshot's customer row after it changed; call inside the write's transaction"""
+        loaded = self._load(conn, customer_id)
+        if loaded:
+            unique_id, snapshot = loaded
+            snapshot['customer'] = _dicts(conn.execute('SELECT * FROM customers WHERE id = ?', (customer_id,)))[0]
+            self._store(conn, customer_id, unique_id, snapshot)
@@ -0,0 +1,268 @@
+"""
+Customer Search
+Trigram full-text index and keyset pagination for the customers table
+"""
+
+import re
+import json
+import base64
+import sqlite3
+import logging
+from difflib import SequenceMatcher
+from typing import Any, Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# bm25 weights for (unique_id, name, email): an ID hit outranks an email hit outranks a name hit
+BM25_WEIGHTS = (10.0, 3.0, 5.0)
+
+# Typo fallback: how many trigram candidates to rerank and how close they must be
+FUZZY_CANDIDATES = 200
+FUZZY_MIN_SIMILARITY = 0.75
+
+# The trigram tokenizer cannot match terms shorter than this
+MIN_INDEXED_TERM = 3
+
+SEARCH_INDEX_TRIGGERS = '''
+    CREATE TRIGGER IF NOT EXISTS customers_fts_insert AFTER INSERT ON customers BEGIN
+        INSERT INTO customers_fts (rowid, unique_id, name, email)
+        VALUES (new.id, new.unique_id, new.name, new.email);
+    END;
+
+    CREATE TRIGGER IF NOT EXISTS customers_fts_delete AFTER DELETE ON customers BEGIN
+        INSERT INTO customers_fts (customers_fts, rowid, unique_id, name, email)
+        VALUES ('delete', old.id, old.unique_id, old.name, old.email);
+    END;
+
+    CREATE TRIGGER IF NOT EXISTS customers_fts_update AFTER UPDATE OF unique_id, name, email ON customers BEGIN
+        INSERT INTO customers_fts (customers_fts, rowid, unique_id, name, email)
+        VALUES ('delete', old.id, old.unique_id, old.name, old.email);
+        INSERT INTO customers_fts (rowid, unique_id, name, email)
+        VALUES (new.id, new.unique_id, new.name, new.email);
+    END;
+'''
+
+
+def encode_cursor(values: Dict[str, Any]) -> str:
+    return base64.urlsafe_b64encode(json.dumps(values, separators=(',', ':')).encode()).decode().rstrip('=')
+
+
+def decode_cursor(cursor: str) -> Dict[str, Any]:
+    """Decode a next_cursor value; raises ValueError if it was not produced by encode_cursor"""
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        values = json.loads(base64.urlsafe_b64decode(padded.encode()).decode())
+    except (ValueError, UnicodeDecodeError) as e:
+        raise ValueError(f'Invalid cursor: {e}')
+    if not isinstance(values, dict):
+        raise ValueError('Invalid cursor')
+    return values
+
+
+def _terms(search: str) -> List[str]:
+    return [term for term in re.split(r'\s+', search.strip()) if term]
+
+
+def _quote(term: str) -> str:
+    return '"' + term.replace('"', '""') + '"'
+
+
+def _trigrams(text: str) -> set:
+    text = text.lower()
+    return {text[i:i + 3] for i in range(len(text) - 2)}
+
+
+def _similarity(terms: List[str], row: Dict) -> float:
+    """Mean over query terms of the best edit-similarity against a column value or word in it"""
+    candidates = []
+    for column in ('unique_id', 'name', 'email'):
+        value = str(row.get(column) or '').lower()
+        if value:
+            candidates.append(value)
+            candidates.extend(word for word in re.split(r'[^a-z0-9]+', value) if word)
+
+    total = 0.0
+    for term in terms:
+        term = term.lower()
+        total += max((SequenceMatcher(None, term, candidate).ratio() for candidate in candidates), default=0.0)
+    return total / len(terms)
+
+
+class CustomerSearch:
+    """Customer lookups backed by an FTS5 trigram index over unique_id, name and email.
+
+    The index is an external-content table kept in sync with ``customers`` by
+    triggers, so every insert and update path stays searchable. Each query
+    term of 3+ characters is a substring match (same semantics as the old
+    ``LIKE '%term%'``) ranked by bm25; shorter terms filter the indexed hits
+    with LIKE. When nothing matches, trigram candidates are reranked by edit
+    similarity so small typos still find the customer. Pages are keyset
+    based: ``next_cursor`` carries the sort key of the last row returned.
+    """
+
+    def __init__(self):
+        self.fts_available = False
+
+    def init_index(self, conn: sqlite3.Connection) -> bool:
+        """Create the index and its sync triggers; falls back to LIKE scans if FTS5 trigram is missing"""
+        cursor = conn.cursor()
+        cursor.execute('CREATE INDEX IF NOT EXISTS idx_customers_created_at_id ON customers(created_at, id)')
+        exists = cursor.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'customers_fts'").fetchone()
+        if not exists:
+            try:
+                cursor.execute('''
+                    CREATE VIRTUAL TABLE customers_fts USING fts5(
+                        unique_id, name, email,
+                        content='customers', content_rowid='id', tokenize='trigram'
+                    )
+                ''')
+            except sqlite3.OperationalError as e:
+                logger.warning(f"FTS5 trigram index unavailable (SQLite {sqlite3.sqlite_version}), "
+                               f"customer search will scan: {e}")
+                conn.commit()
+                self.fts_available = False
+                return False
+            cursor.execute("INSERT INTO customers_fts (customers_fts) VALUES ('rebuild')")
+        cursor.executescript(SEARCH_INDEX_TRIGGERS)
+        conn.commit()
+        self.fts_available = True
+        return True
+
+    def list(self, conn: sqlite3.Connection, limit: int, cursor: Optional[str] = None,
+             offset: int = 0) -> Dict:
+        """Customers newest first"""
+        params: List[Any] = []
+        where = ''
+        if cursor:
+            after = decode_cursor(cursor)
+            where = 'WHERE created_at < ? OR (created_at = ? AND id < ?)'
+            params = [after['created_at'], after['created_at'], after['id']]
+        params += [limit + 1, 0 if cursor else offset]
+
+        rows = conn.execute(f'''
+            SELECT * FROM customers {where}
+            ORDER BY created_at DESC, id DESC
+            LIMIT ? OFFSET ?
+        ''', params).fetchall()
+        customers = [dict(row) for row in rows[:limit]]
+
+        result = {'customers': customers, 'next_cursor': None}
+        if len(rows) > limit:
+            last = customers[-1]
+            result['next_cursor'] = encode_cursor({'created_at': last['created_at'], 'id': last['id']})
+        if not cursor:
+            result['total'] = conn.execute('SELECT COUNT(*) FROM customers').fetchone()[0]
+        return result
+
+    def search(self, conn: sqlite3.Connection, search: str, limit: int, cursor: Optional[str] = None,
+               offset: int = 0) -> Dict:
+        """Customers matching every term of ``search``, best match first"""
+        terms = _terms(search)
+        indexed = [term for term in terms if len(term) >= MIN_INDEXED_TERM]
+        if not self.fts_available or not indexed:
+            return self._search_scan(conn, terms, limit, cursor, offset)
+
+        match = ' AND '.join(_quote(term) for term in indexed)
+        short_filter, short_params = self._short_term_filter(terms)
+        rank = f"bm25(customers_fts, {', '.join(str(w) for w in BM25_WEIGHTS)})"
+
+        params: List[Any] = [match] + short_params
+        keyset = ''
+        if cursor:
+            after = decode_cursor(cursor)
+            keyset = f'AND ({rank} > ? OR ({rank} = ? AND c.id > ?))'
+            params += [after['rank'], after['rank'], after['id']]
+        params += [limit + 1, 0 if cursor else offset]
+
+        rows = conn.execute(f'''
+            SELECT c.*, {rank} AS search_rank
+            FROM customers_fts
+            JOIN customers c ON c.id = customers_fts.rowid
+            WHERE customers_fts MATCH ? {short_filter} {keyset}
+            ORDER BY search_rank, c.id
+            LIMIT ? OFFSET ?
+        ''', params).fetchall()
+
+        customers = [dict(row) for row in rows[:limit]]
+        result = {'customers': customers, 'next_cursor': None, 'fuzzy': False}
+        if len(rows) > limit:
+            last = customers[-1]
+            result['next_cursor'] = encode_cursor({'rank': last['search_rank'], 'id': last['id']})
+        for customer in customers:
+            customer.pop('search_rank', None)
+
+        if not cursor:
+            result['total'] = conn.execute(f'''
+                SELECT COUNT(*) FROM customers_fts
+                JOIN customers c ON c.id = customers_fts.rowid
+                WHERE customers_fts MATCH ? {short_filter}
+            ''', [match] + short_params).fetchone()[0]
+            if result['total'] == 0 and not offset:
+                return self._search_fuzzy(conn, terms, limit)
+        return result
+
+    def _short_term_filter(self, terms: List[str]) -> Tuple[str, List[str]]:
+        """LIKE conditions for terms too short for the trigram index"""
+        clauses, params = [], []
+        for term in terms:
+            if len(term) < MIN_INDEXED_TERM:
+                clauses.append('AND (c.unique_id LIKE ? OR c.name LIKE ? OR c.email LIKE ?)')
+                params += [f'%{term}%'] * 3
+        return ' '.join(clauses), params
+
+    def _search_fuzzy(self, conn: sqlite3.Connection, terms: List[str], limit: int) -> Dict:
+        """Typo-tolerant single page: trigram candidates reranked by edit similarity"""
+        grams = sorted(set().union(*(_trigrams(term) for term in terms)))
+        if not grams:
+            return {'customers': [], 'next_cursor': None, 'fuzzy': True, 'total': 0}
+
+        rows = conn.execute('''
+            SELECT c.* FROM customers_fts
+            JOIN customers c ON c.id = customers_fts.rowid
+            WHERE customers_fts MATCH ?
+            ORDER BY rank
+            LIMIT ?
+        ''', (' OR '.join(_quote(gram) for gram in grams), FUZZY_CANDIDATES)).fetchall()
+
+        scored = []
+        for row in rows:
+            customer = dict(row)
+            similarity = _similarity(terms, customer)
+            if similarity >= FUZZY_MIN_SIMILARITY:
+                scored.append((similarity, customer))
+        scored.sort(key=lambda item: (-item[0], item[1]['id']))
+
+        customers = [customer for _, customer in scored[:limit]]
+        return {'customers': customers, 'next_cursor': None, 'fuzzy': True, 'total': len(customers)}
+
+    def _search_scan(self, conn: sqlite3.Connection, terms: List[str], limit: int, cursor: Optional[str],
+                     offset: int) -> Dict:
+        """LIKE scan for queries the index cannot serve, newest first"""
+        clauses, params = [], []
+        for term in terms:
+            clauses.append('(unique_id LIKE ? OR name LIKE ? OR email LIKE ?)')
+            params += [f'%{term}%'] * 3
+        where = ' AND '.join(clauses) or '1 = 1'
+        filter_params = list(params)
+
+        if cursor:
+            after = decode_cursor(cursor)
+            where += ' AND (created_at < ? OR (created_at = ? AND id < ?))'
+            params += [after['created_at'], after['created_at'], after['id']]
+        params += [limit + 1, 0 if cursor else offset]
+
+        rows = conn.execute(f'''
+            SELECT * FROM customers WHERE {where}
+            ORDER BY created_at DESC, id DESC
+            LIMIT ? OFFSET ?
+        ''', params).fetchall()
+        customers = [dict(row) for row in rows[:limit]]
+
+        result = {'customers': customers, 'next_cursor': None, 'fuzzy': False}
+        if len(rows) > limit:
+            last = customers[-1]
+            result['next_cursor'] = encode_cursor({'created_at': last['created_at'], 'id': last['id']})
+        if not cursor:
+            result['total'] = conn.execute(f"SELECT COUNT(*) FROM customers WHERE {' AND '.join(clauses) or '1 = 1'}",
+                                           filter_params).fetchone()[0]
+        return result
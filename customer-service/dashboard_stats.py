@@ -0,0 +1,202 @@
+"""
+Dashboard Stats
+Trigger-maintained counters behind the dashboard stats and compliance report endpoints
+"""
+
+import sqlite3
+import logging
+from typing import Dict, List
+
+logger = logging.getLogger(__name__)
+
+# Actions the compliance report counts as blocked operations
+BLOCKED_ACTIONS = ('DELETE_ATTEMPTED', 'EMAIL_CHANGE_ATTEMPTED')
+
+STATS_SCHEMA = '''
+    CREATE TABLE IF NOT EXISTS stats_counters (
+        name TEXT PRIMARY KEY,
+        value INTEGER NOT NULL DEFAULT 0
+    );
+
+    -- Rows per metric per hour ('YYYY-MM-DD HH', the timestamp's first 13 characters)
+    CREATE TABLE IF NOT EXISTS stats_hourly (
+        metric TEXT NOT NULL,
+        hour TEXT NOT NULL,
+        count INTEGER NOT NULL DEFAULT 0,
+        PRIMARY KEY (metric, hour)
+    );
+
+    CREATE TABLE IF NOT EXISTS stats_audit_actions (
+        source TEXT NOT NULL,
+        action TEXT NOT NULL,
+        count INTEGER NOT NULL DEFAULT 0,
+        first_occurrence TEXT,
+        last_occurrence TEXT,
+        PRIMARY KEY (source, action)
+    );
+
+    CREATE INDEX IF NOT EXISTS idx_tickets_status_updated_at ON tickets(status, updated_at);
+'''
+
+STATS_TRIGGERS = '''
+    CREATE TRIGGER IF NOT EXISTS stats_customers_insert AFTER INSERT ON customers BEGIN
+        INSERT INTO stats_counters (name, value) VALUES ('customers', 1)
+        ON CONFLICT (name) DO UPDATE SET value = value + 1;
+        INSERT INTO stats_hourly (metric, hour, count) VALUES ('customers_created', substr(new.created_at, 1, 13), 1)
+        ON CONFLICT (metric, hour) DO UPDATE SET count = count + 1;
+    END;
+
+    CREATE TRIGGER IF NOT EXISTS stats_customers_delete AFTER DELETE ON customers BEGIN
+        UPDATE stats_counters SET value = value - 1 WHERE name = 'customers';
+        UPDATE stats_hourly SET count = count - 1
+        WHERE metric = 'customers_created' AND hour = substr(old.created_at, 1, 13);
+    END;
+
+    CREATE TRIGGER IF NOT EXISTS stats_customers_update AFTER UPDATE OF created_at ON customers BEGIN
+        UPDATE stats_hourly SET count = count - 1
+        WHERE metric = 'customers_created' AND hour = substr(old.created_at, 1, 13);
+        INSERT INTO stats_hourly (metric, hour, count) VALUES ('customers_created', substr(new.created_at, 1, 13), 1)
+        ON CONFLICT (metric, hour) DO UPDATE SET count = count + 1;
+    END;
+
+    CREATE TRIGGER IF NOT EXISTS stats_tickets_insert AFTER INSERT ON tickets BEGIN
+        INSERT INTO stats_counters (name, value) VALUES ('tickets:' || coalesce(new.status, ''), 1)
+        ON CONFLICT (name) DO UPDATE SET value = value + 1;
+        INSERT INTO stats_hourly (metric, hour, count)
+        SELECT 'tickets_resolved', substr(new.updated_at, 1, 13), 1 WHERE new.status = 'resolved'
+        ON CONFLICT (metric, hour) DO UPDATE SET count = count + 1;
+    END;
+
+    CREATE TRIGGER IF NOT EXISTS stats_tickets_update AFTER UPDATE OF status, updated_at ON tickets BEGIN
+        UPDATE stats_counters SET value = value - 1 WHERE name = 'tickets:' || coalesce(old.status, '');
+        INSERT INTO stats_counters (name, value) VALUES ('tickets:' || coalesce(new.status, ''), 1)
+        ON CONFLICT (name) DO UPDATE SET value = value + 1;
+        UPDATE stats_hourly SET count = count - 1
+        WHERE old.status = 'resolved' AND metric = 'tickets_resolved' AND hour = substr(old.updated_at, 1, 13);
+        INSERT INTO stats_hourly (metric, hour, count)
+        SELECT 'tickets_resolved', substr(new.updated_at, 1, 13), 1 WHERE new.status = 'resolved'
+        ON CONFLICT (metric, hour) DO UPDATE SET count = count + 1;
+    END;
+
+    CREATE TRIGGER IF NOT EXISTS stats_tickets_delete AFTER DELETE ON tickets BEGIN
+        UPDATE stats_counters SET value = value - 1 WHERE name = 'tickets:' || coalesce(old.status, '');
+        UPDATE stats_hourly SET count = count - 1
+        WHERE old.status = 'resolved' AND metric = 'tickets_resolved' AND hour = substr(old.updated_at, 1, 13);
+    END;
+
+    CREATE TRIGGER IF NOT EXISTS stats_audit_logs_insert AFTER INSERT ON audit_logs BEGIN
+        INSERT INTO stats_audit_actions (source, action, count, first_occurrence, last_occurrence)
+        VALUES ('audit_logs', new.action, 1, new.timestamp, new.timestamp)
+        ON CONFLICT (source, action) DO UPDATE SET
+            count = count + 1,
+            first_occurrence = min(coalesce(first_occurrence, excluded.first_occurrence), excluded.first_occurrence),
+            last_occurrence = max(coalesce(last_occurrence, excluded.last_occurrence), excluded.last_occurrence);
+    END;
+
+    CREATE TRIGGER IF NOT EXISTS stats_user_audit_trail_insert AFTER INSERT ON user_audit_trail BEGIN
+        INSERT INTO stats_audit_actions (source, action, count, first_occurrence, last_occurrence)
+        VALUES ('user_audit_trail', new.action, 1, new.timestamp, new.timestamp)
+        ON CONFLICT (source, action) DO UPDATE SET
+            count = count + 1,
+            first_occurrence = min(coalesce(first_occurrence, excluded.first_occurrence), excluded.first_occurrence),
+            last_occurrence = max(coalesce(last_occurrence, excluded.last_occurrence), excluded.last_occurrence);
+    END;
+
+    CREATE TRIGGER IF NOT EXISTS stats_permanent_records_insert AFTER INSERT ON permanent_user_records BEGIN
+        INSERT INTO stats_counters (name, value) VALUES ('permanent_records', 1)
+        ON CONFLICT (name) DO UPDATE SET value = value + 1;
+    END;
+'''
+
+# Recomputes every counter from the source tables
+STATS_REBUILD = '''
+    DELETE FROM stats_counters;
+    DELETE FROM stats_hourly;
+    DELETE FROM stats_audit_actions;
+
+    INSERT INTO stats_counters (name, value) SELECT 'customers', COUNT(*) FROM customers;
+    INSERT INTO stats_counters (name, value) SELECT 'permanent_records', COUNT(*) FROM permanent_user_records;
+    INSERT INTO stats_counters (name, value)
+    SELECT 'tickets:' || coalesce(status, ''), COUNT(*) FROM tickets GROUP BY 1;
+
+    INSERT INTO stats_hourly (metric, hour, count)
+    SELECT 'customers_created', substr(created_at, 1, 13), COUNT(*) FROM customers GROUP BY 2;
+    INSERT INTO stats_hourly (metric, hour, count)
+    SELECT 'tickets_resolved', substr(updated_at, 1, 13), COUNT(*) FROM tickets WHERE status = 'resolved' GROUP BY 2;
+
+    INSERT INTO stats_audit_actions (source, action, count, first_occurrence, last_occurrence)
+    SELECT 'audit_logs', action, COUNT(*), MIN(timestamp), MAX(timestamp) FROM audit_logs GROUP BY action;
+    INSERT INTO stats_audit_actions (source, action, count, first_occurrence, last_occurrence)
+    SELECT 'user_audit_trail', action, COUNT(*), MIN(timestamp), MAX(timestamp) FROM user_audit_trail GROUP BY action;
+'''
+
+
+class DashboardStats:
+    """Counters for the dashboard and compliance endpoints, kept current by triggers.
+
+    Every insert, update or delete on the counted tables adjusts a counter
+    in the same transaction, whichever code path made it, so reads never
+    scan the source tables. Rolling "last 24 hours" figures add up the
+    hourly buckets after the window start and count only the partial
+    first hour from the (indexed) source table. That gives the same answer
+    as the old ``> datetime('now', '-1 day')`` scans.
+    """
+
+    def init_schema(self, conn: sqlite3.Connection):
+        """Create the counter tables and triggers, backfilling them the first time"""
+        exists = conn.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'stats_counters'").fetchone()
+        conn.executescript(STATS_SCHEMA)
+        conn.executescript(STATS_TRIGGERS)
+        if not exists:
+            self.rebuild(conn)
+        conn.commit()
+
+    def rebuild(self, conn: sqlite3.Connection):
+        """Recompute every counter from scratch, e.g. after rows were changed with triggers off"""
+        conn.executescript(f'BEGIN; {STATS_REBUILD} COMMIT;')
+        logger.info("Dashboard stats rebuilt from source tables")
+
+    def _counter(self, conn: sqlite3.Connection, name: str) -> int:
+        row = conn.execute('SELECT value FROM stats_counters WHERE name = ?', (name,)).fetchone()
+        return row[0] if row else 0
+
+    def _last_day(self, conn: sqlite3.Connection, metric: str, table: str, column: str, where: str = '') -> int:
+        """Rows of ``metric`` with ``column`` after now - 1 day"""
+        start = conn.execute("SELECT datetime('now', '-1 day')").fetchone()[0]
+        start_hour = start[:13]
+        full_hours = conn.execute('''
+            SELECT COALESCE(SUM(count), 0) FROM stats_hourly WHERE metric = ? AND hour > ?
+        ''', (metric, start_hour)).fetchone()[0]
+        # Only the first, partial hour is counted from the source rows
+        partial_hour = conn.execute(f'''
+            SELECT COUNT(*) FROM {table}
+            WHERE {where} {column} > ? AND {column} < ?
+        ''', (start, start_hour + '~')).fetchone()[0]
+        return full_hours + partial_hour
+
+    def dashboard(self, conn: sqlite3.Connection) -> Dict[str, int]:
+        return {
+            'total_customers': self._counter(conn, 'customers'),
+            'new_customers_today': self._last_day(conn, 'customers_created', 'customers', 'created_at'),
+            'open_tickets': self._counter(conn, 'tickets:open'),
+            'resolved_tickets_today': self._last_day(conn, 'tickets_resolved', 'tickets', 'updated_at',
+                                                     "status = 'resolved' AND"),
+        }
+
+    def audit_actions(self, conn: sqlite3.Connection, source: str) -> List[tuple]:
+        """(action, count, first_occurrence, last_occurrence) per action in ``source``"""
+        return conn.execute('''
+            SELECT action, count, first_occurrence, last_occurrence
+            FROM stats_audit_actions
+            WHERE source = ? AND count > 0
+            ORDER BY action
+        ''', (source,)).fetchall()
+
+    def compliance(self, conn: sqlite3.Connection) -> Dict:
+        audit_summary = self.audit_actions(conn, 'audit_logs')
+        return {
+            'audit_summary': audit_summary,
+            'user_changes': [(row[0], row[1]) for row in self.audit_actions(conn, 'user_audit_trail')],
+            'permanent_records_count': self._counter(conn, 'permanent_records'),
+            'blocked_operations': sum(row[1] for row in audit_summary if row[0] in BLOCKED_ACTIONS),
+        }
@@ -0,0 +1,264 @@
+"""
+Database Pool
+Pooled WAL-mode SQLite connections and a batching audit write queue for the customer service API
+"""
+
+import time
+import queue
+import atexit
+import sqlite3
+import logging
+import threading
+from contextlib import contextmanager
+from typing import List, Optional, Sequence, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Audit fsync policy -> synchronous level of the writer's connection. In WAL mode FULL syncs the
+# log on every batch commit; NORMAL only syncs at checkpoints, so a power loss can drop recent batches
+AUDIT_FSYNC_POLICIES = {'batch': 'FULL', 'checkpoint': 'NORMAL'}
+
+# OperationalError messages worth retrying; anything else (no such table, syntax) will never succeed
+TRANSIENT_ERRORS = ('locked', 'busy', 'disk i/o', 'unable to open', 'disk is full')
+
+
+class ConnectionPool:
+    """A bounded pool of long-lived SQLite connections in WAL mode.
+
+    Requests check a connection out instead of connecting per call, so the
+    open cost and SQLite's per-connection statement cache are paid once.
+    WAL lets readers run while a writer commits, and busy_timeout makes
+    writers queue for the lock instead of failing with "database is locked".
+    """
+
+    def __init__(self, db_path: str, max_size: int = 16, busy_timeout_ms: int = 5000,
+                 cached_statements: int = 256):
+        self.db_path = db_path
+        self.max_size = max_size
+        self.busy_timeout_ms = busy_timeout_ms
+        self.cached_statements = cached_statements
+        self._idle: queue.LifoQueue = queue.LifoQueue()
+        self._connections: List[sqlite3.Connection] = []
+        self._lock = threading.Lock()
+
+    def connect(self) -> sqlite3.Connection:
+        """A new connection with the pool's settings that is not tracked by the pool"""
+        conn = sqlite3.connect(
+            self.db_path,
+            timeout=self.busy_timeout_ms / 1000,
+            check_same_thread=False,
+            cached_statements=self.cached_statements
+        )
+        conn.execute('PRAGMA journal_mode=WAL')
+        conn.execute('PRAGMA synchronous=NORMAL')
+        conn.execute(f'PRAGMA busy_timeout={int(self.busy_timeout_ms)}')
+        return conn
+
+    def checkout(self, timeout: Optional[float] = None) -> sqlite3.Connection:
+        """An idle connection, a new one while under max_size, or the next one released"""
+        try:
+            return self._idle.get_nowait()
+        except queue.Empty:
+            pass
+        with self._lock:
+            if len(self._connections) < self.max_size:
+                conn = self.connect()
+                self._connections.append(conn)
+                return conn
+        try:
+            return self._idle.get(timeout=timeout if timeout is not None else self.busy_timeout_ms / 1000)
+        except queue.Empty:
+            raise sqlite3.OperationalError(f'No pooled connection to {self.db_path} became available')
+
+    def release(self, conn: sqlite3.Connection):
+        """Return a connection, rolling back anything its borrower left uncommitted"""
+        try:
+            if conn.in_transaction:
+                conn.rollback()
+            conn.row_factory = None
+        except sqlite3.Error as e:
+            logger.warning(f"Discarding broken pooled connection to {self.db_path}: {e}")
+            with self._lock:
+                if conn in self._connections:
+                    self._connections.remove(conn)
+            return
+        self._idle.put(conn)
+
+    @contextmanager
+    def connection(self):
+        """Borrow a connection for the duration of a block"""
+        conn = self.checkout()
+        try:
+            yield conn
+        finally:
+            self.release(conn)
+
+    def close(self):
+        """Close every connection opened through this pool"""
+        with self._lock:
+            for conn in self._connections:
+                try:
+                    conn.close()
+                except sqlite3.Error as e:
+                    logger.warning(f"Error closing connection to {self.db_path}: {e}")
+            self._connections = []
+        self._idle = queue.LifoQueue()
+
+
+class AuditWriteQueue:
+    """Append-only audit pipeline: a bounded in-memory buffer drained by one background writer.
+
+    Request handlers only enqueue, so audit latency is off every customer
+    mutation and an entry never waits on the write lock its own request
+    holds. The writer commits up to ``max_batch`` entries per transaction on
+    a dedicated connection whose fsync behaviour follows ``fsync``.
+
+    Entries are never dropped for transient errors: a failed batch is retried
+    with backoff, and while it is, a full buffer blocks ``submit`` instead of
+    growing without bound. A single FIFO writer keeps commit order equal to
+    submission order. Entries still buffered when the process is killed are
+    lost; a clean shutdown drains them through ``close``.
+
+    Entries are numbered as they are queued and the writer counts those it
+    has finished, so ``flush`` waits only for entries queued before it and
+    gives up after ``flush_timeout`` seconds rather than hanging a reader.
+    """
+
+    def __init__(self, pool: ConnectionPool, max_batch: int = 500, max_delay: float = 0.05,
+                 max_pending: int = 10000, fsync: str = 'batch', max_backoff: float = 2.0,
+                 flush_timeout: float = 2.0):
+        if fsync not in AUDIT_FSYNC_POLICIES:
+            raise ValueError(f"fsync must be one of {sorted(AUDIT_FSYNC_POLICIES)}, got {fsync!r}")
+        self.pool = pool
+        self.max_batch = max_batch
+        self.max_delay = max_delay
+        self.fsync = fsync
+        self.max_backoff = max_backoff
+        self.flush_timeout = flush_timeout
+        self._queue: queue.Queue = queue.Queue(maxsize=max_pending)
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+        # Entries queued / finished by the writer (committed or rejected); FIFO makes the first
+        # ``_done`` queued entries exactly the finished ones
+        self._progress = threading.Condition()
+        self._queued = 0
+        self._done = 0
+        self.written = 0
+        atexit.register(self.close)
+
+    def submit(self, sql: str, params: Sequence):
+        """Queue one INSERT; blocks while the buffer is full (backpressure)"""
+        self._ensure_started()
+        item = (sql, tuple(params))
+        with self._progress:
+            while True:
+                try:
+                    # Queued and numbered together, so sequence numbers follow queue order
+                    self._queue.put_nowait(item)
+                    self._queued += 1
+                    return
+                except queue.Full:
+                    if not self._progress.wait(timeout=self.max_backoff):
+                        logger.warning(f"Audit buffer full ({self._queue.maxsize} entries), waiting for the writer")
+
+    def pending(self) -> int:
+        return self._queue.qsize()
+
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        """Wait until the entries queued before this call are written; False if ``timeout`` ran out first"""
+        timeout = self.flush_timeout if timeout is None else timeout
+        with self._progress:
+            target = self._queued
+            if self._progress.wait_for(lambda: self._done >= target, timeout=timeout):
+                return True
+            logger.warning(f"Audit flush timed out after {timeout:.2f}s with "
+                           f"{target - self._done} earlier entries still unwritten")
+            return False
+
+    def close(self):
+        """Drain the queue and stop the writer thread"""
+        with self._lock:
+            thread, self._thread = self._thread, None
+        if thread is not None and thread.is_alive():
+            self._queue.put(None)
+            thread.join()
+
+    def _ensure_started(self):
+        # Started lazily so a pre-forking server creates the thread in each worker, not the master
+        if self._thread is None or not self._thread.is_alive():
+            with self._lock:
+                if self._thread is None or not self._thread.is_alive():
+                    self._thread = threading.Thread(target=self._run, name='audit-writer', daemon=True)
+                    self._thread.start()
+
+    def _next_batch(self) -> Tuple[List[Tuple[str, tuple]], bool]:
+        first = self._queue.get()
+        if first is None:
+            return [], True
+        batch = [first]
+        stop = False
+        while len(batch) < self.max_batch:
+            try:
+                item = self._queue.get(timeout=self.max_delay)
+            except queue.Empty:
+                break
+            if item is None:
+                stop = True
+                break
+            batch.append(item)
+        return batch, stop
+
+    def _open(self) -> sqlite3.Connection:
+        backoff = self.max_delay
+        while True:
+            try:
+                conn = self.pool.connect()
+                conn.execute(f'PRAGMA synchronous={AUDIT_FSYNC_POLICIES[self.fsync]}')
+                return conn
+            except sqlite3.OperationalError as e:
+                logger.warning(f"Audit writer cannot open {self.pool.db_path}, retrying in {backoff:.2f}s: {e}")
+                time.sleep(backoff)
+                backoff = min(backoff * 2, self.max_backoff)
+
+    def _run(self):
+        conn = self._open()
+        try:
+            while True:
+                batch, stop = self._next_batch()
+                if batch:
+                    self._write(conn, batch)
+                    with self._progress:
+                        self._done += len(batch)
+                        self._progress.notify_all()
+                    for _ in batch:
+                        self._queue.task_done()
+                if stop:
+                    self._queue.task_done()
+                    return
+        finally:
+            conn.close()
+
+    def _write(self, conn: sqlite3.Connection, batch: List[Tuple[str, tuple]]):
+        backoff = self.max_delay
+        while True:
+            try:
+                with conn:
+                    for sql, params in batch:
+                        conn.execute(sql, params)
+                self.written += len(batch)
+                return
+            except sqlite3.Error as e:
+                if any(marker in str(e).lower() for marker in TRANSIENT_ERRORS):
+                    # Locked or I/O trouble is transient: keep the batch and its order, retry
+                    logger.warning(f"Audit batch of {len(batch)} not committed, retrying in {backoff:.2f}s: {e}")
+                    time.sleep(backoff)
+                    backoff = min(backoff * 2, self.max_backoff)
+                elif len(batch) > 1:
+                    # A malformed entry would fail forever; commit the rest one by one around it
+                    logger.error(f"Audit batch of {len(batch)} rejected, writing entries individually: {e}")
+                    for entry in batch:
+                        self._write(conn, [entry])
+                    return
+                else:
+                    logger.error(f"Rejected audit entry {batch[0][1]!r}: {e}")
+                    return
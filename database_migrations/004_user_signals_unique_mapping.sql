@@ -0,0 +1,19 @@
+-- Migration: Unique (user_id, signal_id) on user_signals for bulk delivery tracking
+-- Missing user-signal mappings are inserted set-based with ON CONFLICT DO NOTHING,
+-- which needs a unique index on the pair (the ORM model already declares unique_user_signal)
+
+-- Drop duplicate mappings, keeping the delivered (then earliest) row of each pair
+DELETE FROM user_signals
+WHERE id IN (
+    SELECT id FROM (
+        SELECT id, ROW_NUMBER() OVER (
+            PARTITION BY user_id, signal_id
+            ORDER BY delivered DESC NULLS LAST, created_at ASC NULLS LAST, id
+        ) AS duplicate_rank
+        FROM user_signals
+    ) ranked
+    WHERE duplicate_rank > 1
+);
+
+-- Add unique index for the user-signal pair
+CREATE UNIQUE INDEX IF NOT EXISTS unique_user_signal ON user_signals (user_id, signal_id);
@@ -14,6 +14,8 @@ from datetime import datetime, timedelta
 from typing import Dict, Any, List
 import traceback
 
+from request_instrumentation import install_queue_logging
+
 class EnhancedBackendLogger:
     """Enhanced logging system for backend services with separate log files"""
     
@@ -90,6 +92,13 @@ class EnhancedBackendLogger:
         
         # Create service-specific logger
         self.logger = logging.getLogger(self.service_name)
+        json_logger = logging.getLogger(f"{self.service_name}_json")
+        json_logger.addHandler(self.handlers['json'])
+        json_logger.setLevel(logging.INFO)
+        
+        # File I/O happens on a background listener thread, not in request handlers
+        install_queue_logging(logger)
+        install_queue_logging(json_logger)
         
     def log_request(self, method: str, path: str, headers: Dict, body: Any = None, 
                    user_id: str = None, ip: str = None, request_id: str = None):
@@ -223,11 +232,7 @@ class EnhancedBackendLogger:
         """Log structured JSON data"""
         try:
             json_str = json.dumps(data, default=str)
-            # Create a custom logger for JSON output
-            json_logger = logging.getLogger(f"{self.service_name}_json")
-            json_logger.addHandler(self.handlers['json'])
-            json_logger.setLevel(logging.INFO)
-            json_logger.info(json_str)
+            logging.getLogger(f"{self.service_name}_json").info(json_str)
         except Exception as e:
             self.logger.error(f"Failed to log JSON data: {e}")
 
@@ -10,7 +10,7 @@ import logging
 import traceback
 import time
 import json
-from datetime import datetime, timedelta
+from datetime import datetime
 from typing import Dict, Any, Optional, List, Callable, Union
 from flask import Flask, request, jsonify, g, session, Response
 from flask_cors import CORS
@@ -28,6 +28,69 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+class ErrorRateRing:
+    """Per-second error counters over a sliding window, overall and per error type.
+    
+    One slot per second of the window, reused round-robin. Running totals
+    are adjusted as errors are recorded and as slots fall out of the window,
+    so rate and threshold queries cost O(1) however many errors the window
+    holds, instead of rescanning the error history.
+    """
+    
+    def __init__(self, window_seconds: int = 300, clock: Callable[[], float] = time.monotonic):
+        self.window_seconds = window_seconds
+        self._clock = clock
+        self._slot_totals = [0] * window_seconds
+        self._slot_types: List[Optional[Dict[str, int]]] = [None] * window_seconds
+        self._head: Optional[int] = None  # latest second the ring has advanced to
+        self.total = 0
+        self.by_type: Dict[str, int] = defaultdict(int)
+        self._lock = threading.Lock()
+    
+    def _advance(self, now: float) -> int:
+        second = int(now)
+        if self._head is None:
+            self._head = second
+        elif second > self._head:
+            # Expire every slot that now belongs to a second outside the window (all of them after a long gap)
+            for expired in range(max(self._head + 1, second - self.window_seconds + 1), second + 1):
+                slot = expired % self.window_seconds
+                self.total -= self._slot_totals[slot]
+                self._slot_totals[slot] = 0
+                if self._slot_types[slot]:
+                    for error_type, count in self._slot_types[slot].items():
+                        self.by_type[error_type] -= count
+                        if not self.by_type[error_type]:
+                            del self.by_type[error_type]
+                self._slot_types[slot] = None
+            self._head = second
+        return self._head
+    
+    def record(self, error_type: str):
+        """Count one error of error_type in the current second"""
+        with self._lock:
+            slot = self._advance(self._clock()) % self.window_seconds
+            self._slot_totals[slot] += 1
+            if self._slot_types[slot] is None:
+                self._slot_types[slot] = defaultdict(int)
+            self._slot_types[slot][error_type] += 1
+            self.total += 1
+            self.by_type[error_type] += 1
+    
+    def count(self, error_type: str = None) -> int:
+        """Errors (of error_type, or all) recorded within the window"""
+        with self._lock:
+            self._advance(self._clock())
+            return self.by_type.get(error_type, 0) if error_type else self.total
+    
+    def snapshot(self) -> Dict[str, Any]:
+        """Per-type counts and the per-second totals, oldest second first"""
+        with self._lock:
+            head = self._advance(self._clock())
+            per_second = [self._slot_totals[second % self.window_seconds]
+                          for second in range(head - self.window_seconds + 1, head + 1)]
+            return {'total': self.total, 'by_type': dict(self.by_type), 'per_second': per_second}
+
 class ErrorMetrics:
     """Track error metrics and patterns"""
     
@@ -39,6 +102,7 @@ class ErrorMetrics:
         self.last_error_time = {}
         self.error_rate_window = 300  # 5 minutes
         self.error_rate_threshold = 10  # errors per window
+        self.error_rates = ErrorRateRing(self.error_rate_window)
     
     def record_error(self, error_type: str, error_message: str, context: str = "", 
                     severity: str = "medium", user_id: str = None):
@@ -58,6 +122,7 @@ class ErrorMetrics:
         
         self.error_counts[error_type] += 1
         self.error_history.append(error_record)
+        self.error_rates.record(error_type)
         self.last_error_time[error_type] = datetime.utcnow()
         
         # Track error patterns
@@ -69,17 +134,7 @@ class ErrorMetrics:
     
     def get_error_rate(self, error_type: str = None) -> float:
         """Get error rate for a specific type or overall"""
-        cutoff_time = datetime.utcnow() - timedelta(seconds=self.error_rate_window)
-        
-        if error_type:
-            recent_errors = [e for e in self.error_history 
-                           if e['type'] == error_type and 
-                           datetime.fromisoformat(e['timestamp']) > cutoff_time]
-        else:
-            recent_errors = [e for e in self.error_history 
-                           if datetime.fromisoformat(e['timestamp']) > cutoff_time]
-        
-        return len(recent_errors) / (self.error_rate_window / 60)  # errors per minute
+        return self.error_rates.count(error_type) / (self.error_rate_window / 60)  # errors per minute
     
     def is_error_rate_high(self, error_type: str = None) -> bool:
         """Check if error rate is above threshold"""
@@ -87,14 +142,47 @@ class ErrorMetrics:
     
     def get_error_summary(self) -> Dict[str, Any]:
         """Get summary of error metrics"""
+        error_rate = self.get_error_rate()
         return {
             'total_errors': len(self.error_history),
             'error_counts': dict(self.error_counts),
             'error_patterns': dict(self.error_patterns),
-            'recent_error_rate': self.get_error_rate(),
-            'high_error_rate': self.is_error_rate_high(),
+            'recent_error_rate': error_rate,
+            'high_error_rate': error_rate > self.error_rate_threshold,
             'last_errors': list(self.error_history)[-10:] if self.error_history else []
         }
+    
+    def get_rate_breakdown(self) -> Dict[str, Any]:
+        """Error rates per type and percentiles of errors per second over the rate window"""
+        snapshot = self.error_rates.snapshot()
+        minutes = self.error_rate_window / 60
+        per_second = sorted(snapshot['per_second'])
+        
+        def percentile(fraction: float) -> int:
+            return per_second[min(int(len(per_second) * fraction), len(per_second) - 1)]
+        
+        return {
+            'window_seconds': self.error_rate_window,
+            'threshold_per_minute': self.error_rate_threshold,
+            'total_errors': snapshot['total'],
+            'error_rate': snapshot['total'] / minutes,
+            'high_error_rate': snapshot['total'] / minutes > self.error_rate_threshold,
+            'by_type': {
+                error_type: {
+                    'count': count,
+                    'error_rate': count / minutes,
+                    'share': count / snapshot['total'],
+                    'high_error_rate': count / minutes > self.error_rate_threshold
+                }
+                for error_type, count in sorted(snapshot['by_type'].items(), key=lambda item: -item[1])
+            },
+            'errors_per_second': {
+                'p50': percentile(0.50),
+                'p90': percentile(0.90),
+                'p99': percentile(0.99),
+                'max': per_second[-1]
+            }
+        }
 
 class ErrorRecovery:
     """Handle error recovery and mitigation strategies"""
@@ -463,6 +551,10 @@ class ErrorHandlingMiddleware:
         """Get error metrics summary"""
         return self.error_metrics.get_error_summary()
     
+    def get_error_rate_metrics(self) -> Dict[str, Any]:
+        """Get windowed error rate breakdown"""
+        return self.error_metrics.get_rate_breakdown()
+    
     def register_error_handler(self, error_type: str, handler: Callable):
         """Register custom error handler"""
         self.error_handlers[error_type] = handler
@@ -556,6 +648,15 @@ def create_middleware_app():
             'timestamp': datetime.utcnow().isoformat()
         }), 200
     
+    @app.route('/api/error/metrics/rates', methods=['GET'])
+    def get_error_rate_metrics():
+        """Get error rates per type and errors-per-second percentiles"""
+        return jsonify({
+            'success': True,
+            'rates': error_middleware.get_error_rate_metrics(),
+            'timestamp': datetime.utcnow().isoformat()
+        }), 200
+    
     return app, error_middleware
 
 if __name__ == '__main__':
@@ -0,0 +1,116 @@
+#!/usr/bin/env python3
+"""
+Benchmark for bot price ingest
+Compares connect-per-tick SQLite writes with the pooled, batched BotStorage path
+"""
+
+import os
+import time
+import random
+import sqlite3
+import argparse
+import tempfile
+import logging
+from datetime import datetime
+
+from forex_bot_system import ForexBotSystem
+
+logging.getLogger('forex_bot_system').setLevel(logging.WARNING)
+
+
+def make_ticks(pairs, rounds):
+    symbols = [f"PAIR{i:03d}" for i in range(pairs)]
+    rates = {symbol: random.uniform(0.5, 2.0) for symbol in symbols}
+    for _ in range(rounds):
+        batch = []
+        for symbol in symbols:
+            rates[symbol] *= 1 + random.gauss(0, 0.0005)
+            batch.append({'symbol': symbol, 'base_currency': symbol[:3], 'quote_currency': 'USD',
+                          'rate': rates[symbol], 'previous_rate': rates[symbol], 'change_percent': 0.0,
+                          'high_24h': rates[symbol], 'low_24h': rates[symbol], 'volume_24h': 0.0})
+        yield batch
+
+
+def ingest_connect_per_tick(db_path, ticks):
+    """The previous write path: one connection and commit per tick"""
+    bot = ForexBotSystem(db_path)  # creates the schema
+    count = 0
+    for batch in ticks:
+        for data in batch:
+            now = datetime.now().isoformat()
+            conn = sqlite3.connect(db_path)
+            cursor = conn.cursor()
+            cursor.execute('''
+                INSERT OR REPLACE INTO forex_pairs
+                (symbol, base_currency, quote_currency, current_rate, previous_rate,
+                 change_percent, high_24h, low_24h, volume_24h, last_updated)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+            ''', (data['symbol'], data['base_currency'], data['quote_currency'], data['rate'],
+                  data['previous_rate'], data['change_percent'], data['high_24h'], data['low_24h'],
+                  data['volume_24h'], now))
+            cursor.execute('''
+                INSERT INTO price_history (symbol, price, timestamp)
+                VALUES (?, ?, ?)
+            ''', (data['symbol'], data['rate'], now))
+            conn.commit()
+            conn.close()
+            count += 1
+    bot.storage.close()
+    return count
+
+
+def ingest_pooled_per_tick(db_path, ticks):
+    bot = ForexBotSystem(db_path)
+    count = 0
+    for batch in ticks:
+        for data in batch:
+            bot.update_forex_data([data])
+            count += 1
+    bot.storage.close()
+    return count
+
+
+def ingest_batched(db_path, ticks):
+    bot = ForexBotSystem(db_path)
+    count = 0
+    for batch in ticks:
+        bot.update_forex_data(batch)
+        count += len(batch)
+    bot.storage.close()
+    return count
+
+
+def time_history_reads(db_path, pairs, reads):
+    bot = ForexBotSystem(db_path)
+    started = time.perf_counter()
+    for i in range(reads):
+        bot.get_price_history(f"PAIR{i % pairs:03d}", limit=100)
+    elapsed = time.perf_counter() - started
+    bot.storage.close()
+    return elapsed / reads
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark bot price ingest')
+    parser.add_argument('--pairs', type=int, default=50)
+    parser.add_argument('--rounds', type=int, default=40)
+    parser.add_argument('--reads', type=int, default=2000)
+    args = parser.parse_args()
+
+    random.seed(7)
+    with tempfile.TemporaryDirectory() as tmp:
+        for name, ingest in [('connect per tick', ingest_connect_per_tick),
+                             ('pooled per tick', ingest_pooled_per_tick),
+                             ('pooled, batched', ingest_batched)]:
+            db_path = os.path.join(tmp, f"{name.replace(' ', '_').replace(',', '')}.db")
+            started = time.perf_counter()
+            count = ingest(db_path, make_ticks(args.pairs, args.rounds))
+            elapsed = time.perf_counter() - started
+            print(f"{name:18s} {count:7d} ticks in {elapsed:7.2f}s  -> {count / elapsed:10.0f} ticks/s")
+
+        read_latency = time_history_reads(db_path, args.pairs, args.reads)
+        print(f"get_price_history(limit=100): {read_latency * 1e6:.0f} us per call")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,100 @@
+#!/usr/bin/env python3
+"""
+Benchmark for server-pushed quotes
+Holds many /api/stream/quotes clients open against a fake upstream and counts upstream requests, which should
+follow the poll interval and distinct pairs rather than the number of connected clients
+"""
+
+import time
+import random
+import argparse
+import threading
+import logging
+
+import server
+from market_data_gateway import Quote
+
+logging.getLogger('werkzeug').setLevel(logging.WARNING)
+
+PAIRS = ['EUR/USD', 'GBP/USD', 'USD/JPY', 'USD/CHF', 'AUD/USD', 'USD/CAD', 'NZD/USD', 'EUR/GBP']
+
+
+class TickingUpstream:
+    """Stands in for yfinance: every request returns a moved price for each symbol and is counted"""
+
+    def __init__(self, delay):
+        self.delay = delay
+        self.requests = 0
+        self.symbols = 0
+        self._prices = {}
+        self._lock = threading.Lock()
+
+    def __call__(self, symbols):
+        time.sleep(self.delay)
+        quotes = {}
+        with self._lock:
+            self.requests += 1
+            self.symbols += len(symbols)
+            for symbol in symbols:
+                price = self._prices.get(symbol, random.uniform(0.6, 150)) * (1 + random.gauss(0, 0.0002))
+                self._prices[symbol] = price
+                quotes[symbol] = Quote(symbol=symbol, price=price, open=price, high=price, low=price, volume=0,
+                                       timestamp=f'{time.time():.3f}', previous_close=price)
+        return quotes
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark the SSE quote stream')
+    parser.add_argument('--clients', type=int, default=200)
+    parser.add_argument('--pairs', type=int, default=3, help='Pairs per client, drawn from a pool of 8')
+    parser.add_argument('--seconds', type=float, default=5.0)
+    parser.add_argument('--interval', type=float, default=0.5, help='Stream poll interval')
+    parser.add_argument('--delay', type=float, default=0.05, help='Fake upstream latency in seconds')
+    args = parser.parse_args()
+
+    upstream = TickingUpstream(args.delay)
+    server.market_data.fetcher = upstream
+    server.market_data.refresh_interval = 0
+    server.quote_streamer.interval = args.interval
+    # One process stands in for many workers here, so lift the per-worker cap on open streams
+    server.quote_stream_slots = threading.BoundedSemaphore(args.clients)
+    client = server.app.test_client()
+
+    events = []
+    distinct = set()
+    lock = threading.Lock()
+
+    def stream(index):
+        pairs = random.Random(index).sample(PAIRS, args.pairs)
+        with lock:
+            distinct.update(pairs)
+        response = client.get(f"/api/stream/quotes?pairs={','.join(pairs)}", buffered=False)
+        received = 0
+        deadline = time.monotonic() + args.seconds
+        for chunk in response.response:
+            received += chunk.count(b'event: quote')
+            if time.monotonic() >= deadline:
+                break
+        response.close()
+        with lock:
+            events.append(received)
+
+    threads = [threading.Thread(target=stream, args=(i,)) for i in range(args.clients)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    server.quote_streamer.close()
+
+    polls = server.quote_streamer.counters['polls']
+    print(f"{args.clients} clients x {args.pairs} pairs ({len(distinct)} distinct) for {args.seconds:.0f}s, "
+          f"polling every {args.interval}s")
+    print(f"  quote events delivered:  {sum(events)} ({sum(events) / len(events):.1f} per client)")
+    print(f"  upstream requests:       {upstream.requests} ({upstream.symbols} symbol fetches, {polls} polls)")
+    print(f"  client polling would be: {args.clients * args.pairs * args.seconds / args.interval:.0f} "
+          f"price requests at the same refresh rate")
+    print(f"  streamer: {server.quote_streamer.stats()}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,100 @@
+#!/usr/bin/env python3
+"""
+Benchmark for swing point detection in perform_smc_analysis
+Compares the original nested-loop scan with the rolling-window find_swing_points
+"""
+
+import time
+import argparse
+
+import numpy as np
+import pandas as pd
+
+from server import find_swing_points, perform_smc_analysis_batch
+
+
+def find_swing_points_loop(highs, lows, lookback):
+    """Original O(n*k) nested-loop swing detection, kept as the reference"""
+    major_swing_highs = []
+    major_swing_lows = []
+
+    for i in range(lookback, len(highs) - lookback):
+        is_swing_high = True
+        current_high = highs[i]
+        for j in range(i - lookback, i + lookback + 1):
+            if j != i and highs[j] >= current_high:
+                is_swing_high = False
+                break
+        if is_swing_high:
+            major_swing_highs.append({'index': i, 'price': current_high})
+
+        is_swing_low = True
+        current_low = lows[i]
+        for j in range(i - lookback, i + lookback + 1):
+            if j != i and lows[j] <= current_low:
+                is_swing_low = False
+                break
+        if is_swing_low:
+            major_swing_lows.append({'index': i, 'price': current_low})
+
+    return major_swing_highs, major_swing_lows
+
+
+def generate_candles(bars, seed=42):
+    """Random-walk OHLC series with rounded prices so ties occur"""
+    rng = np.random.default_rng(seed)
+    closes = np.round(1.1 + np.cumsum(rng.normal(0, 0.0005, bars)), 4)
+    spread = np.round(np.abs(rng.normal(0, 0.0003, bars)), 4)
+    return pd.DataFrame({
+        'time': pd.date_range('2024-01-01', periods=bars, freq='min'),
+        'open': closes,
+        'high': closes + spread,
+        'low': closes - spread,
+        'close': closes,
+        'volume': rng.integers(100, 1000, bars).astype(float),
+    })
+
+
+def best_of(fn, repeats):
+    timings = []
+    for _ in range(repeats):
+        started = time.perf_counter()
+        result = fn()
+        timings.append(time.perf_counter() - started)
+    return min(timings), result
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark swing point detection')
+    parser.add_argument('--bars', type=int, default=10000)
+    parser.add_argument('--lookback', type=int, default=50)
+    parser.add_argument('--repeats', type=int, default=3)
+    parser.add_argument('--symbols', type=int, default=20)
+    args = parser.parse_args()
+
+    data = generate_candles(args.bars)
+    highs = data['high'].values
+    lows = data['low'].values
+
+    loop_time, expected = best_of(lambda: find_swing_points_loop(highs, lows, args.lookback), args.repeats)
+    fast_time, actual = best_of(lambda: find_swing_points(highs, lows, args.lookback), args.repeats)
+
+    assert expected == actual, "rolling-window swing points differ from the reference loop"
+
+    print(f"Swing points on {args.bars} bars (lookback {args.lookback}): "
+          f"{len(actual[0])} highs, {len(actual[1])} lows")
+    print(f"  nested loop:    {loop_time * 1000:9.2f} ms")
+    print(f"  rolling window: {fast_time * 1000:9.2f} ms")
+    print(f"  speedup:        {loop_time / fast_time:9.1f}x")
+
+    datasets = {
+        (f"SYM{i}", timeframe): generate_candles(args.bars, seed=i)
+        for i in range(args.symbols) for timeframe in ('15m', '1h')
+    }
+    batch_time, results = best_of(lambda: perform_smc_analysis_batch(datasets), 1)
+    print(f"Batch SMC analysis of {len(results)} series: {batch_time * 1000:.2f} ms "
+          f"({batch_time * 1000 / len(results):.2f} ms per series)")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,178 @@
+#!/usr/bin/env python3
+"""
+Candle Store
+Persistent OHLCV storage for the forex data service, keyed by (symbol, interval)
+"""
+
+import os
+import re
+import logging
+import threading
+from typing import Dict, Optional
+
+import numpy as np
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+# One record per bar; time is UTC epoch nanoseconds
+CANDLE_DTYPE = np.dtype([
+    ('time', '<i8'),
+    ('open', '<f8'),
+    ('high', '<f8'),
+    ('low', '<f8'),
+    ('close', '<f8'),
+    ('volume', '<f8'),
+])
+
+OHLCV_COLUMNS = ['open', 'high', 'low', 'close', 'volume']
+
+
+class CandleStore:
+    """Columnar candle store backed by memory-mapped NumPy files.
+
+    Each (symbol, interval) series lives in its own ``.npy`` file holding a
+    structured array sorted by time. Reads map the file instead of loading it,
+    and writes go through a temp file plus ``os.replace`` so readers in other
+    gunicorn workers never see a half-written series.
+    """
+
+    def __init__(self, root_dir: str, max_bars: int = 50000):
+        self.root_dir = root_dir
+        self.max_bars = max_bars
+        self._locks: Dict[str, threading.Lock] = {}
+        self._locks_guard = threading.Lock()
+
+    def _path(self, symbol: str, interval: str) -> str:
+        safe_symbol = re.sub(r'[^A-Za-z0-9_.-]', '_', symbol.upper())
+        return os.path.join(self.root_dir, f"{safe_symbol}__{interval}.npy")
+
+    def _lock(self, path: str) -> threading.Lock:
+        with self._locks_guard:
+            if path not in self._locks:
+                self._locks[path] = threading.Lock()
+            return self._locks[path]
+
+    def load(self, symbol: str, interval: str) -> np.ndarray:
+        """Return the stored bars (memory-mapped), or an empty array"""
+        path = self._path(symbol, interval)
+        if not os.path.exists(path):
+            return np.empty(0, dtype=CANDLE_DTYPE)
+        try:
+            return np.load(path, mmap_mode='r')
+        except (OSError, ValueError) as e:
+            logger.error(f"Corrupt candle file {path}, ignoring it: {e}")
+            return np.empty(0, dtype=CANDLE_DTYPE)
+
+    def first_time(self, symbol: str, interval: str) -> Optional[pd.Timestamp]:
+        """Timestamp (UTC) of the oldest stored bar"""
+        bars = self.load(symbol, interval)
+        if len(bars) == 0:
+            return None
+        return pd.Timestamp(int(bars['time'][0]), unit='ns', tz='UTC')
+
+    def last_time(self, symbol: str, interval: str) -> Optional[pd.Timestamp]:
+        """Timestamp (UTC) of the newest stored bar"""
+        bars = self.load(symbol, interval)
+        if len(bars) == 0:
+            return None
+        return pd.Timestamp(int(bars['time'][-1]), unit='ns', tz='UTC')
+
+    def covers(self, symbol: str, interval: str, start=None, end=None) -> bool:
+        """Whether the stored series spans the whole [start, end] range"""
+        first = self.first_time(symbol, interval)
+        last = self.last_time(symbol, interval)
+        if first is None:
+            return False
+        if start is not None and _to_utc(start) < first:
+            return False
+        if end is not None and _to_utc(end) > last:
+            return False
+        return True
+
+    def append(self, symbol: str, interval: str, df: pd.DataFrame, replace: bool = False) -> int:
+        """Merge freshly fetched bars into the stored series.
+
+        Bars in ``df`` overwrite stored bars inside the time span they cover,
+        which refreshes the still-forming last candle. With ``replace`` the
+        stored series is discarded first (used when the gap to the last stored
+        bar is too large to close with a tail fetch). Returns the stored length.
+        """
+        new_bars = frame_to_bars(df)
+        if len(new_bars) == 0 and not replace:
+            return len(self.load(symbol, interval))
+
+        path = self._path(symbol, interval)
+        with self._lock(path):
+            if replace:
+                merged = new_bars
+            else:
+                existing = self.load(symbol, interval)
+                first_new, last_new = new_bars['time'][0], new_bars['time'][-1]
+                merged = np.concatenate([
+                    existing[existing['time'] < first_new],
+                    new_bars,
+                    existing[existing['time'] > last_new],
+                ])
+
+            if len(merged) > self.max_bars:
+                merged = merged[-self.max_bars:]
+
+            os.makedirs(self.root_dir, exist_ok=True)
+            tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+            with open(tmp_path, 'wb') as f:
+                np.save(f, np.ascontiguousarray(merged))
+            os.replace(tmp_path, path)
+
+        return len(merged)
+
+    def read(self, symbol: str, interval: str, start=None, end=None,
+             limit: Optional[int] = None) -> pd.DataFrame:
+        """Return stored bars as a DataFrame with a naive UTC ``time`` column"""
+        bars = self.load(symbol, interval)
+        times = bars['time']
+
+        lo = 0 if start is None else int(np.searchsorted(times, _to_utc(start).value, side='left'))
+        hi = len(bars) if end is None else int(np.searchsorted(times, _to_utc(end).value, side='right'))
+        if limit is not None:
+            lo = max(lo, hi - limit)
+
+        window = np.array(bars[lo:hi])
+        df = pd.DataFrame({col: window[col] for col in OHLCV_COLUMNS})
+        df.insert(0, 'time', pd.to_datetime(window['time'], unit='ns'))
+        return df
+
+    def stats(self) -> Dict:
+        """Number of stored series and their total size on disk"""
+        if not os.path.isdir(self.root_dir):
+            return {'series': 0, 'bytes': 0}
+        files = [f for f in os.listdir(self.root_dir) if f.endswith('.npy')]
+        return {
+            'series': len(files),
+            'bytes': sum(os.path.getsize(os.path.join(self.root_dir, f)) for f in files),
+        }
+
+
+def _to_utc(value) -> pd.Timestamp:
+    ts = pd.Timestamp(value)
+    return ts.tz_localize('UTC') if ts.tzinfo is None else ts.tz_convert('UTC')
+
+
+def frame_to_bars(df: pd.DataFrame) -> np.ndarray:
+    """Convert a DataFrame with time/open/high/low/close[/volume] to sorted bars"""
+    if df is None or df.empty:
+        return np.empty(0, dtype=CANDLE_DTYPE)
+
+    times = pd.to_datetime(df['time'], utc=True).dt.tz_localize(None)
+    bars = np.empty(len(df), dtype=CANDLE_DTYPE)
+    bars['time'] = times.to_numpy(dtype='datetime64[ns]').astype(np.int64)
+    for col in OHLCV_COLUMNS:
+        if col in df.columns:
+            bars[col] = pd.to_numeric(df[col], errors='coerce').to_numpy(dtype=float)
+        else:
+            bars[col] = np.nan
+
+    bars = bars[np.argsort(bars['time'], kind='stable')]
+    # Keep the last occurrence of duplicated timestamps
+    keep = np.append(bars['time'][1:] != bars['time'][:-1], True)
+    return bars[keep]
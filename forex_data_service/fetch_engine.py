@@ -0,0 +1,129 @@
+#!/usr/bin/env python3
+"""
+Fetch Engine
+Bounded concurrent upstream fetching with per-provider limits for the forex data service
+"""
+
+import time
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor, Future, wait
+from contextlib import contextmanager
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, Hashable, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class TokenBucket:
+    """Thread-safe token bucket; ``acquire`` blocks until a token is available"""
+
+    def __init__(self, rate: float, capacity: Optional[float] = None):
+        self.rate = float(rate)
+        self.capacity = float(capacity if capacity is not None else max(rate, 1.0))
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self, now: float):
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def try_acquire(self, tokens: float = 1.0) -> float:
+        """Take tokens if available; otherwise return the seconds to wait"""
+        with self._lock:
+            self._refill(time.monotonic())
+            if self._tokens >= tokens:
+                self._tokens -= tokens
+                return 0.0
+            return (tokens - self._tokens) / self.rate
+
+    def acquire(self, tokens: float = 1.0):
+        while True:
+            delay = self.try_acquire(tokens)
+            if delay <= 0:
+                return
+            time.sleep(delay)
+
+
+class Provider:
+    """Concurrency and request-rate limits for one upstream API"""
+
+    def __init__(self, name: str, max_concurrency: int, rate_per_second: float,
+                 burst: Optional[float] = None):
+        self.name = name
+        self.semaphore = threading.BoundedSemaphore(max_concurrency)
+        self.bucket = TokenBucket(rate_per_second, burst)
+
+    @contextmanager
+    def slot(self):
+        with self.semaphore:
+            self.bucket.acquire()
+            yield
+
+
+@dataclass
+class FetchResult:
+    """Outcome of one upstream fetch"""
+    value: Any = None
+    error: Optional[str] = None
+    duration_ms: float = 0.0
+    timed_out: bool = False
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None and not self.timed_out
+
+
+class FetchEngine:
+    """Runs upstream fetches on a shared bounded thread pool.
+
+    Each fetch is tagged with a provider; the provider's semaphore bounds how
+    many of its calls run at once and its token bucket spaces them out, so no
+    fixed sleeps are needed between requests.
+    """
+
+    def __init__(self, max_workers: int = 16):
+        self.executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='fetch')
+        self.providers: Dict[str, Provider] = {}
+
+    def register_provider(self, name: str, max_concurrency: int, rate_per_second: float,
+                          burst: Optional[float] = None) -> Provider:
+        provider = Provider(name, max_concurrency, rate_per_second, burst)
+        self.providers[name] = provider
+        return provider
+
+    def submit(self, provider_name: str, fn: Callable, *args, **kwargs) -> Future:
+        """Schedule ``fn`` under the provider's limits; the future yields a FetchResult"""
+        provider = self.providers[provider_name]
+
+        def run() -> FetchResult:
+            started = time.perf_counter()
+            try:
+                with provider.slot():
+                    value = fn(*args, **kwargs)
+                return FetchResult(value=value, duration_ms=(time.perf_counter() - started) * 1000)
+            except Exception as e:
+                logger.error(f"{provider.name} fetch failed: {str(e)}")
+                return FetchResult(error=str(e), duration_ms=(time.perf_counter() - started) * 1000)
+
+        return self.executor.submit(run)
+
+    def gather(self, futures: Dict[Hashable, Future], timeout: Optional[float] = None) -> Dict[Hashable, FetchResult]:
+        """Wait for all futures up to ``timeout`` seconds, returning partial results.
+
+        Fetches still queued at the timeout are cancelled so later batches do
+        not wait behind them; ones already running finish in the background.
+        """
+        started = time.perf_counter()
+        wait(list(futures.values()), timeout=timeout)
+        elapsed_ms = (time.perf_counter() - started) * 1000
+
+        results = {}
+        for key, future in futures.items():
+            if future.done() and not future.cancelled():
+                results[key] = future.result()
+            else:
+                future.cancel()
+                results[key] = FetchResult(error='Timed out', duration_ms=elapsed_ms, timed_out=True)
+        return results
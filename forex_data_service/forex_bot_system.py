@@ -5,21 +5,27 @@ Analyzes forex data and generates trading signals
 """
 
 import os
+import sys
 import json
 import logging
 import threading
 import time
 from datetime import datetime, timedelta
-from typing import Dict, List, Optional, Tuple
+from typing import Dict, List, Optional
 import requests
-import sqlite3
-import numpy as np
 from dataclasses import dataclass
 
+# Storage and the incremental indicator engine are shared with the crypto bot at the repository root
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from bot_storage import BotStorage
+from indicator_engine import IndicatorEngine
+
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+INDICATOR_OPTIONS = {'sma_periods': (20, 50)}
+
 @dataclass
 class ForexPair:
     """Forex pair data structure"""
@@ -58,14 +64,19 @@ class ForexBotSystem:
             'stop_loss_percent': 0.02,
             'take_profit_percent': 0.04
         }
+        self.indicators = IndicatorEngine(**INDICATOR_OPTIONS)
+        self.storage = BotStorage(db_path)
         self.init_database()
         self.start_monitoring()
     
     def init_database(self):
         """Initialize database for forex data and signals"""
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        
+        with self.storage.transaction() as conn:
+            self._create_tables(conn.cursor())
+        logger.info("Forex bot database initialized")
+    
+    def _create_tables(self, cursor):
+        """Create tables and indexes if they don't exist"""
         # Create forex pairs table
         cursor.execute('''
             CREATE TABLE IF NOT EXISTS forex_pairs (
@@ -108,35 +119,42 @@ class ForexBotSystem:
             )
         ''')
         
-        conn.commit()
-        conn.close()
-        logger.info("Forex bot database initialized")
+        # Covering index for the latest-prices-per-symbol lookup
+        cursor.execute('''
+            CREATE INDEX IF NOT EXISTS idx_price_history_symbol_timestamp
+            ON price_history (symbol, timestamp, price)
+        ''')
     
     def add_forex_pair(self, pair: ForexPair):
         """Add or update a forex pair"""
-        self.forex_pairs[pair.symbol] = pair
+        self.add_forex_pairs([pair])
+    
+    def add_forex_pairs(self, pairs: List[ForexPair]):
+        """Add or update several forex pairs in a single transaction"""
+        for pair in pairs:
+            self.forex_pairs[pair.symbol] = pair
+            self.indicators.update(
+                pair.symbol, pair.current_rate,
+                history_loader=lambda symbol=pair.symbol: self.get_price_history(
+                    symbol, limit=self.indicators.history_size)
+            )
         
         # Save to database
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        
-        cursor.execute('''
-            INSERT OR REPLACE INTO forex_pairs 
-            (symbol, base_currency, quote_currency, current_rate, previous_rate, 
-             change_percent, high_24h, low_24h, volume_24h, last_updated)
-            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-        ''', (pair.symbol, pair.base_currency, pair.quote_currency, pair.current_rate,
-              pair.previous_rate, pair.change_percent, pair.high_24h, pair.low_24h,
-              pair.volume_24h, pair.last_updated.isoformat()))
-        
-        # Add to price history
-        cursor.execute('''
-            INSERT INTO price_history (symbol, price, timestamp)
-            VALUES (?, ?, ?)
-        ''', (pair.symbol, pair.current_rate, pair.last_updated.isoformat()))
-        
-        conn.commit()
-        conn.close()
+        with self.storage.transaction() as conn:
+            conn.executemany('''
+                INSERT OR REPLACE INTO forex_pairs 
+                (symbol, base_currency, quote_currency, current_rate, previous_rate, 
+                 change_percent, high_24h, low_24h, volume_24h, last_updated)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+            ''', [(pair.symbol, pair.base_currency, pair.quote_currency, pair.current_rate,
+                   pair.previous_rate, pair.change_percent, pair.high_24h, pair.low_24h,
+                   pair.volume_24h, pair.last_updated.isoformat()) for pair in pairs])
+            
+            # Add to price history
+            conn.executemany('''
+                INSERT INTO price_history (symbol, price, timestamp)
+                VALUES (?, ?, ?)
+            ''', [(pair.symbol, pair.current_rate, pair.last_updated.isoformat()) for pair in pairs])
     
     def get_forex_pair(self, symbol: str) -> Optional[ForexPair]:
         """Get forex pair by symbol"""
@@ -152,14 +170,11 @@ class ForexBotSystem:
         if not pair:
             return None
         
-        # Get price history for analysis
-        prices = self.get_price_history(symbol, limit=100)
-        if len(prices) < 20:
+        # Technical indicators are maintained incrementally as prices arrive
+        indicators = self.indicators.snapshot(symbol)
+        if not indicators:
             return None
         
-        # Calculate technical indicators
-        indicators = self.calculate_indicators(prices)
-        
         # Generate signal based on indicators
         signal = self.generate_signal(symbol, pair, indicators)
         
@@ -169,90 +184,6 @@ class ForexBotSystem:
         
         return None
     
-    def calculate_indicators(self, prices: List[float]) -> Dict:
-        """Calculate technical indicators from price data"""
-        if len(prices) < 20:
-            return {}
-        
-        prices_array = np.array(prices)
-        
-        # Simple Moving Averages
-        sma_20 = np.mean(prices_array[-20:])
-        sma_50 = np.mean(prices_array[-50:]) if len(prices) >= 50 else sma_20
-        
-        # Exponential Moving Averages
-        ema_12 = self.calculate_ema(prices_array, 12)
-        ema_26 = self.calculate_ema(prices_array, 26)
-        
-        # RSI
-        rsi = self.calculate_rsi(prices_array)
-        
-        # MACD
-        macd_line = ema_12 - ema_26
-        signal_line = self.calculate_ema(np.array([macd_line]), 9)[0] if len(prices) >= 35 else 0
-        
-        # Bollinger Bands
-        bb_upper, bb_lower = self.calculate_bollinger_bands(prices_array, 20)
-        
-        return {
-            'sma_20': float(sma_20),
-            'sma_50': float(sma_50),
-            'ema_12': float(ema_12),
-            'ema_26': float(ema_26),
-            'rsi': float(rsi),
-            'macd': float(macd_line),
-            'macd_signal': float(signal_line),
-            'bb_upper': float(bb_upper),
-            'bb_lower': float(bb_lower),
-            'current_price': float(prices[-1])
-        }
-    
-    def calculate_ema(self, prices: np.ndarray, period: int) -> float:
-        """Calculate Exponential Moving Average"""
-        if len(prices) < period:
-            return float(prices[-1])
-        
-        alpha = 2 / (period + 1)
-        ema = prices[0]
-        
-        for price in prices[1:]:
-            ema = alpha * price + (1 - alpha) * ema
-        
-        return ema
-    
-    def calculate_rsi(self, prices: np.ndarray, period: int = 14) -> float:
-        """Calculate Relative Strength Index"""
-        if len(prices) < period + 1:
-            return 50.0
-        
-        deltas = np.diff(prices)
-        gains = np.where(deltas > 0, deltas, 0)
-        losses = np.where(deltas < 0, -deltas, 0)
-        
-        avg_gain = np.mean(gains[-period:])
-        avg_loss = np.mean(losses[-period:])
-        
-        if avg_loss == 0:
-            return 100.0
-        
-        rs = avg_gain / avg_loss
-        rsi = 100 - (100 / (1 + rs))
-        
-        return rsi
-    
-    def calculate_bollinger_bands(self, prices: np.ndarray, period: int = 20) -> Tuple[float, float]:
-        """Calculate Bollinger Bands"""
-        if len(prices) < period:
-            return prices[-1], prices[-1]
-        
-        sma = np.mean(prices[-period:])
-        std = np.std(prices[-period:])
-        
-        upper_band = sma + (2 * std)
-        lower_band = sma - (2 * std)
-        
-        return upper_band, lower_band
-    
     def generate_signal(self, symbol: str, pair: ForexPair, indicators: Dict) -> Optional[TradingSignal]:
         """Generate trading signal based on indicators"""
         if not indicators:
@@ -335,19 +266,13 @@ class ForexBotSystem:
         self.signals.append(signal)
         
         # Save to database
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        
-        cursor.execute('''
+        self.storage.execute('''
             INSERT INTO forex_signals 
             (symbol, signal_type, confidence, price, indicators, reasoning)
             VALUES (?, ?, ?, ?, ?, ?)
         ''', (signal.symbol, signal.signal_type, signal.confidence, signal.price,
               json.dumps(signal.indicators), signal.reasoning))
         
-        conn.commit()
-        conn.close()
-        
         logger.info(f"New signal: {signal.signal_type.upper()} {signal.symbol} "
                    f"(confidence: {signal.confidence:.2f})")
     
@@ -357,18 +282,14 @@ class ForexBotSystem:
     
     def get_price_history(self, symbol: str, limit: int = 100) -> List[float]:
         """Get price history for a symbol"""
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        
-        cursor.execute('''
+        rows = self.storage.fetchall('''
             SELECT price FROM price_history 
             WHERE symbol = ? 
             ORDER BY timestamp DESC 
             LIMIT ?
         ''', (symbol, limit))
         
-        prices = [row[0] for row in cursor.fetchall()]
-        conn.close()
+        prices = [row[0] for row in rows]
         
         return prices[::-1]  # Return in chronological order
     
@@ -392,6 +313,7 @@ class ForexBotSystem:
     
     def update_forex_data(self, forex_data: List[Dict]):
         """Update forex data from external source"""
+        pairs = []
         for data in forex_data:
             try:
                 pair = ForexPair(
@@ -408,10 +330,16 @@ class ForexBotSystem:
                 )
                 
                 if pair.symbol:
-                    self.add_forex_pair(pair)
+                    pairs.append(pair)
                     
             except Exception as e:
                 logger.error(f"Error processing forex data: {e}")
+        
+        if pairs:
+            try:
+                self.add_forex_pairs(pairs)
+            except Exception as e:
+                logger.error(f"Error saving forex data: {e}")
     
     def get_system_status(self) -> Dict:
         """Get system status"""
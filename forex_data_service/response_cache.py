@@ -0,0 +1,115 @@
+#!/usr/bin/env python3
+"""
+Response Cache
+Namespaced, TTL-aware LRU cache bounded by size for the forex data service
+"""
+
+import json
+import time
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, Optional, Tuple
+
+# Candle series for short timeframes go stale quickly; daily and longer bars barely move
+TIMEFRAME_TTL_SECONDS = {
+    '1m': 20,
+    '2m': 30,
+    '3m': 30,
+    '5m': 60,
+    '15m': 120,
+    '30m': 300,
+    '1h': 300,
+    '2h': 600,
+    '4h': 900,
+    '1d': 3600,
+    '1w': 6 * 3600,
+    '1wk': 6 * 3600,
+    '1mo': 24 * 3600,
+}
+DEFAULT_TTL_SECONDS = 60
+
+
+def ttl_for_timeframe(timeframe: Optional[str]) -> int:
+    """TTL for cached data of the given bar timeframe"""
+    return TIMEFRAME_TTL_SECONDS.get(timeframe, DEFAULT_TTL_SECONDS)
+
+
+class ResponseCache:
+    """LRU cache keyed by (namespace, key) with a per-entry TTL.
+
+    Entries are evicted least-recently-used first once the estimated JSON size
+    of all entries exceeds ``max_bytes``. Expired entries are dropped lazily on
+    access, so one endpoint's stale data never clears another endpoint's cache.
+    """
+
+    def __init__(self, max_bytes: int = 64 * 1024 * 1024):
+        self.max_bytes = max_bytes
+        self._entries: "OrderedDict[Tuple[str, Hashable], Tuple[Any, float, int]]" = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self._counters: Dict[str, Dict[str, int]] = {}
+
+    def _count(self, namespace: str, counter: str):
+        counters = self._counters.setdefault(namespace, {'hits': 0, 'misses': 0, 'evictions': 0, 'expirations': 0})
+        counters[counter] += 1
+
+    def _remove(self, entry_key: Tuple[str, Hashable]):
+        _, _, size = self._entries.pop(entry_key)
+        self._bytes -= size
+
+    def get(self, namespace: str, key: Hashable) -> Optional[Any]:
+        """Return the cached value, or None on a miss or expired entry"""
+        entry_key = (namespace, key)
+        with self._lock:
+            entry = self._entries.get(entry_key)
+            if entry is None:
+                self._count(namespace, 'misses')
+                return None
+            value, expires_at, _ = entry
+            if expires_at <= time.monotonic():
+                self._remove(entry_key)
+                self._count(namespace, 'expirations')
+                self._count(namespace, 'misses')
+                return None
+            self._entries.move_to_end(entry_key)
+            self._count(namespace, 'hits')
+            return value
+
+    def set(self, namespace: str, key: Hashable, value: Any, ttl: float = DEFAULT_TTL_SECONDS):
+        """Store a JSON-serializable value for ``ttl`` seconds"""
+        size = len(json.dumps(value, default=str))
+        if size > self.max_bytes:
+            return
+
+        entry_key = (namespace, key)
+        with self._lock:
+            if entry_key in self._entries:
+                self._remove(entry_key)
+            self._entries[entry_key] = (value, time.monotonic() + ttl, size)
+            self._bytes += size
+
+            while self._bytes > self.max_bytes:
+                oldest_key = next(iter(self._entries))
+                self._remove(oldest_key)
+                self._count(oldest_key[0], 'evictions')
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def stats(self) -> Dict:
+        """Entry count, size and per-namespace hit/miss/eviction counters"""
+        with self._lock:
+            namespaces: Dict[str, Dict[str, int]] = {
+                namespace: {**counters, 'entries': 0}
+                for namespace, counters in self._counters.items()
+            }
+            for namespace, _ in self._entries:
+                stats = namespaces.setdefault(namespace, {'hits': 0, 'misses': 0, 'evictions': 0,
+                                                          'expirations': 0, 'entries': 0})
+                stats['entries'] += 1
+            return {
+                'entries': len(self._entries),
+                'bytes': self._bytes,
+                'max_bytes': self.max_bytes,
+                'namespaces': namespaces,
+            }
@@ -1,4 +1,4 @@
-from flask import Flask, jsonify, request
+from flask import Flask, Response, jsonify, request, stream_with_context
 from flask_cors import CORS
 import yfinance as yf
 import pandas as pd
@@ -9,11 +9,26 @@ from requests.adapters import HTTPAdapter
 from urllib3.util.retry import Retry
 import logging
 import os
+import sys
+import json
+import threading
+from concurrent.futures import ThreadPoolExecutor, CancelledError, as_completed, TimeoutError as FuturesTimeoutError
 from datetime import datetime, timedelta
 import random
 
+from candle_store import CandleStore
+from fetch_engine import FetchEngine
+from response_cache import ResponseCache, ttl_for_timeframe
+
+# Shared instrumentation lives at the repository root
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from market_data_gateway import MarketDataGateway
+from quote_stream import QuoteStreamer, format_sse
+from request_instrumentation import RequestInstrumentation, install_queue_logging
+
 # Configure logging
 logging.basicConfig(level=logging.INFO)
+install_queue_logging()
 logger = logging.getLogger(__name__)
 
 # Configure requests session with retry strategy
@@ -35,6 +50,13 @@ session = create_session_with_retries()
 
 app = Flask(__name__)
 
+# Per-route latency histograms and upstream timings, served at /metrics
+instrumentation = RequestInstrumentation(app, service='forex_data_service')
+instrumentation.track_requests_session(session)
+
+# Latest yfinance quotes: cached for a few seconds, one upstream fetch per symbol however many requests ask
+market_data = MarketDataGateway(ttl=float(os.environ.get('QUOTE_TTL_SECONDS', 5)), trace=instrumentation.upstream)
+
 # Enhanced CORS configuration for deployment
 CORS(app, 
      origins=["*"], 
@@ -61,10 +83,37 @@ def after_request(response):
     response.headers.add('Access-Control-Allow-Methods', 'GET,PUT,POST,DELETE,OPTIONS')
     return response
 
-# Cache setup
-cache = {}
-cache_timestamp = 0
-CACHE_DURATION_SECONDS = 60  # Cache for 60 seconds
+# Cache setup: one namespace per endpoint, TTL per entry, LRU eviction by size
+CACHE_DURATION_SECONDS = 60  # Cache prices for 60 seconds
+CACHE_MAX_BYTES = int(os.environ.get('CACHE_MAX_BYTES', 64 * 1024 * 1024))
+FOREX_DATA_CACHE = 'forex-data'
+BULK_PRICE_CACHE = 'bulk-forex-price'
+cache = ResponseCache(max_bytes=CACHE_MAX_BYTES)
+
+# Persistent candle store; requests only fetch bars newer than the last stored one
+CANDLE_STORE_DIR = os.environ.get(
+    'CANDLE_STORE_DIR',
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), 'instance', 'candles')
+)
+candle_store = CandleStore(CANDLE_STORE_DIR)
+
+# yfinance intervals whose bars are calendar dates; they are stored at midnight of the exchange's date
+YFINANCE_DAILY_INTERVALS = ('1d', '5d', '1wk', '1mo', '3mo')
+
+BINANCE_MAX_KLINES = 1000  # Largest page Binance returns per klines request
+
+# Bounded concurrent upstream fetching, rate-limited per provider
+BULK_FETCH_TIMEOUT_SECONDS = float(os.environ.get('BULK_FETCH_TIMEOUT_SECONDS', 20))
+YFINANCE_BATCH_KEY = '__yfinance_batch__'
+fetch_engine = FetchEngine(max_workers=int(os.environ.get('FETCH_MAX_WORKERS', 16)))
+fetch_engine.register_provider('binance', max_concurrency=8, rate_per_second=10)
+fetch_engine.register_provider('yfinance', max_concurrency=2, rate_per_second=2)
+
+# Batch SMC analysis; crypto fetches enough candles to clear the 100-candle minimum
+ANALYSIS_CANDLES = 500
+ANALYZE_BATCH_MAX_SYMBOLS = int(os.environ.get('ANALYZE_BATCH_MAX_SYMBOLS', 500))
+analysis_executor = ThreadPoolExecutor(max_workers=int(os.environ.get('ANALYSIS_MAX_WORKERS', 4)),
+                                       thread_name_prefix='analysis')
 
 # Add root endpoint
 @app.route('/')
@@ -81,6 +130,7 @@ def root():
             '/api/bulk-forex-price',
             '/api/get-price',
             '/api/analyze-symbol',
+            '/api/analyze-symbols',
             '/api/forex-news',
             '/api/real-time-price/<pair>',
             '/api/real-time-prices'
@@ -94,7 +144,9 @@ def health_check():
         'status': 'healthy',
         'service': 'forex-data-service',
         'timestamp': time.time(),
-        'cache_size': len(cache)
+        'cache_size': len(cache),
+        'cache': cache.stats(),
+        'candle_store': candle_store.stats()
     })
 
 def format_symbol_for_yfinance(symbol):
@@ -143,6 +195,14 @@ def get_yfinance_interval(timeframe):
     }
     return timeframe_map.get(timeframe, '1h') # Default to '1h' if not found
 
+def get_binance_interval(timeframe):
+    """Maps frontend timeframe to a valid Binance kline interval."""
+    interval_map = {
+        '1m': '1m', '3m': '3m', '5m': '5m', '15m': '15m', '30m': '30m',
+        '1h': '1h', '4h': '4h', '1d': '1d', '1wk': '1w', '1mo': '1M',
+    }
+    return interval_map.get(timeframe, '1h')
+
 
 @app.route('/api/forex-data')
 def get_forex_data():
@@ -157,16 +217,15 @@ def get_forex_data():
 
         # Check cache first
         cache_key = f"{pair}_{timeframe}_{start_date}_{end_date}"
-        current_time = time.time()
-        
-        if cache_key in cache and (current_time - cache[cache_key]['timestamp']) < CACHE_DURATION_SECONDS:
+        cached_data = cache.get(FOREX_DATA_CACHE, cache_key)
+        if cached_data is not None:
             logger.info(f"Returning cached data for {pair}")
-            return jsonify(cache[cache_key]['data'])
+            return jsonify(cached_data)
 
         # Check if the pair is a crypto pair
         if pair.endswith('USDT'):
             try:
-                data = get_binance_klines(pair, timeframe, start_date, end_date)
+                data = get_stored_binance_klines(pair, timeframe, start_date, end_date)
                 if data is None or data.empty:
                     logger.warning(f"No Binance data found for {pair}")
                     return jsonify({'error': f'No data found for {pair}'}), 404
@@ -175,10 +234,7 @@ def get_forex_data():
                 result = data_copy.to_dict(orient='records')
                 
                 # Cache the result
-                cache[cache_key] = {
-                    'data': result,
-                    'timestamp': current_time
-                }
+                cache.set(FOREX_DATA_CACHE, cache_key, result, ttl=ttl_for_timeframe(timeframe))
                 
                 return jsonify(result)
             except Exception as e:
@@ -186,82 +242,40 @@ def get_forex_data():
                 return jsonify({'error': f'An error occurred while fetching data for {pair}.'}), 500
                 
         # Continue to yfinance processing for non-crypto pairs
-        return process_yfinance_data(pair, timeframe, start_date, end_date, cache_key, current_time)
+        return process_yfinance_data(pair, timeframe, start_date, end_date, cache_key)
         
     except Exception as e:
         logger.error(f"Unexpected error in get_forex_data: {str(e)}")
         return jsonify({'error': 'Internal server error occurred.'}), 500
 
-def process_yfinance_data(pair, timeframe, start_date, end_date, cache_key, current_time):
+def process_yfinance_data(pair, timeframe, start_date, end_date, cache_key):
     """Process yfinance data with error handling"""
     try:
         # Fallback to yfinance for non-crypto pairs
         formatted_pair = format_symbol_for_yfinance(pair)
         interval = get_yfinance_interval(timeframe)
-    
-        # Construct parameters for yfinance
-        params = {'interval': interval}
+
         if start_date and end_date:
-            params['start'] = start_date
-            params['end'] = end_date
+            if candle_store.covers(formatted_pair, interval, start_date, end_date):
+                data = candle_store.read(formatted_pair, interval, start_date, end_date)
+            else:
+                data = fetch_yfinance_history(pair, formatted_pair, {
+                    'interval': interval, 'start': start_date, 'end': end_date
+                })
         else:
-            # Default period if no date range is provided
-            params['period'] = '1mo' if interval in ['1d', '1wk', '1mo'] else '7d'
-
-        # Fetch data from yfinance with better error handling
-        try:
-            ticker = yf.Ticker(formatted_pair)
-            data = ticker.history(**params)
-        except Exception as yf_error:
-            logger.warning(f"yfinance Ticker failed for {pair}: {str(yf_error)}")
-            # Try alternative method
-            try:
-                data = yf.download(
-                    tickers=formatted_pair,
-                    **params,
-                    auto_adjust=False,
-                    progress=False,
-                    timeout=30
-                )
-            except Exception as download_error:
-                logger.error(f"yfinance download also failed for {pair}: {str(download_error)}")
-                # Return mock data to prevent 500 errors
-                return get_mock_forex_data(pair, timeframe)
-
-        if data.empty:
-            logger.warning(f"No data found for {pair} with the specified parameters. Trying with a different period.")
-            try:
-                params['period'] = '1y' # Try with a longer period
-                data = yf.download(
-                    tickers=formatted_pair,
-                    **params,
-                    auto_adjust=False,
-                    progress=False,
-                    timeout=30
-                )
-            except Exception as fallback_error:
-                logger.error(f"Fallback yfinance download failed for {pair}: {str(fallback_error)}")
-                # Return mock data to prevent 500 errors
-                return get_mock_forex_data(pair, timeframe)
+            data = get_stored_yfinance_history(pair, formatted_pair, interval)
 
-        if data.empty:
+        if data is None or data.empty:
             logger.warning(f"Still no data for {pair}, returning mock data")
             return get_mock_forex_data(pair, timeframe)
 
-        # Reset index to make datetime a column
-        data.reset_index(inplace=True)
-        data.rename(columns={'Datetime': 'time', 'Date': 'time'}, inplace=True)
-
         # Format the data
+        data = data.copy()
         data['time'] = data['time'].dt.strftime('%Y-%m-%d %H:%M:%S')
-        data.columns = data.columns.str.lower()
         result = data[['time', 'open', 'high', 'low', 'close', 'volume']].to_dict(orient='records')
 
         # Cache the result
-        cache[cache_key] = {
-            'data': result,
-            'timestamp': current_time
-        }
+        cache.set(FOREX_DATA_CACHE, cache_key, result, ttl=ttl_for_timeframe(timeframe))
 
         return jsonify(result)
         
@@ -270,6 +284,104 @@ def process_yfinance_data(pair, timeframe, start_date, end_date, cache_key, curr
         # Return mock data instead of 500 error
         return get_mock_forex_data(pair, timeframe)
 
+def download_yfinance_history(pair, formatted_pair, params):
+    """Download yfinance history, returning normalized OHLCV bars or None on failure"""
+    # Fetch data from yfinance with better error handling
+    try:
+        ticker = yf.Ticker(formatted_pair)
+        with instrumentation.upstream('yfinance', 'history'):
+            data = ticker.history(**params)
+    except Exception as yf_error:
+        logger.warning(f"yfinance Ticker failed for {pair}: {str(yf_error)}")
+        # Try alternative method
+        try:
+            with instrumentation.upstream('yfinance', 'download'):
+                data = yf.download(
+                    tickers=formatted_pair,
+                    **params,
+                    auto_adjust=False,
+                    progress=False,
+                    timeout=30
+                )
+        except Exception as download_error:
+            logger.error(f"yfinance download also failed for {pair}: {str(download_error)}")
+            return None
+
+    if data.empty:
+        return pd.DataFrame()
+
+    # Reset index to make datetime a column
+    data = data.reset_index()
+    data.rename(columns={'Datetime': 'time', 'Date': 'time'}, inplace=True)
+    data.columns = data.columns.str.lower()
+
+    times = pd.to_datetime(data['time'])
+    if params.get('interval') in YFINANCE_DAILY_INTERVALS:
+        # Keep the exchange's date: converting its midnight to UTC would move the bar to another hour or day
+        data['time'] = (times.dt.tz_localize(None) if times.dt.tz is not None else times).dt.normalize()
+    else:
+        # Store and serve intraday bars in naive UTC, like the Binance klines
+        data['time'] = pd.to_datetime(times, utc=True).dt.tz_localize(None)
+    return data[['time', 'open', 'high', 'low', 'close', 'volume']]
+
+def fetch_yfinance_history(pair, formatted_pair, params):
+    """Download yfinance history, retrying with a longer period when nothing comes back"""
+    data = download_yfinance_history(pair, formatted_pair, params)
+    if data is None or not data.empty:
+        return data
+
+    logger.warning(f"No data found for {pair} with the specified parameters. Trying with a different period.")
+    return download_yfinance_history(pair, formatted_pair, {**params, 'period': '1y'})
+
+def get_stored_yfinance_history(pair, formatted_pair, interval):
+    """Serve the default yfinance window from the candle store, fetching only the missing tail"""
+    period = '1mo' if interval in ['1d', '1wk', '1mo'] else '7d'
+    window_start = pd.Timestamp.now(tz='UTC') - pd.Timedelta(days=31 if period == '1mo' else 7)
+
+    last_time = candle_store.last_time(formatted_pair, interval)
+    # Daily series stored off midnight predate exchange-dated bars; refetch them rather than mix the two
+    misdated = last_time is not None and interval in YFINANCE_DAILY_INTERVALS and last_time != last_time.normalize()
+    if last_time is None or last_time < window_start or misdated:
+        data = fetch_yfinance_history(pair, formatted_pair, {'interval': interval, 'period': period})
+        if data is not None and not data.empty:
+            candle_store.append(formatted_pair, interval, data, replace=True)
+        return data
+
+    tail = download_yfinance_history(pair, formatted_pair, {
+        'interval': interval, 'start': last_time.to_pydatetime()
+    })
+    if tail is not None:
+        candle_store.append(formatted_pair, interval, tail)
+    else:
+        logger.warning(f"Serving stored candles for {pair}; tail refresh failed")
+    return candle_store.read(formatted_pair, interval, start=window_start)
+
+def get_stored_binance_klines(symbol, timeframe, start_date=None, end_date=None, limit=1000, deadline=None):
+    """Serve Binance klines from the candle store, fetching only the missing tail before ``deadline``"""
+    interval = get_binance_interval(timeframe)
+
+    if start_date or end_date:
+        if candle_store.covers(symbol, interval, start_date, end_date):
+            return candle_store.read(symbol, interval, start_date, end_date).head(limit)
+        return get_binance_klines(symbol, timeframe, start_date, end_date, limit=limit,
+                                  timeout=seconds_left(deadline))
+
+    last_time = candle_store.last_time(symbol, interval)
+    replace = last_time is None
+    if last_time is not None:
+        data = get_binance_klines(symbol, timeframe, start_date=last_time, limit=BINANCE_MAX_KLINES,
+                                  timeout=seconds_left(deadline))
+        # A full page means the gap to the stored bars was not closed; start over
+        replace = len(data) >= BINANCE_MAX_KLINES
+    if replace:
+        # Seed the store with a full page so later, larger reads are served from disk too
+        data = get_binance_klines(symbol, timeframe, limit=BINANCE_MAX_KLINES, timeout=seconds_left(deadline))
+        if data.empty:
+            return data
+
+    candle_store.append(symbol, interval, data, replace=replace)
+    return candle_store.read(symbol, interval, limit=limit)
+
 def get_mock_forex_data(pair, timeframe):
     """Generate mock forex data to prevent 500 errors"""
     try:
@@ -337,66 +449,119 @@ def get_bulk_forex_data():
     if not pairs:
         return jsonify({'error': 'The "pairs" parameter is required.'}), 400
 
-    pairs_list = pairs.split(',')
+    pairs_list = [p.strip() for p in pairs.split(',') if p.strip()]
+    crypto_pairs = [p for p in pairs_list if p.endswith('USDT')]
+    forex_pairs = [p for p in pairs_list if not p.endswith('USDT')]
+
+    # Binance klines run concurrently; all yfinance pairs go out in one batched download
+    futures = {}
+    for pair in crypto_pairs:
+        futures[pair] = fetch_engine.submit('binance', get_stored_binance_klines, pair, timeframe)
+    if forex_pairs:
+        futures[YFINANCE_BATCH_KEY] = fetch_engine.submit('yfinance', download_yfinance_batch, forex_pairs, timeframe)
+
+    outcomes = fetch_engine.gather(futures, timeout=BULK_FETCH_TIMEOUT_SECONDS)
     results = {}
+    timings = {}
+
+    for pair in crypto_pairs:
+        outcome = outcomes[pair]
+        timings[pair] = outcome.duration_ms
+        if outcome.ok and outcome.value is not None and not outcome.value.empty:
+            data = outcome.value.copy()
+            data['time'] = data['time'].dt.strftime('%Y-%m-%d %H:%M:%S')
+            results[pair] = data.to_dict(orient='records')
+        else:
+            if not outcome.ok:
+                logger.error(f"Error fetching Binance data for {pair}: {outcome.error}")
+            results[pair] = []
+
+    if forex_pairs:
+        outcome = outcomes[YFINANCE_BATCH_KEY]
+        for pair in forex_pairs:
+            timings[pair] = outcome.duration_ms
+            if not outcome.ok:
+                logger.error(f"Error fetching data for {pair}: {outcome.error}")
+                results[pair] = {'error': f'Failed to fetch data for {pair}'}
+            elif outcome.value.get(pair):
+                results[pair] = outcome.value[pair]
+            else:
+                logger.warning(f"No data returned for {pair}")
+                results[pair] = []
 
-    for pair in pairs_list:
-        if pair.endswith('USDT'):
-            try:
-                data = get_binance_klines(pair, timeframe)
-                data['time'] = data['time'].dt.strftime('%Y-%m-%d %H:%M:%S')
-                results[pair] = data.to_dict(orient='records')
-            except Exception as e:
-                logger.error(f"Error fetching Binance data for {pair}: {str(e)}")
+    response = jsonify(results)
+    response.headers['Server-Timing'] = format_server_timing(timings)
+    return response
+
+def download_yfinance_batch(pairs, timeframe):
+    """Download history for several yfinance pairs in a single request"""
+    formatted_pairs = {pair: format_symbol_for_yfinance(pair) for pair in pairs}
+    interval = get_yfinance_interval(timeframe)
+    period = '1mo' if interval in ['1d', '1wk', '1mo'] else '7d'
+
+    logger.info(f"Fetching bulk data for: {list(formatted_pairs.values())}")
+    with instrumentation.upstream('yfinance', 'download_batch'):
+        data = yf.download(
+            tickers=list(set(formatted_pairs.values())),
+            period=period,
+            interval=interval,
+            auto_adjust=False,
+            group_by='ticker',
+            threads=True,
+            progress=False
+        )
+
+    results = {}
+    for pair, formatted_pair in formatted_pairs.items():
+        if data.empty:
+            results[pair] = []
+            continue
+
+        # A single ticker may come back without the ticker column level
+        if isinstance(data.columns, pd.MultiIndex):
+            if formatted_pair not in data.columns.get_level_values(0):
                 results[pair] = []
+                continue
+            pair_data = data[formatted_pair]
         else:
-            # yfinance logic for non-crypto pairs
-            formatted_pair = format_symbol_for_yfinance(pair)
-            interval = get_yfinance_interval(timeframe)
-            period = '1mo' if interval in ['1d', '1wk', '1mo'] else '7d'
-            
-            try:
-                time.sleep(0.5) # Avoid rate limiting
-                logger.info(f"Fetching data for single pair: {pair} ({formatted_pair})")
-                ticker = yf.Ticker(formatted_pair)
-                data = ticker.history(
-                    period=period,
-                    interval=interval,
-                    auto_adjust=False
-                )
+            pair_data = data
 
-                if not data.empty:
-                    data = data.copy()
-                    data.reset_index(inplace=True)
-                    
-                    timestamp_col = 'Datetime' if 'Datetime' in data.columns else 'Date'
-                    
-                    if data[timestamp_col].dt.tz:
-                        data[timestamp_col] = data[timestamp_col].dt.tz_convert('UTC')
-                    else:
-                        data[timestamp_col] = data[timestamp_col].dt.tz_localize('UTC')
-                    
-                    data['time'] = data[timestamp_col].dt.strftime('%Y-%m-%d %H:%M:%S')
+        pair_data = pair_data.dropna(subset=['Open', 'High', 'Low', 'Close'], how='all').copy()
+        if pair_data.empty:
+            results[pair] = []
+            continue
 
-                    data.rename(columns={
-                        'Open': 'open', 'High': 'high', 'Low': 'low', 'Close': 'close', 'Volume': 'volume'
-                    }, inplace=True)
-                    
-                    required_cols = ['time', 'open', 'high', 'low', 'close']
-                    if 'volume' in data.columns:
-                        required_cols.append('volume')
-                    
-                    data.replace({np.nan: None}, inplace=True)
-                    results[pair] = data[required_cols].to_dict('records')
-                else:
-                    logger.warning(f"No data returned for {pair}")
-                    results[pair] = []
+        pair_data.reset_index(inplace=True)
+        timestamp_col = 'Datetime' if 'Datetime' in pair_data.columns else 'Date'
 
-            except Exception as e:
-                logger.error(f"Error fetching data for {pair}: {str(e)}")
-                results[pair] = {'error': f'Failed to fetch data for {pair}'}
+        if pair_data[timestamp_col].dt.tz:
+            pair_data[timestamp_col] = pair_data[timestamp_col].dt.tz_convert('UTC')
+        else:
+            pair_data[timestamp_col] = pair_data[timestamp_col].dt.tz_localize('UTC')
+
+        pair_data['time'] = pair_data[timestamp_col].dt.strftime('%Y-%m-%d %H:%M:%S')
+
+        pair_data.rename(columns={
+            'Open': 'open', 'High': 'high', 'Low': 'low', 'Close': 'close', 'Volume': 'volume'
+        }, inplace=True)
 
-    return jsonify(results)
+        required_cols = ['time', 'open', 'high', 'low', 'close']
+        if 'volume' in pair_data.columns:
+            required_cols.append('volume')
+
+        pair_data = pair_data[required_cols].astype(object)
+        pair_data = pair_data.where(pd.notna(pair_data), None)
+        results[pair] = pair_data.to_dict('records')
+
+    return results
+
+def format_server_timing(timings):
+    """Render per-pair fetch durations as a Server-Timing header value"""
+    entries = []
+    for pair, duration_ms in timings.items():
+        name = ''.join(c if c.isalnum() else '_' for c in pair)
+        entries.append(f'{name};desc="{pair}";dur={duration_ms:.1f}')
+    return ', '.join(entries)
 
 @app.route('/api/forex-price')
 def get_forex_price():
@@ -419,18 +584,15 @@ def get_forex_price():
     formatted_pair = format_symbol_for_yfinance(pair)
 
     try:
-        logger.info(f"Fetching price for {formatted_pair}")
-        ticker = yf.Ticker(formatted_pair)
-        
-        # Try to get recent data first (more reliable)
-        data = ticker.history(period='1d', interval='5m')
-        if not data.empty and not data['Close'].dropna().empty:
-            latest_price = data['Close'].dropna().iloc[-1]
-            return jsonify({'pair': pair, 'price': float(latest_price)})
+        # Try the shared recent-data quote first (more reliable)
+        quote = market_data.quote(formatted_pair)
+        if quote is not None:
+            return jsonify({'pair': pair, 'price': quote.price})
         
         # Fallback to ticker info
         try:
-            info = ticker.info
+            logger.info(f"No recent bars for {formatted_pair}, trying ticker info")
+            info = yf.Ticker(formatted_pair).info
             if info and isinstance(info, dict):
                 price = info.get('regularMarketPrice') or info.get('bid') or info.get('ask')
                 if price:
@@ -446,9 +608,6 @@ def get_forex_price():
 
 @app.route('/api/bulk-forex-price')
 def get_bulk_forex_price():
-    global cache, cache_timestamp
-    current_time = time.time()
-    
     pairs = request.args.get('pairs')
     if not pairs:
         return jsonify({'error': 'The "pairs" parameter is required.'}), 400
@@ -457,16 +616,13 @@ def get_bulk_forex_price():
     
     cached_results = {}
     pairs_to_fetch = []
-    # Check cache for all pairs
-    if current_time - cache_timestamp < CACHE_DURATION_SECONDS:
-        for pair in pairs_list:
-            if pair in cache:
-                cached_results[pair] = cache[pair]
-            else:
-                pairs_to_fetch.append(pair)
-    else:
-        pairs_to_fetch = pairs_list
-        cache.clear()
+    # Check cache for all pairs; each price expires on its own
+    for pair in pairs_list:
+        cached_price = cache.get(BULK_PRICE_CACHE, pair)
+        if cached_price is not None:
+            cached_results[pair] = cached_price
+        else:
+            pairs_to_fetch.append(pair)
 
     if pairs_to_fetch:
         fetched_data = {}
@@ -484,58 +640,25 @@ def get_bulk_forex_price():
                 data = response.json()
                 price_data = {'pair': pair, 'price': float(data['price'])}
                 fetched_data[pair] = price_data
-                cache[pair] = price_data
+                cache.set(BULK_PRICE_CACHE, pair, price_data, ttl=CACHE_DURATION_SECONDS)
             except Exception as e:
                 logger.error(f"Error fetching Binance price for {pair}: {str(e)}")
                 fetched_data[pair] = {'error': 'Failed to fetch data.'}
 
         # Fetch all forex pairs in a single bulk request using yfinance
         if forex_pairs:
-            formatted_forex_pairs = [format_symbol_for_yfinance(p) for p in forex_pairs]
-            try:
-                logger.info(f"Fetching bulk prices for: {formatted_forex_pairs}")
-                # Use yf.download for efficient bulk fetching of recent price data
-                data = yf.download(
-                    tickers=formatted_forex_pairs,
-                    period='1d',       # Get data for the last day
-                    interval='1m',     # Get the most recent minute-by-minute data
-                    auto_adjust=True,
-                    group_by='ticker', # Group data by ticker symbol
-                    threads=True       # Use multiple threads for faster downloads
-                )
-                
-                if not data.empty:
-                    for i, pair in enumerate(forex_pairs):
-                        formatted_pair = formatted_forex_pairs[i]
-                        
-                        # Access data for the specific ticker
-                        # When fetching a single ticker, yf.download doesn't create a multi-level index
-                        pair_data = data[formatted_pair] if len(formatted_forex_pairs) > 1 else data
-
-                        if not pair_data.empty and 'Close' in pair_data.columns:
-                            # Get the last valid price from the 'Close' column
-                            last_price = pair_data['Close'].dropna().iloc[-1] if not pair_data['Close'].dropna().empty else None
-                            if last_price is not None and pd.notna(last_price):
-                                price_data = {'pair': pair, 'price': float(last_price)}
-                                fetched_data[pair] = price_data
-                                cache[pair] = price_data # Update cache
-                            else:
-                                fetched_data[pair] = {'error': f'No recent price data for {pair}'}
-                        else:
-                            fetched_data[pair] = {'error': f'No data found for {pair}'}
+            formatted_forex_pairs = {p: format_symbol_for_yfinance(p) for p in forex_pairs}
+            logger.info(f"Fetching bulk prices for: {list(formatted_forex_pairs.values())}")
+            # One upstream request for every symbol not already held by the gateway
+            quotes = market_data.quotes(formatted_forex_pairs.values())
+            for pair, formatted_pair in formatted_forex_pairs.items():
+                quote = quotes.get(formatted_pair)
+                if quote is not None:
+                    price_data = {'pair': pair, 'price': quote.price}
+                    fetched_data[pair] = price_data
+                    cache.set(BULK_PRICE_CACHE, pair, price_data, ttl=CACHE_DURATION_SECONDS)
                 else:
-                    logger.warning(f"yf.download returned no data for pairs: {forex_pairs}")
-                    for pair in forex_pairs:
-                        fetched_data[pair] = {'error': f'No data returned from yfinance for {pair}'}
-
-            except Exception as e:
-                logger.error(f"Error fetching bulk forex prices with yfinance: {str(e)}")
-                for pair in forex_pairs:
-                    fetched_data[pair] = {'error': 'Failed to fetch data in bulk.'}
-
-        # Update cache timestamp if any new data was fetched
-        if fetched_data:
-            cache_timestamp = time.time()
+                    fetched_data[pair] = {'error': f'No recent price data for {pair}'}
 
         # Combine cached results with newly fetched data
         cached_results.update(fetched_data)
@@ -577,19 +700,13 @@ def get_real_time_price():
         formatted_symbol = format_symbol_for_yfinance(symbol)
         
         try:
-            logger.info(f"Fetching real-time price for {formatted_symbol}")
-            ticker = yf.Ticker(formatted_symbol)
-            
             # Get the most recent price data
-            data = ticker.history(period='1d', interval='1m')
-            if not data.empty:
-                latest_price = data['Close'].iloc[-1]
-                latest_time = data.index[-1]
-                
+            quote = market_data.quote(formatted_symbol)
+            if quote is not None:
                 return jsonify({
                     'symbol': symbol,
-                    'price': float(latest_price),
-                    'timestamp': latest_time.strftime('%Y-%m-%d %H:%M:%S'),
+                    'price': quote.price,
+                    'timestamp': datetime.fromisoformat(quote.timestamp).strftime('%Y-%m-%d %H:%M:%S'),
                     'source': 'yfinance'
                 })
             else:
@@ -612,7 +729,7 @@ def analyze_symbol():
             return jsonify({'error': 'Invalid or missing JSON body.'}), 400
             
         symbol = data.get('symbol')
-        timeframe = data.get('timeframe', '15m')
+        timeframe = normalize_analysis_timeframe(data.get('timeframe', '15m'))
         
         # Validate symbol
         if not symbol or not isinstance(symbol, str) or not symbol.strip():
@@ -622,42 +739,11 @@ def analyze_symbol():
                 'signalType': 'NEUTRAL',
                 'analysis': 'Invalid symbol format'
             }), 400
-            
-        # Clean and validate timeframe
-        if not isinstance(timeframe, str) or timeframe.strip() not in ['1m', '3m', '5m', '15m', '30m', '1h', '2h', '4h', '1d', '1w']:
-            timeframe = '15m'  # Default to 15m if invalid
 
         logger.info(f"Analyzing {symbol} on {timeframe}")
         
         # Get historical data for analysis
-        if symbol.endswith('USDT'):
-            # Use Binance for crypto
-            historical_data = get_binance_klines(symbol, timeframe, limit=100)
-        else:
-            # Use yfinance for forex/commodities
-            formatted_symbol = format_symbol_for_yfinance(symbol)
-            interval = get_yfinance_interval(timeframe)
-            
-            ticker = yf.Ticker(formatted_symbol)
-            historical_data = ticker.history(
-                period='5d' if interval in ['1m', '2m', '5m'] else '1mo',
-                interval=interval,
-                auto_adjust=False
-            )
-            
-            if not historical_data.empty:
-                historical_data.reset_index(inplace=True)
-                timestamp_col = 'Datetime' if 'Datetime' in historical_data.columns else 'Date'
-                
-                if historical_data[timestamp_col].dt.tz:
-                    historical_data[timestamp_col] = historical_data[timestamp_col].dt.tz_convert('UTC')
-                else:
-                    historical_data[timestamp_col] = historical_data[timestamp_col].dt.tz_localize('UTC')
-                
-                historical_data['time'] = historical_data[timestamp_col]
-                historical_data.rename(columns={
-                    'Open': 'open', 'High': 'high', 'Low': 'low', 'Close': 'close', 'Volume': 'volume'
-                }, inplace=True)
+        historical_data = fetch_analysis_data(symbol, timeframe)
         
         if historical_data.empty:
             return jsonify({
@@ -679,6 +765,160 @@ def analyze_symbol():
             'analysis': 'Analysis error occurred'
         }), 500
 
+# Batch analysis endpoint: many (symbol, timeframe) pairs per request, streamed as NDJSON
+@app.route('/api/analyze-symbols', methods=['POST'])
+def analyze_symbols():
+    data = request.get_json(silent=True)
+    if not data or not isinstance(data.get('symbols'), list):
+        return jsonify({'error': 'JSON body with a "symbols" list is required.'}), 400
+
+    default_timeframe = data.get('timeframe', '15m')
+    targets = []
+    for item in data['symbols']:
+        if isinstance(item, dict):
+            symbol, timeframe = item.get('symbol'), item.get('timeframe', default_timeframe)
+        elif isinstance(item, (list, tuple)) and len(item) == 2:
+            symbol, timeframe = item
+        else:
+            symbol, timeframe = item, default_timeframe
+        if not symbol or not isinstance(symbol, str) or not symbol.strip():
+            return jsonify({'error': f'Invalid symbol entry: {str(item)[:100]}'}), 400
+        target = (symbol.strip(), normalize_analysis_timeframe(timeframe))
+        if target not in targets:
+            targets.append(target)
+
+    if len(targets) > ANALYZE_BATCH_MAX_SYMBOLS:
+        return jsonify({'error': f'At most {ANALYZE_BATCH_MAX_SYMBOLS} symbol/timeframe pairs per request.'}), 400
+
+    # Every fetch and analysis of the request shares one deadline: waits on a fetch give up at it, fetches
+    # that only start after it are skipped, and each upstream request gets the time left as its timeout.
+    # A request already in flight can still overrun by its connect/read timeouts and retries
+    deadline = time.monotonic() + BULK_FETCH_TIMEOUT_SECONDS
+
+    # One upstream fetch per distinct provider series, shared by every target that needs it
+    fetches = {}
+    for symbol, timeframe in targets:
+        provider, fetch_key = analysis_fetch_key(symbol, timeframe)
+        if fetch_key not in fetches:
+            fetches[fetch_key] = fetch_engine.submit(provider, fetch_analysis_data, symbol, timeframe, deadline)
+
+    analyses = {
+        analysis_executor.submit(run_batch_analysis, fetches[analysis_fetch_key(symbol, timeframe)[1]],
+                                 symbol, timeframe, deadline): (symbol, timeframe)
+        for symbol, timeframe in targets
+    }
+    logger.info(f"Batch analysis of {len(targets)} targets using {len(fetches)} upstream fetches")
+
+    def generate():
+        pending = set(analyses)
+        try:
+            for future in as_completed(analyses, timeout=max(deadline - time.monotonic(), 0)):
+                pending.discard(future)
+                yield json.dumps(future.result(), default=str) + '\n'
+        except FuturesTimeoutError:
+            cancel_batch_analysis(pending, fetches.values())
+            for future in pending:
+                yield json.dumps(batch_timeout_result(*analyses[future])) + '\n'
+        finally:
+            # Also reached when the client disconnects mid-stream
+            cancel_batch_analysis(pending, fetches.values())
+
+    return Response(generate(), mimetype='application/x-ndjson')
+
+def normalize_analysis_timeframe(timeframe):
+    """Clean and validate an analysis timeframe, defaulting to 15m"""
+    if not isinstance(timeframe, str) or timeframe.strip() not in ['1m', '3m', '5m', '15m', '30m', '1h', '2h', '4h', '1d', '1w']:
+        return '15m'  # Default to 15m if invalid
+    return timeframe.strip()
+
+def analysis_fetch_key(symbol, timeframe):
+    """Provider name and the key identifying the upstream series an analysis needs"""
+    if symbol.endswith('USDT'):
+        return 'binance', ('binance', symbol, get_binance_interval(timeframe))
+    return 'yfinance', ('yfinance', format_symbol_for_yfinance(symbol), get_yfinance_interval(timeframe))
+
+def seconds_left(deadline):
+    """Seconds until a time.monotonic() deadline (None without one); raises TimeoutError once it has passed"""
+    if deadline is None:
+        return None
+    left = deadline - time.monotonic()
+    if left <= 0:
+        raise TimeoutError('Batch deadline passed')
+    return left
+
+def fetch_analysis_data(symbol, timeframe, deadline=None):
+    """Fetch the OHLCV history perform_smc_analysis runs on, giving up at ``deadline``"""
+    if symbol.endswith('USDT'):
+        # Use Binance for crypto
+        return get_stored_binance_klines(symbol, timeframe, limit=ANALYSIS_CANDLES, deadline=deadline)
+
+    # Use yfinance for forex/commodities
+    formatted_symbol = format_symbol_for_yfinance(symbol)
+    interval = get_yfinance_interval(timeframe)
+    
+    ticker = yf.Ticker(formatted_symbol)
+    with instrumentation.upstream('yfinance', 'history'):
+        historical_data = ticker.history(
+            period='5d' if interval in ['1m', '2m', '5m'] else '1mo',
+            interval=interval,
+            auto_adjust=False,
+            **({'timeout': seconds_left(deadline)} if deadline is not None else {})
+        )
+    
+    if not historical_data.empty:
+        historical_data.reset_index(inplace=True)
+        timestamp_col = 'Datetime' if 'Datetime' in historical_data.columns else 'Date'
+        
+        if historical_data[timestamp_col].dt.tz:
+            historical_data[timestamp_col] = historical_data[timestamp_col].dt.tz_convert('UTC')
+        else:
+            historical_data[timestamp_col] = historical_data[timestamp_col].dt.tz_localize('UTC')
+        
+        historical_data['time'] = historical_data[timestamp_col]
+        historical_data.rename(columns={
+            'Open': 'open', 'High': 'high', 'Low': 'low', 'Close': 'close', 'Volume': 'volume'
+        }, inplace=True)
+
+    return historical_data
+
+def batch_timeout_result(symbol, timeframe):
+    return {
+        'error': 'Analysis timed out',
+        'signalType': 'NEUTRAL',
+        'analysis': 'Analysis error occurred',
+        'symbol': symbol,
+        'timeframe': timeframe
+    }
+
+def cancel_batch_analysis(analyses, fetches):
+    """Drop a batch's queued work from the shared pools; tasks already running stop at their upstream timeout"""
+    for future in list(analyses) + list(fetches):
+        future.cancel()
+
+def run_batch_analysis(fetch_future, symbol, timeframe, deadline):
+    """Wait for the shared fetch until the batch deadline and analyze one (symbol, timeframe) target"""
+    try:
+        outcome = fetch_future.result(timeout=max(deadline - time.monotonic(), 0))
+    except (FuturesTimeoutError, CancelledError):
+        return batch_timeout_result(symbol, timeframe)
+    if not outcome.ok:
+        return {
+            'error': f'Analysis failed: {outcome.error}',
+            'signalType': 'NEUTRAL',
+            'analysis': 'Analysis error occurred',
+            'symbol': symbol,
+            'timeframe': timeframe
+        }
+    if outcome.value is None or outcome.value.empty:
+        return {
+            'error': f'No historical data available for {symbol}',
+            'signalType': 'NEUTRAL',
+            'analysis': 'Insufficient data for analysis',
+            'symbol': symbol,
+            'timeframe': timeframe
+        }
+    return perform_smc_analysis(outcome.value, symbol, timeframe)
+
 def perform_smc_analysis(data, symbol, timeframe):
     """Perform Smart Money Concepts analysis on the data with enhanced primary confirmations"""
     try:
@@ -706,30 +946,7 @@ def perform_smc_analysis(data, symbol, timeframe):
         swing_lookback = min(50, len(data) // 4)  # Use 50 or quarter of data, whichever is smaller
         
         # Find major swing highs and lows
-        major_swing_highs = []
-        major_swing_lows = []
-        
-        # Detect swing points with proper lookback
-        for i in range(swing_lookback, len(highs) - swing_lookback):
-            # Check for swing high
-            is_swing_high = True
-            current_high = highs[i]
-            for j in range(i - swing_lookback, i + swing_lookback + 1):
-                if j != i and highs[j] >= current_high:
-                    is_swing_high = False
-                    break
-            if is_swing_high:
-                major_swing_highs.append({'index': i, 'price': current_high})
-            
-            # Check for swing low
-            is_swing_low = True
-            current_low = lows[i]
-            for j in range(i - swing_lookback, i + swing_lookback + 1):
-                if j != i and lows[j] <= current_low:
-                    is_swing_low = False
-                    break
-            if is_swing_low:
-                major_swing_lows.append({'index': i, 'price': current_low})
+        major_swing_highs, major_swing_lows = find_swing_points(highs, lows, swing_lookback)
         
         # Get most recent swing points
         recent_swing_high = major_swing_highs[-1] if major_swing_highs else {'price': np.max(highs[-20:]), 'index': len(highs) - 10}
@@ -869,6 +1086,48 @@ def perform_smc_analysis(data, symbol, timeframe):
             'timestamp': datetime.now().isoformat()
         }
 
+def find_swing_points(highs, lows, lookback):
+    """Find bars whose high (low) is strictly above (below) every other bar within lookback on each side.
+
+    Uses rolling maxima/minima of the neighbouring windows, so the cost is O(n)
+    regardless of the lookback.
+    """
+    highs = np.asarray(highs, dtype=float)
+    lows = np.asarray(lows, dtype=float)
+    n = len(highs)
+    if lookback < 1 or n < 2 * lookback + 1:
+        return [], []
+
+    # NaN neighbours never disqualify a swing point, and NaN bars never fail the comparison
+    high_missing = np.isnan(highs)
+    low_missing = np.isnan(lows)
+    rolling_max = pd.Series(highs).rolling(lookback, min_periods=1).max().fillna(-np.inf).to_numpy()
+    rolling_min = pd.Series(lows).rolling(lookback, min_periods=1).min().fillna(np.inf).to_numpy()
+
+    # For centre i, rolling[i - 1] covers [i - lookback, i - 1] and rolling[i + lookback] covers [i + 1, i + lookback]
+    centers = np.arange(lookback, n - lookback)
+    is_swing_high = high_missing[centers] | (
+        (highs[centers] > rolling_max[centers - 1]) & (highs[centers] > rolling_max[centers + lookback])
+    )
+    is_swing_low = low_missing[centers] | (
+        (lows[centers] < rolling_min[centers - 1]) & (lows[centers] < rolling_min[centers + lookback])
+    )
+
+    major_swing_highs = [{'index': int(i), 'price': highs[i]} for i in centers[is_swing_high]]
+    major_swing_lows = [{'index': int(i), 'price': lows[i]} for i in centers[is_swing_low]]
+    return major_swing_highs, major_swing_lows
+
+def perform_smc_analysis_batch(datasets):
+    """Run SMC analysis over many (symbol, timeframe) series in one call.
+
+    ``datasets`` maps (symbol, timeframe) to an OHLCV DataFrame; the result maps
+    the same keys to the analysis dicts returned by perform_smc_analysis.
+    """
+    return {
+        (symbol, timeframe): perform_smc_analysis(data, symbol, timeframe)
+        for (symbol, timeframe), data in datasets.items()
+    }
+
 def get_session_quality():
     """Determine current trading session quality"""
     now = datetime.utcnow()
@@ -883,15 +1142,11 @@ def get_session_quality():
     else:
         return 'Asian Session - Medium'
 
-def get_binance_klines(symbol, timeframe, start_date=None, end_date=None, limit=1000):
+def get_binance_klines(symbol, timeframe, start_date=None, end_date=None, limit=1000, timeout=None):
     """Enhanced Binance klines function with limit parameter"""
     BINANCE_API_URL = "https://api.binance.com/api/v3/klines"
     
-    interval_map = {
-        '1m': '1m', '3m': '3m', '5m': '5m', '15m': '15m', '30m': '30m',
-        '1h': '1h', '4h': '4h', '1d': '1d', '1wk': '1w', '1mo': '1M',
-    }
-    binance_interval = interval_map.get(timeframe, '1h')
+    binance_interval = get_binance_interval(timeframe)
 
     params = {
         'symbol': symbol,
@@ -905,7 +1160,7 @@ def get_binance_klines(symbol, timeframe, start_date=None, end_date=None, limit=
         params['endTime'] = int(pd.to_datetime(end_date).timestamp() * 1000)
 
     try:
-        response = session.get(BINANCE_API_URL, params=params)
+        response = session.get(BINANCE_API_URL, params=params, timeout=timeout)
         response.raise_for_status()
         klines = response.json()
 
@@ -1080,10 +1335,24 @@ def get_real_time_price_simple(pair):
         # For forex pairs, try to get current price
         formatted_pair = format_symbol_for_yfinance(pair)
         
+        try:
+            # Shared recent-data quote, usually already cached by another request or the quote stream
+            quote = market_data.quote(formatted_pair)
+            if quote is not None and quote.price > 0:
+                return jsonify({
+                    'pair': pair,
+                    'price': quote.price,
+                    'timestamp': datetime.now().isoformat(),
+                    'source': 'yfinance'
+                })
+        except Exception as quote_error:
+            logger.warning(f"Failed to get quote for {pair}: {str(quote_error)}")
+        
         try:
             # Try to get info directly from yfinance
             ticker = yf.Ticker(formatted_pair)
-            info = ticker.info
+            with instrumentation.upstream('yfinance', 'info'):
+                info = ticker.info
             
             if info and isinstance(info, dict):
                 price = info.get('regularMarketPrice') or info.get('bid') or info.get('ask')
@@ -1123,6 +1392,10 @@ def get_real_time_prices_bulk():
         pairs = request.args.get('pairs', 'EUR/USD,GBP/USD,USD/JPY,USD/CHF')
         pairs_list = pairs.split(',')
         
+        # Warm the gateway with every forex pair in one upstream request; the per-pair lookups below hit it
+        market_data.quotes(format_symbol_for_yfinance(p.strip()) for p in pairs_list
+                           if p.strip() and not p.strip().endswith('USDT'))
+        
         results = {}
         for pair in pairs_list:
             pair = pair.strip()
@@ -1149,6 +1422,61 @@ def get_real_time_prices_bulk():
             'USD/JPY': {'pair': 'USD/JPY', 'price': 110.0, 'timestamp': datetime.now().isoformat(), 'source': 'fallback'}
         })
 
+# Server-sent quote streams: one poller per worker refreshes the distinct streamed pairs every interval
+QUOTE_STREAM_MAX_PAIRS = 50
+QUOTE_STREAM_HEARTBEAT_SECONDS = 15
+QUOTE_STREAM_MAX_SECONDS = float(os.environ.get('QUOTE_STREAM_MAX_SECONDS', 300))
+# Each open stream pins a gunicorn thread (--threads 32); cap them below that so ordinary requests still get served
+QUOTE_STREAM_MAX_OPEN = int(os.environ.get('QUOTE_STREAM_MAX_OPEN', 24))
+QUOTE_STREAM_RETRY_AFTER_SECONDS = 5
+quote_stream_slots = threading.BoundedSemaphore(QUOTE_STREAM_MAX_OPEN)
+quote_streamer = QuoteStreamer(market_data, resolve=format_symbol_for_yfinance,
+                               interval=float(os.environ.get('QUOTE_STREAM_INTERVAL', 2)))
+
+@app.route('/api/stream/quotes')
+def stream_quotes():
+    """Server-sent quote updates for ?pairs=EUR/USD,GBP/USD, pushed when a price changes.
+
+    Every open stream shares one poller, so upstream load grows with the
+    distinct pairs streamed, not the number of clients. The stream ends
+    after QUOTE_STREAM_MAX_SECONDS; EventSource reconnects on its own.
+    At most QUOTE_STREAM_MAX_OPEN streams are open per worker; past that the
+    request gets a 503 with Retry-After.
+    """
+    pairs = [p.strip().upper() for p in request.args.get('pairs', '').split(',') if p.strip()]
+    if not pairs:
+        return jsonify({'error': 'Pairs parameter is missing.'}), 400
+    if len(pairs) > QUOTE_STREAM_MAX_PAIRS:
+        return jsonify({'error': f'At most {QUOTE_STREAM_MAX_PAIRS} pairs per stream.'}), 400
+
+    if not quote_stream_slots.acquire(blocking=False):
+        response = jsonify({'error': 'Too many open quote streams, retry shortly.'})
+        response.status_code = 503
+        response.headers['Retry-After'] = str(QUOTE_STREAM_RETRY_AFTER_SECONDS)
+        return response
+
+    try:
+        updates = quote_streamer.listen(pairs, heartbeat=QUOTE_STREAM_HEARTBEAT_SECONDS,
+                                        max_duration=QUOTE_STREAM_MAX_SECONDS)
+    except Exception:
+        quote_stream_slots.release()
+        raise
+
+    def events():
+        yield format_sse(retry_ms=1000)
+        try:
+            for payload in updates:
+                yield format_sse(payload, event='quote') if payload is not None else format_sse()
+        finally:
+            updates.close()
+
+    response = Response(stream_with_context(events()), mimetype='text/event-stream')
+    response.headers['Cache-Control'] = 'no-cache'
+    response.headers['X-Accel-Buffering'] = 'no'
+    # The server closes the response once the stream ends or the client goes away, even if it never started
+    response.call_on_close(quote_stream_slots.release)
+    return response
+
 if __name__ == '__main__':
     try:
         port = int(os.environ.get("PORT", 3004))
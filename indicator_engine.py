@@ -0,0 +1,259 @@
+#!/usr/bin/env python3
+"""
+Indicator Engine
+Incremental technical indicators shared by the forex and crypto trading bots
+"""
+
+import math
+import threading
+from typing import Callable, Dict, Iterable, Optional, Tuple
+
+import numpy as np
+
+
+class SymbolIndicators:
+    """O(1)-update indicator state for a single symbol.
+
+    Prices are kept in a fixed-size ring buffer with running sums per SMA
+    window; EMAs, Wilder RSI and the MACD signal line are updated in place.
+    """
+
+    def __init__(self, sma_periods: Tuple[int, ...], ema_periods: Tuple[int, ...],
+                 rsi_period: int, bb_period: int, volatility_window: Optional[int]):
+        self.sma_periods = sma_periods
+        self.ema_periods = ema_periods
+        self.rsi_period = rsi_period
+        self.bb_period = bb_period
+        self.volatility_window = volatility_window
+
+        self.capacity = max(sma_periods + (bb_period, (volatility_window or 0) + 1))
+        self.prices = np.zeros(self.capacity)
+        self.returns = np.zeros(self.capacity)
+        self.count = 0
+
+        self.sums = {period: 0.0 for period in set(sma_periods + (bb_period,))}
+        self.bb_sum_sq = 0.0
+        self.ret_sum = 0.0
+        self.ret_sum_sq = 0.0
+
+        self.emas = {period: None for period in ema_periods}
+        self.macd_signal = None
+        self.macd_count = 0
+
+        self.rsi_deltas = 0
+        self.avg_gain = 0.0
+        self.avg_loss = 0.0
+
+    def _at(self, buffer: np.ndarray, age: int) -> float:
+        """Value written ``age`` updates ago (0 is the latest)"""
+        return buffer[(self.count - 1 - age) % self.capacity]
+
+    def _recompute_sums(self):
+        """Rebuild running sums from the buffer to shed floating-point drift"""
+        for period in self.sums:
+            n = min(period, self.count)
+            self.sums[period] = math.fsum(self._at(self.prices, i) for i in range(n))
+        n = min(self.bb_period, self.count)
+        self.bb_sum_sq = math.fsum(self._at(self.prices, i) ** 2 for i in range(n))
+        if self.volatility_window:
+            n = min(self.volatility_window, self.count - 1)
+            self.ret_sum = math.fsum(self._at(self.returns, i) for i in range(n))
+            self.ret_sum_sq = math.fsum(self._at(self.returns, i) ** 2 for i in range(n))
+
+    def update(self, price: float):
+        price = float(price)
+        previous = self._at(self.prices, 0) if self.count else None
+
+        # Values leaving each window, read before the ring slot is overwritten
+        leaving = {period: self._at(self.prices, period - 1) if self.count >= period else 0.0
+                   for period in self.sums}
+
+        slot = self.count % self.capacity
+        self.prices[slot] = price
+        self.count += 1
+
+        for period in self.sums:
+            self.sums[period] += price - leaving[period]
+        self.bb_sum_sq += price * price - leaving[self.bb_period] ** 2
+
+        if previous is not None:
+            self._update_returns(previous, price, slot)
+            self._update_rsi(price - previous)
+
+        self._update_emas(price)
+
+        if slot == self.capacity - 1:
+            self._recompute_sums()
+
+    def _update_returns(self, previous: float, price: float, slot: int):
+        if not self.volatility_window:
+            return
+        log_return = math.log(price / previous) if previous > 0 and price > 0 else 0.0
+        returns_seen = self.count - 1
+        if returns_seen > self.volatility_window:
+            old = self.returns[(slot - self.volatility_window) % self.capacity]
+            self.ret_sum -= old
+            self.ret_sum_sq -= old * old
+        self.returns[slot] = log_return
+        self.ret_sum += log_return
+        self.ret_sum_sq += log_return * log_return
+
+    def _update_rsi(self, delta: float):
+        gain = delta if delta > 0 else 0.0
+        loss = -delta if delta < 0 else 0.0
+        self.rsi_deltas += 1
+        if self.rsi_deltas <= self.rsi_period:
+            # Seed with the simple average of the first period's moves
+            self.avg_gain += gain / self.rsi_period
+            self.avg_loss += loss / self.rsi_period
+        else:
+            self.avg_gain = (self.avg_gain * (self.rsi_period - 1) + gain) / self.rsi_period
+            self.avg_loss = (self.avg_loss * (self.rsi_period - 1) + loss) / self.rsi_period
+
+    def _update_emas(self, price: float):
+        for period, ema in self.emas.items():
+            alpha = 2 / (period + 1)
+            self.emas[period] = price if ema is None else alpha * price + (1 - alpha) * ema
+
+        if len(self.ema_periods) >= 2 and self.count >= max(self.ema_periods[:2]):
+            macd = self.emas[self.ema_periods[0]] - self.emas[self.ema_periods[1]]
+            alpha = 2 / (9 + 1)
+            self.macd_signal = macd if self.macd_signal is None else alpha * macd + (1 - alpha) * self.macd_signal
+            self.macd_count += 1
+
+    def ema(self, period: int) -> float:
+        # Until a full period has been seen the latest price stands in for the EMA
+        if self.count < period:
+            return float(self._at(self.prices, 0))
+        return float(self.emas[period])
+
+    def rsi(self) -> float:
+        if self.rsi_deltas < self.rsi_period:
+            return 50.0
+        if self.avg_loss == 0:
+            return 100.0
+        rs = self.avg_gain / self.avg_loss
+        return 100 - (100 / (1 + rs))
+
+    def snapshot(self) -> Dict:
+        current_price = float(self._at(self.prices, 0))
+        indicators = {}
+
+        # Longer SMAs fall back to the next shorter one until their window fills
+        previous_sma = None
+        for period in self.sma_periods:
+            if self.count >= period or previous_sma is None:
+                n = min(period, self.count)
+                value = self.sums[period] / n
+            else:
+                value = previous_sma
+            indicators[f'sma_{period}'] = float(value)
+            previous_sma = value
+
+        for period in self.ema_periods:
+            indicators[f'ema_{period}'] = self.ema(period)
+
+        indicators['rsi'] = float(self.rsi())
+
+        if len(self.ema_periods) >= 2:
+            fast, slow = self.ema_periods[:2]
+            indicators['macd'] = self.ema(fast) - self.ema(slow)
+            indicators['macd_signal'] = float(self.macd_signal) if self.macd_count >= 9 else 0.0
+
+        n = min(self.bb_period, self.count)
+        mean = self.sums[self.bb_period] / n
+        std = math.sqrt(max(self.bb_sum_sq / n - mean * mean, 0.0))
+        indicators['bb_upper'] = float(mean + 2 * std)
+        indicators['bb_lower'] = float(mean - 2 * std)
+
+        indicators['current_price'] = current_price
+
+        if self.volatility_window:
+            n = min(self.volatility_window, self.count - 1)
+            if n > 0:
+                mean_ret = self.ret_sum / n
+                variance = max(self.ret_sum_sq / n - mean_ret * mean_ret, 0.0)
+                indicators['volatility'] = float(math.sqrt(variance) * math.sqrt(252))  # Annualized volatility
+            else:
+                indicators['volatility'] = 0.0
+
+        return indicators
+
+
+class IndicatorEngine:
+    """Per-symbol incremental indicators, fed one price at a time.
+
+    ``update`` costs O(1) per tick and ``snapshot`` returns the indicator
+    keys the bots' ``generate_signal`` reads, so analysis cost no longer
+    depends on how much history has been seen.
+    """
+
+    def __init__(self, sma_periods: Iterable[int] = (20, 50), ema_periods: Iterable[int] = (12, 26),
+                 rsi_period: int = 14, bb_period: int = 20, volatility_window: Optional[int] = None,
+                 min_samples: int = 20):
+        self.sma_periods = tuple(sorted(sma_periods))
+        self.ema_periods = tuple(ema_periods)
+        self.rsi_period = rsi_period
+        self.bb_period = bb_period
+        self.volatility_window = volatility_window
+        self.min_samples = min_samples
+        self._symbols: Dict[str, SymbolIndicators] = {}
+        self._lock = threading.Lock()
+
+    def _state(self, symbol: str) -> SymbolIndicators:
+        state = self._symbols.get(symbol)
+        if state is None:
+            state = SymbolIndicators(self.sma_periods, self.ema_periods, self.rsi_period,
+                                     self.bb_period, self.volatility_window)
+            self._symbols[symbol] = state
+        return state
+
+    @property
+    def history_size(self) -> int:
+        """Number of past prices needed to warm a symbol up fully"""
+        return max(self.sma_periods + (self.bb_period, (self.volatility_window or 0) + 1))
+
+    def has(self, symbol: str) -> bool:
+        return symbol in self._symbols
+
+    def count(self, symbol: str) -> int:
+        state = self._symbols.get(symbol)
+        return state.count if state else 0
+
+    def update(self, symbol: str, price: float, history_loader: Optional[Callable[[], Iterable[float]]] = None):
+        """Feed the latest price for a symbol.
+
+        The first time a symbol is seen, ``history_loader`` (if given) supplies
+        its stored prices, oldest first, so state survives a restart.
+        """
+        history = None
+        if history_loader is not None and not self.has(symbol):
+            # Read outside the lock so a slow first load only holds up this symbol; if another
+            # thread set the symbol up meanwhile, its state wins and this history is dropped
+            history = list(history_loader())
+        with self._lock:
+            if symbol not in self._symbols and history is not None:
+                state = self._state(symbol)
+                for stored_price in history:
+                    state.update(stored_price)
+            self._state(symbol).update(price)
+
+    def warm_up(self, symbol: str, prices: Iterable[float]):
+        """Replay stored prices (oldest first) into a symbol's state"""
+        with self._lock:
+            state = self._state(symbol)
+            for price in prices:
+                state.update(price)
+
+    def snapshot(self, symbol: str) -> Dict:
+        """Current indicators, or {} until ``min_samples`` prices have been seen"""
+        with self._lock:
+            state = self._symbols.get(symbol)
+            if state is None or state.count < self.min_samples:
+                return {}
+            return state.snapshot()
+
+    def remove(self, symbol: str):
+        with self._lock:
+            self._symbols.pop(symbol, None)
+
@@ -3,7 +3,7 @@ from flask import Flask, request, make_response
 from flask_jwt_extended import JWTManager
 from flask_cors import CORS
 
-from .extensions import db, socketio
+from .extensions import db, socketio, instrumentation
 from .config import ProductionConfig
 
 def create_app(config_object=ProductionConfig):
@@ -13,6 +13,7 @@ def create_app(config_object=ProductionConfig):
     # Initialize extensions
     db.init_app(app)
     JWTManager(app)
+    instrumentation.init_app(app)
     
     # More specific CORS configuration
     CORS(app, 
@@ -34,6 +35,7 @@ def create_app(config_object=ProductionConfig):
 
     # Create database tables if they don't exist
     with app.app_context():
+        instrumentation.track_sqlalchemy(db.engine)
         db.create_all()
 
     return app
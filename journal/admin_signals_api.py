@@ -14,6 +14,7 @@ from .signal_models import Signal, UserSignal, SignalRiskMap, db
 from .redis_service import redis_service
 from .models import User
 from .auth_middleware import session_required
+from . import signal_stats
 
 logger = logging.getLogger(__name__)
 
@@ -143,6 +144,7 @@ def create_signal():
         )
         
         db.session.add(signal)
+        signal_stats.record_created(signal_stats.ADMIN, [signal_stats.admin_state(signal)])
         db.session.commit()
         
         logger.info(f"Created signal {signal.id} by admin {admin_id}")
@@ -192,8 +194,8 @@ def archive_signal(signal_id):
         # Get admin user info
         admin_id = get_jwt_identity()
         
-        # Find signal
-        signal = Signal.query.get(signal_id)
+        # Find signal; locked so concurrent archives count it once
+        signal = Signal.query.with_for_update().get(signal_id)
         if not signal:
             return jsonify({'error': 'Signal not found'}), 404
         
@@ -201,8 +203,10 @@ def archive_signal(signal_id):
             return jsonify({'error': 'Signal is already archived'}), 400
         
         # Archive signal
+        old_state = signal_stats.admin_state(signal)
         signal.status = 'archived'
         signal.updated_at = datetime.utcnow()
+        signal_stats.record_change(signal_stats.ADMIN, old_state, signal_stats.admin_state(signal))
         db.session.commit()
         
         logger.info(f"Archived signal {signal_id} by admin {admin_id}")
@@ -275,34 +279,10 @@ def get_signal_stats():
         return '', 200
     
     try:
-        # Get basic stats
-        total_signals = Signal.query.filter_by(origin='admin').count()
-        active_signals = Signal.query.filter_by(origin='admin', status='active').count()
-        archived_signals = Signal.query.filter_by(origin='admin', status='archived').count()
-        
-        # Get signals by risk tier
-        risk_tier_stats = db.session.query(
-            Signal.risk_tier,
-            db.func.count(Signal.id).label('count')
-        ).filter_by(origin='admin', status='active').group_by(Signal.risk_tier).all()
-        
-        # Get recent signals (last 24 hours)
-        from datetime import datetime, timedelta
-        yesterday = datetime.utcnow() - timedelta(days=1)
-        recent_signals = Signal.query.filter(
-            Signal.origin == 'admin',
-            Signal.created_at >= yesterday
-        ).count()
-        
+        # Read from the counters signal_stats maintains, not the signals table
         return jsonify({
             'success': True,
-            'stats': {
-                'total_signals': total_signals,
-                'active_signals': active_signals,
-                'archived_signals': archived_signals,
-                'recent_signals_24h': recent_signals,
-                'by_risk_tier': {stat.risk_tier: stat.count for stat in risk_tier_stats}
-            }
+            'stats': signal_stats.admin_summary()
         }), 200
         
     except Exception as e:
@@ -0,0 +1,89 @@
+#!/usr/bin/env python3
+"""
+Load test for the shared market data gateway
+Fires concurrent /yfinance/price requests at the journal blueprint with a slow fake upstream and reports how
+many upstream requests they caused (one per symbol when coalescing works) and the request latency
+"""
+
+import os
+import sys
+import time
+import argparse
+import threading
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from flask import Flask
+
+from market_data_gateway import Quote
+from journal.extensions import market_data
+from journal.yfinance_routes import yfinance_bp
+
+
+class SlowUpstream:
+    """Stands in for yfinance: sleeps ``delay`` seconds per request and counts the requests"""
+
+    def __init__(self, delay):
+        self.delay = delay
+        self.requests = 0
+        self._lock = threading.Lock()
+
+    def __call__(self, symbols):
+        with self._lock:
+            self.requests += 1
+        time.sleep(self.delay)
+        return {symbol: Quote(symbol=symbol, price=1.0920, open=1.0915, high=1.0925, low=1.0910, volume=0,
+                              timestamp='2024-01-02T10:00:00+00:00', previous_close=1.0900,
+                              recent_closes=[1.0915, 1.0918, 1.0920])
+                for symbol in symbols}
+
+
+def percentile(values, fraction):
+    values = sorted(values)
+    return values[min(int(len(values) * fraction), len(values) - 1)]
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Load test the market data gateway through /yfinance/price')
+    parser.add_argument('--requests', type=int, default=500, help='Concurrent requests')
+    parser.add_argument('--symbol', default='EURUSD')
+    parser.add_argument('--delay', type=float, default=0.5, help='Fake upstream latency in seconds')
+    args = parser.parse_args()
+
+    upstream = SlowUpstream(args.delay)
+    market_data.fetcher = upstream
+    market_data.refresh_interval = 0  # no background refresh, so only the requests reach the upstream
+
+    app = Flask(__name__)
+    app.register_blueprint(yfinance_bp)
+    client = app.test_client()
+
+    statuses = []
+    latencies = []
+    ready = threading.Barrier(args.requests)
+
+    def request_price():
+        ready.wait()
+        started = time.perf_counter()
+        response = client.get(f'/yfinance/price/{args.symbol}')
+        latencies.append(time.perf_counter() - started)
+        statuses.append(response.status_code)
+
+    threads = [threading.Thread(target=request_price) for _ in range(args.requests)]
+    started = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - started
+
+    print(f"{args.requests} concurrent /yfinance/price/{args.symbol} requests in {elapsed:.2f}s")
+    print(f"  responses:         {statuses.count(200)} x 200, {len(statuses) - statuses.count(200)} other")
+    print(f"  upstream requests: {upstream.requests}")
+    print(f"  latency p50/p99:   {percentile(latencies, 0.5) * 1000:.0f} / "
+          f"{percentile(latencies, 0.99) * 1000:.0f} ms (fake upstream {args.delay * 1000:.0f} ms)")
+    print(f"  gateway:           {market_data.stats()}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,110 @@
+#!/usr/bin/env python3
+"""
+Benchmark for the journal rate limiter
+Measures checks per second for the memory store and the Redis store (a local fake by default, or a real
+server with --redis-url), and shows why per-process limits are wrong under several gunicorn workers
+"""
+
+import os
+import sys
+import time
+import argparse
+import threading
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from rate_limit import MemoryRateLimitStore, Rate, RateLimiter, RedisRateLimitStore, gcra_update, parse_rate
+
+
+class FakeRedis:
+    """The slice of the redis-py client RedisRateLimitStore uses, served from a dict.
+
+    A registered script runs ``gcra_update`` (the Python twin of
+    GCRA_SCRIPT) atomically, and each call counts as one round trip.
+    Use --redis-url to exercise the Lua script itself.
+    """
+
+    def __init__(self, clock=time.time):
+        self.clock = clock
+        self.data = {}
+        self.round_trips = 0
+        self._lock = threading.Lock()
+
+    def register_script(self, script):
+        def run(keys, args):
+            cost, pairs = args[0], args[1:]
+            rates = [Rate(round(pairs[i + 1] / pairs[i]), int(pairs[i + 1])) for i in range(0, len(pairs), 2)]
+            with self._lock:
+                self.round_trips += 1
+                allowed, retry_after, remaining = gcra_update(self.data, self.clock() * 1000, keys, rates, cost)
+            return [int(allowed), int(retry_after), remaining]
+        return run
+
+
+def checks_per_second(limiter, threads, checks, rates):
+    def worker(index):
+        for i in range(checks):
+            limiter.hit('bench', f'client{index}:{i % 1000}', rates)
+
+    workers = [threading.Thread(target=worker, args=(i,)) for i in range(threads)]
+    started = time.perf_counter()
+    for thread in workers:
+        thread.start()
+    for thread in workers:
+        thread.join()
+    return threads * checks / (time.perf_counter() - started)
+
+
+def allowed_in_an_hour(make_store, workers, rate, interval_seconds):
+    """One client retrying every ``interval_seconds`` for an hour, round-robin across workers.
+
+    ``make_store(clock)`` returns the store for the next worker; the clock is simulated.
+    """
+    now = [0.0]
+    limiters = [RateLimiter(store=make_store(lambda: now[0])) for _ in range(workers)]
+    allowed = 0
+    for i in range(int(3600 / interval_seconds)):
+        now[0] = i * interval_seconds
+        allowed += limiters[i % workers].check('payment', 'user', rate).allowed
+    return allowed
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark journal rate limit stores')
+    parser.add_argument('--checks', type=int, default=50000, help='Checks per thread')
+    parser.add_argument('--threads', type=int, default=4)
+    parser.add_argument('--workers', type=int, default=4, help='Simulated gunicorn workers')
+    parser.add_argument('--redis-url', help='Also benchmark a real Redis server')
+    args = parser.parse_args()
+
+    single = [parse_rate('100 per hour')]
+    defaults = [parse_rate('200 per day'), parse_rate('50 per hour')]
+    fake = FakeRedis()
+    stores = [('memory', MemoryRateLimitStore()), ('redis (fake)', RedisRateLimitStore(fake))]
+    if args.redis_url:
+        stores.append(('redis', RedisRateLimitStore.from_url(args.redis_url)))
+
+    print(f"{'store':14s} {'limits':>6s} {'1 thread':>12s} {f'{args.threads} threads':>12s}")
+    for name, store in stores:
+        limiter = RateLimiter(store=store)
+        for rates in (single, defaults):
+            one = checks_per_second(limiter, 1, args.checks, rates)
+            many = checks_per_second(limiter, args.threads, args.checks, rates)
+            print(f"{name:14s} {len(rates):6d} {one:10.0f}/s {many:10.0f}/s")
+    print(f"\nfake Redis round trips per check: {fake.round_trips / (2 * (1 + args.threads) * args.checks):.2f}")
+
+    print(f"\n'10 per hour', one client retrying every 10s for an hour across {args.workers} workers:")
+    per_process = allowed_in_an_hour(MemoryRateLimitStore, args.workers, '10 per hour', 10)
+    server = FakeRedis()
+
+    def shared_store(clock):
+        server.clock = clock
+        return RedisRateLimitStore(server)
+
+    shared = allowed_in_an_hour(shared_store, args.workers, '10 per hour', 10)
+    print(f"  per-process memory stores: {per_process} allowed")
+    print(f"  shared Redis store:        {shared} allowed (burst of 10, then one every 6 minutes)")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,98 @@
+#!/usr/bin/env python3
+"""
+Benchmark for the signal feed
+Fills a SQLite signal_feed table to several sizes and times /signals/feed for the first page, a cursor page in
+the middle of the feed, and the same middle page by the legacy ?page= OFFSET path
+"""
+
+import os
+import sys
+import time
+import json
+import random
+import argparse
+import tempfile
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from flask import Flask
+
+from journal.extensions import db
+from journal.models import SignalFeed
+from journal.pagination import encode_cursor
+from journal.signal_feed_routes import feed_rows, signal_feed_bp
+
+MARKETS = ['forex', 'crypto', 'indices', 'commodities']
+
+
+def fill(count, start, now):
+    """Append ``count`` signals, newest last, ~20% of them taken"""
+    rows = []
+    for i in range(start, start + count):
+        rows.append({
+            'unique_key': f'bench-{i}', 'signal_id': f'sig-{i}', 'pair': 'EURUSD',
+            'direction': random.choice(['BUY', 'SELL']), 'entry_price': '1.0920', 'stop_loss': '1.0890',
+            'take_profit': json.dumps(['1.0950', '1.0980']), 'confidence': random.randint(70, 99),
+            'analysis': 'Bullish order block retest', 'ict_concepts': json.dumps(['FVG', 'Order Block']),
+            'timestamp': now - timedelta(seconds=10 * (10 ** 7 - i)), 'market': random.choice(MARKETS),
+            'status': 'taken' if random.random() < 0.2 else 'active', 'timeframe': '1h', 'created_by': 'admin'
+        })
+        if len(rows) == 20000:
+            db.session.execute(SignalFeed.__table__.insert(), rows)
+            rows = []
+    if rows:
+        db.session.execute(SignalFeed.__table__.insert(), rows)
+    db.session.commit()
+
+
+def timed(client, url, repeat):
+    response = client.get(url)  # warm the row cache like a steady-state feed
+    assert response.status_code == 200, response.get_data(as_text=True)
+    started = time.perf_counter()
+    for _ in range(repeat):
+        client.get(url)
+    return (time.perf_counter() - started) / repeat * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark /signals/feed pagination')
+    parser.add_argument('--sizes', default='10000,100000,1000000', help='Comma-separated table sizes')
+    parser.add_argument('--per-page', type=int, default=20)
+    parser.add_argument('--repeat', type=int, default=50)
+    args = parser.parse_args()
+
+    path = os.path.join(tempfile.mkdtemp(), 'feed.db')
+    app = Flask(__name__)
+    app.config['SQLALCHEMY_DATABASE_URI'] = f'sqlite:///{path}'
+    db.init_app(app)
+    app.register_blueprint(signal_feed_bp)
+    client = app.test_client()
+    now = datetime.utcnow()
+
+    print(f"{'signals':>9s} {'first page':>11s} {'middle (cursor)':>16s} {'middle (?page=)':>16s}")
+    with app.app_context():
+        SignalFeed.__table__.create(db.engine)
+        filled = 0
+        for size in (int(size) for size in args.sizes.split(',')):
+            fill(size - filled, filled, now)
+            filled = size
+
+            middle = SignalFeed.query.filter_by(status='active', market='forex') \
+                .order_by(SignalFeed.timestamp.desc(), SignalFeed.id.desc()) \
+                .offset(size // 8).first()
+            cursor = encode_cursor(middle.timestamp, middle.id)
+            page = size // 8 // args.per_page + 1
+
+            first = timed(client, f'/signals/feed?market=forex&per_page={args.per_page}', args.repeat)
+            keyset = timed(client, f'/signals/feed?market=forex&per_page={args.per_page}&cursor={cursor}',
+                           args.repeat)
+            offset = timed(client, f'/signals/feed?market=forex&per_page={args.per_page}&page={page}',
+                           max(args.repeat // 10, 1))
+            print(f"{size:9d} {first:9.2f}ms {keyset:14.2f}ms {offset:14.2f}ms")
+
+    print(f"\nrow cache: {feed_rows.hits} hits, {feed_rows.misses} misses")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,89 @@
+#!/usr/bin/env python3
+"""
+Benchmark for signal relay ingest
+Relays bursts of signals one POST per signal through /signals/relay and as one POST through /signals/relay/batch,
+then replays the burst to measure the all-duplicates path
+"""
+
+import os
+import sys
+import time
+import argparse
+import tempfile
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from flask import Flask
+from sqlalchemy.dialects.postgresql import JSONB
+from sqlalchemy.ext.compiler import compiles
+
+from journal.extensions import db
+from journal.models import SignalFeed, SignalStatBucket, SignalStatusCount
+from journal.signal_models import Signal
+from journal.signal_feed_routes import signal_feed_bp
+
+
+@compiles(JSONB, 'sqlite')
+def _jsonb_on_sqlite(type_, compiler, **kw):
+    # signals.payload is JSONB; SQLite stores the same values as JSON
+    return 'JSON'
+
+
+def make_burst(prefix, count):
+    opened = datetime.utcnow().replace(microsecond=0)
+    return [{
+        'uniqueKey': f'{prefix}-{i}',
+        'signal': {
+            'id': f'{prefix}-{i}', 'pair': 'EURUSD', 'direction': 'BUY' if i % 2 else 'SELL',
+            'entry': 1.0920, 'stopLoss': 1.0890, 'takeProfit': [1.0950, 1.0980], 'confidence': 80 + i % 20,
+            'analysis': 'Session open liquidity sweep', 'ictConcepts': ['FVG', 'Order Block'],
+            'timestamp': (opened + timedelta(milliseconds=i)).isoformat() + 'Z', 'market': 'forex',
+            'timeframe': '15m', 'riskTier': ['low', 'medium', 'high'][i % 3]
+        }
+    } for i in range(count)]
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark signal relay ingest')
+    parser.add_argument('--burst', type=int, default=10000, help='Signals per burst')
+    parser.add_argument('--single', type=int, default=1000, help='Signals relayed one POST at a time')
+    parser.add_argument('--database-url', help='Database to use instead of a temporary SQLite file')
+    args = parser.parse_args()
+
+    app = Flask(__name__)
+    app.config['SQLALCHEMY_DATABASE_URI'] = args.database_url or \
+        f"sqlite:///{os.path.join(tempfile.mkdtemp(), 'relay.db')}"
+    db.init_app(app)
+    app.register_blueprint(signal_feed_bp)
+    client = app.test_client()
+
+    with app.app_context():
+        for table in (SignalFeed.__table__, Signal.__table__, SignalStatusCount.__table__, SignalStatBucket.__table__):
+            table.create(db.engine, checkfirst=True)
+
+        single = make_burst(f'single-{time.time_ns()}', args.single)
+        started = time.perf_counter()
+        for item in single:
+            assert client.post('/signals/relay', json=item).status_code == 200
+        single_rate = len(single) / (time.perf_counter() - started)
+
+        burst = make_burst(f'burst-{time.time_ns()}', args.burst)
+        started = time.perf_counter()
+        response = client.post('/signals/relay/batch', json={'signals': burst})
+        batch_seconds = time.perf_counter() - started
+        created = response.get_json()
+
+        started = time.perf_counter()
+        replayed = client.post('/signals/relay/batch', json={'signals': burst}).get_json()
+        replay_seconds = time.perf_counter() - started
+
+    print(f"one POST per signal:        {single_rate:9.0f} signals/s ({args.single} signals)")
+    print(f"batch of {args.burst}:          {args.burst / batch_seconds:9.0f} signals/s "
+          f"({batch_seconds * 1000:.0f} ms, {created['created']} created)")
+    print(f"same batch replayed:        {args.burst / replay_seconds:9.0f} signals/s "
+          f"({replay_seconds * 1000:.0f} ms, {replayed['duplicate']} duplicates)")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,118 @@
+#!/usr/bin/env python3
+"""
+Benchmark for signal statistics
+Relays signals into a SQLite feed, marks a share of them taken, then times /signals/stats read from the counters
+against the per-request count() and GROUP BY scans it used to run, and checks the counters against a full rebuild
+"""
+
+import os
+import sys
+import time
+import random
+import argparse
+import tempfile
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from flask import Flask
+from sqlalchemy.dialects.postgresql import JSONB
+from sqlalchemy.ext.compiler import compiles
+
+from journal.extensions import db
+from journal.models import SignalFeed, SignalStatBucket, SignalStatusCount
+from journal.signal_models import Signal
+from journal.signal_feed_routes import signal_feed_bp
+from journal import signal_stats
+
+MARKETS = ['forex', 'crypto', 'indices', 'commodities']
+OUTCOMES = ['Target Hit', 'Stop Loss Hit', 'Breakeven']
+
+
+@compiles(JSONB, 'sqlite')
+def _jsonb_on_sqlite(type_, compiler, **kw):
+    # signals.payload is JSONB; SQLite stores the same values as JSON
+    return 'JSON'
+
+
+def make_burst(prefix, count, now):
+    return [{
+        'uniqueKey': f'{prefix}-{i}',
+        'signal': {
+            'id': f'{prefix}-{i}', 'pair': 'EURUSD', 'direction': random.choice(['BUY', 'SELL']),
+            'entry': 1.0920, 'stopLoss': 1.0890, 'takeProfit': [1.0950], 'confidence': random.randint(70, 99),
+            'timestamp': (now - timedelta(minutes=random.randint(0, 60 * 24 * 45))).isoformat() + 'Z',
+            'market': random.choice(MARKETS), 'timeframe': '1h', 'riskTier': random.choice(['low', 'medium', 'high'])
+        }
+    } for i in range(count)]
+
+
+def scan_stats():
+    """The aggregation /signals/stats ran before the counters"""
+    total_signals = SignalFeed.query.count()
+    active_signals = SignalFeed.query.filter_by(status='active').count()
+    taken_signals = SignalFeed.query.filter_by(status='taken').count()
+    outcomes = db.session.query(SignalFeed.outcome, db.func.count(SignalFeed.id)) \
+        .filter(SignalFeed.status == 'taken').group_by(SignalFeed.outcome).all()
+    return total_signals, active_signals, taken_signals, dict(outcomes)
+
+
+def timed(call, repeat):
+    started = time.perf_counter()
+    for _ in range(repeat):
+        call()
+    return (time.perf_counter() - started) / repeat * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark /signals/stats')
+    parser.add_argument('--sizes', default='10000,100000,300000', help='Comma-separated feed sizes')
+    parser.add_argument('--taken', type=float, default=0.3, help='Share of signals marked taken')
+    parser.add_argument('--repeat', type=int, default=50)
+    args = parser.parse_args()
+
+    app = Flask(__name__)
+    app.config['SQLALCHEMY_DATABASE_URI'] = f"sqlite:///{os.path.join(tempfile.mkdtemp(), 'stats.db')}"
+    db.init_app(app)
+    app.register_blueprint(signal_feed_bp)
+    client = app.test_client()
+    now = datetime.utcnow()
+
+    print(f"{'signals':>9s} {'counters':>9s} {'scans':>10s}")
+    with app.app_context():
+        for table in (SignalFeed.__table__, Signal.__table__, SignalStatusCount.__table__, SignalStatBucket.__table__):
+            table.create(db.engine, checkfirst=True)
+
+        filled = 0
+        for size in (int(size) for size in args.sizes.split(',')):
+            burst = make_burst(f'bench-{size}', size - filled, now)
+            for start in range(0, len(burst), 10000):
+                response = client.post('/signals/relay/batch', json={'signals': burst[start:start + 10000]})
+                assert response.status_code == 200, response.get_data(as_text=True)
+            for item in random.sample(burst, int(len(burst) * args.taken)):
+                response = client.post('/signals/mark-taken', json={
+                    'signalId': item['signal']['id'], 'outcome': random.choice(OUTCOMES),
+                    'pnl': round(random.uniform(-50, 120), 2), 'userId': 'bench'
+                })
+                assert response.status_code == 200, response.get_data(as_text=True)
+            filled = size
+
+            counters = timed(lambda: client.get('/signals/stats'), args.repeat)
+            scans = timed(scan_stats, max(args.repeat // 10, 1))
+            print(f"{size:9d} {counters:7.2f}ms {scans:8.2f}ms")
+
+        maintained = client.get('/signals/stats').get_json()
+        total, active, taken, outcomes = scan_stats()
+        assert (maintained['total_signals'], maintained['active_signals'], maintained['taken_signals'],
+                maintained['outcome_stats']) == (total, active, taken, outcomes), (maintained, outcomes)
+        admin = signal_stats.admin_summary()
+        signal_stats.rebuild()
+        rebuilt = client.get('/signals/stats').get_json()
+        assert maintained == rebuilt, (maintained, rebuilt)
+        assert admin == signal_stats.admin_summary()
+
+    print(f"\ncounters match a full rebuild; rolling windows: {maintained['rolling']}")
+
+
+if __name__ == '__main__':
+    main()
@@ -15,6 +15,8 @@ class Config:
     # JWT & Security Configuration
     SECRET_KEY = os.getenv('SECRET_KEY', 'dev-secret-key-change-in-production')
     JWT_SECRET_KEY = os.getenv('JWT_SECRET_KEY', 'dev-jwt-secret-change-in-production')
+    # Rate limit state; a redis:// URL shares the limits across gunicorn workers
+    RATELIMIT_STORAGE_URI = os.getenv('RATELIMIT_STORAGE_URI', os.getenv('REDIS_URL', 'memory://'))
 
 class ProductionConfig(Config):
     """Production configuration class"""
@@ -1,12 +1,17 @@
 from flask import Blueprint, request, jsonify
 from .models import db, User, RiskPlan
+from .pagination import keyset_page
 from datetime import datetime, timedelta
 import json
+import uuid
 import requests
 from sqlalchemy import func
 
 dashboard_bp = Blueprint('dashboard', __name__)
 
+# Sort position of customers with no created_at in /customers/search
+UNKNOWN_JOIN_DATE = datetime(1970, 1, 1)
+
 @dashboard_bp.route('/dashboard/notifications', methods=['GET'])
 def get_dashboard_notifications():
     """Get notifications for customer service dashboard"""
@@ -333,6 +338,7 @@ def search_customers():
         date_from = request.args.get('date_from')
         date_to = request.args.get('date_to')
         limit = request.args.get('limit', 50, type=int)
+        cursor = request.args.get('cursor')
         
         # Build query
         query = User.query
@@ -373,13 +379,26 @@ def search_customers():
             except ValueError:
                 pass
         
-        # Execute query
-        users = query.limit(limit).all()
+        # Keyset pagination: resume after the last (created_at, id) of the previous page. Customers without a
+        # created_at sort as the epoch, so they come last and still carry a cursor value
+        joined = func.coalesce(User.created_at, UNKNOWN_JOIN_DATE)
+        try:
+            users, next_cursor = keyset_page(query, joined, User.id, cursor, limit,
+                                             key=lambda user: (user.created_at or UNKNOWN_JOIN_DATE, user.id),
+                                             parse_id=lambda value: uuid.UUID(str(value)))
+        except ValueError as e:
+            return jsonify({'error': f'Invalid cursor: {str(e)}'}), 400
+        
+        # Load every risk plan for the page in one query instead of one per user
+        risk_plans = {}
+        if users:
+            for plan in RiskPlan.query.filter(RiskPlan.user_id.in_([user.id for user in users])).all():
+                risk_plans.setdefault(plan.user_id, plan)
         
         # Format results
         customers = []
         for user in users:
-            risk_plan = RiskPlan.query.filter_by(user_id=user.id).first()
+            risk_plan = risk_plans.get(user.id)
             
             customer_data = {
                 'id': user.id,
@@ -414,6 +433,7 @@ def search_customers():
         return jsonify({
             'customers': customers,
             'total': len(customers),
+            'next_cursor': next_cursor,
             'search_query': search_query,
             'filters_applied': {
                 'membership_tier': membership_tier,
@@ -762,13 +782,17 @@ def mark_signal_taken():
         
         # Update signal status in database
         from .models import SignalFeed
-        signal = SignalFeed.query.filter_by(signal_id=signal_id).first()
+        from . import signal_stats
+        signal = SignalFeed.query.filter_by(signal_id=signal_id).with_for_update().first()
         
         if signal:
+            old_state = signal_stats.feed_state(signal)
             signal.status = 'taken'
             signal.outcome = outcome
             if pnl:
                 signal.pnl = pnl
+            signal.taken_at = signal.taken_at or datetime.utcnow()
+            signal_stats.record_change(signal_stats.FEED, old_state, signal_stats.feed_state(signal))
             db.session.commit()
         
         return jsonify({
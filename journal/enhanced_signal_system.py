@@ -11,6 +11,7 @@ from flask import Blueprint, request, jsonify
 from flask_socketio import emit
 from .models import Signal, SignalFeed, User, RiskPlan, UserSignal
 from .extensions import db, socketio
+from . import signal_stats
 from datetime import datetime, timedelta
 import uuid
 import json
@@ -84,6 +85,7 @@ class SignalDeliveryService:
             
             db.session.add(signal_feed)
             db.session.add(admin_signal)
+            signal_stats.record_created(signal_stats.FEED, [signal_stats.feed_state(signal_feed)])
             db.session.commit()
             
             # Emit real-time signal to all connected users
@@ -181,9 +183,10 @@ class SignalDeliveryService:
         """
         try:
             # Find the signal
-            signal = SignalFeed.query.filter_by(signal_id=signal_id).first()
+            signal = SignalFeed.query.filter_by(signal_id=signal_id).with_for_update().first()
             if not signal:
                 return {'success': False, 'error': 'Signal not found'}
+            old_state = signal_stats.feed_state(signal)
             
             # Update signal status (never delete, only mark as taken)
             signal.status = 'taken'
@@ -191,6 +194,7 @@ class SignalDeliveryService:
             signal.pnl = pnl
             signal.taken_by = str(user_id)
             signal.taken_at = datetime.utcnow()
+            signal_stats.record_change(signal_stats.FEED, old_state, signal_stats.feed_state(signal))
             
             # Create user signal record for tracking
             user_signal = UserSignal(
@@ -296,24 +300,19 @@ def get_signal_stats():
         return '', 200
     
     try:
-        total_signals = SignalFeed.query.count()
-        active_signals = SignalFeed.query.filter_by(status='active').count()
-        taken_signals = SignalFeed.query.filter_by(status='taken').count()
-        recommended_signals = SignalFeed.query.filter_by(is_recommended=True, status='active').count()
-        
-        # Get market breakdown
-        forex_signals = SignalFeed.query.filter_by(market='forex', status='active').count()
-        crypto_signals = SignalFeed.query.filter_by(market='crypto', status='active').count()
+        # Read from the counters signal_stats maintains, not the signal_feed table
+        stats = signal_stats.feed_summary()
         
         return jsonify({
             'success': True,
             'stats': {
-                'total_signals': total_signals,
-                'active_signals': active_signals,
-                'taken_signals': taken_signals,
-                'recommended_signals': recommended_signals,
-                'forex_signals': forex_signals,
-                'crypto_signals': crypto_signals
+                'total_signals': stats['total_signals'],
+                'active_signals': stats['active_signals'],
+                'taken_signals': stats['taken_signals'],
+                'recommended_signals': stats['recommended_signals'],
+                'forex_signals': stats['active_by_market'].get('forex', 0),
+                'crypto_signals': stats['active_by_market'].get('crypto', 0),
+                'rolling': stats['rolling']
             }
         }), 200
         
@@ -330,6 +329,7 @@ def clear_signals():
         # This should be protected with admin authentication in production
         SignalFeed.query.delete()
         Signal.query.delete()
+        signal_stats.reset()
         db.session.commit()
         
         return jsonify({
@@ -3,8 +3,14 @@ from flask_socketio import SocketIO
 from supabase import create_client, Client
 import os
 
+from market_data_gateway import MarketDataGateway
+from request_instrumentation import RequestInstrumentation
+
 db = SQLAlchemy()
 socketio = SocketIO()
+instrumentation = RequestInstrumentation(service='journal')
+# Quotes shared by the yfinance and forex blueprints, one upstream fetch per symbol at a time
+market_data = MarketDataGateway(trace=instrumentation.upstream)
 
 # Supabase client (primary database)
 supabase: Client = None
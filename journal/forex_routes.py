@@ -2,7 +2,8 @@ from flask import Blueprint, request, jsonify
 from datetime import datetime
 import logging
 import yfinance as yf
-import time
+
+from .extensions import market_data
 
 # Set up logging
 logging.basicConfig(level=logging.INFO)
@@ -11,55 +12,21 @@ logger = logging.getLogger(__name__)
 forex_bp = Blueprint('forex', __name__)
 
 
+def _yfinance_symbol(pair: str) -> str:
+    """Convert forex pair to yfinance symbol format"""
+    if '/' in pair:
+        return pair.replace('/', '') + '=X'
+    return pair + '=X'
+
+
 def _get_forex_price_from_yfinance(pair: str) -> float:
-    """Get forex price from yfinance only with rate limit handling"""
+    """Get forex price from the shared market data gateway (cached, one upstream fetch per symbol)"""
+    symbol = _yfinance_symbol(pair)
     try:
-        # Convert forex pair to yfinance symbol format
-        if '/' in pair:
-            symbol = pair.replace('/', '') + '=X'
-        else:
-            symbol = pair + '=X'
-        
-        logger.info(f"Fetching {pair} as {symbol} from yfinance")
-        
-        # Add delay to avoid rate limiting
-        time.sleep(0.5)
-        
-        # Try simple download method first (most reliable)
-        try:
-            data = yf.download(symbol, period='1d', interval='1m', progress=False, timeout=10)
-            if data is not None and not data.empty and len(data) > 0:
-                price = data['Close'].iloc[-1]
-                if price and price > 0:
-                    logger.info(f"✅ yfinance download price for {pair}: {price}")
-                    return float(price)
-        except Exception as e:
-            logger.debug(f"yfinance download failed for {pair}: {e}")
-        
-        # Try ticker history as fallback
-        try:
-            ticker = yf.Ticker(symbol)
-            hist = ticker.history(period='1d', interval='1m', timeout=10)
-            if hist is not None and not hist.empty and len(hist) > 0:
-                price = hist['Close'].iloc[-1]
-                if price and price > 0:
-                    logger.info(f"✅ yfinance history price for {pair}: {price}")
-                    return float(price)
-        except Exception as e:
-            logger.debug(f"yfinance history failed for {pair}: {e}")
-        
-        # Try ticker info as last resort
-        try:
-            ticker = yf.Ticker(symbol)
-            info = ticker.info
-            if info and 'regularMarketPrice' in info and info['regularMarketPrice']:
-                price = info['regularMarketPrice']
-                if price and price > 0:
-                    logger.info(f"✅ yfinance info price for {pair}: {price}")
-                    return float(price)
-        except Exception as e:
-            logger.debug(f"yfinance info failed for {pair}: {e}")
-        
+        quote = market_data.quote(symbol)
+        if quote is not None and quote.price > 0:
+            return quote.price
+        logger.warning(f"No yfinance data for {pair} ({symbol})")
     except Exception as e:
         logger.error(f"yfinance error for {pair}: {e}")
     
@@ -129,7 +96,7 @@ def get_forex_data():
         if not pair:
             return jsonify({'error': 'Pair parameter is missing.'}), 400
 
-        symbol = _format_symbol(pair)
+        symbol = _yfinance_symbol(pair)
         ticker = yf.Ticker(symbol)
 
         # Try multiple intervals for robustness
@@ -176,11 +143,13 @@ def get_bulk_forex_price():
         pairs_list = [p.strip() for p in pairs.split(',') if p.strip()]
         results = {}
         
-        # Process pairs individually with API calls
+        # Every pair not already cached is fetched in one upstream request
+        quotes = market_data.quotes(_yfinance_symbol(pair) for pair in pairs_list)
+        
         for pair in pairs_list:
             try:
-                # Try to get real price from yfinance
-                price = _get_forex_price_from_yfinance(pair)
+                quote = quotes.get(_yfinance_symbol(pair))
+                price = quote.price if quote is not None and quote.price > 0 else None
                 
                 if price is not None:
                     results[pair] = {
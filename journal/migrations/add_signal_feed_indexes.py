@@ -0,0 +1,49 @@
+"""
+Migration script to add the signal feed indexes: composite indexes behind keyset pagination, and the unique
+index on signal_feed.unique_key that relay deduplication (ON CONFLICT) depends on
+"""
+from sqlalchemy import create_engine, inspect, text
+import os
+
+# (table, index name, columns, unique), matching the SignalFeed and Signal models
+INDEXES = [
+    ('signal_feed', 'ux_signal_feed_unique_key', 'unique_key', True),
+    ('signal_feed', 'ix_signal_feed_status_market_timestamp', 'status, market, timestamp, id', False),
+    ('signal_feed', 'ix_signal_feed_status_timestamp', 'status, timestamp, id', False),
+    ('signals', 'ix_signals_risk_tier_status_created_at', 'risk_tier, status, created_at, id', False),
+]
+
+def add_signal_feed_indexes():
+    """Create the feed indexes that don't exist yet; on PostgreSQL without locking the tables against writes"""
+
+    # Database connection
+    database_url = os.getenv('DATABASE_URL', 'sqlite:///journal.db')
+    is_sqlite = 'sqlite' in database_url.lower()
+    # CREATE INDEX CONCURRENTLY cannot run inside a transaction
+    engine = create_engine(database_url) if is_sqlite else create_engine(database_url, isolation_level='AUTOCOMMIT')
+    inspector = inspect(engine)
+    tables = set(inspector.get_table_names())
+
+    with engine.connect() as connection:
+        for table, name, columns, unique in INDEXES:
+            if table not in tables:
+                print(f"Table '{table}' does not exist, skipping {name}.")
+                continue
+            if any(index['name'] == name for index in inspector.get_indexes(table)):
+                print(f"Index '{name}' already exists.")
+                continue
+            # A table created from the model already has unique_key's UNIQUE constraint
+            if unique and any(constraint['column_names'] == [columns]
+                              for constraint in inspector.get_unique_constraints(table)):
+                print(f"Unique constraint on {table}({columns}) already exists.")
+                continue
+            concurrently = '' if is_sqlite else 'CONCURRENTLY '
+            kind = 'UNIQUE INDEX' if unique else 'INDEX'
+            connection.execute(text(f"CREATE {kind} {concurrently}IF NOT EXISTS {name} ON {table} ({columns})"))
+            print(f"Created index '{name}' on {table}({columns}).")
+        connection.commit()
+
+    print("Migration to add signal feed indexes completed successfully.")
+
+if __name__ == '__main__':
+    add_signal_feed_indexes()
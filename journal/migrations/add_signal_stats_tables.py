@@ -0,0 +1,37 @@
+"""
+Migration script to add the signal statistics tables (signal_status_counts, signal_stat_buckets) and backfill them
+from signal_feed and signals. Rerunning it recounts from scratch, which also repairs counters after writes made
+outside the app (manual SQL, scripts that bypass journal.signal_stats)
+"""
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from flask import Flask
+
+from journal.extensions import db
+from journal.models import SignalStatBucket, SignalStatusCount
+from journal import signal_stats
+
+def add_signal_stats_tables():
+    """Create the statistics tables if missing, then rebuild their counters"""
+
+    # Database connection
+    app = Flask(__name__)
+    app.config['SQLALCHEMY_DATABASE_URI'] = os.getenv('DATABASE_URL', 'sqlite:///journal.db')
+    db.init_app(app)
+
+    with app.app_context():
+        for table in (SignalStatusCount.__table__, SignalStatBucket.__table__):
+            table.create(db.engine, checkfirst=True)
+            print(f"Table '{table.name}' is present.")
+
+        signal_stats.rebuild()
+        feed, admin = signal_stats.feed_summary(), signal_stats.admin_summary()
+        print(f"Counted {feed['total_signals']} feed signals and {admin['total_signals']} admin signals.")
+
+    print("Migration to add signal statistics tables completed successfully.")
+
+if __name__ == '__main__':
+    add_signal_stats_tables()
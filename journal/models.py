@@ -87,3 +87,55 @@ class SignalTracking(db.Model):
     outcome = db.Column(db.String(20))
     pnl = db.Column(db.Numeric(15, 2))
     created_at = db.Column(db.DateTime, default=db.func.current_timestamp())
+
+class SignalFeed(db.Model):
+    __tablename__ = 'signal_feed'
+    id = db.Column(db.Integer, primary_key=True)
+    unique_key = db.Column(db.String(255), unique=True, nullable=False)
+    signal_id = db.Column(db.String(255), nullable=False)
+    pair = db.Column(db.String(50), nullable=False)
+    direction = db.Column(db.String(10), nullable=False)
+    entry_price = db.Column(db.String(50))
+    stop_loss = db.Column(db.String(50))
+    take_profit = db.Column(db.Text)
+    confidence = db.Column(db.Integer)
+    analysis = db.Column(db.Text)
+    ict_concepts = db.Column(db.Text)
+    timestamp = db.Column(db.DateTime, nullable=False, default=db.func.current_timestamp())
+    status = db.Column(db.String(20), default='active')
+    market = db.Column(db.String(20), default='forex')
+    timeframe = db.Column(db.String(20))
+    created_by = db.Column(db.String(50), default='admin')
+    is_recommended = db.Column(db.Boolean, default=False)
+    outcome = db.Column(db.String(50))
+    pnl = db.Column(db.Numeric(15, 2))
+    taken_by = db.Column(db.String(255))
+    taken_at = db.Column(db.DateTime)
+    # Newest-first feed pages, filtered by market or not, are range scans ending in (timestamp, id)
+    __table_args__ = (
+        db.Index('ix_signal_feed_status_market_timestamp', 'status', 'market', 'timestamp', 'id'),
+        db.Index('ix_signal_feed_status_timestamp', 'status', 'timestamp', 'id'),
+    )
+
+class SignalStatusCount(db.Model):
+    """Current number of signals per status and dimension, maintained by journal.signal_stats"""
+    __tablename__ = 'signal_status_counts'
+    source = db.Column(db.String(10), primary_key=True)  # 'feed' (signal_feed) or 'admin' (signals)
+    status = db.Column(db.String(20), primary_key=True)
+    market = db.Column(db.String(20), primary_key=True, default='')
+    risk_tier = db.Column(db.String(20), primary_key=True, default='')
+    recommended = db.Column(db.Boolean, primary_key=True, default=False)
+    count = db.Column(db.Integer, nullable=False, default=0)
+
+class SignalStatBucket(db.Model):
+    """Signals created and taken per hour, with wins and PnL of the taken ones, maintained by journal.signal_stats"""
+    __tablename__ = 'signal_stat_buckets'
+    source = db.Column(db.String(10), primary_key=True)
+    bucket = db.Column(db.DateTime, primary_key=True)  # UTC hour
+    market = db.Column(db.String(20), primary_key=True, default='')
+    risk_tier = db.Column(db.String(20), primary_key=True, default='')
+    event = db.Column(db.String(10), primary_key=True)  # 'created' or 'taken'
+    outcome = db.Column(db.String(50), primary_key=True, default='')
+    count = db.Column(db.Integer, nullable=False, default=0)
+    wins = db.Column(db.Integer, nullable=False, default=0)
+    pnl = db.Column(db.Float, nullable=False, default=0)
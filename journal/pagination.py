@@ -0,0 +1,92 @@
+"""
+Keyset Pagination
+Opaque (timestamp, id) cursors for newest-first feeds, and a cache of rows serialized to JSON once
+"""
+
+import json
+import base64
+import binascii
+import threading
+from collections import OrderedDict
+from datetime import datetime
+from typing import Any, Callable, Dict, Hashable, List, Optional, Tuple
+
+from flask import Response
+from sqlalchemy import tuple_
+
+
+def encode_cursor(timestamp: datetime, row_id: Any) -> str:
+    raw = json.dumps([timestamp.isoformat(), row_id if isinstance(row_id, int) else str(row_id)])
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip('=')
+
+
+def decode_cursor(cursor: str, parse_id: Callable[[Any], Any] = None) -> Tuple[datetime, Any]:
+    """(timestamp, id) from encode_cursor, the id converted by ``parse_id``; raises ValueError for anything else"""
+    try:
+        timestamp, row_id = json.loads(base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4)))
+        return datetime.fromisoformat(timestamp), parse_id(row_id) if parse_id is not None else row_id
+    except (binascii.Error, UnicodeDecodeError, TypeError, ValueError, AttributeError) as e:
+        raise ValueError('Invalid cursor') from e
+
+
+def keyset_page(query, timestamp_column, id_column, cursor: Optional[str], limit: int,
+                key: Callable[[Any], Tuple[datetime, Any]], parse_id: Callable[[Any], Any] = None):
+    """One newest-first page strictly after ``cursor``: (rows, next_cursor or None).
+
+    The (timestamp, id) row comparison is a range on an index ending in
+    those columns, so every page costs the same however deep it is.
+    ``key`` returns a result row's (timestamp, id).
+    """
+    if cursor:
+        timestamp, row_id = decode_cursor(cursor, parse_id)
+        query = query.filter(tuple_(timestamp_column, id_column) < (timestamp, row_id))
+    rows = query.order_by(timestamp_column.desc(), id_column.desc()).limit(limit + 1).all()
+    if len(rows) <= limit:
+        return rows, None
+    rows = rows[:limit]
+    return rows, encode_cursor(*key(rows[-1]))
+
+
+class RowJSONCache:
+    """Bounded LRU of rows already encoded as JSON objects.
+
+    Keys carry whatever changes a row's JSON (e.g. id and status), so an
+    updated row gets a new entry instead of needing invalidation.
+    """
+
+    def __init__(self, max_rows: int = 20000):
+        self.max_rows = max_rows
+        self._rows: "OrderedDict[Hashable, str]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: Hashable, serialize: Callable[[], Dict]) -> str:
+        with self._lock:
+            row = self._rows.get(key)
+            if row is not None:
+                self._rows.move_to_end(key)
+                self.hits += 1
+                return row
+            self.misses += 1
+        row = json.dumps(serialize(), separators=(',', ':'))
+        with self._lock:
+            self._rows[key] = row
+            if len(self._rows) > self.max_rows:
+                self._rows.popitem(last=False)
+        return row
+
+
+def with_fields(row_json: str, fields: Dict) -> str:
+    """Append per-request fields to a cached JSON object without decoding it"""
+    if not fields:
+        return row_json
+    return f"{row_json[:-1]},{json.dumps(fields, separators=(',', ':'))[1:]}"
+
+
+def rows_response(payload: Dict, rows: List[str], key: str = 'signals', status: int = 200) -> Response:
+    """JSON response of ``payload`` plus ``key``: the pre-serialized rows, spliced in as a JSON array"""
+    body = json.dumps(payload, separators=(',', ':'))
+    array = f"[{','.join(rows)}]"
+    body = f'{{"{key}":{array}}}' if body == '{}' else f'{body[:-1]},"{key}":{array}}}'
+    return Response(body, status=status, mimetype='application/json')
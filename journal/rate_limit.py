@@ -0,0 +1,231 @@
+"""
+Rate Limiting
+GCRA rate limits with an in-process store for development and a Redis store shared by every gunicorn worker
+"""
+
+import os
+import time
+import logging
+import threading
+from functools import lru_cache, wraps
+from typing import Callable, Dict, List, NamedTuple, Optional, Sequence, Tuple
+
+from flask import Flask, current_app, jsonify, request
+
+logger = logging.getLogger(__name__)
+
+PERIODS = {'second': 1, 'minute': 60, 'hour': 3600, 'day': 86400}
+
+# Memory store keys past their TAT are swept once the table grows beyond this
+MEMORY_SWEEP_THRESHOLD = 100000
+
+# While Redis is unreachable, the fail-open warning is logged at most this often
+STORE_WARNING_INTERVAL = 60
+
+# Applies every limit atomically in one round trip, on the Redis clock so all workers agree.
+# KEYS: one per limit. ARGV: cost, then emission interval and period (ms) per limit.
+# Returns {allowed, retry_after_ms, remaining}; nothing is written unless every limit allows.
+GCRA_SCRIPT = """
+if redis.replicate_commands then redis.replicate_commands() end
+local t = redis.call('TIME')
+local now = tonumber(t[1]) * 1000 + math.floor(tonumber(t[2]) / 1000)
+local cost = tonumber(ARGV[1])
+local new_tats = {}
+local remaining = -1
+for i, key in ipairs(KEYS) do
+    local emission = tonumber(ARGV[2 * i])
+    local period = tonumber(ARGV[2 * i + 1])
+    local tat = tonumber(redis.call('GET', key)) or now
+    if tat < now then tat = now end
+    local new_tat = tat + emission * cost
+    local allow_at = new_tat - period
+    if allow_at > now then
+        return {0, allow_at - now, 0}
+    end
+    new_tats[i] = new_tat
+    local left = math.floor((period - (new_tat - now)) / emission)
+    if remaining < 0 or left < remaining then remaining = left end
+end
+for i, key in ipairs(KEYS) do
+    redis.call('SET', key, new_tats[i], 'PX', math.max(math.ceil(new_tats[i] - now), 1))
+end
+return {1, 0, remaining}
+"""
+
+
+class Rate(NamedTuple):
+    limit: int
+    period_ms: int
+
+    @property
+    def emission_ms(self) -> float:
+        return self.period_ms / self.limit
+
+
+class RateLimitResult(NamedTuple):
+    allowed: bool
+    remaining: int
+    retry_after: float  # seconds
+
+
+@lru_cache(maxsize=256)
+def parse_rate(rate: str) -> Rate:
+    """'10 per hour' / '5/minute' -> Rate(10, 3600000)"""
+    count, _, unit = rate.replace('/', ' per ').partition(' per ')
+    unit = unit.strip().lower().rstrip('s')
+    if unit not in PERIODS:
+        raise ValueError(f"Unknown rate period in {rate!r}")
+    return Rate(int(count), PERIODS[unit] * 1000)
+
+
+def gcra_update(tats: Dict[str, float], now: float, keys: Sequence[str], rates: Sequence[Rate],
+                cost: int = 1) -> Tuple[bool, float, int]:
+    """The GCRA step of GCRA_SCRIPT on a dict of theoretical arrival times (ms): (allowed, retry_after_ms, remaining)"""
+    new_tats = []
+    remaining = None
+    for key, rate in zip(keys, rates):
+        tat = max(tats.get(key, now), now)
+        new_tat = tat + rate.emission_ms * cost
+        allow_at = new_tat - rate.period_ms
+        if allow_at > now:
+            return False, allow_at - now, 0
+        new_tats.append(new_tat)
+        left = int((rate.period_ms - (new_tat - now)) // rate.emission_ms)
+        remaining = left if remaining is None else min(remaining, left)
+    for key, new_tat in zip(keys, new_tats):
+        tats[key] = new_tat
+    return True, 0.0, remaining or 0
+
+
+class MemoryRateLimitStore:
+    """Per-process GCRA state; correct for a single worker, per-worker with several"""
+
+    def __init__(self, clock: Callable[[], float] = time.time):
+        self.clock = clock
+        self._tats: Dict[str, float] = {}
+        self._lock = threading.Lock()
+
+    def hit(self, keys: Sequence[str], rates: Sequence[Rate], cost: int = 1) -> Tuple[bool, float, int]:
+        now = self.clock() * 1000
+        with self._lock:
+            if len(self._tats) > MEMORY_SWEEP_THRESHOLD:
+                self._tats = {key: tat for key, tat in self._tats.items() if tat > now}
+            return gcra_update(self._tats, now, keys, rates, cost)
+
+
+class RedisRateLimitStore:
+    """GCRA state in Redis: one EVALSHA per check, shared by every worker and host.
+
+    When Redis cannot be reached the check fails open, so an outage
+    degrades to no rate limiting rather than rejecting every request.
+    """
+
+    def __init__(self, client):
+        self.client = client
+        self._script = client.register_script(GCRA_SCRIPT)
+        self._last_warning = 0.0
+
+    @classmethod
+    def from_url(cls, url: str) -> 'RedisRateLimitStore':
+        import redis
+        return cls(redis.from_url(url))
+
+    def hit(self, keys: Sequence[str], rates: Sequence[Rate], cost: int = 1) -> Tuple[bool, float, int]:
+        args: List[float] = [cost]
+        for rate in rates:
+            args += [rate.emission_ms, rate.period_ms]
+        try:
+            allowed, retry_after_ms, remaining = self._script(keys=list(keys), args=args)
+        except Exception as e:
+            if time.monotonic() - self._last_warning > STORE_WARNING_INTERVAL:
+                self._last_warning = time.monotonic()
+                logger.warning(f"Rate limit store unavailable, allowing requests: {e}")
+            return True, 0.0, 0
+        return bool(allowed), float(retry_after_ms), int(remaining)
+
+
+def create_rate_limit_store(uri: str):
+    """'memory://' or a redis:// / rediss:// URL"""
+    if uri.startswith('memory://'):
+        return MemoryRateLimitStore()
+    if uri.startswith(('redis://', 'rediss://', 'unix://')):
+        return RedisRateLimitStore.from_url(uri)
+    raise ValueError(f"Unsupported rate limit storage URI: {uri}")
+
+
+def remote_address() -> str:
+    return request.remote_addr or '127.0.0.1'
+
+
+class RateLimiter:
+    """Flask extension checking GCRA limits against a pluggable store.
+
+    Each named limit allows ``limit`` requests at once and then one every
+    ``period / limit``, so the rate is smooth instead of resetting at
+    window edges. ``default_limits`` apply to every endpoint not decorated
+    with ``limit``.
+    """
+
+    def __init__(self, app: Optional[Flask] = None, store=None, key_func: Callable[[], str] = remote_address,
+                 default_limits: Sequence[str] = (), key_prefix: str = 'rl'):
+        self.store = store
+        self.key_func = key_func
+        self.default_limits = [parse_rate(rate) for rate in default_limits]
+        self.key_prefix = key_prefix
+        if app:
+            self.init_app(app)
+
+    def init_app(self, app: Flask):
+        """Pick the store from RATELIMIT_STORAGE_URI (config or environment) and apply the default limits"""
+        if self.store is None:
+            uri = app.config.get('RATELIMIT_STORAGE_URI') or os.getenv('RATELIMIT_STORAGE_URI', 'memory://')
+            self.store = create_rate_limit_store(uri)
+        if self.default_limits:
+            app.before_request(self._check_default_limits)
+        app.extensions['rate_limiter'] = self
+
+    def _key(self, scope: str, identity: str, rate: Rate) -> str:
+        return f"{self.key_prefix}:{scope}:{identity}:{rate.limit}/{rate.period_ms}"
+
+    def hit(self, scope: str, identity: str, rates: Sequence[Rate], cost: int = 1) -> RateLimitResult:
+        """Count one request against every rate at once; nothing is counted if any is exceeded"""
+        keys = [self._key(scope, identity, rate) for rate in rates]
+        allowed, retry_after_ms, remaining = self.store.hit(keys, rates, cost)
+        return RateLimitResult(allowed, remaining, retry_after_ms / 1000)
+
+    def check(self, scope: str, identity: str, rate: str, cost: int = 1) -> RateLimitResult:
+        return self.hit(scope, identity, [parse_rate(rate)], cost)
+
+    def _check_default_limits(self):
+        view = current_app.view_functions.get(request.endpoint) if request.endpoint else None
+        if view is None or getattr(view, '_rate_limited', False):
+            return None
+        result = self.hit(request.endpoint, self.key_func(), self.default_limits)
+        if not result.allowed:
+            return too_many_requests('Rate limit exceeded', result)
+        return None
+
+    def limit(self, *rates: str, key_func: Optional[Callable[[], str]] = None, scope: Optional[str] = None,
+              message: str = 'Rate limit exceeded'):
+        """Decorator limiting a view; several rates are checked together in one store round trip"""
+        parsed = [parse_rate(rate) for rate in rates]
+
+        def decorator(f):
+            limit_scope = scope or f"{f.__module__}.{f.__qualname__}"
+
+            @wraps(f)
+            def wrapped(*args, **kwargs):
+                result = self.hit(limit_scope, (key_func or self.key_func)(), parsed)
+                if not result.allowed:
+                    return too_many_requests(message, result)
+                return f(*args, **kwargs)
+            wrapped._rate_limited = True
+            return wrapped
+        return decorator
+
+
+def too_many_requests(message: str, result: RateLimitResult):
+    response = jsonify({'error': message, 'retry_after': round(result.retry_after, 3)})
+    response.status_code = 429
+    response.headers['Retry-After'] = str(max(int(result.retry_after + 0.999), 1))
+    return response
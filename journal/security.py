@@ -1,18 +1,15 @@
 from flask import Flask, request, jsonify
-from flask_limiter import Limiter
-from flask_limiter.util import get_remote_address
 from flask_cors import CORS
 import os
-from datetime import datetime, timedelta
+from functools import lru_cache, wraps
 import hashlib
 import hmac
 
-# Rate limiting configuration
-limiter = Limiter(
-    key_func=get_remote_address,
-    default_limits=["200 per day", "50 per hour"],
-    storage_uri="memory://"
-)
+from .rate_limit import RateLimiter, too_many_requests
+
+# Rate limiting configuration; set RATELIMIT_STORAGE_URI to a redis:// URL so the
+# limits are shared by every gunicorn worker instead of counted per process
+limiter = RateLimiter(default_limits=["200 per day", "50 per hour"])
 
 def init_security(app: Flask):
     """Initialize security features for the Flask app"""
@@ -80,11 +77,9 @@ def init_security(app: Flask):
                 # Limit payment attempts to 10 per hour per user
                 user_id = get_user_id_from_token(auth_header)
                 if user_id:
-                    key = f"payment:{user_id}"
-                    if limiter.limiter.is_allowed(key, 10, timedelta(hours=1)):
-                        return None
-                    else:
-                        return jsonify({'error': 'Too many payment attempts. Please try again later.'}), 429
+                    result = limiter.check('payment', user_id, '10 per hour')
+                    if not result.allowed:
+                        return too_many_requests('Too many payment attempts. Please try again later.', result)
         
         return None
 
@@ -96,37 +91,27 @@ def get_user_id_from_token(auth_header: str) -> str:
         
         # In production, you'd verify the JWT token here
         # For now, return a hash of the token as user identifier
-        return hashlib.sha256(token.encode()).hexdigest()[:16]
+        return _token_digest(token)
     except:
         return None
 
+@lru_cache(maxsize=4096)
+def _token_digest(token: str) -> str:
+    # A client sends the same token on every request, so each is hashed once
+    return hashlib.sha256(token.encode()).hexdigest()[:16]
+
 # Specific rate limit decorators
 def payment_rate_limit():
     """Rate limit decorator for payment endpoints"""
-    def decorator(f):
-        @limiter.limit("10 per hour")
-        def wrapped(*args, **kwargs):
-            return f(*args, **kwargs)
-        return wrapped
-    return decorator
+    return limiter.limit("10 per hour")
 
 def auth_rate_limit():
     """Rate limit decorator for authentication endpoints"""
-    def decorator(f):
-        @limiter.limit("5 per hour")
-        def wrapped(*args, **kwargs):
-            return f(*args, **kwargs)
-        return wrapped
-    return decorator
+    return limiter.limit("5 per hour")
 
 def api_rate_limit():
     """Rate limit decorator for general API endpoints"""
-    def decorator(f):
-        @limiter.limit("100 per hour")
-        def wrapped(*args, **kwargs):
-            return f(*args, **kwargs)
-        return wrapped
-    return decorator
+    return limiter.limit("100 per hour")
 
 # Security utilities
 def validate_input(data: dict, required_fields: list, optional_fields: list = None) -> tuple[bool, str]:
@@ -192,6 +177,7 @@ def verify_csrf_token(token: str, stored_token: str) -> bool:
 def require_https():
     """Middleware to require HTTPS in production"""
     def decorator(f):
+        @wraps(f)
         def wrapped(*args, **kwargs):
             if request.headers.get('X-Forwarded-Proto') == 'https':
                 return f(*args, **kwargs)
@@ -205,6 +191,7 @@ def require_https():
 def validate_api_key():
     """Middleware to validate API key"""
     def decorator(f):
+        @wraps(f)
         def wrapped(*args, **kwargs):
             api_key = request.headers.get('X-API-Key')
             if not api_key:
@@ -1,12 +1,29 @@
 from flask import Blueprint, request, jsonify
-from .models import Signal, SignalFeed
+from .models import SignalFeed
+from .signal_models import Signal
 from .extensions import db
+from .pagination import RowJSONCache, decode_cursor, encode_cursor, keyset_page, rows_response
+from . import signal_stats
 from datetime import datetime
 import hashlib
 import json
+import os
+import uuid
 
 signal_feed_bp = Blueprint('signal_feed', __name__)
 
+MAX_FEED_PAGE_SIZE = 100
+MAX_RELAY_BATCH = 10000
+# Values the signals table's CHECK constraints accept for relayed rows
+RELAY_SIDES = ('buy', 'sell')
+RELAY_RISK_TIERS = ('low', 'medium', 'high')
+
+# signals.created_by for relayed signals: the configured admin, or the nil UUID standing for the relay itself
+RELAY_CREATED_BY = uuid.UUID(os.getenv('SIGNAL_RELAY_ADMIN_ID', '00000000-0000-0000-0000-000000000000'))
+
+# JSON of feed rows, so paging re-parses no take_profit / ict_concepts
+feed_rows = RowJSONCache()
+
 @signal_feed_bp.route('/signals/relay', methods=['POST'])
 def relay_signal():
     """Relay a signal from admin to user feed with deduplication"""
@@ -21,58 +38,11 @@ def relay_signal():
         if not signal_data or not unique_key:
             return jsonify({'error': 'Missing signal data or unique key'}), 422
         
-        # Check if signal already exists using unique key
-        existing_signal = SignalFeed.query.filter_by(unique_key=unique_key).first()
-        if existing_signal:
+        result = relay_signals([data])[0]
+        if result['status'] == 'duplicate':
             return jsonify({'message': 'Signal already exists', 'exists': True}), 200
-        
-        # Determine if signal should be marked as recommended
-        # Logic: High confidence (>85%) + strong market conditions
-        confidence = signal_data.get('confidence', 90)
-        is_recommended = confidence > 85  # Can be enhanced with more sophisticated logic
-        
-        # Create new signal feed entry
-        new_signal_feed = SignalFeed(
-            unique_key=unique_key,
-            signal_id=signal_data.get('id'),
-            pair=signal_data.get('pair'),
-            direction=signal_data.get('direction'),
-            entry_price=str(signal_data.get('entry')),
-            stop_loss=str(signal_data.get('stopLoss')),
-            take_profit=json.dumps(signal_data.get('takeProfit')) if isinstance(signal_data.get('takeProfit'), list) else str(signal_data.get('takeProfit')),
-            confidence=confidence,
-            analysis=signal_data.get('analysis', ''),
-            ict_concepts=json.dumps(signal_data.get('ictConcepts', [])),
-            timestamp=datetime.fromisoformat(signal_data.get('timestamp').replace('Z', '+00:00')),
-            status='active',
-            market=signal_data.get('market', 'forex'),
-            timeframe=signal_data.get('timeframe', ''),
-            created_by='admin',
-            is_recommended=is_recommended
-        )
-        
-        db.session.add(new_signal_feed)
-        db.session.commit()
-        
-        # Also add to main signals table for admin tracking
-        admin_signal = Signal(
-            signal_id=signal_data.get('id'),
-            pair=signal_data.get('pair'),
-            timeframe=signal_data.get('timeframe', ''),
-            direction=signal_data.get('direction'),
-            entry_price=str(signal_data.get('entry')),
-            stop_loss=str(signal_data.get('stopLoss')),
-            take_profit=json.dumps(signal_data.get('takeProfit')) if isinstance(signal_data.get('takeProfit'), list) else str(signal_data.get('takeProfit')),
-            confidence=signal_data.get('confidence', 90),
-            analysis=signal_data.get('analysis', ''),
-            ict_concepts=json.dumps(signal_data.get('ictConcepts', [])),
-            timestamp=datetime.fromisoformat(signal_data.get('timestamp').replace('Z', '+00:00')),
-            status='active',
-            created_by='admin'
-        )
-        
-        db.session.add(admin_signal)
-        db.session.commit()
+        if result['status'] == 'invalid':
+            return jsonify({'error': result['error']}), 422
         
         return jsonify({'message': 'Signal successfully relayed', 'exists': False}), 200
         
@@ -80,6 +50,160 @@ def relay_signal():
         db.session.rollback()
         return jsonify({'error': f'Failed to relay signal: {str(e)}'}), 500
 
+@signal_feed_bp.route('/signals/relay/batch', methods=['POST'])
+def relay_signal_batch():
+    """Relay a burst of signals in one transaction; body is [{signal, uniqueKey}, ...] or {"signals": [...]}"""
+    try:
+        data = request.get_json()
+        items = data.get('signals') if isinstance(data, dict) else data
+        if not isinstance(items, list) or not items:
+            return jsonify({'error': 'Expected a non-empty list of {signal, uniqueKey} items'}), 422
+        if len(items) > MAX_RELAY_BATCH:
+            return jsonify({'error': f'At most {MAX_RELAY_BATCH} signals per batch'}), 413
+        
+        results = relay_signals(items)
+        counts = {'created': 0, 'duplicate': 0, 'invalid': 0}
+        for result in results:
+            counts[result['status']] += 1
+        
+        return jsonify({'results': results, **counts}), 200
+        
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'error': f'Failed to relay signals: {str(e)}'}), 500
+
+def relay_signals(items):
+    """
+    Insert new feed entries, and their admin signal rows, in one transaction.
+    
+    Duplicates are resolved by the unique index on signal_feed.unique_key
+    (INSERT ... ON CONFLICT DO NOTHING RETURNING), so concurrent relays of
+    the same key cannot both insert it. Signal statistics are updated in
+    the same transaction. Returns one
+    {uniqueKey, status[, error]} per item, status being created,
+    duplicate or invalid.
+    """
+    results = []
+    feed_rows_by_key = {}
+    for item in items:
+        unique_key = item.get('uniqueKey') if isinstance(item, dict) else None
+        result = {'uniqueKey': unique_key}
+        results.append(result)
+        try:
+            if not unique_key or not isinstance(item.get('signal'), dict):
+                raise ValueError('Missing signal data or unique key')
+            if unique_key in feed_rows_by_key:
+                result['status'] = 'duplicate'
+                continue
+            feed_rows_by_key[unique_key] = (_feed_values(item['signal'], unique_key), item['signal'])
+            result['status'] = 'created'
+        except (ValueError, TypeError, AttributeError) as e:
+            result['status'] = 'invalid'
+            result['error'] = str(e)
+    
+    created = set()
+    if feed_rows_by_key:
+        try:
+            inserted = db.session.execute(
+                signal_stats.dialect_insert(SignalFeed.__table__)
+                .on_conflict_do_nothing(index_elements=['unique_key'])
+                .returning(SignalFeed.unique_key),
+                [feed for feed, _ in feed_rows_by_key.values()]
+            )
+            created = set(inserted.scalars())
+            
+            # Also add to main signals table for admin tracking
+            admin_rows = [_admin_signal_values(signal_data, feed)
+                          for key, (feed, signal_data) in feed_rows_by_key.items() if key in created]
+            if admin_rows:
+                db.session.execute(Signal.__table__.insert(), admin_rows)
+                signal_stats.record_created(signal_stats.FEED, (
+                    signal_stats.feed_state(feed) for key, (feed, _) in feed_rows_by_key.items() if key in created))
+                signal_stats.record_created(signal_stats.ADMIN, map(signal_stats.admin_state, admin_rows))
+            db.session.commit()
+        except Exception:
+            db.session.rollback()
+            raise
+    
+    for result in results:
+        if result['status'] == 'created' and result['uniqueKey'] not in created:
+            result['status'] = 'duplicate'
+    return results
+
+def _feed_values(signal_data, unique_key):
+    """signal_feed row for a relayed signal; raises ValueError when a required field is missing or malformed"""
+    if not signal_data.get('pair') or not signal_data.get('direction'):
+        raise ValueError('Missing pair or direction')
+    if not signal_data.get('timestamp'):
+        raise ValueError('Missing timestamp')
+    if not signal_data.get('id'):
+        raise ValueError('Missing signal id')
+    # The signals row written alongside must pass its chk_side and chk_risk_tier constraints
+    if str(signal_data['direction']).lower() not in RELAY_SIDES:
+        raise ValueError(f"Invalid direction {signal_data['direction']!r}, expected one of {', '.join(RELAY_SIDES)}")
+    risk_tier = str(signal_data.get('riskTier') or 'medium').lower()
+    if risk_tier not in RELAY_RISK_TIERS:
+        raise ValueError(f"Invalid riskTier {signal_data.get('riskTier')!r}, "
+                         f"expected one of {', '.join(RELAY_RISK_TIERS)}")
+    
+    # Determine if signal should be marked as recommended
+    # Logic: High confidence (>85%) + strong market conditions
+    confidence = int(signal_data.get('confidence', 90))
+    is_recommended = confidence > 85  # Can be enhanced with more sophisticated logic
+    
+    values = {
+        'unique_key': unique_key,
+        'signal_id': signal_data.get('id'),
+        'pair': signal_data.get('pair'),
+        'direction': signal_data.get('direction'),
+        'entry_price': str(signal_data.get('entry')),
+        'stop_loss': str(signal_data.get('stopLoss')),
+        'take_profit': json.dumps(signal_data.get('takeProfit')) if isinstance(signal_data.get('takeProfit'), list) else str(signal_data.get('takeProfit')),
+        'confidence': confidence,
+        'analysis': signal_data.get('analysis', ''),
+        'ict_concepts': json.dumps(signal_data.get('ictConcepts', [])),
+        'timestamp': datetime.fromisoformat(signal_data.get('timestamp').replace('Z', '+00:00')),
+        'status': 'active',
+        'market': signal_data.get('market', 'forex'),
+        'timeframe': signal_data.get('timeframe', ''),
+        'created_by': 'admin',
+        'is_recommended': is_recommended
+    }
+    # An over-long value would fail the whole batch INSERT on PostgreSQL
+    for name, value in values.items():
+        length = getattr(SignalFeed.__table__.c[name].type, 'length', None)
+        if length and isinstance(value, str) and len(value) > length:
+            raise ValueError(f'{name} is longer than {length} characters')
+    return values
+
+def _price(value):
+    try:
+        return float(value[0] if isinstance(value, list) else value)
+    except (TypeError, ValueError, IndexError):
+        return None
+
+def _admin_signal_values(signal_data, feed):
+    """signals row for a relayed signal; the full relayed payload is kept alongside the typed columns"""
+    side = feed['direction'].upper()
+    entry_price = _price(signal_data.get('entry'))
+    stop_loss = _price(signal_data.get('stopLoss'))
+    take_profit = _price(signal_data.get('takeProfit'))
+    return {
+        'id': uuid.uuid4(),
+        'symbol': feed['pair'],
+        'side': side,
+        'entry_price': entry_price,
+        'stop_loss': stop_loss,
+        'take_profit': take_profit,
+        'rr_ratio': Signal.risk_reward(side, entry_price, stop_loss, take_profit),
+        'risk_tier': str(signal_data.get('riskTier') or 'medium').lower(),
+        'payload': {**signal_data, 'uniqueKey': feed['unique_key']},
+        'created_by': RELAY_CREATED_BY,
+        'origin': 'admin',
+        'status': 'active',
+        'immutable': True
+    }
+
 @signal_feed_bp.route('/signals/check/<unique_key>', methods=['GET'])
 def check_signal_exists(unique_key):
     """Check if a signal with the given unique key already exists"""
@@ -91,58 +215,71 @@ def check_signal_exists(unique_key):
 
 @signal_feed_bp.route('/signals/feed', methods=['GET'])
 def get_signal_feed():
-    """Get signals for user feed with pagination and deduplication"""
+    """Get signals for user feed, newest first, paged by an opaque cursor (no COUNT or OFFSET)"""
     try:
+        cursor = request.args.get('cursor')
         page = request.args.get('page', 1, type=int)
-        per_page = request.args.get('per_page', 20, type=int)
+        per_page = min(max(request.args.get('per_page', 20, type=int), 1), MAX_FEED_PAGE_SIZE)
         market = request.args.get('market', 'all')
         
+        if cursor:
+            try:
+                decode_cursor(cursor, int)
+            except ValueError:
+                return jsonify({'error': 'Invalid cursor'}), 400
+        
         # Build query
         query = SignalFeed.query.filter_by(status='active')
         
         if market != 'all':
             query = query.filter_by(market=market)
         
-        # Order by newest first and paginate
-        signals = query.order_by(SignalFeed.timestamp.desc()).paginate(
-            page=page, per_page=per_page, error_out=False
-        )
-        
-        # Convert to dict format
-        signal_list = []
-        for signal in signals.items:
-            signal_dict = {
-                'id': signal.signal_id,
-                'pair': signal.pair,
-                'direction': signal.direction,
-                'entry': signal.entry_price,
-                'stopLoss': signal.stop_loss,
-                'takeProfit': json.loads(signal.take_profit) if signal.take_profit.startswith('[') else [signal.take_profit],
-                'confidence': signal.confidence,
-                'analysis': signal.analysis,
-                'ictConcepts': json.loads(signal.ict_concepts) if signal.ict_concepts else [],
-                'timestamp': signal.timestamp.isoformat(),
-                'status': signal.status,
-                'market': signal.market,
-                'timeframe': signal.timeframe
-            }
-            signal_list.append(signal_dict)
+        if cursor or page <= 1:
+            signals, next_cursor = keyset_page(query, SignalFeed.timestamp, SignalFeed.id, cursor, per_page,
+                                               key=lambda signal: (signal.timestamp, signal.id), parse_id=int)
+        else:
+            # Older clients still send ?page=N; serve it by OFFSET and hand them a cursor for the next page
+            signals = query.order_by(SignalFeed.timestamp.desc(), SignalFeed.id.desc()) \
+                .offset((page - 1) * per_page).limit(per_page + 1).all()
+            next_cursor = None
+            if len(signals) > per_page:
+                signals = signals[:per_page]
+                next_cursor = encode_cursor(signals[-1].timestamp, signals[-1].id)
+        
+        # Rows in the feed are active and never edited in place, so each is serialized once per process
+        signal_list = [feed_rows.get((signal.id, signal.status), lambda: _feed_signal_dict(signal))
+                       for signal in signals]
         
-        return jsonify({
-            'signals': signal_list,
+        return rows_response({
             'pagination': {
-                'page': page,
+                'page': page if not cursor else None,
                 'per_page': per_page,
-                'total': signals.total,
-                'pages': signals.pages,
-                'has_next': signals.has_next,
-                'has_prev': signals.has_prev
+                'next_cursor': next_cursor,
+                'has_next': next_cursor is not None,
+                'has_prev': bool(cursor) or page > 1
             }
-        }), 200
+        }, signal_list)
         
     except Exception as e:
         return jsonify({'error': f'Failed to get signal feed: {str(e)}'}), 500
 
+def _feed_signal_dict(signal):
+    return {
+        'id': signal.signal_id,
+        'pair': signal.pair,
+        'direction': signal.direction,
+        'entry': signal.entry_price,
+        'stopLoss': signal.stop_loss,
+        'takeProfit': json.loads(signal.take_profit) if (signal.take_profit or '').startswith('[') else [signal.take_profit],
+        'confidence': signal.confidence,
+        'analysis': signal.analysis,
+        'ictConcepts': json.loads(signal.ict_concepts) if signal.ict_concepts else [],
+        'timestamp': signal.timestamp.isoformat(),
+        'status': signal.status,
+        'market': signal.market,
+        'timeframe': signal.timeframe
+    }
+
 @signal_feed_bp.route('/signals/mark-taken', methods=['POST'])
 def mark_signal_taken():
     """Mark a signal as taken by user with outcome tracking"""
@@ -159,10 +296,11 @@ def mark_signal_taken():
         if not signal_id or not outcome:
             return jsonify({'error': 'Missing signal ID or outcome'}), 422
         
-        # Find signal in feed
-        signal = SignalFeed.query.filter_by(signal_id=signal_id).first()
+        # Find signal in feed; locked so concurrent updates count its old state once
+        signal = SignalFeed.query.filter_by(signal_id=signal_id).with_for_update().first()
         if not signal:
             return jsonify({'error': 'Signal not found'}), 404
+        old_state = signal_stats.feed_state(signal)
         
         # Update signal status
         signal.status = 'taken'
@@ -170,6 +308,7 @@ def mark_signal_taken():
         signal.pnl = pnl
         signal.taken_by = user_id
         signal.taken_at = datetime.utcnow()
+        signal_stats.record_change(signal_stats.FEED, old_state, signal_stats.feed_state(signal))
         
         db.session.commit()
         
@@ -183,24 +322,8 @@ def mark_signal_taken():
 def get_signal_stats():
     """Get signal statistics for dashboard"""
     try:
-        total_signals = SignalFeed.query.count()
-        active_signals = SignalFeed.query.filter_by(status='active').count()
-        taken_signals = SignalFeed.query.filter_by(status='taken').count()
-        
-        # Get outcome statistics
-        outcomes = db.session.query(
-            SignalFeed.outcome,
-            db.func.count(SignalFeed.id)
-        ).filter(SignalFeed.status == 'taken').group_by(SignalFeed.outcome).all()
-        
-        outcome_stats = {outcome: count for outcome, count in outcomes}
-        
-        return jsonify({
-            'total_signals': total_signals,
-            'active_signals': active_signals,
-            'taken_signals': taken_signals,
-            'outcome_stats': outcome_stats
-        }), 200
+        # Read from the counters signal_stats maintains, not the signal_feed table
+        return jsonify(signal_stats.feed_summary()), 200
         
     except Exception as e:
         return jsonify({'error': f'Failed to get signal stats: {str(e)}'}), 500
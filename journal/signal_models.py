@@ -4,12 +4,12 @@ Defines SQLAlchemy models for the signal system
 """
 
 from datetime import datetime
-from flask_sqlalchemy import SQLAlchemy
 from sqlalchemy.dialects.postgresql import UUID, JSONB
 from sqlalchemy import func, text
 import uuid
 
-db = SQLAlchemy()
+# The app's shared instance, so signal writes commit in one session with signal_feed and the stats counters
+from .extensions import db
 
 class Signal(db.Model):
     """Core signals table - immutable by users"""
@@ -35,6 +35,16 @@ class Signal(db.Model):
     user_signals = db.relationship('UserSignal', backref='signal', lazy='dynamic', cascade='all, delete-orphan')
     risk_mappings = db.relationship('SignalRiskMap', backref='signal', lazy='dynamic', cascade='all, delete-orphan')
     
+    # Per-tier feeds page newest-first by (created_at, id) within one tier and status; the checks are those of
+    # database_migrations/001_create_signals_tables.sql
+    __table_args__ = (
+        db.Index('ix_signals_risk_tier_status_created_at', 'risk_tier', 'status', 'created_at', 'id'),
+        db.CheckConstraint("side IN ('buy', 'sell', 'BUY', 'SELL')", name='chk_side'),
+        db.CheckConstraint("risk_tier IN ('low', 'medium', 'high')", name='chk_risk_tier'),
+        db.CheckConstraint("status IN ('active', 'archived')", name='chk_status'),
+        db.CheckConstraint("origin IN ('admin', 'system')", name='chk_origin'),
+    )
+    
     def __repr__(self):
         return f'<Signal {self.id}: {self.symbol} {self.side}>'
     
@@ -79,17 +89,7 @@ class Signal(db.Model):
             Created Signal instance
         """
         # Calculate risk:reward ratio
-        rr_ratio = None
-        if entry_price and stop_loss and take_profit:
-            if side.lower() == 'buy':
-                risk = abs(entry_price - stop_loss)
-                reward = abs(take_profit - entry_price)
-            else:  # sell
-                risk = abs(stop_loss - entry_price)
-                reward = abs(entry_price - take_profit)
-            
-            if risk > 0:
-                rr_ratio = reward / risk
+        rr_ratio = cls.risk_reward(side, entry_price, stop_loss, take_profit)
         
         signal = cls(
             symbol=symbol,
@@ -108,6 +108,22 @@ class Signal(db.Model):
         
         return signal
     
+    @staticmethod
+    def risk_reward(side: str, entry_price: float, stop_loss: float, take_profit: float):
+        """
+        Reward per unit of risk, or None without all three prices or with zero risk
+        """
+        if not (entry_price and stop_loss and take_profit):
+            return None
+        if side.lower() == 'buy':
+            risk = abs(entry_price - stop_loss)
+            reward = abs(take_profit - entry_price)
+        else:  # sell
+            risk = abs(stop_loss - entry_price)
+            reward = abs(entry_price - take_profit)
+        
+        return reward / risk if risk > 0 else None
+    
     @classmethod
     def get_active_signals_by_risk_tier(cls, risk_tier: str, limit: int = 100):
         """
@@ -218,6 +234,50 @@ class UserSignal(db.Model):
             return user_signal
         
         return existing
+    
+    @classmethod
+    def create_mappings_for_risk_tier(cls, signal_id: str, risk_tier: str) -> int:
+        """
+        Create missing user-signal mappings for every user in a risk tier
+        with a single INSERT ... SELECT (caller commits)
+        
+        Args:
+            signal_id: Signal ID
+            risk_tier: Risk tier whose users receive the signal
+            
+        Returns:
+            Number of mappings created
+        """
+        result = db.session.execute(text("""
+            INSERT INTO user_signals (id, user_id, signal_id, delivered, created_at)
+            SELECT gen_random_uuid(), u.uuid, :signal_id, FALSE, now()
+            FROM users u
+            WHERE u.risk_tier = :risk_tier
+            ON CONFLICT (user_id, signal_id) DO NOTHING
+        """), {'signal_id': signal_id, 'risk_tier': risk_tier})
+        return result.rowcount
+    
+    @classmethod
+    def mark_delivered_bulk(cls, user_ids, signal_id: str) -> int:
+        """
+        Mark a signal as delivered to many users in one UPDATE (caller commits)
+        
+        Args:
+            user_ids: IDs of the users the signal reached
+            signal_id: Signal ID
+            
+        Returns:
+            Number of mappings newly marked delivered
+        """
+        user_ids = list(user_ids)
+        if not user_ids:
+            return 0
+        
+        return cls.query.filter(
+            cls.signal_id == signal_id,
+            cls.user_id.in_(user_ids),
+            cls.delivered.isnot(True)
+        ).update({'delivered': True, 'delivered_at': func.now()}, synchronize_session=False)
 
 class SignalRiskMap(db.Model):
     """Maps signals to risk tiers for efficient querying"""
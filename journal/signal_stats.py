@@ -0,0 +1,257 @@
+"""
+Signal Statistics
+Counters for the signal feed and admin signals, updated in the same transaction as each signal write, so stats
+endpoints read a few counter rows instead of scanning the signal tables
+"""
+
+import logging
+from collections import defaultdict
+from datetime import datetime, timedelta, timezone
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from sqlalchemy import func, select
+from sqlalchemy.dialects.postgresql import insert as postgresql_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+
+from .extensions import db
+from .models import SignalFeed, SignalStatBucket, SignalStatusCount
+
+logger = logging.getLogger(__name__)
+
+FEED = 'feed'    # signal_feed rows
+ADMIN = 'admin'  # signals rows with origin 'admin'
+
+WINNING_OUTCOMES = ('Target Hit',)
+ROLLING_WINDOWS = {'7d': timedelta(days=7), '30d': timedelta(days=30)}
+
+# Rows per upsert statement when rebuilding from the signal tables
+REBUILD_CHUNK = 5000
+
+
+def dialect_insert(table):
+    """INSERT for the session's dialect, with the ON CONFLICT clauses PostgreSQL and SQLite share"""
+    dialect = db.session.get_bind().dialect.name
+    if dialect == 'postgresql':
+        return postgresql_insert(table)
+    if dialect == 'sqlite':
+        return sqlite_insert(table)
+    raise RuntimeError(f'Signal statistics do not support the {dialect} dialect')
+
+
+def _hour(moment: Optional[datetime]) -> datetime:
+    """Naive UTC hour a moment falls in; counters are bucketed hourly so 24h/7d/30d windows are exact to the hour"""
+    moment = moment or datetime.utcnow()
+    if moment.tzinfo is not None:
+        moment = moment.astimezone(timezone.utc).replace(tzinfo=None)
+    return moment.replace(minute=0, second=0, microsecond=0)
+
+
+def _float(value) -> float:
+    try:
+        return float(value or 0)
+    except (TypeError, ValueError):
+        return 0.0
+
+
+def _getter(row):
+    return row.get if isinstance(row, dict) else lambda name: getattr(row, name, None)
+
+
+def feed_state(row) -> Dict:
+    """The counted dimensions of a signal_feed row (ORM object or column dict)"""
+    get = _getter(row)
+    return {
+        'status': get('status') or 'active',
+        'market': get('market') or '',
+        'risk_tier': '',
+        'recommended': bool(get('is_recommended')),
+        'outcome': get('outcome') or '',
+        'pnl': _float(get('pnl')),
+        'created': get('timestamp'),
+        'taken_at': get('taken_at')
+    }
+
+
+def admin_state(row) -> Dict:
+    """The counted dimensions of a signals row (ORM object or column dict)"""
+    get = _getter(row)
+    payload = get('payload') or {}
+    return {
+        'status': get('status') or 'active',
+        'market': str(payload.get('market') or ''),
+        'risk_tier': get('risk_tier') or '',
+        'recommended': False,
+        'outcome': '',
+        'pnl': 0.0,
+        'created': get('created_at'),
+        'taken_at': None
+    }
+
+
+def _add_contribution(counts, buckets, source: str, state: Dict, sign: int):
+    """What one row in ``state`` adds to the counters, times sign (+1 for the new state, -1 for the old)"""
+    market, risk_tier = state['market'], state['risk_tier']
+    counts[(source, state['status'], market, risk_tier, state['recommended'])] += sign
+    created = buckets[(source, _hour(state['created']), market, risk_tier, 'created', '')]
+    created[0] += sign
+    if state['status'] == 'taken':
+        taken = buckets[(source, _hour(state['taken_at']), market, risk_tier, 'taken', state['outcome'])]
+        taken[0] += sign
+        taken[1] += sign * (state['outcome'] in WINNING_OUTCOMES)
+        taken[2] += sign * state['pnl']
+
+
+def record_transitions(source: str, transitions: Iterable[Tuple[Optional[Dict], Optional[Dict]]]):
+    """
+    Apply (old_state, new_state) changes to the counters in the caller's transaction (caller commits).
+
+    old_state is None for a new row, new_state None for a deleted one.
+    """
+    counts = defaultdict(int)
+    buckets = defaultdict(lambda: [0, 0, 0.0])
+    for old, new in transitions:
+        if old is not None:
+            _add_contribution(counts, buckets, source, old, -1)
+        if new is not None:
+            _add_contribution(counts, buckets, source, new, 1)
+    _apply(counts, buckets)
+
+
+def record_created(source: str, states: Iterable[Dict]):
+    record_transitions(source, ((None, state) for state in states))
+
+
+def record_change(source: str, old: Dict, new: Dict):
+    record_transitions(source, [(old, new)])
+
+
+def _apply(counts: Dict, buckets: Dict):
+    # Keys are the tables' primary keys in column order; upserting in sorted key order makes concurrent
+    # transactions lock shared counter rows in the same order, so they queue instead of deadlocking
+    count_rows = [
+        {'source': source, 'status': status, 'market': market, 'risk_tier': risk_tier,
+         'recommended': recommended, 'count': delta}
+        for (source, status, market, risk_tier, recommended), delta in sorted(counts.items()) if delta
+    ]
+    bucket_rows = [
+        {'source': source, 'bucket': bucket, 'market': market, 'risk_tier': risk_tier, 'event': event,
+         'outcome': outcome, 'count': count, 'wins': wins, 'pnl': pnl}
+        for (source, bucket, market, risk_tier, event, outcome), (count, wins, pnl) in sorted(buckets.items())
+        if count or wins or pnl
+    ]
+    if count_rows:
+        table = SignalStatusCount.__table__
+        stmt = dialect_insert(table)
+        db.session.execute(stmt.on_conflict_do_update(
+            index_elements=[column.name for column in table.primary_key],
+            set_={'count': table.c.count + stmt.excluded.count}
+        ), count_rows)
+    if bucket_rows:
+        table = SignalStatBucket.__table__
+        stmt = dialect_insert(table)
+        db.session.execute(stmt.on_conflict_do_update(
+            index_elements=[column.name for column in table.primary_key],
+            set_={name: table.c[name] + stmt.excluded[name] for name in ('count', 'wins', 'pnl')}
+        ), bucket_rows)
+
+
+def _window(source: str, event: str, since: Optional[datetime] = None, group_by=()) -> List:
+    columns = [SignalStatBucket.__table__.c[name] for name in group_by]
+    query = select(*columns, func.coalesce(func.sum(SignalStatBucket.count), 0),
+                   func.coalesce(func.sum(SignalStatBucket.wins), 0),
+                   func.coalesce(func.sum(SignalStatBucket.pnl), 0.0)) \
+        .where(SignalStatBucket.source == source, SignalStatBucket.event == event)
+    if since is not None:
+        query = query.where(SignalStatBucket.bucket >= _hour(since))
+    if columns:
+        query = query.group_by(*columns)
+    return db.session.execute(query).all()
+
+
+def _rolling(source: str, now: datetime) -> Dict:
+    windows = {}
+    for name, length in ROLLING_WINDOWS.items():
+        taken, wins, pnl = _window(source, 'taken', now - length)[0]
+        windows[name] = {
+            'taken': int(taken),
+            'wins': int(wins),
+            'win_rate': round(wins / taken * 100, 2) if taken else 0.0,
+            'pnl': round(float(pnl), 2)
+        }
+    return windows
+
+
+def _status_counts(source: str) -> List:
+    return db.session.execute(
+        select(SignalStatusCount.status, SignalStatusCount.market, SignalStatusCount.risk_tier,
+               SignalStatusCount.recommended, SignalStatusCount.count)
+        .where(SignalStatusCount.source == source, SignalStatusCount.count != 0)
+    ).all()
+
+
+def feed_summary(now: Optional[datetime] = None) -> Dict:
+    """Feed totals, active counts by market, all-time outcomes and rolling 7d/30d win rate and PnL"""
+    now = now or datetime.utcnow()
+    by_status = defaultdict(int)
+    active_by_market = defaultdict(int)
+    recommended = 0
+    for status, market, _, is_recommended, count in _status_counts(FEED):
+        by_status[status] += count
+        if status == 'active':
+            active_by_market[market] += count
+            recommended += count if is_recommended else 0
+    outcomes = {outcome: int(count) for outcome, count, _, _ in _window(FEED, 'taken', group_by=('outcome',))
+                if count}
+    return {
+        'total_signals': sum(by_status.values()),
+        'active_signals': by_status['active'],
+        'taken_signals': by_status['taken'],
+        'recommended_signals': recommended,
+        'active_by_market': dict(active_by_market),
+        'outcome_stats': outcomes,
+        'rolling': _rolling(FEED, now)
+    }
+
+
+def admin_summary(now: Optional[datetime] = None) -> Dict:
+    """Admin signal totals, active counts by risk tier and signals created in the last 24 hours"""
+    now = now or datetime.utcnow()
+    by_status = defaultdict(int)
+    active_by_tier = defaultdict(int)
+    for status, _, risk_tier, _, count in _status_counts(ADMIN):
+        by_status[status] += count
+        if status == 'active':
+            active_by_tier[risk_tier] += count
+    recent, _, _ = _window(ADMIN, 'created', now - timedelta(hours=24))[0]
+    return {
+        'total_signals': sum(by_status.values()),
+        'active_signals': by_status['active'],
+        'archived_signals': by_status['archived'],
+        'recent_signals_24h': int(recent),
+        'by_risk_tier': dict(active_by_tier)
+    }
+
+
+def reset():
+    """Clear every counter (caller commits), e.g. when the signal tables are emptied"""
+    db.session.execute(SignalStatusCount.__table__.delete())
+    db.session.execute(SignalStatBucket.__table__.delete())
+
+
+def rebuild():
+    """Recount everything from signal_feed and signals; for backfilling and after writes made outside the app"""
+    from .signal_models import Signal
+
+    reset()
+    sources = [
+        (FEED, feed_state, select(*(SignalFeed.__table__.c[name] for name in (
+            'status', 'market', 'is_recommended', 'outcome', 'pnl', 'timestamp', 'taken_at')))),
+        (ADMIN, admin_state, select(*(Signal.__table__.c[name] for name in (
+            'status', 'risk_tier', 'payload', 'created_at'))).where(Signal.__table__.c.origin == 'admin')),
+    ]
+    for source, state_of, query in sources:
+        rows = db.session.execute(query.execution_options(yield_per=REBUILD_CHUNK)).mappings()
+        for chunk in rows.partitions():
+            record_created(source, (state_of(dict(row)) for row in chunk))
+    db.session.commit()
+    logger.info("Rebuilt signal statistics")
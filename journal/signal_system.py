@@ -10,6 +10,7 @@ from datetime import datetime, timedelta
 from flask import current_app
 from .models import db, SignalFeed, User
 from .extensions import socketio
+from . import signal_stats
 import random
 
 class SignalGenerator:
@@ -197,6 +198,7 @@ class SignalSystem:
             )
             
             db.session.add(signal_feed)
+            signal_stats.record_created(signal_stats.FEED, [signal_stats.feed_state(signal_feed)])
             db.session.commit()
             
             # Broadcast to all connected users via WebSocket
@@ -1,6 +1,7 @@
 from flask import Blueprint, request, jsonify
 from .models import Signal
 from .extensions import db, socketio
+from . import signal_stats
 from datetime import datetime
 import uuid
 import json
@@ -96,6 +97,7 @@ def create_signal():
                 
                 try:
                     db.session.add(new_signal_feed)
+                    signal_stats.record_created(signal_stats.FEED, [signal_stats.feed_state(new_signal_feed)])
                     db.session.commit()
                     print(f"Signal successfully relayed to user feed")
                 except Exception as db_error:
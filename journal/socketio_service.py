@@ -3,15 +3,20 @@ Socket.IO Service for Real-time Signal Distribution
 Handles WebSocket connections, authentication, and room management
 """
 
+import os
 import socketio
 import logging
-from typing import Dict, Any, Optional
+import threading
+from typing import Dict, Any, List, Optional, Set
 from flask_jwt_extended import decode_token
 from datetime import datetime
 
+from quote_stream import QuoteStreamer
+from .extensions import market_data
 from .models import User
 from .signal_models import Signal, UserSignal, db
 from .redis_service import redis_service
+from .yfinance_routes import validate_symbol
 
 logger = logging.getLogger(__name__)
 
@@ -25,6 +30,90 @@ sio = socketio.Server(
 # Store connected users for tracking
 connected_users: Dict[str, Dict[str, Any]] = {}
 
+# Index of user_id -> connected sids, kept in step with connected_users
+user_sids: Dict[str, Set[str]] = {}
+_connections_lock = threading.Lock()
+
+def _register_connection(sid: str, user_info: Dict[str, Any]):
+    with _connections_lock:
+        connected_users[sid] = user_info
+        user_sids.setdefault(user_info['user_id'], set()).add(sid)
+
+def _unregister_connection(sid: str) -> Optional[Dict[str, Any]]:
+    with _connections_lock:
+        user_info = connected_users.pop(sid, None)
+        if user_info:
+            sids = user_sids.get(user_info['user_id'])
+            if sids is not None:
+                sids.discard(sid)
+                if not sids:
+                    del user_sids[user_info['user_id']]
+        return user_info
+
+# Quote rooms are named quote:<SYMBOL>; each sid's symbols, so a disconnect releases its subscriptions
+QUOTE_ROOM_PREFIX = 'quote:'
+MAX_QUOTE_SUBSCRIPTIONS = 50
+quote_subscriptions: Dict[str, Set[str]] = {}
+
+def _emit_quote(symbol: str, payload: Dict[str, Any]):
+    sio.emit('quote:update', payload, room=f"{QUOTE_ROOM_PREFIX}{symbol}")
+
+# One poller refreshes the distinct subscribed symbols, however many clients share a room
+quote_streamer = QuoteStreamer(market_data, publish=_emit_quote, resolve=validate_symbol,
+                               interval=float(os.getenv('QUOTE_STREAM_INTERVAL', 2)))
+
+def _subscribe_quotes(sid: str, symbols: List[str]) -> List[str]:
+    with _connections_lock:
+        current = quote_subscriptions.setdefault(sid, set())
+        added = [symbol for symbol in dict.fromkeys(symbols) if symbol not in current]
+        added = added[:max(MAX_QUOTE_SUBSCRIPTIONS - len(current), 0)]
+        current.update(added)
+    for symbol in added:
+        sio.enter_room(sid, f"{QUOTE_ROOM_PREFIX}{symbol}")
+    quote_streamer.subscribe(added)
+    for payload in quote_streamer.snapshot(added):
+        sio.emit('quote:update', payload, room=sid)
+    return added
+
+def _unsubscribe_quotes(sid: str, symbols: Optional[List[str]] = None) -> List[str]:
+    """Release the given symbols, or all of the sid's when symbols is None"""
+    with _connections_lock:
+        current = quote_subscriptions.get(sid, set())
+        removed = list(current) if symbols is None else [symbol for symbol in symbols if symbol in current]
+        current.difference_update(removed)
+        if not current:
+            quote_subscriptions.pop(sid, None)
+    for symbol in removed:
+        sio.leave_room(sid, f"{QUOTE_ROOM_PREFIX}{symbol}")
+    quote_streamer.unsubscribe(removed)
+    return removed
+
+def _quote_symbols(data) -> List[str]:
+    if not isinstance(data, dict):
+        return []
+    symbols = data.get('symbols') or [data.get('symbol')]
+    if isinstance(symbols, str):
+        symbols = symbols.split(',')
+    return [str(symbol).upper().strip() for symbol in symbols if symbol and str(symbol).strip()]
+
+def is_user_online(user_id: str) -> bool:
+    """
+    Check whether a user has at least one live connection
+    """
+    return bool(user_sids.get(str(user_id)))
+
+def online_user_ids(risk_tier: Optional[str] = None) -> Set[str]:
+    """
+    IDs of connected users, optionally limited to one risk tier
+    """
+    with _connections_lock:
+        if risk_tier is None:
+            return set(user_sids)
+        return {
+            user_id for user_id, sids in user_sids.items()
+            if any(connected_users[sid]['risk_tier'] == risk_tier for sid in sids)
+        }
+
 @sio.event
 def connect(sid, environ, auth):
     """
@@ -66,13 +155,13 @@ def connect(sid, environ, auth):
                 user_risk_tier = 'medium'
             
             # Store user info
-            connected_users[sid] = {
+            _register_connection(sid, {
                 'user_id': str(user.uuid),
                 'username': user.username,
                 'risk_tier': user_risk_tier,
                 'connected_at': datetime.utcnow(),
                 'session_id': decoded_token.get('session_id')
-            }
+            })
             
             # Join user-specific room
             user_room = f"user:{user.uuid}"
@@ -108,10 +197,10 @@ def disconnect(sid):
     Handle client disconnection
     """
     try:
-        if sid in connected_users:
-            user_info = connected_users[sid]
+        _unsubscribe_quotes(sid)
+        user_info = _unregister_connection(sid)
+        if user_info:
             logger.info(f"User {user_info['username']} ({user_info['user_id']}) disconnected")
-            del connected_users[sid]
         else:
             logger.info(f"Unknown user disconnected with sid {sid}")
     except Exception as e:
@@ -128,7 +217,11 @@ def join_room(sid, data):
             return
         
         room = data.get('room')
-        if room:
+        if room and room.startswith(QUOTE_ROOM_PREFIX):
+            # Quote rooms go through the streamer so their symbol gets polled
+            _subscribe_quotes(sid, _quote_symbols({'symbol': room[len(QUOTE_ROOM_PREFIX):]}))
+            sio.emit('joined_room', {'room': room}, room=sid)
+        elif room:
             sio.enter_room(sid, room)
             sio.emit('joined_room', {'room': room}, room=sid)
             logger.info(f"User {connected_users[sid]['username']} joined room {room}")
@@ -148,7 +241,10 @@ def leave_room(sid, data):
             return
         
         room = data.get('room')
-        if room and not room.startswith('user:') and not room.startswith('risk:'):
+        if room and room.startswith(QUOTE_ROOM_PREFIX):
+            _unsubscribe_quotes(sid, _quote_symbols({'symbol': room[len(QUOTE_ROOM_PREFIX):]}))
+            sio.emit('left_room', {'room': room}, room=sid)
+        elif room and not room.startswith('user:') and not room.startswith('risk:'):
             # Don't allow leaving user or risk rooms
             sio.leave_room(sid, room)
             sio.emit('left_room', {'room': room}, room=sid)
@@ -169,6 +265,38 @@ def ping(sid, data):
     except Exception as e:
         logger.error(f"Ping error for sid {sid}: {e}")
 
+@sio.event
+def subscribe_quotes(sid, data):
+    """
+    Join quote:<SYMBOL> rooms for {'symbols': [...]} and receive quote:update events as prices change
+    """
+    try:
+        if sid not in connected_users:
+            sio.emit('error', {'message': 'Not authenticated'}, room=sid)
+            return
+        
+        added = _subscribe_quotes(sid, _quote_symbols(data))
+        sio.emit('quotes_subscribed', {
+            'symbols': sorted(quote_subscriptions.get(sid, ())),
+            'rooms': [f"{QUOTE_ROOM_PREFIX}{symbol}" for symbol in added]
+        }, room=sid)
+        
+    except Exception as e:
+        logger.error(f"Subscribe quotes error for sid {sid}: {e}")
+        sio.emit('error', {'message': 'Failed to subscribe to quotes'}, room=sid)
+
+@sio.event
+def unsubscribe_quotes(sid, data):
+    """
+    Leave quote rooms for {'symbols': [...]}
+    """
+    try:
+        removed = _unsubscribe_quotes(sid, _quote_symbols(data))
+        sio.emit('quotes_unsubscribed', {'symbols': removed}, room=sid)
+    except Exception as e:
+        logger.error(f"Unsubscribe quotes error for sid {sid}: {e}")
+        sio.emit('error', {'message': 'Failed to unsubscribe from quotes'}, room=sid)
+
 def broadcast_signal_to_risk_tier(signal_data: Dict[str, Any]):
     """
     Broadcast signal to all users in a specific risk tier
@@ -188,8 +316,7 @@ def broadcast_signal_to_risk_tier(signal_data: Dict[str, Any]):
         sio.emit('signal:new', signal_data, room=risk_room)
         
         # Count connected users in this risk tier
-        connected_count = sum(1 for user_info in connected_users.values() 
-                            if user_info['risk_tier'] == risk_tier)
+        connected_count = len(online_user_ids(risk_tier))
         
         logger.info(f"Broadcasted signal {signal_data.get('id')} to risk tier {risk_tier} ({connected_count} connected users)")
         
@@ -230,26 +357,17 @@ def update_signal_delivery_tracking(signal_data: Dict[str, Any]):
         if not signal_id or not risk_tier:
             return
         
-        # Get all users with this risk tier
-        users = User.query.filter_by(risk_tier=risk_tier).all()
-        
-        for user in users:
-            # Create or update user-signal mapping
-            user_signal = UserSignal.query.filter_by(
-                user_id=str(user.uuid),
-                signal_id=signal_id
-            ).first()
-            
-            if not user_signal:
-                UserSignal.create_user_signal_mapping(str(user.uuid), signal_id)
-            
-            # Mark as delivered if user is currently connected
-            if any(user_info['user_id'] == str(user.uuid) for user_info in connected_users.values()):
-                UserSignal.mark_delivered(str(user.uuid), signal_id)
+        # Map every user in the tier to the signal, then mark the connected ones
+        # delivered - two statements and one commit regardless of tier size
+        created = UserSignal.create_mappings_for_risk_tier(signal_id, risk_tier)
+        delivered = UserSignal.mark_delivered_bulk(online_user_ids(risk_tier), signal_id)
+        db.session.commit()
         
-        logger.info(f"Updated delivery tracking for signal {signal_id} to {len(users)} users")
+        logger.info(f"Updated delivery tracking for signal {signal_id}: "
+                   f"{created} new mappings, {delivered} delivered to connected users")
         
     except Exception as e:
+        db.session.rollback()
         logger.error(f"Error updating delivery tracking: {e}")
 
 def get_connected_users_stats() -> Dict[str, Any]:
@@ -7,17 +7,27 @@ from flask import Blueprint, request, jsonify
 from flask_jwt_extended import jwt_required, get_jwt_identity, get_jwt
 from datetime import datetime, timedelta
 import logging
+import uuid
 from typing import List, Dict, Any
 
 from .signal_models import Signal, UserSignal, db
 from .models import User
 from .auth_middleware import session_required
 from .dual_db_service import dual_db
+from .pagination import RowJSONCache, decode_cursor, keyset_page, rows_response, with_fields
 
 logger = logging.getLogger(__name__)
 
 user_signals_bp = Blueprint('user_signals', __name__)
 
+# Signal JSON keyed by (id, status, updated_at), shared by every user of a tier
+signal_rows = RowJSONCache()
+
+
+def parse_signal_id(value) -> uuid.UUID:
+    """A cursor's signal id; raises ValueError for anything that is not a UUID"""
+    return uuid.UUID(str(value))
+
 @user_signals_bp.route('/user/signals', methods=['GET', 'OPTIONS'])
 @jwt_required()
 @session_required
@@ -49,6 +59,7 @@ def get_user_signals():
         # Get query parameters
         limit = min(int(request.args.get('limit', 50)), 200)  # Cap at 200
         since_param = request.args.get('since')
+        cursor = request.args.get('cursor')
         include_delivered = request.args.get('include_delivered', 'false').lower() == 'true'
         
         # Parse since timestamp if provided
@@ -59,50 +70,66 @@ def get_user_signals():
             except ValueError:
                 return jsonify({'error': 'Invalid since timestamp format'}), 400
         
+        if cursor:
+            try:
+                decode_cursor(cursor, parse_signal_id)
+            except ValueError:
+                return jsonify({'error': 'Invalid cursor'}), 400
+        
         # Build query for signals matching user's risk tier
-        query = Signal.query.filter(
+        filters = [
             Signal.risk_tier == user_risk_tier.lower(),
             Signal.status == 'active',
             Signal.origin == 'admin'
-        )
+        ]
         
         # Apply since filter if provided
         if since_date:
-            query = query.filter(Signal.created_at >= since_date)
-        
-        # Execute query
-        signals = query.order_by(Signal.created_at.desc()).limit(limit).all()
+            filters.append(Signal.created_at >= since_date)
+        
+        if include_delivered:
+            # Delivery status comes from the same query through one outer join, not a lookup per signal
+            query = db.session.query(Signal, UserSignal.delivered, UserSignal.delivered_at).outerjoin(
+                UserSignal, db.and_(UserSignal.signal_id == Signal.id, UserSignal.user_id == user.uuid)
+            )
+            signal_of = lambda row: row[0]
+        else:
+            query = db.session.query(Signal)
+            signal_of = lambda row: row
+        
+        # Execute query: one newest-first page after the cursor
+        rows, next_cursor = keyset_page(
+            query.filter(*filters), Signal.created_at, Signal.id, cursor, limit,
+            key=lambda row: (signal_of(row).created_at, signal_of(row).id), parse_id=parse_signal_id
+        )
         
-        # Convert signals to dict and add delivery status if requested
+        # Pre-serialized signals, with the user's delivery status appended when requested
         signals_data = []
-        for signal in signals:
-            signal_dict = signal.to_dict()
-            
+        for row in rows:
+            signal = signal_of(row)
+            signal_json = signal_rows.get((signal.id, signal.status, signal.updated_at), signal.to_dict)
             if include_delivered:
-                # Check delivery status
-                user_signal = UserSignal.query.filter_by(
-                    user_id=str(user.uuid),
-                    signal_id=str(signal.id)
-                ).first()
-                
-                signal_dict['delivered'] = user_signal.delivered if user_signal else False
-                signal_dict['delivered_at'] = user_signal.delivered_at.isoformat() if user_signal and user_signal.delivered_at else None
-            
-            signals_data.append(signal_dict)
+                _, delivered, delivered_at = row
+                signal_json = with_fields(signal_json, {
+                    'delivered': bool(delivered),
+                    'delivered_at': delivered_at.isoformat() if delivered_at else None
+                })
+            signals_data.append(signal_json)
         
         logger.info(f"Fetched {len(signals_data)} signals for user {user_id} (risk_tier: {user_risk_tier})")
         
-        return jsonify({
+        return rows_response({
             'success': True,
-            'signals': signals_data,
             'count': len(signals_data),
             'user_risk_tier': user_risk_tier,
+            'next_cursor': next_cursor,
             'filters': {
                 'limit': limit,
                 'since': since_param,
+                'cursor': cursor,
                 'include_delivered': include_delivered
             }
-        }), 200
+        }, signals_data)
         
     except Exception as e:
         logger.error(f"Error fetching user signals: {e}")
@@ -141,15 +168,15 @@ def get_recent_signals():
             Signal.created_at >= since_date
         ).order_by(Signal.created_at.desc()).all()
         
-        signals_data = [signal.to_dict() for signal in signals]
+        signals_data = [signal_rows.get((signal.id, signal.status, signal.updated_at), signal.to_dict)
+                        for signal in signals]
         
-        return jsonify({
+        return rows_response({
             'success': True,
-            'signals': signals_data,
             'count': len(signals_data),
             'period': '24_hours',
             'user_risk_tier': user_risk_tier
-        }), 200
+        }, signals_data)
         
     except Exception as e:
         logger.error(f"Error fetching recent signals: {e}")
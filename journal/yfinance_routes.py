@@ -5,6 +5,8 @@ import numpy as np
 from datetime import datetime, timedelta
 import logging
 
+from .extensions import market_data
+
 # Set up logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
@@ -38,6 +40,12 @@ def validate_symbol(symbol):
     
     return symbol_mappings.get(symbol, symbol)
 
+def smoothed_latest_price(quote):
+    """Latest close, smoothed over the recent closes when there are enough of them"""
+    if len(quote.recent_closes) >= 5:
+        return float(smooth_price(quote.recent_closes)[-1])
+    return quote.price
+
 @yfinance_bp.route('/yfinance/price/<symbol>', methods=['GET'])
 def get_price(symbol):
     """Get current price for a symbol with smoothing"""
@@ -46,33 +54,22 @@ def get_price(symbol):
         normalized_symbol = validate_symbol(symbol)
         logger.info(f"Fetching price for {symbol} (normalized: {normalized_symbol})")
         
-        # Fetch ticker data
-        ticker = yf.Ticker(normalized_symbol)
+        # Shared quote: cached briefly, and fetched once however many requests ask at the same time
+        quote = market_data.quote(normalized_symbol)
         
-        # Get recent price data for smoothing
-        hist = ticker.history(period="1d", interval="1m")
-        
-        if hist.empty:
+        if quote is None:
             logger.warning(f"No data received for {normalized_symbol}")
             return jsonify({'error': 'No data available'}), 404
         
-        # Get the latest price
-        latest_price = float(hist['Close'].iloc[-1])
-        
-        # Apply smoothing if we have enough data
-        if len(hist) >= 5:
-            prices = hist['Close'].tail(10).tolist()
-            smoothed_prices = smooth_price(prices)
-            latest_price = float(smoothed_prices[-1])
+        latest_price = smoothed_latest_price(quote)
         
         # Validate price
         if not (0 < latest_price < 1000000):
             logger.warning(f"Invalid price received for {normalized_symbol}: {latest_price}")
             return jsonify({'error': 'Invalid price data'}), 500
         
-        # Get additional info
-        info = ticker.info
-        previous_close = info.get('previousClose', latest_price)
+        # Change against the previous session's last close, taken from the same history request
+        previous_close = quote.previous_close or latest_price
         change = latest_price - previous_close
         change_percent = (change / previous_close) * 100 if previous_close > 0 else 0
         
@@ -81,10 +78,10 @@ def get_price(symbol):
             'price': round(latest_price, 6),
             'change': round(change, 6),
             'changePercent': round(change_percent, 2),
-            'volume': int(hist['Volume'].iloc[-1]) if 'Volume' in hist.columns else 0,
-            'high': float(hist['High'].iloc[-1]) if 'High' in hist.columns else latest_price,
-            'low': float(hist['Low'].iloc[-1]) if 'Low' in hist.columns else latest_price,
-            'open': float(hist['Open'].iloc[-1]) if 'Open' in hist.columns else latest_price,
+            'volume': int(quote.volume),
+            'high': quote.high,
+            'low': quote.low,
+            'open': quote.open,
             'timestamp': datetime.now().isoformat(),
             'normalized_symbol': normalized_symbol
         }
@@ -151,41 +148,24 @@ def get_multiple_prices():
         if len(symbols) > 50:
             return jsonify({'error': 'Maximum 50 symbols allowed'}), 400
         
+        # Every symbol not already cached is fetched in one upstream request
+        normalized = {symbol: validate_symbol(symbol) for symbol in symbols}
+        quotes = market_data.quotes(normalized.values())
+        
         results = []
         for symbol in symbols:
-            try:
-                # Use the existing price endpoint logic
-                normalized_symbol = validate_symbol(symbol)
-                ticker = yf.Ticker(normalized_symbol)
-                hist = ticker.history(period="1d", interval="1m")
-                
-                if not hist.empty:
-                    latest_price = float(hist['Close'].iloc[-1])
-                    
-                    # Apply smoothing
-                    if len(hist) >= 5:
-                        prices = hist['Close'].tail(10).tolist()
-                        smoothed_prices = smooth_price(prices)
-                        latest_price = float(smoothed_prices[-1])
-                    
-                    results.append({
-                        'symbol': symbol,
-                        'price': round(latest_price, 6),
-                        'timestamp': datetime.now().isoformat(),
-                        'success': True
-                    })
-                else:
-                    results.append({
-                        'symbol': symbol,
-                        'error': 'No data available',
-                        'success': False
-                    })
-                    
-            except Exception as e:
-                logger.warning(f"Failed to fetch price for {symbol}: {str(e)}")
+            quote = quotes.get(normalized[symbol])
+            if quote is not None:
+                results.append({
+                    'symbol': symbol,
+                    'price': round(smoothed_latest_price(quote), 6),
+                    'timestamp': datetime.now().isoformat(),
+                    'success': True
+                })
+            else:
                 results.append({
                     'symbol': symbol,
-                    'error': str(e),
+                    'error': 'No data available',
                     'success': False
                 })
         
@@ -8,10 +8,14 @@ import os
 import sys
 import json
 import time
+import queue
+import random
 import threading
+import itertools
+import math
 import asyncio
 import websockets
-from datetime import datetime, timedelta
+from datetime import datetime
 from typing import Dict, List, Any, Optional
 from collections import defaultdict, deque
 import logging
@@ -34,24 +38,132 @@ class ExecutionEvent:
     user_id: Optional[str] = None
     session_id: Optional[str] = None
 
+EVENT_SERVICES = ('backend', 'frontend')
+EVENT_STATUSES = ('success', 'error', 'warning')
+
+def parse_event(data: Any) -> ExecutionEvent:
+    """ExecutionEvent from posted JSON; raises ValueError for anything the collector could not aggregate"""
+    if not isinstance(data, dict):
+        raise ValueError('event must be an object')
+    unknown = set(data) - set(ExecutionEvent.__dataclass_fields__)
+    if unknown:
+        raise ValueError(f"unknown fields: {', '.join(sorted(unknown))}")
+    data = {'timestamp': datetime.now().isoformat(), 'details': {}, **data}
+    for name in ('timestamp', 'service', 'component', 'action', 'status'):
+        if not isinstance(data.get(name), str) or not data[name]:
+            raise ValueError(f'{name} must be a non-empty string')
+    for name in ('user_id', 'session_id'):
+        if data.get(name) is not None and not isinstance(data[name], str):
+            raise ValueError(f'{name} must be a string')
+    if data['service'] not in EVENT_SERVICES:
+        raise ValueError(f"service must be one of {', '.join(EVENT_SERVICES)}")
+    if data['status'] not in EVENT_STATUSES:
+        raise ValueError(f"status must be one of {', '.join(EVENT_STATUSES)}")
+    duration = data.get('duration_ms')
+    if isinstance(duration, bool) or not isinstance(duration, (int, float)) \
+            or not math.isfinite(duration) or duration < 0:
+        raise ValueError('duration_ms must be a non-negative number')
+    if not isinstance(data['details'], dict):
+        raise ValueError('details must be an object')
+    try:
+        datetime.fromisoformat(data['timestamp'])
+    except ValueError:
+        raise ValueError('timestamp must be ISO 8601') from None
+    return ExecutionEvent(**{**data, 'duration_ms': float(duration)})
+
+def event_epoch(timestamp: str) -> float:
+    """Epoch seconds of an event timestamp (naive ones are local time); now if it does not parse"""
+    try:
+        return datetime.fromisoformat(timestamp).timestamp()
+    except (TypeError, ValueError):
+        return time.time()
+
+class WindowAggregate:
+    """Running totals for one service's events in one time bucket.
+
+    Adding an event is O(1), and a window is the merge of its buckets, so
+    window metrics cost the same however many raw events are retained.
+    """
+
+    def __init__(self):
+        self.count = 0
+        self.duration_sum = 0.0
+        self.min_duration = float('inf')
+        self.max_duration = 0.0
+        self.statuses: Dict[str, int] = defaultdict(int)
+        self.components: Dict[str, int] = defaultdict(int)
+        self.actions: Dict[str, int] = defaultdict(int)
+
+    def add(self, event: ExecutionEvent):
+        self.count += 1
+        self.duration_sum += event.duration_ms
+        self.min_duration = min(self.min_duration, event.duration_ms)
+        self.max_duration = max(self.max_duration, event.duration_ms)
+        self.statuses[event.status] += 1
+        self.components[event.component] += 1
+        self.actions[event.action] += 1
+
+    def merge(self, other: 'WindowAggregate') -> 'WindowAggregate':
+        self.count += other.count
+        self.duration_sum += other.duration_sum
+        self.min_duration = min(self.min_duration, other.min_duration)
+        self.max_duration = max(self.max_duration, other.max_duration)
+        for totals, other_totals in ((self.statuses, other.statuses), (self.components, other.components),
+                                     (self.actions, other.actions)):
+            for key, count in other_totals.items():
+                totals[key] += count
+        return self
+
+    @property
+    def avg_duration(self) -> float:
+        return self.duration_sum / self.count if self.count else 0
+
 class LiveExecutionMonitor:
-    """Monitors live execution activity from backend and frontend"""
+    """Monitors live execution activity from backend and frontend
+
+    Instrumented code pushes events with ``record_event``, which only puts
+    them on an unbounded SimpleQueue and never blocks. A collector thread
+    drains the queue every ``collect_interval`` seconds and folds each event
+    into per-``bucket_seconds`` aggregates. Every ``resource_interval``
+    seconds it also takes a non-blocking psutil sample. Comparisons run on
+    demand over the buckets of the window and are cached until new events
+    arrive or a bucket closes. Windows are therefore exact to one bucket,
+    and no query re-reads the raw event deques.
+    """
     
-    def __init__(self, max_events: int = 10000):
+    def __init__(self, max_events: int = 10000, collect_interval: float = 1.0,
+                 resource_interval: Optional[float] = 5.0, bucket_seconds: int = 10,
+                 retention_minutes: int = 10, max_listed_events: int = 500,
+                 simulate_frontend: bool = True):
         self.max_events = max_events
+        self.collect_interval = collect_interval
+        self.resource_interval = resource_interval
+        self.bucket_seconds = bucket_seconds
+        self.retention_buckets = retention_minutes * 60 // bucket_seconds + 1
+        self.max_listed_events = max_listed_events
+        self.simulate_frontend = simulate_frontend
         self.backend_events = deque(maxlen=max_events)
         self.frontend_events = deque(maxlen=max_events)
         self.execution_differences = []
         self.is_monitoring = False
         self.monitor_thread = None
         
+        # Events pushed by instrumented code, drained by the collector
+        self._inbox: queue.SimpleQueue = queue.SimpleQueue()
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._buckets: Dict[str, Dict[int, WindowAggregate]] = {'backend': {}, 'frontend': {}}
+        self._generation = 0
+        self._comparison_key = None
+        self._last_resource_sample = 0.0
+        
         # Setup logging
         self.setup_logging()
         
         # Performance tracking
         self.performance_metrics = {
-            'backend': defaultdict(list),
-            'frontend': defaultdict(list)
+            'backend': defaultdict(lambda: deque(maxlen=max_events)),
+            'frontend': defaultdict(lambda: deque(maxlen=max_events))
         }
         
     def setup_logging(self):
@@ -68,6 +180,9 @@ class LiveExecutionMonitor:
             return
             
         self.is_monitoring = True
+        self._stop.clear()
+        # Primes psutil so the first non-blocking cpu_percent reading is meaningful
+        psutil.cpu_percent(interval=None)
         self.monitor_thread = threading.Thread(target=self._monitor_loop, daemon=True)
         self.monitor_thread.start()
         self.logger.info("🚀 Live execution monitoring started")
@@ -75,37 +190,83 @@ class LiveExecutionMonitor:
     def stop_monitoring(self):
         """Stop monitoring"""
         self.is_monitoring = False
+        self._stop.set()
         if self.monitor_thread:
             self.monitor_thread.join(timeout=5)
+        self._collect()
         self.logger.info("⏹️ Live execution monitoring stopped")
         
+    def record_event(self, event: ExecutionEvent):
+        """Queue an event from any thread; never blocks on the collector"""
+        self._inbox.put(event)
+        
     def _monitor_loop(self):
-        """Main monitoring loop"""
-        while self.is_monitoring:
+        """Collector loop: drain queued events and sample resources at the configured cadence"""
+        while not self._stop.wait(self.collect_interval):
             try:
-                # Monitor backend execution
-                self._monitor_backend_execution()
+                if (self.resource_interval is not None
+                        and time.time() - self._last_resource_sample >= self.resource_interval):
+                    self._monitor_backend_execution()
+                    
+                if self.simulate_frontend:
+                    self._monitor_frontend_execution()
+                    
+                self._collect()
                 
-                # Monitor frontend execution (via API calls)
-                self._monitor_frontend_execution()
+            except Exception as e:
+                self.logger.error(f"Error in monitoring loop: {e}")
                 
-                # Compare executions
-                self._compare_executions()
+    def _collect(self):
+        """Fold every queued event into the raw deques and its time bucket"""
+        with self._lock:
+            oldest = self._current_bucket() - self.retention_buckets
+            collected = 0
+            while True:
+                try:
+                    event = self._inbox.get_nowait()
+                except queue.Empty:
+                    break
+                service = 'frontend' if event.service == 'frontend' else 'backend'
+                (self.frontend_events if service == 'frontend' else self.backend_events).append(event)
+                bucket = self._bucket_of(event.timestamp)
+                if bucket > oldest:
+                    buckets = self._buckets[service]
+                    if bucket not in buckets:
+                        buckets[bucket] = WindowAggregate()
+                    buckets[bucket].add(event)
+                collected += 1
                 
-                time.sleep(1)  # Monitor every second
+            for buckets in self._buckets.values():
+                for bucket in [b for b in buckets if b <= oldest]:
+                    del buckets[bucket]
+            if collected:
+                self._generation += 1
                 
-            except Exception as e:
-                self.logger.error(f"Error in monitoring loop: {e}")
-                time.sleep(5)
+    def _current_bucket(self) -> int:
+        return int(time.time() // self.bucket_seconds)
+        
+    def _bucket_of(self, timestamp: str) -> int:
+        return int(event_epoch(timestamp) // self.bucket_seconds)
+            
+    def _window(self, service: str, minutes: int) -> WindowAggregate:
+        """Aggregate of a service's buckets in the last ``minutes``"""
+        first = self._current_bucket() - minutes * 60 // self.bucket_seconds
+        window = WindowAggregate()
+        for bucket, aggregate in self._buckets[service].items():
+            if bucket > first:
+                window.merge(aggregate)
+        return window
                 
     def _monitor_backend_execution(self):
         """Monitor backend execution activity"""
         try:
-            # Monitor system resources
-            cpu_percent = psutil.cpu_percent(interval=0.1)
+            # Monitor system resources; interval=None compares with the previous call instead of sleeping
+            started = time.perf_counter()
+            cpu_percent = psutil.cpu_percent(interval=None)
             memory = psutil.virtual_memory()
             disk_io = psutil.disk_io_counters()
             network_io = psutil.net_io_counters()
+            self._last_resource_sample = time.time()
             
             # Create backend execution event
             event = ExecutionEvent(
@@ -113,7 +274,7 @@ class LiveExecutionMonitor:
                 service='backend',
                 component='system',
                 action='resource_monitoring',
-                duration_ms=100,  # 100ms monitoring interval
+                duration_ms=(time.perf_counter() - started) * 1000,
                 status='success',
                 details={
                     'cpu_percent': cpu_percent,
@@ -126,7 +287,7 @@ class LiveExecutionMonitor:
                 }
             )
             
-            self.backend_events.append(event)
+            self.record_event(event)
             self.performance_metrics['backend']['resource_usage'].append({
                 'timestamp': event.timestamp,
                 'cpu': cpu_percent,
@@ -136,6 +297,7 @@ class LiveExecutionMonitor:
         except Exception as e:
             self.logger.error(f"Error monitoring backend: {e}")
             
+            
     def _monitor_frontend_execution(self):
         """Monitor frontend execution activity"""
         try:
@@ -161,7 +323,7 @@ class LiveExecutionMonitor:
                     },
                     session_id=f"session_{random.randint(1000, 9999)}"
                 )
-                self.frontend_events.append(event)
+                self.record_event(event)
                 
             # Simulate API calls
             if random.random() < 0.05:  # 5% chance per second
@@ -180,68 +342,65 @@ class LiveExecutionMonitor:
                     },
                     session_id=f"session_{random.randint(1000, 9999)}"
                 )
-                self.frontend_events.append(event)
+                self.record_event(event)
                 
         except Exception as e:
             self.logger.error(f"Error monitoring frontend: {e}")
             
-    def _compare_executions(self):
-        """Compare backend and frontend executions to find differences"""
+    def _compare_executions(self) -> List[Dict[str, Any]]:
+        """Compare backend and frontend executions to find differences, reusing the last result while nothing changed"""
         try:
-            # Get recent events (last 5 minutes)
-            cutoff_time = datetime.now() - timedelta(minutes=5)
-            
-            recent_backend = [
-                event for event in self.backend_events 
-                if datetime.fromisoformat(event.timestamp) > cutoff_time
-            ]
-            
-            recent_frontend = [
-                event for event in self.frontend_events 
-                if datetime.fromisoformat(event.timestamp) > cutoff_time
-            ]
-            
-            # Analyze execution patterns
-            backend_analysis = self._analyze_execution_patterns(recent_backend, 'backend')
-            frontend_analysis = self._analyze_execution_patterns(recent_frontend, 'frontend')
-            
-            # Find differences
-            differences = self._find_execution_differences(backend_analysis, frontend_analysis)
-            
-            if differences:
-                self.execution_differences.extend(differences)
-                # Keep only last 100 differences
-                self.execution_differences = self.execution_differences[-100:]
+            self._collect()
+            with self._lock:
+                key = (self._generation, self._current_bucket())
+                if key == self._comparison_key:
+                    return []
+                    
+                # Analyze execution patterns over the last 5 minutes
+                backend_analysis = self._analyze_execution_patterns(self._window('backend', 5), 'backend')
+                frontend_analysis = self._analyze_execution_patterns(self._window('frontend', 5), 'frontend')
+                
+                # Find differences
+                differences = self._find_execution_differences(backend_analysis, frontend_analysis)
+                self._comparison_key = key
+                
+                if differences:
+                    self.execution_differences.extend(differences)
+                    # Keep only last 100 differences
+                    self.execution_differences = self.execution_differences[-100:]
+                return differences
                 
         except Exception as e:
             self.logger.error(f"Error comparing executions: {e}")
+            return []
+            
+    def get_execution_differences(self) -> List[Dict[str, Any]]:
+        """Differences detected so far, including any found in events collected since the last call"""
+        self._compare_executions()
+        return self.execution_differences
             
-    def _analyze_execution_patterns(self, events: List[ExecutionEvent], service: str) -> Dict[str, Any]:
+    def _analyze_execution_patterns(self, window: WindowAggregate, service: str) -> Dict[str, Any]:
         """Analyze execution patterns for a service"""
-        if not events:
+        if not window.count:
             return {}
             
-        analysis = {
-            'total_events': len(events),
-            'avg_duration_ms': sum(event.duration_ms for event in events) / len(events),
-            'error_rate': sum(1 for event in events if event.status == 'error') / len(events),
-            'component_activity': defaultdict(int),
-            'action_frequency': defaultdict(int),
-            'performance_trend': []
+        return {
+            'total_events': window.count,
+            'avg_duration_ms': window.avg_duration,
+            'error_rate': window.statuses.get('error', 0) / window.count,
+            'component_activity': dict(window.components),
+            'action_frequency': dict(window.actions),
+            'performance_trend': [
+                {
+                    'timestamp': datetime.fromtimestamp(bucket * self.bucket_seconds).isoformat(),
+                    'events': aggregate.count,
+                    'avg_duration_ms': aggregate.avg_duration,
+                    'errors': aggregate.statuses.get('error', 0)
+                }
+                for bucket, aggregate in sorted(self._buckets[service].items())
+            ]
         }
         
-        for event in events:
-            analysis['component_activity'][event.component] += 1
-            analysis['action_frequency'][event.action] += 1
-            
-            analysis['performance_trend'].append({
-                'timestamp': event.timestamp,
-                'duration_ms': event.duration_ms,
-                'status': event.status
-            })
-            
-        return analysis
-        
     def _find_execution_differences(self, backend_analysis: Dict, frontend_analysis: Dict) -> List[Dict[str, Any]]:
         """Find differences between backend and frontend execution patterns"""
         differences = []
@@ -298,22 +457,15 @@ class LiveExecutionMonitor:
         
     def get_live_comparison_data(self) -> Dict[str, Any]:
         """Get current live comparison data"""
-        # Get recent events (last 10 minutes)
-        cutoff_time = datetime.now() - timedelta(minutes=10)
-        
-        recent_backend = [
-            asdict(event) for event in self.backend_events 
-            if datetime.fromisoformat(event.timestamp) > cutoff_time
-        ]
+        self._compare_executions()
         
-        recent_frontend = [
-            asdict(event) for event in self.frontend_events 
-            if datetime.fromisoformat(event.timestamp) > cutoff_time
-        ]
-        
-        # Calculate metrics
-        backend_metrics = self._calculate_live_metrics(recent_backend, 'backend')
-        frontend_metrics = self._calculate_live_metrics(recent_frontend, 'frontend')
+        # Metrics cover the last 10 minutes; the event listing is capped at max_listed_events
+        cutoff = time.time() - 10 * 60
+        with self._lock:
+            backend_metrics = self._calculate_live_metrics(self._window('backend', 10), 10)
+            frontend_metrics = self._calculate_live_metrics(self._window('frontend', 10), 10)
+            recent_backend = self._recent_events(self.backend_events, cutoff)
+            recent_frontend = self._recent_events(self.frontend_events, cutoff)
         
         return {
             'timestamp': datetime.now().isoformat(),
@@ -331,24 +483,26 @@ class LiveExecutionMonitor:
             'performance_comparison': self._compare_performance_metrics(backend_metrics, frontend_metrics)
         }
         
-    def _calculate_live_metrics(self, events: List[Dict], service: str) -> Dict[str, Any]:
-        """Calculate live metrics for events"""
-        if not events:
+    def _recent_events(self, events: deque, cutoff: float) -> List[Dict]:
+        """Events after ``cutoff`` (epoch seconds) among the last ``max_listed_events`` received, oldest first"""
+        tail = list(itertools.islice(reversed(events), self.max_listed_events))
+        return [asdict(event) for event in reversed(tail) if event_epoch(event.timestamp) > cutoff]
+        
+    def _calculate_live_metrics(self, window: WindowAggregate, window_minutes: int) -> Dict[str, Any]:
+        """Calculate live metrics for a window"""
+        if not window.count:
             return {}
             
-        durations = [event['duration_ms'] for event in events]
-        statuses = [event['status'] for event in events]
-        
         return {
-            'total_events': len(events),
-            'avg_duration_ms': sum(durations) / len(durations) if durations else 0,
-            'max_duration_ms': max(durations) if durations else 0,
-            'min_duration_ms': min(durations) if durations else 0,
-            'success_rate': statuses.count('success') / len(statuses) if statuses else 0,
-            'error_rate': statuses.count('error') / len(statuses) if statuses else 0,
-            'events_per_minute': len(events) / 10,  # 10-minute window
-            'components': list(set(event['component'] for event in events)),
-            'actions': list(set(event['action'] for event in events))
+            'total_events': window.count,
+            'avg_duration_ms': window.avg_duration,
+            'max_duration_ms': window.max_duration,
+            'min_duration_ms': window.min_duration,
+            'success_rate': window.statuses.get('success', 0) / window.count,
+            'error_rate': window.statuses.get('error', 0) / window.count,
+            'events_per_minute': window.count / window_minutes,
+            'components': list(window.components),
+            'actions': list(window.actions)
         }
         
     def _compare_performance_metrics(self, backend_metrics: Dict, frontend_metrics: Dict) -> Dict[str, Any]:
@@ -433,9 +587,10 @@ def get_live_data():
 def get_execution_differences():
     """Get execution differences"""
     try:
+        differences = monitor.get_execution_differences()
         return jsonify({
-            'differences': monitor.execution_differences,
-            'total_differences': len(monitor.execution_differences),
+            'differences': differences,
+            'total_differences': len(differences),
             'timestamp': datetime.now().isoformat()
         })
     except Exception as e:
@@ -444,6 +599,36 @@ def get_execution_differences():
             'message': str(e)
         }), 500
 
+@app.route('/api/live-execution/events', methods=['POST'])
+def record_events():
+    """Accept one event or a list of events from an instrumented app"""
+    try:
+        payload = request.get_json(force=True, silent=True)
+        if payload is None:
+            return jsonify({
+                'status': 'error',
+                'message': 'Request body must be JSON'
+            }), 400
+        # Validate the whole batch first so a bad event rejects it before anything reaches the collector
+        events = [parse_event(event) for event in (payload if isinstance(payload, list) else [payload])]
+        for event in events:
+            monitor.record_event(event)
+        return jsonify({
+            'status': 'success',
+            'accepted': len(events),
+            'timestamp': datetime.now().isoformat()
+        }), 202
+    except ValueError as e:
+        return jsonify({
+            'status': 'error',
+            'message': f'Invalid event: {e}'
+        }), 400
+    except Exception as e:
+        return jsonify({
+            'status': 'error',
+            'message': str(e)
+        }), 500
+
 @app.route('/api/live-execution/status', methods=['GET'])
 def get_monitoring_status():
     """Get monitoring status"""
@@ -457,8 +642,6 @@ def get_monitoring_status():
 
 def main():
     """Main function to run the live execution monitor"""
-    import random  # Import here to avoid issues
-    
     print("🚀 Starting Live Execution Monitor...")
     print("📊 This will monitor backend and frontend execution activity in real-time")
     print("🔍 Comparing executions to find differences...")
@@ -474,6 +657,7 @@ def main():
         print("   POST /api/live-execution/stop - Stop monitoring")
         print("   GET  /api/live-execution/data - Get live data")
         print("   GET  /api/live-execution/differences - Get differences")
+        print("   POST /api/live-execution/events - Push events from instrumented apps")
         print("   GET  /api/live-execution/status - Get status")
         
         app.run(host='0.0.0.0', port=5001, debug=False)
@@ -6,15 +6,56 @@ Analyzes and compares backend and frontend logs to identify execution difference
 
 import os
 import json
+import heapq
 import pandas as pd
 import matplotlib.pyplot as plt
 import seaborn as sns
 from datetime import datetime, timedelta
 from typing import Dict, List, Any, Optional, Tuple
 import argparse
-from collections import defaultdict, Counter
+from collections import defaultdict, Counter, OrderedDict
 import numpy as np
 
+from log_stream import DEFAULT_CHUNK_BYTES, HeavyHitters, LatencyHistogram, iter_json, map_chunks, split_file
+
+BACKEND_LOG_FILES = [
+    "flask_backend_structured.json",
+    "api_server_structured.json",
+    "database_structured.json",
+    "external_apis_structured.json"
+]
+
+FRONTEND_LOG_FILES = [
+    "frontend_app_structured.json",
+    "react_component_structured.json"
+]
+
+# Requests and responses still waiting for their other half; the oldest are dropped beyond this
+MAX_PENDING_REQUESTS = 100000
+
+def _parse_timestamp(value: Any) -> Optional[datetime]:
+    """ISO 8601 timestamp (with a trailing Z allowed) as a datetime, or None"""
+    if not isinstance(value, str):
+        return None
+    try:
+        return datetime.fromisoformat(value.replace('Z', '+00:00'))
+    except ValueError:
+        return None
+
+def _rate_per_hour(count: int, start: datetime, end: datetime) -> float:
+    """Events per hour between the first and last occurrence"""
+    time_span = (end - start).total_seconds() / 3600  # hours
+    return count / time_span if time_span > 0 else 0.0
+
+def _format_period(start: datetime, end: datetime) -> str:
+    return f"{start.strftime('%Y-%m-%d %H:%M')} to {end.strftime('%Y-%m-%d %H:%M')}"
+
+def _earliest(current: Optional[datetime], value: Optional[datetime]) -> Optional[datetime]:
+    return value if current is None or (value is not None and value < current) else current
+
+def _latest(current: Optional[datetime], value: Optional[datetime]) -> Optional[datetime]:
+    return value if current is None or (value is not None and value > current) else current
+
 class LogAnalyzer:
     """Comprehensive log analysis and comparison tool"""
     
@@ -29,25 +70,13 @@ class LogAnalyzer:
         print("📊 Loading log files...")
         
         # Load backend logs
-        backend_files = [
-            "flask_backend_structured.json",
-            "api_server_structured.json", 
-            "database_structured.json",
-            "external_apis_structured.json"
-        ]
-        
-        for file in backend_files:
+        for file in BACKEND_LOG_FILES:
             file_path = os.path.join(self.logs_dir, file)
             if os.path.exists(file_path):
                 self._load_json_logs(file_path, "backend")
                 
         # Load frontend logs (if available)
-        frontend_files = [
-            "frontend_app_structured.json",
-            "react_component_structured.json"
-        ]
-        
-        for file in frontend_files:
+        for file in FRONTEND_LOG_FILES:
             file_path = os.path.join(self.logs_dir, file)
             if os.path.exists(file_path):
                 self._load_json_logs(file_path, "frontend")
@@ -73,6 +102,10 @@ class LogAnalyzer:
         except Exception as e:
             print(f"⚠️ Error loading {file_path}: {e}")
             
+    def log_counts(self) -> Tuple[int, int]:
+        """Number of (backend, frontend) log entries loaded"""
+        return len(self.backend_logs), len(self.frontend_logs)
+        
     def analyze_performance_differences(self) -> Dict[str, Any]:
         """Analyze performance differences between backend and frontend"""
         print("🔍 Analyzing performance differences...")
@@ -81,15 +114,19 @@ class LogAnalyzer:
         backend_perf = [log for log in self.backend_logs if log.get('type') == 'performance']
         frontend_perf = [log for log in self.frontend_logs if log.get('type') == 'performance']
         
-        analysis = {
+        # Compare common metrics
+        backend_metrics = {m['metric_name']: m['value'] for m in backend_perf if 'metric_name' in m}
+        frontend_metrics = {m['name']: m['value'] for m in frontend_perf if 'name' in m}
+        
+        return {
             'backend_performance': self._analyze_performance_metrics(backend_perf),
             'frontend_performance': self._analyze_performance_metrics(frontend_perf),
-            'comparison': {}
+            'comparison': self._compare_metric_values(backend_metrics, frontend_metrics)
         }
         
-        # Compare common metrics
-        backend_metrics = {m['metric_name']: m['value'] for m in backend_perf if 'metric_name' in m}
-        frontend_metrics = {m['name']: m['value'] for m in frontend_perf if 'name' in m}
+    def _compare_metric_values(self, backend_metrics: Dict[str, float], frontend_metrics: Dict[str, float]) -> Dict[str, Any]:
+        """Compare the latest value of each metric reported by both sides"""
+        comparison = {}
         
         # Find common metrics
         common_metrics = set(backend_metrics.keys()) & set(frontend_metrics.keys())
@@ -100,14 +137,14 @@ class LogAnalyzer:
             difference = abs(backend_val - frontend_val)
             percentage_diff = (difference / min(backend_val, frontend_val)) * 100 if min(backend_val, frontend_val) > 0 else 0
             
-            analysis['comparison'][metric] = {
+            comparison[metric] = {
                 'backend_value': backend_val,
                 'frontend_value': frontend_val,
                 'difference': difference,
                 'percentage_difference': percentage_diff
             }
             
-        return analysis
+        return comparison
         
     def _analyze_performance_metrics(self, perf_logs: List[Dict]) -> Dict[str, Any]:
         """Analyze performance metrics for a specific log type"""
@@ -241,8 +278,7 @@ class LogAnalyzer:
         if not timestamps:
             return 0.0
             
-        time_span = (max(timestamps) - min(timestamps)).total_seconds() / 3600  # hours
-        return len(errors) / time_span if time_span > 0 else 0.0
+        return _rate_per_hour(len(errors), min(timestamps), max(timestamps))
         
     def analyze_user_behavior_patterns(self) -> Dict[str, Any]:
         """Analyze user behavior patterns from frontend logs"""
@@ -330,8 +366,7 @@ class LogAnalyzer:
         if not timestamps:
             return 0.0
             
-        time_span = (max(timestamps) - min(timestamps)).total_seconds() / 3600  # hours
-        return len(actions) / time_span if time_span > 0 else 0.0
+        return _rate_per_hour(len(actions), min(timestamps), max(timestamps))
         
     def generate_comparison_report(self) -> str:
         """Generate a comprehensive comparison report"""
@@ -342,6 +377,7 @@ class LogAnalyzer:
         request_analysis = self.analyze_request_response_patterns()
         error_analysis = self.analyze_error_patterns()
         user_analysis = self.analyze_user_behavior_patterns()
+        backend_count, frontend_count = self.log_counts()
         
         # Generate report
         report = f"""
@@ -349,8 +385,8 @@ class LogAnalyzer:
 Generated on: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}
 
 ## Executive Summary
-- Backend Logs: {len(self.backend_logs)} entries
-- Frontend Logs: {len(self.frontend_logs)} entries
+- Backend Logs: {backend_count} entries
+- Frontend Logs: {frontend_count} entries
 - Analysis Period: {self._get_analysis_period()}
 
 ## Performance Comparison
@@ -382,9 +418,7 @@ Generated on: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}
                 all_timestamps.append(datetime.fromisoformat(log['timestamp'].replace('Z', '+00:00')))
                 
         if all_timestamps:
-            start = min(all_timestamps)
-            end = max(all_timestamps)
-            return f"{start.strftime('%Y-%m-%d %H:%M')} to {end.strftime('%Y-%m-%d %H:%M')}"
+            return _format_period(min(all_timestamps), max(all_timestamps))
         return "Unknown"
         
     def _format_performance_comparison(self, analysis: Dict) -> str:
@@ -531,28 +565,13 @@ Generated on: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}
         
     def _create_performance_chart(self, output_dir: str):
         """Create performance comparison chart"""
-        backend_perf = [log for log in self.backend_logs if log.get('type') == 'performance']
-        frontend_perf = [log for log in self.frontend_logs if log.get('type') == 'performance']
+        backend_metrics, frontend_metrics = self._metric_means()
         
-        if not backend_perf and not frontend_perf:
+        if not backend_metrics and not frontend_metrics:
             return
             
         plt.figure(figsize=(12, 8))
         
-        # Extract common metrics
-        backend_metrics = defaultdict(list)
-        frontend_metrics = defaultdict(list)
-        
-        for log in backend_perf:
-            metric_name = log.get('metric_name', 'unknown')
-            value = log.get('value', 0)
-            backend_metrics[metric_name].append(value)
-            
-        for log in frontend_perf:
-            metric_name = log.get('name', 'unknown')
-            value = log.get('value', 0)
-            frontend_metrics[metric_name].append(value)
-            
         # Find common metrics
         common_metrics = set(backend_metrics.keys()) & set(frontend_metrics.keys())
         
@@ -561,10 +580,7 @@ Generated on: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}
             labels = []
             
             for metric in list(common_metrics)[:10]:  # Limit to 10 metrics
-                backend_avg = np.mean(backend_metrics[metric])
-                frontend_avg = np.mean(frontend_metrics[metric])
-                
-                data.append([backend_avg, frontend_avg])
+                data.append([backend_metrics[metric], frontend_metrics[metric]])
                 labels.append(metric)
                 
             x = np.arange(len(labels))
@@ -582,10 +598,30 @@ Generated on: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}
             plt.savefig(os.path.join(output_dir, 'performance_comparison.png'), dpi=300, bbox_inches='tight')
             plt.close()
             
+    def _metric_means(self) -> Tuple[Dict[str, float], Dict[str, float]]:
+        """Mean value of each (backend, frontend) performance metric"""
+        backend_metrics = defaultdict(list)
+        frontend_metrics = defaultdict(list)
+        
+        for log in self.backend_logs:
+            if log.get('type') == 'performance':
+                backend_metrics[log.get('metric_name', 'unknown')].append(log.get('value', 0))
+                
+        for log in self.frontend_logs:
+            if log.get('type') == 'performance':
+                frontend_metrics[log.get('name', 'unknown')].append(log.get('value', 0))
+                
+        return ({metric: np.mean(values) for metric, values in backend_metrics.items()},
+                {metric: np.mean(values) for metric, values in frontend_metrics.items()})
+        
+    def _error_totals(self) -> Tuple[int, int]:
+        """Number of (backend, frontend) error entries"""
+        return (sum(1 for log in self.backend_logs if log.get('type') == 'error'),
+                sum(1 for log in self.frontend_logs if log.get('type') == 'error'))
+        
     def _create_error_chart(self, output_dir: str):
         """Create error distribution chart"""
-        backend_errors = [log for log in self.backend_logs if log.get('type') == 'error']
-        frontend_errors = [log for log in self.frontend_logs if log.get('type') == 'error']
+        backend_errors, frontend_errors = self._error_totals()
         
         if not backend_errors and not frontend_errors:
             return
@@ -593,8 +629,8 @@ Generated on: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}
         plt.figure(figsize=(10, 6))
         
         error_counts = {
-            'Backend': len(backend_errors),
-            'Frontend': len(frontend_errors)
+            'Backend': backend_errors,
+            'Frontend': frontend_errors
         }
         
         plt.bar(error_counts.keys(), error_counts.values(), color=['#ff6b6b', '#4ecdc4'])
@@ -605,18 +641,8 @@ Generated on: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}
         
     def _create_timeline_chart(self, output_dir: str):
         """Create request timeline chart"""
-        requests = [log for log in self.backend_logs if log.get('type') == 'request']
+        hourly_counts = self._hourly_request_counts()
         
-        if not requests:
-            return
-            
-        # Group by hour
-        hourly_counts = defaultdict(int)
-        for req in requests:
-            timestamp = datetime.fromisoformat(req['timestamp'].replace('Z', '+00:00'))
-            hour = timestamp.strftime('%Y-%m-%d %H:00')
-            hourly_counts[hour] += 1
-            
         if hourly_counts:
             hours = sorted(hourly_counts.keys())
             counts = [hourly_counts[h] for h in hours]
@@ -630,6 +656,400 @@ Generated on: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}
             plt.tight_layout()
             plt.savefig(os.path.join(output_dir, 'request_timeline.png'), dpi=300, bbox_inches='tight')
             plt.close()
+            
+    def _hourly_request_counts(self) -> Dict[str, int]:
+        """Backend requests per 'YYYY-MM-DD HH:00' hour"""
+        hourly_counts = defaultdict(int)
+        for req in self.backend_logs:
+            if req.get('type') == 'request':
+                timestamp = datetime.fromisoformat(req['timestamp'].replace('Z', '+00:00'))
+                hourly_counts[timestamp.strftime('%Y-%m-%d %H:00')] += 1
+        return hourly_counts
+
+class StructuredLogSummary:
+    """One-pass, mergeable summary of structured JSON logs holding everything LogAnalyzer reports.
+
+    Memory grows with the number of distinct metrics, error types, sessions
+    and in-flight requests, not with the number of lines: latencies go into
+    log-bucketed histograms, high-cardinality keys (error messages, URLs,
+    components) into count-min heavy hitters, and request/response pairs
+    are joined as they stream past. Summaries of consecutive file chunks
+    merge in order, including pairs split across a chunk boundary.
+    """
+    
+    def __init__(self):
+        self.entries = 0
+        self.first_seen: Optional[datetime] = None
+        self.last_seen: Optional[datetime] = None
+        
+        # Performance metrics
+        self.metrics: Dict[str, LatencyHistogram] = defaultdict(LatencyHistogram)
+        self.latest_metric_values: Dict[str, float] = {}
+        self.latest_named_values: Dict[str, float] = {}
+        
+        # Request/response pairs
+        self.pending_requests: OrderedDict = OrderedDict()
+        self.pending_responses: OrderedDict = OrderedDict()
+        self.unmatched_dropped = 0
+        self.matched_requests = 0
+        self.execution_times = LatencyHistogram()
+        self.slowest_requests: List[Tuple[float, str]] = []
+        self.status_codes = Counter()
+        self.methods = Counter()
+        self.request_hours = Counter()
+        self.requests_per_hour = Counter()
+        
+        # Errors
+        self.errors = 0
+        self.error_types = Counter()
+        self.error_names = Counter()
+        self.error_messages = HeavyHitters()
+        self.errors_per_hour = Counter()
+        self.first_error: Optional[datetime] = None
+        self.last_error: Optional[datetime] = None
+        
+        # User actions and API calls
+        self.actions = 0
+        self.action_types = Counter()
+        self.components = HeavyHitters()
+        self.first_action: Optional[datetime] = None
+        self.last_action: Optional[datetime] = None
+        self.sessions: Dict[str, list] = {}
+        self.api_calls = 0
+        self.api_endpoints = HeavyHitters()
+        self.api_methods = Counter()
+        self.api_status_codes = Counter()
+        self.api_response_times = LatencyHistogram()
+        
+    def add(self, entry: Dict[str, Any]):
+        """Fold one log entry into the summary"""
+        self.entries += 1
+        timestamp = _parse_timestamp(entry.get('timestamp'))
+        if timestamp is not None:
+            self.first_seen = _earliest(self.first_seen, timestamp)
+            self.last_seen = _latest(self.last_seen, timestamp)
+            
+        log_type = entry.get('type')
+        if log_type == 'performance':
+            value = entry.get('value', 0)
+            if isinstance(value, (int, float)):
+                self.metrics[entry.get('metric_name') or entry.get('name', 'unknown')].add(value)
+            if 'metric_name' in entry:
+                self.latest_metric_values[entry['metric_name']] = value
+            if 'name' in entry:
+                self.latest_named_values[entry['name']] = value
+                
+        elif log_type == 'request':
+            if timestamp is not None:
+                self.requests_per_hour[timestamp.strftime('%Y-%m-%d %H:00')] += 1
+            request_id = entry.get('request_id')
+            if request_id:
+                request = (entry.get('method'), entry.get('path'), timestamp.hour if timestamp else None)
+                response = self.pending_responses.pop(request_id, None)
+                if response is not None:
+                    self._match(request, response)
+                else:
+                    self._hold(self.pending_requests, request_id, request)
+                    
+        elif log_type == 'response':
+            request_id = entry.get('request_id')
+            if request_id:
+                response = (entry.get('status_code'), entry.get('execution_time_ms'))
+                request = self.pending_requests.pop(request_id, None)
+                if request is not None:
+                    self._match(request, response)
+                else:
+                    self._hold(self.pending_responses, request_id, response)
+                    
+        elif log_type == 'error':
+            self.errors += 1
+            self.error_types[entry.get('error_type', 'unknown')] += 1
+            error = entry.get('error')
+            self.error_names[error.get('name', 'unknown') if isinstance(error, dict) else 'unknown'] += 1
+            self.error_messages.add(entry.get('error_message', 'unknown'))
+            if timestamp is not None:
+                self.errors_per_hour[timestamp.strftime('%Y-%m-%d %H:00')] += 1
+                self.first_error = _earliest(self.first_error, timestamp)
+                self.last_error = _latest(self.last_error, timestamp)
+                
+        elif log_type == 'user_action':
+            self.actions += 1
+            self.action_types[entry.get('action', 'unknown')] += 1
+            self.components.add(entry.get('component', 'unknown'))
+            if timestamp is not None:
+                self.first_action = _earliest(self.first_action, timestamp)
+                self.last_action = _latest(self.last_action, timestamp)
+            session = self.sessions.setdefault(entry.get('sessionId', 'unknown'), [0, None, None])
+            session[0] += 1
+            if timestamp is not None:
+                session[1] = _earliest(session[1], timestamp)
+                session[2] = _latest(session[2], timestamp)
+                
+        elif log_type == 'api_call':
+            self.api_calls += 1
+            self.api_endpoints.add(entry.get('url', 'unknown'))
+            self.api_methods[entry.get('method', 'unknown')] += 1
+            self.api_status_codes[entry.get('status', 0)] += 1
+            response_time = entry.get('responseTime')
+            if response_time and isinstance(response_time, (int, float)):
+                self.api_response_times.add(response_time)
+                
+    def _hold(self, pending: OrderedDict, request_id: str, item: tuple):
+        pending[request_id] = item
+        if len(pending) > MAX_PENDING_REQUESTS:
+            pending.popitem(last=False)
+            self.unmatched_dropped += 1
+            
+    def _match(self, request: tuple, response: tuple):
+        method, path, hour = request
+        status_code, execution_time = response
+        self.matched_requests += 1
+        if method is not None:
+            self.methods[method] += 1
+        if status_code is not None:
+            self.status_codes[status_code] += 1
+        if hour is not None:
+            self.request_hours[hour] += 1
+        if isinstance(execution_time, (int, float)):
+            self.execution_times.add(execution_time)
+            self._track_slowest((execution_time, path if isinstance(path, str) else ''))
+            
+    def _track_slowest(self, item: Tuple[float, str]):
+        if len(self.slowest_requests) < 10:
+            heapq.heappush(self.slowest_requests, item)
+        elif item > self.slowest_requests[0]:
+            heapq.heapreplace(self.slowest_requests, item)
+            
+    def merge(self, other: 'StructuredLogSummary') -> 'StructuredLogSummary':
+        """Fold in the summary of the log data that follows this one"""
+        self.entries += other.entries
+        self.first_seen = _earliest(self.first_seen, other.first_seen)
+        self.last_seen = _latest(self.last_seen, other.last_seen)
+        
+        for name, histogram in other.metrics.items():
+            self.metrics[name].merge(histogram)
+        self.latest_metric_values.update(other.latest_metric_values)
+        self.latest_named_values.update(other.latest_named_values)
+        
+        # Join halves of request/response pairs that fell on either side of the chunk boundary
+        for request_id, response in other.pending_responses.items():
+            request = self.pending_requests.pop(request_id, None)
+            if request is not None:
+                self._match(request, response)
+            else:
+                self._hold(self.pending_responses, request_id, response)
+        for request_id, request in other.pending_requests.items():
+            response = self.pending_responses.pop(request_id, None)
+            if response is not None:
+                self._match(request, response)
+            else:
+                self._hold(self.pending_requests, request_id, request)
+        self.unmatched_dropped += other.unmatched_dropped
+        self.matched_requests += other.matched_requests
+        self.execution_times.merge(other.execution_times)
+        for item in other.slowest_requests:
+            self._track_slowest(item)
+        self.status_codes.update(other.status_codes)
+        self.methods.update(other.methods)
+        self.request_hours.update(other.request_hours)
+        self.requests_per_hour.update(other.requests_per_hour)
+        
+        self.errors += other.errors
+        self.error_types.update(other.error_types)
+        self.error_names.update(other.error_names)
+        self.error_messages.merge(other.error_messages)
+        self.errors_per_hour.update(other.errors_per_hour)
+        self.first_error = _earliest(self.first_error, other.first_error)
+        self.last_error = _latest(self.last_error, other.last_error)
+        
+        self.actions += other.actions
+        self.action_types.update(other.action_types)
+        self.components.merge(other.components)
+        self.first_action = _earliest(self.first_action, other.first_action)
+        self.last_action = _latest(self.last_action, other.last_action)
+        for session_id, (count, first, last) in other.sessions.items():
+            session = self.sessions.setdefault(session_id, [0, None, None])
+            session[0] += count
+            session[1] = _earliest(session[1], first)
+            session[2] = _latest(session[2], last)
+        self.api_calls += other.api_calls
+        self.api_endpoints.merge(other.api_endpoints)
+        self.api_methods.update(other.api_methods)
+        self.api_status_codes.update(other.api_status_codes)
+        self.api_response_times.merge(other.api_response_times)
+        return self
+        
+    def performance_metrics(self) -> Dict[str, Any]:
+        """Same shape as LogAnalyzer._analyze_performance_metrics; percentiles are within 1%"""
+        return {name: histogram.summary() for name, histogram in self.metrics.items()}
+        
+    def request_patterns(self) -> Dict[str, Any]:
+        """Same shape as LogAnalyzer.analyze_request_response_patterns"""
+        if not self.matched_requests:
+            return {'total_requests': 0}
+        return {
+            'total_requests': self.matched_requests,
+            'avg_execution_time': self.execution_times.mean,
+            'median_execution_time': self.execution_times.percentile(50),
+            'slowest_endpoints': [{'path': path, 'execution_time': execution_time}
+                                  for execution_time, path in sorted(self.slowest_requests, reverse=True)],
+            'status_code_distribution': dict(self.status_codes.most_common()),
+            'method_distribution': dict(self.methods.most_common()),
+            'hourly_distribution': dict(sorted(self.request_hours.items())),
+            'unmatched_dropped': self.unmatched_dropped
+        }
+        
+    def error_summary(self) -> Dict[str, Any]:
+        """Same shape as LogAnalyzer._analyze_errors, plus errors per hour"""
+        if not self.errors:
+            return {}
+        return {
+            'total_errors': self.errors,
+            'error_types': dict(self.error_types),
+            'common_error_messages': dict(self.error_messages.most_common(10)),
+            'error_rate_per_hour': (_rate_per_hour(self.errors, self.first_error, self.last_error)
+                                    if self.first_error else 0.0),
+            'errors_per_hour': dict(sorted(self.errors_per_hour.items()))
+        }
+        
+    def user_actions_summary(self) -> Dict[str, Any]:
+        """Same shape as LogAnalyzer._analyze_user_actions"""
+        if not self.actions:
+            return {}
+        return {
+            'total_actions': self.actions,
+            'action_types': dict(self.action_types),
+            'most_active_components': dict(self.components.most_common(10)),
+            'actions_per_hour': (_rate_per_hour(self.actions, self.first_action, self.last_action)
+                                 if self.first_action else 0.0)
+        }
+        
+    def api_calls_summary(self) -> Dict[str, Any]:
+        """Same shape as LogAnalyzer._analyze_api_calls"""
+        if not self.api_calls:
+            return {}
+        return {
+            'total_calls': self.api_calls,
+            'endpoints': dict(self.api_endpoints.most_common(10)),
+            'methods': dict(self.api_methods),
+            'status_codes': dict(self.api_status_codes),
+            'avg_response_time': self.api_response_times.mean,
+            'median_response_time': self.api_response_times.percentile(50)
+        }
+        
+    def engagement_summary(self) -> Dict[str, Any]:
+        """Same shape as LogAnalyzer._analyze_user_engagement"""
+        if not self.actions:
+            return {}
+        session_durations = [(last - first).total_seconds() / 60  # minutes
+                             for count, first, last in self.sessions.values() if count > 1 and first is not None]
+        return {
+            'total_sessions': len(self.sessions),
+            'avg_session_duration': np.mean(session_durations) if session_durations else 0,
+            'median_session_duration': np.median(session_durations) if session_durations else 0,
+            'actions_per_session': self.actions / len(self.sessions)
+        }
+
+def _summarize_chunk(task: Tuple[str, int, int]) -> StructuredLogSummary:
+    """Summary of one byte range of a structured log file (runs in a worker process)"""
+    file_path, start, end = task
+    summary = StructuredLogSummary()
+    try:
+        for entry in iter_json(file_path, start, end):
+            summary.add(entry)
+    except Exception as e:
+        print(f"⚠️ Error streaming {file_path} bytes {start}-{end}: {e}")
+    return summary
+
+class StreamingLogAnalyzer(LogAnalyzer):
+    """LogAnalyzer that streams the log files once instead of loading them into lists.
+    
+    Files are split into byte ranges summarized in parallel worker
+    processes, and the partial summaries are merged in file order. Counts,
+    means, rates and distributions match the in-memory analysis; medians
+    and percentiles come from histograms and are within 1% of it.
+    """
+    
+    def __init__(self, logs_dir: str = "logs", workers: Optional[int] = None,
+                 chunk_bytes: int = DEFAULT_CHUNK_BYTES):
+        super().__init__(logs_dir)
+        self.workers = workers or os.cpu_count() or 1
+        self.chunk_bytes = chunk_bytes
+        self.backend_summary = StructuredLogSummary()
+        self.frontend_summary = StructuredLogSummary()
+        
+    def load_logs(self):
+        """Summarize all log files from the logs directory in one streaming pass"""
+        print("📊 Streaming log files...")
+        
+        tasks = []
+        sides = []
+        for summary, files in ((self.backend_summary, BACKEND_LOG_FILES), (self.frontend_summary, FRONTEND_LOG_FILES)):
+            for file in files:
+                file_path = os.path.join(self.logs_dir, file)
+                if os.path.exists(file_path):
+                    for start, end in split_file(file_path, self.chunk_bytes):
+                        tasks.append((file_path, start, end))
+                        sides.append(summary)
+                        
+        for summary, partial in zip(sides, map_chunks(_summarize_chunk, tasks, self.workers)):
+            summary.merge(partial)
+            
+        backend_count, frontend_count = self.log_counts()
+        print(f"✅ Streamed {backend_count} backend logs and {frontend_count} frontend logs "
+              f"({len(tasks)} chunks on {min(self.workers, max(len(tasks), 1))} workers)")
+        
+    def log_counts(self) -> Tuple[int, int]:
+        return self.backend_summary.entries, self.frontend_summary.entries
+        
+    def analyze_performance_differences(self) -> Dict[str, Any]:
+        print("🔍 Analyzing performance differences...")
+        return {
+            'backend_performance': self.backend_summary.performance_metrics(),
+            'frontend_performance': self.frontend_summary.performance_metrics(),
+            'comparison': self._compare_metric_values(self.backend_summary.latest_metric_values,
+                                                      self.frontend_summary.latest_named_values)
+        }
+        
+    def analyze_request_response_patterns(self) -> Dict[str, Any]:
+        print("🔄 Analyzing request/response patterns...")
+        return self.backend_summary.request_patterns()
+        
+    def analyze_error_patterns(self) -> Dict[str, Any]:
+        print("❌ Analyzing error patterns...")
+        return {
+            'backend_errors': self.backend_summary.error_summary(),
+            'frontend_errors': self.frontend_summary.error_summary(),
+            'error_comparison': {
+                'backend_error_types': dict(self.backend_summary.error_types),
+                'frontend_error_types': dict(self.frontend_summary.error_names),
+                'total_backend_errors': self.backend_summary.errors,
+                'total_frontend_errors': self.frontend_summary.errors
+            }
+        }
+        
+    def analyze_user_behavior_patterns(self) -> Dict[str, Any]:
+        print("👤 Analyzing user behavior patterns...")
+        return {
+            'user_actions': self.frontend_summary.user_actions_summary(),
+            'api_calls': self.frontend_summary.api_calls_summary(),
+            'user_engagement': self.frontend_summary.engagement_summary()
+        }
+        
+    def _get_analysis_period(self) -> str:
+        start = _earliest(self.backend_summary.first_seen, self.frontend_summary.first_seen)
+        end = _latest(self.backend_summary.last_seen, self.frontend_summary.last_seen)
+        return _format_period(start, end) if start else "Unknown"
+        
+    def _metric_means(self) -> Tuple[Dict[str, float], Dict[str, float]]:
+        return ({metric: histogram.mean for metric, histogram in self.backend_summary.metrics.items()},
+                {metric: histogram.mean for metric, histogram in self.frontend_summary.metrics.items()})
+        
+    def _error_totals(self) -> Tuple[int, int]:
+        return self.backend_summary.errors, self.frontend_summary.errors
+        
+    def _hourly_request_counts(self) -> Dict[str, int]:
+        return dict(self.backend_summary.requests_per_hour)
 
 def main():
     parser = argparse.ArgumentParser(description='Analyze and compare backend vs frontend logs')
@@ -637,16 +1057,23 @@ def main():
     parser.add_argument('--output-dir', default='log_analysis_output', help='Output directory for analysis results')
     parser.add_argument('--generate-report', action='store_true', help='Generate comprehensive report')
     parser.add_argument('--create-visualizations', action='store_true', help='Create visualization charts')
+    parser.add_argument('--stream', action='store_true', help='Analyze in one streaming pass with bounded memory')
+    parser.add_argument('--workers', type=int, default=None, help='Worker processes for --stream (default: CPU count)')
+    parser.add_argument('--chunk-mb', type=int, default=DEFAULT_CHUNK_BYTES // (1024 * 1024),
+                        help='Size of the file chunks --stream hands to each worker')
     
     args = parser.parse_args()
     
     # Initialize analyzer
-    analyzer = LogAnalyzer(args.logs_dir)
+    if args.stream:
+        analyzer = StreamingLogAnalyzer(args.logs_dir, args.workers, args.chunk_mb * 1024 * 1024)
+    else:
+        analyzer = LogAnalyzer(args.logs_dir)
     
     # Load logs
     analyzer.load_logs()
     
-    if not analyzer.backend_logs and not analyzer.frontend_logs:
+    if not any(analyzer.log_counts()):
         print("❌ No log files found. Please ensure logs are generated first.")
         return
         
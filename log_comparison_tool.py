@@ -10,9 +10,35 @@ import json
 import re
 from datetime import datetime, timedelta
 from collections import defaultdict, Counter
-from typing import Dict, List, Any, Tuple
+from typing import Dict, List, Any, Optional, Tuple
 import argparse
 
+from log_stream import DEFAULT_CHUNK_BYTES, HeavyHitters, LatencyHistogram, iter_json, iter_lines, map_chunks, split_file
+
+BACKEND_LOG_FILES = [
+    "backend_main.log",
+    "backend_errors.log",
+    "backend_performance.log",
+    "backend_api.log",
+    "backend_database.log",
+    "backend_business.log",
+    "backend_structured.json"
+]
+
+FRONTEND_LOG_FILES = [
+    "frontend_main.log",
+    "frontend_errors.log",
+    "frontend_performance.log",
+    "frontend_user_actions.log",
+    "frontend_api.log",
+    "frontend_components.log",
+    "frontend_navigation.log",
+    "frontend_structured.json"
+]
+
+# Entries handed to the _extract_* methods at a time when streaming
+STREAM_BATCH_SIZE = 10000
+
 class LogComparisonTool:
     """Tool for comparing and analyzing frontend and backend logs"""
     
@@ -26,31 +52,8 @@ class LogComparisonTool:
         """Load all log files from the logs directory"""
         print("📂 Loading log files...")
         
-        # Backend log files
-        backend_files = [
-            "backend_main.log",
-            "backend_errors.log",
-            "backend_performance.log", 
-            "backend_api.log",
-            "backend_database.log",
-            "backend_business.log",
-            "backend_structured.json"
-        ]
-        
-        # Frontend log files
-        frontend_files = [
-            "frontend_main.log",
-            "frontend_errors.log",
-            "frontend_performance.log",
-            "frontend_user_actions.log",
-            "frontend_api.log", 
-            "frontend_components.log",
-            "frontend_navigation.log",
-            "frontend_structured.json"
-        ]
-        
         # Load backend logs
-        for file in backend_files:
+        for file in BACKEND_LOG_FILES:
             file_path = os.path.join(self.logs_dir, file)
             if os.path.exists(file_path):
                 self.backend_logs[file] = self._parse_log_file(file_path)
@@ -59,7 +62,7 @@ class LogComparisonTool:
                 print(f"   ❌ {file} not found")
         
         # Load frontend logs
-        for file in frontend_files:
+        for file in FRONTEND_LOG_FILES:
             file_path = os.path.join(self.logs_dir, file)
             if os.path.exists(file_path):
                 self.frontend_logs[file] = self._parse_log_file(file_path)
@@ -147,7 +150,15 @@ class LogComparisonTool:
         # Analyze user activity patterns
         frontend_user_actions = self._extract_user_actions(self.frontend_logs)
         
-        # Store comparison results
+        self._store_comparison(backend_errors, frontend_errors, backend_performance, frontend_performance,
+                               backend_api, frontend_api, frontend_user_actions)
+        
+        print("✅ Pattern analysis completed")
+    
+    def _store_comparison(self, backend_errors: Dict, frontend_errors: Dict, backend_performance: Dict,
+                          frontend_performance: Dict, backend_api: Dict, frontend_api: Dict,
+                          frontend_user_actions: Dict):
+        """Store extracted patterns and their comparisons in comparison_results"""
         self.comparison_results = {
             "errors": {
                 "backend": backend_errors,
@@ -168,8 +179,6 @@ class LogComparisonTool:
                 "frontend": frontend_user_actions
             }
         }
-        
-        print("✅ Pattern analysis completed")
     
     def _extract_errors(self, logs: Dict[str, List[Dict]]) -> Dict[str, Any]:
         """Extract error information from logs"""
@@ -323,6 +332,8 @@ class LogComparisonTool:
     def _compare_performance_patterns(self, backend_perf: Dict, frontend_perf: Dict) -> Dict[str, Any]:
         """Compare performance patterns between backend and frontend"""
         def avg(lst):
+            if isinstance(lst, LatencyHistogram):
+                return lst.mean
             return sum(lst) / len(lst) if lst else 0
         
         return {
@@ -478,12 +489,184 @@ class LogComparisonTool:
         if user_activity:
             print(f"👤 User Actions: {user_activity['count']}")
 
+class PatternTally:
+    """Running totals of the _extract_* results over a log stream, in bounded memory.
+    
+    Counters that stay small (levels, methods, status codes, error types)
+    are kept exactly; error messages, endpoints and user ids go into
+    count-min heavy hitters, and metric series into histograms whose mean
+    is exact. Tallies of consecutive chunks merge in order.
+    """
+    
+    def __init__(self):
+        self.entries = 0
+        self.errors = {"count": 0, "types": Counter(), "messages": HeavyHitters(),
+                       "first_timestamp": None, "last_timestamp": None}
+        self.performance = defaultdict(LatencyHistogram)
+        self.api_calls = {"count": 0, "methods": Counter(), "endpoints": HeavyHitters(),
+                          "status_codes": Counter(), "response_times": LatencyHistogram()}
+        self.user_actions = {"count": 0, "actions": Counter(), "components": Counter(), "users": HeavyHitters()}
+    
+    def add_batch(self, tool: 'LogComparisonTool', logs: Dict[str, List[Dict]]):
+        """Fold the patterns the tool extracts from one batch of entries"""
+        self.entries += sum(len(entries) for entries in logs.values())
+        
+        errors = tool._extract_errors(logs)
+        self.errors["count"] += errors["count"]
+        self.errors["types"].update(errors["types"])
+        for message in errors["messages"]:
+            self.errors["messages"].add(message)
+        timestamps = [timestamp for timestamp in errors["timestamps"] if timestamp]
+        if timestamps:
+            self._span(min(timestamps), max(timestamps))
+        
+        for name, values in tool._extract_performance_metrics(logs).items():
+            series = self.performance[name]
+            for value in values:
+                series.add(value)
+        
+        api_calls = tool._extract_api_calls(logs)
+        self.api_calls["count"] += api_calls["count"]
+        self.api_calls["methods"].update(api_calls["methods"])
+        for endpoint, count in api_calls["endpoints"].items():
+            self.api_calls["endpoints"].add(endpoint, count)
+        self.api_calls["status_codes"].update(api_calls["status_codes"])
+        for value in api_calls["response_times"]:
+            self.api_calls["response_times"].add(value)
+        
+        user_actions = tool._extract_user_actions(logs)
+        self.user_actions["count"] += user_actions["count"]
+        self.user_actions["actions"].update(user_actions["actions"])
+        self.user_actions["components"].update(user_actions["components"])
+        for user, count in user_actions["users"].items():
+            self.user_actions["users"].add(user, count)
+    
+    def _span(self, first: Optional[str], last: Optional[str]):
+        if first and (self.errors["first_timestamp"] is None or first < self.errors["first_timestamp"]):
+            self.errors["first_timestamp"] = first
+        if last and (self.errors["last_timestamp"] is None or last > self.errors["last_timestamp"]):
+            self.errors["last_timestamp"] = last
+    
+    def merge(self, other: 'PatternTally') -> 'PatternTally':
+        self.entries += other.entries
+        self.errors["count"] += other.errors["count"]
+        self.errors["types"].update(other.errors["types"])
+        self.errors["messages"].merge(other.errors["messages"])
+        self._span(other.errors["first_timestamp"], other.errors["last_timestamp"])
+        for name, series in other.performance.items():
+            self.performance[name].merge(series)
+        for key in ("methods", "status_codes"):
+            self.api_calls[key].update(other.api_calls[key])
+        self.api_calls["count"] += other.api_calls["count"]
+        self.api_calls["endpoints"].merge(other.api_calls["endpoints"])
+        self.api_calls["response_times"].merge(other.api_calls["response_times"])
+        self.user_actions["count"] += other.user_actions["count"]
+        self.user_actions["actions"].update(other.user_actions["actions"])
+        self.user_actions["components"].update(other.user_actions["components"])
+        self.user_actions["users"].merge(other.user_actions["users"])
+        return self
+    
+    def results(self) -> Tuple[Dict[str, Any], Dict[str, Any], Dict[str, Any], Dict[str, Any]]:
+        """(errors, performance, api_calls, user_actions) shaped like the _extract_* results.
+        
+        Heavy hitters become Counters of their top keys; metric series stay
+        LatencyHistogram objects, which _compare_performance_patterns averages.
+        """
+        errors = dict(self.errors, messages=Counter(dict(self.errors["messages"].most_common())))
+        performance = {name: self.performance[name]
+                       for name in ("response_times", "execution_times", "memory_usage", "api_response_times")}
+        api_calls = dict(self.api_calls, endpoints=Counter(dict(self.api_calls["endpoints"].most_common())))
+        user_actions = dict(self.user_actions, users=Counter(dict(self.user_actions["users"].most_common())))
+        return errors, performance, api_calls, user_actions
+
+def _tally_chunk(task: Tuple[str, int, int]) -> PatternTally:
+    """Tally of one byte range of a log file (runs in a worker process)"""
+    file_path, start, end = task
+    file_name = os.path.basename(file_path)
+    tool = LogComparisonTool()
+    tally = PatternTally()
+    batch = []
+    try:
+        if file_path.endswith('.json'):
+            entries = iter_json(file_path, start, end)
+        else:
+            entries = (tool._parse_log_line(line.decode('utf-8', 'replace')) for line in iter_lines(file_path, start, end))
+        for entry in entries:
+            batch.append(entry)
+            if len(batch) >= STREAM_BATCH_SIZE:
+                tally.add_batch(tool, {file_name: batch})
+                batch = []
+    except Exception as e:
+        print(f"   ⚠️  Error parsing {file_path} bytes {start}-{end}: {e}")
+    if batch:
+        tally.add_batch(tool, {file_name: batch})
+    return tally
+
+class StreamingLogComparisonTool(LogComparisonTool):
+    """LogComparisonTool that tallies the log files in one streaming pass instead of loading them.
+    
+    Files are split into byte ranges that worker processes tally in
+    batches of STREAM_BATCH_SIZE entries with the same _extract_* methods,
+    so every count matches the in-memory comparison and memory stays flat
+    however large the logs are.
+    """
+    
+    def __init__(self, logs_dir: str = "logs", workers: Optional[int] = None,
+                 chunk_bytes: int = DEFAULT_CHUNK_BYTES):
+        super().__init__(logs_dir)
+        self.workers = workers or os.cpu_count() or 1
+        self.chunk_bytes = chunk_bytes
+        self.backend_tally = PatternTally()
+        self.frontend_tally = PatternTally()
+    
+    def load_logs(self):
+        """Tally all log files from the logs directory"""
+        print("📂 Streaming log files...")
+        
+        tasks = []
+        targets = []
+        file_tallies = {}
+        for tally, files in ((self.backend_tally, BACKEND_LOG_FILES), (self.frontend_tally, FRONTEND_LOG_FILES)):
+            for file in files:
+                file_path = os.path.join(self.logs_dir, file)
+                if os.path.exists(file_path):
+                    file_tallies[file] = 0
+                    for start, end in split_file(file_path, self.chunk_bytes):
+                        tasks.append((file_path, start, end))
+                        targets.append((tally, file))
+                else:
+                    print(f"   ❌ {file} not found")
+        
+        for (tally, file), partial in zip(targets, map_chunks(_tally_chunk, tasks, self.workers)):
+            tally.merge(partial)
+            file_tallies[file] += partial.entries
+        
+        for file, entries in file_tallies.items():
+            print(f"   ✅ Streamed {file} ({entries} entries)")
+        print(f"📊 Total backend entries: {self.backend_tally.entries}")
+        print(f"📊 Total frontend entries: {self.frontend_tally.entries}")
+    
+    def compare_log_patterns(self):
+        """Compare patterns between frontend and backend log tallies"""
+        print("\n🔍 Analyzing log patterns...")
+        
+        backend_errors, backend_performance, backend_api, _ = self.backend_tally.results()
+        frontend_errors, frontend_performance, frontend_api, frontend_user_actions = self.frontend_tally.results()
+        self._store_comparison(backend_errors, frontend_errors, backend_performance, frontend_performance,
+                               backend_api, frontend_api, frontend_user_actions)
+        
+        print("✅ Pattern analysis completed")
+
 def main():
     """Main function with command line argument parsing"""
     parser = argparse.ArgumentParser(description="Compare and analyze frontend and backend logs")
     parser.add_argument("--logs-dir", default="logs", help="Directory containing log files (default: logs)")
     parser.add_argument("--report", action="store_true", help="Generate detailed comparison report")
     parser.add_argument("--output", default="log_comparison_report.md", help="Output file for report (default: log_comparison_report.md)")
+    parser.add_argument("--stream", action="store_true", help="Compare in one streaming pass with bounded memory")
+    parser.add_argument("--workers", type=int, default=None, help="Worker processes for --stream (default: CPU count)")
+    parser.add_argument("--chunk-mb", type=int, default=DEFAULT_CHUNK_BYTES // (1024 * 1024),
+                        help="Size of the file chunks --stream hands to each worker")
     
     args = parser.parse_args()
     
@@ -491,7 +674,10 @@ def main():
     print("=" * 50)
     
     # Initialize comparison tool
-    tool = LogComparisonTool(args.logs_dir)
+    if args.stream:
+        tool = StreamingLogComparisonTool(args.logs_dir, args.workers, args.chunk_mb * 1024 * 1024)
+    else:
+        tool = LogComparisonTool(args.logs_dir)
     
     # Load logs
     tool.load_logs()
@@ -0,0 +1,254 @@
+#!/usr/bin/env python3
+"""
+Log Stream
+Bounded-memory building blocks for one-pass log analysis: fast JSON-lines reading over byte ranges,
+mergeable latency histograms and count-min heavy hitters, and a parallel map over file chunks
+"""
+
+import os
+import json
+import math
+import heapq
+import hashlib
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Callable, Dict, Hashable, Iterable, Iterator, List, Optional, Tuple
+
+try:
+    import orjson
+    loads = orjson.loads
+except ImportError:
+    orjson = None
+    loads = json.loads
+
+# Files are split into ranges of about this size so one large file still spreads over every worker
+DEFAULT_CHUNK_BYTES = 64 * 1024 * 1024
+
+
+class LatencyHistogram:
+    """Log-bucketed histogram (HDR/DDSketch style) with exact count, mean, std, min and max.
+
+    Each positive value v lands in bucket ceil(log_gamma(v)), so any
+    percentile is reported within ``relative_accuracy`` of a real sample
+    whatever the distribution, in memory that grows with the log of the
+    value range rather than with the number of samples. Histograms with
+    the same accuracy merge by adding bucket counts.
+    """
+
+    def __init__(self, relative_accuracy: float = 0.01):
+        self.relative_accuracy = relative_accuracy
+        self._gamma = (1 + relative_accuracy) / (1 - relative_accuracy)
+        self._log_gamma = math.log(self._gamma)
+        self.positive: Dict[int, int] = {}
+        self.negative: Dict[int, int] = {}
+        self.zeros = 0
+        self.count = 0
+        self.mean = 0.0
+        self._m2 = 0.0
+        self.min = math.inf
+        self.max = -math.inf
+
+    def _bucket(self, magnitude: float) -> int:
+        return math.ceil(math.log(magnitude) / self._log_gamma)
+
+    def _value(self, bucket: int) -> float:
+        return 2 * self._gamma ** bucket / (self._gamma + 1)
+
+    def add(self, value: float):
+        value = float(value)
+        if value > 0:
+            bucket = self._bucket(value)
+            self.positive[bucket] = self.positive.get(bucket, 0) + 1
+        elif value < 0:
+            bucket = self._bucket(-value)
+            self.negative[bucket] = self.negative.get(bucket, 0) + 1
+        else:
+            self.zeros += 1
+        # Welford's update keeps the variance stable over billions of samples
+        self.count += 1
+        delta = value - self.mean
+        self.mean += delta / self.count
+        self._m2 += delta * (value - self.mean)
+        if value < self.min:
+            self.min = value
+        if value > self.max:
+            self.max = value
+
+    def merge(self, other: 'LatencyHistogram') -> 'LatencyHistogram':
+        if other.relative_accuracy != self.relative_accuracy:
+            raise ValueError("Cannot merge histograms with different relative accuracy")
+        if not other.count:
+            return self
+        for bucket, count in other.positive.items():
+            self.positive[bucket] = self.positive.get(bucket, 0) + count
+        for bucket, count in other.negative.items():
+            self.negative[bucket] = self.negative.get(bucket, 0) + count
+        self.zeros += other.zeros
+        total = self.count + other.count
+        delta = other.mean - self.mean
+        self._m2 += other._m2 + delta * delta * self.count * other.count / total
+        self.mean += delta * other.count / total
+        self.count = total
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+        return self
+
+    def __len__(self) -> int:
+        return self.count
+
+    @property
+    def total(self) -> float:
+        return self.mean * self.count
+
+    @property
+    def std(self) -> float:
+        """Population standard deviation, like np.std"""
+        return math.sqrt(self._m2 / self.count) if self.count else 0.0
+
+    def _value_at(self, rank: int) -> float:
+        seen = 0
+        ordered = [(-self._value(b), c) for b, c in sorted(self.negative.items(), reverse=True)]
+        ordered.append((0.0, self.zeros))
+        ordered += [(self._value(b), c) for b, c in sorted(self.positive.items())]
+        for value, count in ordered:
+            seen += count
+            if seen > rank:
+                return min(max(value, self.min), self.max)
+        return self.max
+
+    def percentile(self, q: float) -> float:
+        """Approximate q-th percentile (0-100), interpolated between ranks like np.percentile"""
+        if not self.count:
+            return 0.0
+        rank = q / 100 * (self.count - 1)
+        lower = math.floor(rank)
+        value = self._value_at(lower)
+        if rank > lower:
+            value += (self._value_at(lower + 1) - value) * (rank - lower)
+        return value
+
+    def summary(self) -> Dict[str, float]:
+        """The statistics LogAnalyzer reports per metric"""
+        return {
+            'count': self.count,
+            'mean': self.mean,
+            'median': self.percentile(50),
+            'std': self.std,
+            'min': self.min,
+            'max': self.max,
+            'p95': self.percentile(95),
+            'p99': self.percentile(99)
+        }
+
+
+class HeavyHitters:
+    """Approximate top-k counter: a count-min sketch plus the k keys with the highest estimates.
+
+    Memory is fixed by ``width * depth`` counters and ``capacity`` keys no
+    matter how many distinct keys (endpoints with ids in the path, error
+    messages) stream through. Estimates never undercount and overcount by
+    at most about ``total * e / width``. Keys are hashed with blake2b
+    rather than ``hash()`` so sketches from different processes agree and
+    can be merged.
+    """
+
+    def __init__(self, capacity: int = 100, width: int = 2048, depth: int = 4):
+        self.capacity = capacity
+        self.width = width
+        self.depth = depth
+        self.table: List[List[int]] = [[0] * width for _ in range(depth)]
+        self.candidates: Dict[Hashable, int] = {}
+        self.total = 0
+
+    def _cells(self, key: Hashable) -> List[int]:
+        digest = hashlib.blake2b(repr(key).encode(), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], 'little')
+        h2 = int.from_bytes(digest[8:], 'little') | 1
+        return [(h1 + row * h2) % self.width for row in range(self.depth)]
+
+    def estimate(self, key: Hashable) -> int:
+        return min(self.table[row][cell] for row, cell in enumerate(self._cells(key)))
+
+    def add(self, key: Hashable, count: int = 1):
+        self.total += count
+        estimate = None
+        for row, cell in enumerate(self._cells(key)):
+            self.table[row][cell] += count
+            value = self.table[row][cell]
+            estimate = value if estimate is None else min(estimate, value)
+        self.candidates[key] = estimate
+        if len(self.candidates) > 2 * self.capacity:
+            self._prune()
+
+    def _prune(self):
+        self.candidates = dict(heapq.nlargest(self.capacity, self.candidates.items(), key=lambda item: item[1]))
+
+    def merge(self, other: 'HeavyHitters') -> 'HeavyHitters':
+        if (other.width, other.depth) != (self.width, self.depth):
+            raise ValueError("Cannot merge count-min sketches of different shapes")
+        for row, other_row in zip(self.table, other.table):
+            for cell, value in enumerate(other_row):
+                if value:
+                    row[cell] += value
+        self.total += other.total
+        keys = set(self.candidates) | set(other.candidates)
+        self.candidates = {key: self.estimate(key) for key in keys}
+        self._prune()
+        return self
+
+    def most_common(self, n: Optional[int] = None) -> List[Tuple[Hashable, int]]:
+        ranked = sorted(self.candidates.items(), key=lambda item: item[1], reverse=True)
+        return ranked[:n] if n is not None else ranked
+
+
+def iter_lines(path: str, start: int = 0, end: Optional[int] = None) -> Iterator[bytes]:
+    """Non-empty lines that start inside [start, end) of a file.
+
+    A line straddling ``start`` belongs to the previous range, so ranges
+    from ``split_file`` cover every line exactly once.
+    """
+    with open(path, 'rb') as f:
+        position = start
+        if start > 0:
+            f.seek(start - 1)
+            position = start - 1 + len(f.readline())
+        for line in f:
+            if end is not None and position >= end:
+                break
+            position += len(line)
+            line = line.strip()
+            if line:
+                yield line
+
+
+def iter_json(path: str, start: int = 0, end: Optional[int] = None) -> Iterator[Dict[str, Any]]:
+    """Decoded JSON objects from a JSON-lines byte range, skipping malformed lines"""
+    for line in iter_lines(path, start, end):
+        try:
+            entry = loads(line)
+        except ValueError:
+            continue
+        if isinstance(entry, dict):
+            yield entry
+
+
+def split_file(path: str, chunk_bytes: int = DEFAULT_CHUNK_BYTES) -> List[Tuple[int, int]]:
+    """(start, end) byte ranges of about ``chunk_bytes`` covering the file"""
+    size = os.path.getsize(path)
+    if size == 0:
+        return []
+    return [(start, min(start + chunk_bytes, size)) for start in range(0, size, chunk_bytes)]
+
+
+def map_chunks(func: Callable, tasks: Iterable, workers: int = 1) -> Iterator:
+    """``func`` over every task, in worker processes when ``workers`` > 1, yielding results in task order.
+
+    ``func`` must be a module-level function and its results picklable;
+    callers fold the partial results together with their ``merge``.
+    """
+    tasks = list(tasks)
+    if workers <= 1 or len(tasks) <= 1:
+        for task in tasks:
+            yield func(task)
+        return
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        yield from executor.map(func, tasks)
@@ -0,0 +1,243 @@
+#!/usr/bin/env python3
+"""
+Market Data Gateway
+In-process quote source shared by the Flask services: one upstream fetch per symbol however many requests
+ask at once, a short-TTL quote cache, and background refresh of the symbols being polled
+"""
+
+import time
+import logging
+import threading
+from collections import OrderedDict
+from concurrent.futures import Future
+from contextlib import nullcontext
+from dataclasses import dataclass, field
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# One request returns the latest bar, recent closes for smoothing and the previous session's close
+QUOTE_PERIOD = '2d'
+QUOTE_INTERVAL = '1m'
+RECENT_CLOSES = 10
+
+
+@dataclass
+class Quote:
+    """Latest 1m bar for a symbol plus the context price endpoints derive from it"""
+    symbol: str
+    price: float
+    open: float
+    high: float
+    low: float
+    volume: float
+    timestamp: str
+    previous_close: Optional[float] = None
+    recent_closes: List[float] = field(default_factory=list)
+
+
+def quote_from_history(symbol: str, history) -> Optional[Quote]:
+    """Quote from a yfinance OHLCV frame, or None when it has no closes"""
+    if history is None or history.empty or 'Close' not in history.columns:
+        return None
+    history = history.dropna(subset=['Close'])
+    if history.empty:
+        return None
+    last = history.iloc[-1]
+    dates = history.index.date
+    earlier = history['Close'][dates < dates[-1]]
+    return Quote(
+        symbol=symbol,
+        price=float(last['Close']),
+        open=float(last.get('Open', last['Close'])),
+        high=float(last.get('High', last['Close'])),
+        low=float(last.get('Low', last['Close'])),
+        volume=float(last.get('Volume', 0) or 0),
+        timestamp=history.index[-1].isoformat(),
+        previous_close=float(earlier.iloc[-1]) if not earlier.empty else None,
+        recent_closes=[float(close) for close in history['Close'].tail(RECENT_CLOSES)]
+    )
+
+
+def fetch_yfinance_quotes(symbols: List[str]) -> Dict[str, Quote]:
+    """Quotes for yfinance symbols in a single upstream request; symbols without data are left out"""
+    import yfinance as yf
+
+    if len(symbols) == 1:
+        frames = {symbols[0]: yf.Ticker(symbols[0]).history(period=QUOTE_PERIOD, interval=QUOTE_INTERVAL)}
+    else:
+        data = yf.download(tickers=symbols, period=QUOTE_PERIOD, interval=QUOTE_INTERVAL, group_by='ticker',
+                           auto_adjust=False, threads=True, progress=False)
+        available = set(data.columns.get_level_values(0)) if not data.empty else set()
+        frames = {symbol: data[symbol] for symbol in symbols if symbol in available}
+    quotes = {}
+    for symbol, frame in frames.items():
+        quote = quote_from_history(symbol, frame)
+        if quote is not None:
+            quotes[symbol] = quote
+    return quotes
+
+
+class MarketDataGateway:
+    """Coalescing, caching front for an upstream quote fetcher.
+
+    Concurrent requests for a symbol that is neither cached nor being
+    fetched elect one caller to fetch it (singleflight); the others wait for
+    that result instead of issuing their own. Misses in one ``quotes`` call
+    are fetched together in one upstream request. Quotes are cached for
+    ``ttl`` seconds. Symbols requested at least ``hot_threshold`` times in a
+    ``hot_window`` are re-fetched in the background before they expire, so
+    pollers of popular symbols never wait on the upstream.
+    """
+
+    def __init__(self, fetcher: Callable[[List[str]], Dict[str, Quote]] = fetch_yfinance_quotes, ttl: float = 5.0,
+                 refresh_interval: Optional[float] = None, hot_threshold: int = 3, hot_window: float = 60.0,
+                 max_symbols: int = 1000, trace: Optional[Callable] = None, clock: Callable[[], float] = time.monotonic):
+        self.fetcher = fetcher
+        self.ttl = ttl
+        self.refresh_interval = refresh_interval if refresh_interval is not None else ttl / 2
+        self.hot_threshold = hot_threshold
+        self.hot_window = hot_window
+        self.max_symbols = max_symbols
+        self.trace = trace
+        self.clock = clock
+        self._cache: "OrderedDict[str, Tuple[Quote, float]]" = OrderedDict()
+        self._inflight: Dict[str, Future] = {}
+        self._demand: Dict[str, int] = {}
+        self._hot: set = set()
+        self._window_started = clock()
+        self._lock = threading.Lock()
+        self._refresher: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+        self.counters = {'hits': 0, 'misses': 0, 'coalesced': 0, 'upstream_requests': 0, 'upstream_errors': 0,
+                         'refreshed': 0}
+
+    def quote(self, symbol: str) -> Optional[Quote]:
+        """The symbol's quote, or None when the upstream has no data; upstream errors propagate"""
+        return self._resolve([symbol], raise_errors=True)[symbol]
+
+    def quotes(self, symbols: Iterable[str]) -> Dict[str, Optional[Quote]]:
+        """Quotes for several symbols, fetching every miss in one upstream request; failures map to None"""
+        return self._resolve(list(dict.fromkeys(symbols)), raise_errors=False)
+
+    def refresh(self, symbols: Iterable[str]) -> Dict[str, Optional[Quote]]:
+        """Fresh quotes bypassing the cache (a fetch already in flight is shared); failures map to None"""
+        return self._resolve(list(dict.fromkeys(symbols)), raise_errors=False, force=True)
+
+    def _resolve(self, symbols: List[str], raise_errors: bool, force: bool = False) -> Dict[str, Optional[Quote]]:
+        self._ensure_refresher()
+        results: Dict[str, Optional[Quote]] = {}
+        waiting: Dict[str, Future] = {}
+        owned: List[str] = []
+        with self._lock:
+            now = self.clock()
+            self._roll_demand(now)
+            for symbol in symbols:
+                # Forced refreshes come from pollers that already fetch on a schedule; they don't make a symbol hot
+                if not force:
+                    self._demand[symbol] = self._demand.get(symbol, 0) + 1
+                cached = None if force else self._cache.get(symbol)
+                if cached is not None and cached[1] > now:
+                    self._cache.move_to_end(symbol)
+                    self.counters['hits'] += 1
+                    results[symbol] = cached[0]
+                elif symbol in self._inflight:
+                    self.counters['coalesced'] += 1
+                    waiting[symbol] = self._inflight[symbol]
+                else:
+                    self.counters['refreshed' if force else 'misses'] += 1
+                    waiting[symbol] = self._inflight[symbol] = Future()
+                    owned.append(symbol)
+
+        if owned:
+            self._fetch(owned, 'refresh' if force else 'quote' if len(owned) == 1 else 'quote_batch')
+        for symbol, future in waiting.items():
+            try:
+                results[symbol] = future.result()
+            except Exception:
+                if raise_errors:
+                    raise
+                results[symbol] = None
+        return results
+
+    def _fetch(self, symbols: List[str], operation: str):
+        """Fetch symbols this thread claimed in _inflight and hand the outcome to every waiter"""
+        try:
+            with self.trace('market_data', operation) if self.trace else nullcontext():
+                fetched = self.fetcher(symbols)
+        except Exception as e:
+            logger.error(f"Market data fetch failed for {symbols}: {e}")
+            with self._lock:
+                self.counters['upstream_requests'] += 1
+                self.counters['upstream_errors'] += 1
+                for symbol in symbols:
+                    self._inflight.pop(symbol).set_exception(e)
+            return
+
+        with self._lock:
+            self.counters['upstream_requests'] += 1
+            expires_at = self.clock() + self.ttl
+            for symbol in symbols:
+                quote = fetched.get(symbol)
+                if quote is not None:
+                    self._cache[symbol] = (quote, expires_at)
+                    self._cache.move_to_end(symbol)
+                self._inflight.pop(symbol).set_result(quote)
+            while len(self._cache) > self.max_symbols:
+                self._cache.popitem(last=False)
+
+    def _roll_demand(self, now: float):
+        if now - self._window_started >= self.hot_window:
+            self._hot = {symbol for symbol, count in self._demand.items() if count >= self.hot_threshold}
+            self._demand = {}
+            self._window_started = now
+
+    def hot_symbols(self) -> List[str]:
+        with self._lock:
+            current = {symbol for symbol, count in self._demand.items() if count >= self.hot_threshold}
+            return sorted(self._hot | current)
+
+    def refresh_hot(self):
+        """Re-fetch, in one request, the hot symbols that would expire before the next refresh"""
+        with self._lock:
+            now = self.clock()
+            self._roll_demand(now)
+            hot = self._hot | {symbol for symbol, count in self._demand.items() if count >= self.hot_threshold}
+            owned = []
+            for symbol in sorted(hot):
+                cached = self._cache.get(symbol)
+                if symbol in self._inflight or (cached is not None and cached[1] > now + self.refresh_interval):
+                    continue
+                self._inflight[symbol] = Future()
+                owned.append(symbol)
+            self.counters['refreshed'] += len(owned)
+        if owned:
+            self._fetch(owned, 'refresh')
+
+    def _ensure_refresher(self):
+        # Started lazily so a pre-forking server creates the thread in each worker, not the master
+        if self.refresh_interval <= 0 or (self._refresher is not None and self._refresher.is_alive()):
+            return
+        with self._lock:
+            if self._refresher is None or not self._refresher.is_alive():
+                self._stop.clear()
+                self._refresher = threading.Thread(target=self._refresh_loop, name='market-data-refresh',
+                                                   daemon=True)
+                self._refresher.start()
+
+    def _refresh_loop(self):
+        while not self._stop.wait(self.refresh_interval):
+            try:
+                self.refresh_hot()
+            except Exception as e:
+                logger.error(f"Market data refresh failed: {e}")
+
+    def close(self):
+        self._stop.set()
+        if self._refresher is not None:
+            self._refresher.join(timeout=5)
+
+    def stats(self) -> Dict:
+        with self._lock:
+            return {**self.counters, 'cached_symbols': len(self._cache), 'inflight': len(self._inflight),
+                    'hot_symbols': len(self._hot)}
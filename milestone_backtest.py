@@ -4,15 +4,26 @@ Milestone Backtest Script for TraderEdgePro
 Analyzes historical signals and optimizes milestone thresholds to achieve target win rates.
 """
 
+import os
 import json
 import csv
+import time
 import random
 import numpy as np
+from concurrent.futures import ProcessPoolExecutor
 from datetime import datetime, timedelta
 from typing import Dict, List, Tuple, Optional
 import argparse
 from dataclasses import dataclass
 
+MILESTONES = ['M1', 'M2', 'M3', 'M4']
+
+# Below this many candidates a single vectorized pass beats the cost of a process pool
+PARALLEL_MIN_CANDIDATES = 20000
+
+# Smallest signal sample successive halving scores candidates on
+MIN_HALVING_SAMPLE = 1000
+
 @dataclass
 class SignalResult:
     """Represents a historical signal with its outcome"""
@@ -42,6 +53,152 @@ class MilestoneThresholds:
     M4_confidence: float = 0.00
     M4_confirmations: int = 0
 
+    @classmethod
+    def from_arrays(cls, confidences, confirmations) -> 'MilestoneThresholds':
+        """Build thresholds from M1..M3 confidence and confirmation rows"""
+        return cls(
+            M1_confidence=float(confidences[0]), M1_confirmations=int(confirmations[0]),
+            M2_confidence=float(confidences[1]), M2_confirmations=int(confirmations[1]),
+            M3_confidence=float(confidences[2]), M3_confirmations=int(confirmations[2])
+        )
+
+@dataclass
+class SignalColumns:
+    """Signal fields as NumPy column arrays, rows sorted by timestamp"""
+    confidence: np.ndarray
+    secondary_count: np.ndarray
+    won: np.ndarray
+    lost: np.ndarray
+    pnl: np.ndarray
+    order: np.ndarray  # position of each row in the original signal list
+
+    @classmethod
+    def from_signals(cls, signals: List[SignalResult]) -> 'SignalColumns':
+        timestamps = np.array([s.timestamp for s in signals], dtype='datetime64[us]')
+        order = np.argsort(timestamps, kind='stable')
+        outcomes = np.array([s.outcome for s in signals])[order]
+        return cls(
+            confidence=np.array([s.confidence_score for s in signals], dtype=float)[order],
+            secondary_count=np.array([s.secondary_count for s in signals], dtype=int)[order],
+            won=outcomes == 'won',
+            lost=outcomes == 'lost',
+            pnl=np.array([s.pnl for s in signals], dtype=float)[order],
+            order=order
+        )
+
+    def __len__(self) -> int:
+        return len(self.pnl)
+
+    def take(self, rows: np.ndarray) -> 'SignalColumns':
+        """Subset of rows, kept in timestamp order"""
+        rows = np.sort(rows)
+        return SignalColumns(self.confidence[rows], self.secondary_count[rows], self.won[rows],
+                             self.lost[rows], self.pnl[rows], self.order[rows])
+
+def assign_milestone_codes(confidence: np.ndarray, secondary_count: np.ndarray,
+                           thresholds: MilestoneThresholds) -> np.ndarray:
+    """Vectorized _assign_milestone: index into MILESTONES for every signal"""
+    conditions = [
+        (confidence >= thresholds.M1_confidence) & (secondary_count >= thresholds.M1_confirmations),
+        (confidence >= thresholds.M2_confidence) & (secondary_count >= thresholds.M2_confirmations),
+        (confidence >= thresholds.M3_confidence) & (secondary_count >= thresholds.M3_confirmations),
+    ]
+    return np.select(conditions, [0, 1, 2], default=3)
+
+class ThresholdScorer:
+    """Scores many threshold candidates at once against a fixed set of signals.
+
+    Signals are bucketed by secondary_count and sorted by confidence inside each
+    bucket with a running win count, so the signals and wins a threshold admits
+    are a searchsorted lookup rather than a pass over every signal.
+    """
+
+    def __init__(self, columns: SignalColumns, target_win_rates: Dict[str, float]):
+        self.targets = np.array([target_win_rates[m] for m in MILESTONES])
+        self.buckets = []
+        for count in np.unique(columns.secondary_count):
+            in_bucket = columns.secondary_count == count
+            rank = np.argsort(columns.confidence[in_bucket], kind='stable')
+            confidence = columns.confidence[in_bucket][rank]
+            wins = np.concatenate(([0], np.cumsum(columns.won[in_bucket][rank])))
+            self.buckets.append((int(count), confidence, wins))
+
+    @staticmethod
+    def _at_or_above(confidence: np.ndarray, wins: np.ndarray, bar: np.ndarray):
+        """Signals and wins in a bucket with confidence >= bar"""
+        start = np.searchsorted(confidence, bar, side='left')
+        return len(confidence) - start, wins[-1] - wins[start]
+
+    def milestone_counts(self, confidences: np.ndarray, confirmations: np.ndarray):
+        """Signals and wins per milestone, each shaped (candidates, 4).
+
+        ``confidences`` and ``confirmations`` hold the M1..M3 thresholds of one
+        candidate per row. A signal goes to the first milestone it qualifies for,
+        so within a bucket the signals claimed by M1..Mi are exactly those at or
+        above the lowest confidence bar among the milestones the bucket meets.
+        """
+        n = len(confidences)
+        totals = np.zeros((n, 4), dtype=np.int64)
+        wins = np.zeros((n, 4), dtype=np.int64)
+        for count, confidence, cum_wins in self.buckets:
+            bar = np.full(n, np.inf)
+            claimed, claimed_wins = np.zeros(n, dtype=np.int64), np.zeros(n, dtype=np.int64)
+            for i in range(3):
+                eligible = count >= confirmations[:, i]
+                bar = np.minimum(bar, np.where(eligible, confidences[:, i], np.inf))
+                now_claimed, now_wins = self._at_or_above(confidence, cum_wins, bar)
+                totals[:, i] += now_claimed - claimed
+                wins[:, i] += now_wins - claimed_wins
+                claimed, claimed_wins = now_claimed, now_wins
+            totals[:, 3] += len(confidence) - claimed
+            wins[:, 3] += cum_wins[-1] - claimed_wins
+        return totals, wins
+
+    def score(self, confidences: np.ndarray, confirmations: np.ndarray) -> np.ndarray:
+        """Optimization score per candidate: win rate misses plus empty-milestone penalties"""
+        totals, wins = self.milestone_counts(confidences, confirmations)
+        win_rates = np.divide(wins, totals, out=np.zeros(totals.shape), where=totals > 0)
+        score = np.abs(win_rates - self.targets).sum(axis=1)
+        return score + 10 * (totals[:, :3] == 0).sum(axis=1)
+
+def _score_chunk(scorer: ThresholdScorer, confidences: np.ndarray, confirmations: np.ndarray) -> np.ndarray:
+    return scorer.score(confidences, confirmations)
+
+def score_candidates(scorer: ThresholdScorer, confidences: np.ndarray, confirmations: np.ndarray,
+                     pool: Optional[ProcessPoolExecutor] = None, workers: int = 1) -> np.ndarray:
+    """Score candidates, splitting large batches across the process pool"""
+    if pool is None or workers <= 1 or len(confidences) < PARALLEL_MIN_CANDIDATES:
+        return scorer.score(confidences, confirmations)
+    chunks = np.array_split(np.arange(len(confidences)), workers)
+    futures = [pool.submit(_score_chunk, scorer, confidences[rows], confirmations[rows]) for rows in chunks]
+    return np.concatenate([future.result() for future in futures])
+
+def random_candidates(count: int, rng: np.random.Generator) -> Tuple[np.ndarray, np.ndarray]:
+    """Monte Carlo threshold draws over the original search ranges, descending confidences only"""
+    confidences = np.column_stack([
+        rng.uniform(0.75, 0.95, count),
+        rng.uniform(0.50, 0.75, count),
+        rng.uniform(0.30, 0.55, count),
+    ])
+    confirmations = np.column_stack([
+        rng.integers(2, 6, count),
+        rng.integers(1, 5, count),
+        rng.integers(0, 4, count),
+    ])
+    descending = (confidences[:, 0] > confidences[:, 1]) & (confidences[:, 1] > confidences[:, 2])
+    return confidences[descending], confirmations[descending]
+
+def grid_candidates(steps: int) -> Tuple[np.ndarray, np.ndarray]:
+    """Every combination of ``steps`` confidence levels and integer confirmations per milestone"""
+    axes = [
+        np.linspace(0.75, 0.95, steps), np.linspace(0.50, 0.75, steps), np.linspace(0.30, 0.55, steps),
+        np.arange(2, 6), np.arange(1, 5), np.arange(0, 4),
+    ]
+    grid = np.stack(np.meshgrid(*axes, indexing='ij'), axis=-1).reshape(-1, 6)
+    confidences, confirmations = grid[:, :3], grid[:, 3:].astype(int)
+    descending = (confidences[:, 0] > confidences[:, 1]) & (confidences[:, 1] > confidences[:, 2])
+    return confidences[descending], confirmations[descending]
+
 class MilestoneBacktester:
     """Backtests milestone system and optimizes thresholds"""
     
@@ -182,56 +339,57 @@ class MilestoneBacktester:
             return 'M4'
     
     def calculate_milestone_performance(self, signals: List[SignalResult], 
-                                      thresholds: Optional[MilestoneThresholds] = None) -> Dict:
+                                      thresholds: Optional[MilestoneThresholds] = None,
+                                      columns: Optional[SignalColumns] = None) -> Dict:
         """Calculate performance metrics for each milestone"""
+        if columns is None:
+            columns = SignalColumns.from_signals(signals)
+
         if thresholds:
             # Reassign milestones with new thresholds
-            for signal in signals:
-                signal.assigned_milestone = self._assign_milestone(
-                    signal.confidence_score, signal.secondary_count, thresholds
-                )
-        
-        # Group signals by milestone
-        milestone_groups = {'M1': [], 'M2': [], 'M3': [], 'M4': []}
-        for signal in signals:
-            milestone_groups[signal.assigned_milestone].append(signal)
-        
+            codes = assign_milestone_codes(columns.confidence, columns.secondary_count, thresholds)
+            for index, code in zip(columns.order, codes):
+                signals[index].assigned_milestone = MILESTONES[code]
+        else:
+            codes = np.array([MILESTONES.index(signals[index].assigned_milestone) for index in columns.order],
+                             dtype=int)
+
         # Calculate metrics for each milestone
         results = {}
-        for milestone, group in milestone_groups.items():
-            if not group:
+        for code, milestone in enumerate(MILESTONES):
+            in_milestone = codes == code
+            total_signals = int(in_milestone.sum())
+            target_win_rate = self.target_win_rates[milestone]
+            if total_signals == 0:
                 results[milestone] = {
                     'total_signals': 0,
                     'win_rate': 0.0,
                     'total_pnl': 0.0,
                     'avg_pnl_per_trade': 0.0,
                     'profit_factor': 0.0,
-                    'max_drawdown': 0.0
+                    'max_drawdown': 0.0,
+                    'target_win_rate': target_win_rate,
+                    'win_rate_diff': target_win_rate
                 }
                 continue
             
-            total_signals = len(group)
-            winning_trades = [s for s in group if s.outcome == 'won']
-            losing_trades = [s for s in group if s.outcome == 'lost']
-            
-            win_rate = len(winning_trades) / total_signals if total_signals > 0 else 0
-            total_pnl = sum(s.pnl for s in group)
-            avg_pnl = total_pnl / total_signals if total_signals > 0 else 0
+            pnl = columns.pnl[in_milestone]
+            won = columns.won[in_milestone]
+            lost = columns.lost[in_milestone]
+
+            win_rate = float(won.sum()) / total_signals
+            total_pnl = float(pnl.sum())
+            avg_pnl = total_pnl / total_signals
             
-            gross_profit = sum(s.pnl for s in winning_trades)
-            gross_loss = abs(sum(s.pnl for s in losing_trades))
+            gross_profit = float(pnl[won].sum())
+            gross_loss = abs(float(pnl[lost].sum()))
             profit_factor = gross_profit / gross_loss if gross_loss > 0 else float('inf')
             
-            # Calculate max drawdown
-            running_pnl = 0
-            peak = 0
-            max_drawdown = 0
-            for signal in sorted(group, key=lambda x: x.timestamp):
-                running_pnl += signal.pnl
-                if running_pnl > peak:
-                    peak = running_pnl
-                drawdown = (peak - running_pnl) / peak if peak > 0 else 0
-                max_drawdown = max(max_drawdown, drawdown)
+            # Max drawdown relative to the running equity peak (rows are already in timestamp order)
+            running_pnl = np.cumsum(pnl)
+            peak = np.maximum(np.maximum.accumulate(running_pnl), 0.0)
+            drawdown = np.divide(peak - running_pnl, peak, out=np.zeros(len(pnl)), where=peak > 0)
+            max_drawdown = max(float(drawdown.max()), 0.0)
             
             results[milestone] = {
                 'total_signals': total_signals,
@@ -240,58 +398,76 @@ class MilestoneBacktester:
                 'avg_pnl_per_trade': avg_pnl,
                 'profit_factor': profit_factor,
                 'max_drawdown': max_drawdown,
-                'target_win_rate': self.target_win_rates[milestone],
-                'win_rate_diff': abs(win_rate - self.target_win_rates[milestone])
+                'target_win_rate': target_win_rate,
+                'win_rate_diff': abs(win_rate - target_win_rate)
             }
         
         return results
     
-    def optimize_thresholds(self, signals: List[SignalResult], iterations: int = 1000) -> MilestoneThresholds:
-        """Use Monte Carlo optimization to find best thresholds"""
-        print(f"Optimizing thresholds with {iterations} iterations...")
-        
-        best_thresholds = MilestoneThresholds()
-        best_score = float('inf')
-        best_results = None
-        
-        for i in range(iterations):
-            # Generate random thresholds
-            thresholds = MilestoneThresholds(
-                M1_confidence=random.uniform(0.75, 0.95),
-                M1_confirmations=random.randint(2, 5),
-                M2_confidence=random.uniform(0.50, 0.75),
-                M2_confirmations=random.randint(1, 4),
-                M3_confidence=random.uniform(0.30, 0.55),
-                M3_confirmations=random.randint(0, 3),
-                M4_confidence=0.0,
-                M4_confirmations=0
-            )
-            
-            # Ensure thresholds are in descending order
-            if (thresholds.M1_confidence <= thresholds.M2_confidence or
-                thresholds.M2_confidence <= thresholds.M3_confidence):
-                continue
-            
-            # Calculate performance
-            results = self.calculate_milestone_performance(signals, thresholds)
-            
-            # Calculate optimization score (minimize win rate differences)
-            score = sum(results[m]['win_rate_diff'] for m in ['M1', 'M2', 'M3', 'M4'])
-            
-            # Add penalty for empty milestones
-            empty_penalty = sum(10 for m in ['M1', 'M2', 'M3'] if results[m]['total_signals'] == 0)
-            score += empty_penalty
-            
-            if score < best_score:
-                best_score = score
-                best_thresholds = thresholds
-                best_results = results
-                
-            if (i + 1) % 100 == 0:
-                print(f"Iteration {i + 1}/{iterations}, Best score: {best_score:.4f}")
-        
-        print(f"\nOptimization complete! Best score: {best_score:.4f}")
+    def optimize_thresholds(self, signals: List[SignalResult], iterations: int = 1000,
+                            search: str = 'random', workers: int = 1, grid_steps: int = 11,
+                            eta: int = 3, seed: Optional[int] = None) -> Tuple[MilestoneThresholds, Dict]:
+        """Search for the thresholds whose milestone win rates best match the targets.
+
+        ``search`` is 'random' (Monte Carlo draws), 'grid' (exhaustive grid) or
+        'halving' (successive halving: score draws on a small signal sample and
+        keep the best 1/eta for a sample eta times larger). Candidates are scored
+        in vectorized batches, split across ``workers`` processes when large.
+        """
+        columns = SignalColumns.from_signals(signals)
+        rng = np.random.default_rng(seed)
+
+        if search == 'grid':
+            confidences, confirmations = grid_candidates(grid_steps)
+        elif search in ('random', 'halving'):
+            confidences, confirmations = random_candidates(iterations, rng)
+        else:
+            raise ValueError(f"Unknown search strategy: {search}")
+
+        print(f"Optimizing thresholds: {search} search over {len(confidences)} candidates, "
+              f"{len(signals)} signals, {workers} worker(s)...")
+        started = time.perf_counter()
+
+        pool = ProcessPoolExecutor(max_workers=workers) if workers > 1 else None
+        try:
+            if search == 'halving':
+                confidences, confirmations = self._successive_halving(
+                    columns, confidences, confirmations, eta, rng, pool, workers)
+
+            scorer = ThresholdScorer(columns, self.target_win_rates)
+            scores = score_candidates(scorer, confidences, confirmations, pool, workers)
+        finally:
+            if pool is not None:
+                pool.shutdown()
+
+        if len(scores) == 0:
+            print("\nNo valid candidates - keeping default thresholds")
+            best_thresholds = MilestoneThresholds()
+        else:
+            best = int(np.argmin(scores))
+            best_thresholds = MilestoneThresholds.from_arrays(confidences[best], confirmations[best])
+            print(f"\nOptimization complete in {time.perf_counter() - started:.2f}s! "
+                  f"Best score: {scores[best]:.4f}")
+
+        # Leave every signal assigned under the winning thresholds for the CSV export
+        best_results = self.calculate_milestone_performance(signals, best_thresholds, columns)
         return best_thresholds, best_results
+
+    def _successive_halving(self, columns: SignalColumns, confidences: np.ndarray, confirmations: np.ndarray,
+                            eta: int, rng: np.random.Generator, pool: Optional[ProcessPoolExecutor],
+                            workers: int) -> Tuple[np.ndarray, np.ndarray]:
+        """Narrow candidates on growing signal samples until few enough remain for a full pass"""
+        rounds = max(int(np.log(max(len(confidences), 1)) / np.log(eta)) - 1, 0)
+        sample_size = max(len(columns) // eta ** rounds, min(len(columns), MIN_HALVING_SAMPLE))
+        while len(confidences) > eta and sample_size < len(columns):
+            sample = columns.take(rng.choice(len(columns), size=sample_size, replace=False))
+            scores = score_candidates(ThresholdScorer(sample, self.target_win_rates),
+                                      confidences, confirmations, pool, workers)
+            keep = np.argsort(scores, kind='stable')[:max(len(confidences) // eta, 1)]
+            print(f"Halving: kept {len(keep)}/{len(confidences)} candidates on {sample_size} signals")
+            confidences, confirmations = confidences[keep], confirmations[keep]
+            sample_size *= eta
+        return confidences, confirmations
     
     def export_results_to_csv(self, signals: List[SignalResult], results: Dict, 
                              filename: str = "milestone_backtest_results.csv"):
@@ -393,6 +569,14 @@ def main():
                        help='Output CSV filename (default: milestone_backtest_results.csv)')
     parser.add_argument('--no-optimize', action='store_true',
                        help='Skip optimization and use default thresholds')
+    parser.add_argument('--search', choices=['random', 'grid', 'halving'], default='random',
+                       help='Threshold search strategy (default: random)')
+    parser.add_argument('--grid-steps', type=int, default=11,
+                       help='Confidence levels per milestone for grid search (default: 11)')
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1,
+                       help='Processes used to score large candidate batches (default: CPU count)')
+    parser.add_argument('--seed', type=int, default=None,
+                       help='Random seed for the threshold search')
     
     args = parser.parse_args()
     
@@ -406,7 +590,10 @@ def main():
         thresholds = MilestoneThresholds()
         results = backtester.calculate_milestone_performance(signals, thresholds)
     else:
-        thresholds, results = backtester.optimize_thresholds(signals, args.iterations)
+        thresholds, results = backtester.optimize_thresholds(
+            signals, args.iterations, search=args.search, workers=args.workers,
+            grid_steps=args.grid_steps, seed=args.seed
+        )
     
     # Print results
     backtester.print_results(results, thresholds)
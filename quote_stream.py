@@ -0,0 +1,207 @@
+#!/usr/bin/env python3
+"""
+Quote Streaming
+Server push of quote updates: one poller refreshes every subscribed symbol per tick through the market data
+gateway and publishes only the quotes that changed, to Socket.IO rooms or SSE listeners
+"""
+
+import json
+import time
+import queue
+import logging
+import threading
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Set, Tuple
+
+from market_data_gateway import MarketDataGateway, Quote
+
+logger = logging.getLogger(__name__)
+
+# Updates an SSE listener has not consumed yet; past this the oldest is dropped (a newer quote supersedes it)
+LISTENER_QUEUE_SIZE = 256
+
+
+def quote_payload(symbol: str, quote: Quote) -> Dict:
+    """JSON-ready tick for a stream symbol"""
+    previous_close = quote.previous_close or quote.price
+    change = quote.price - previous_close
+    return {
+        'symbol': symbol,
+        'price': quote.price,
+        'open': quote.open,
+        'high': quote.high,
+        'low': quote.low,
+        'volume': quote.volume,
+        'change': round(change, 6),
+        'changePercent': round(change / previous_close * 100, 2) if previous_close > 0 else 0,
+        'timestamp': quote.timestamp
+    }
+
+
+def format_sse(data: Optional[Dict] = None, event: Optional[str] = None, retry_ms: Optional[int] = None) -> str:
+    """One text/event-stream message; with no data it is a comment line that keeps the connection open"""
+    if data is None and retry_ms is None:
+        return ': keepalive\n\n'
+    lines = []
+    if retry_ms is not None:
+        lines.append(f'retry: {retry_ms}')
+    if event:
+        lines.append(f'event: {event}')
+    if data is not None:
+        lines.append(f'data: {json.dumps(data, separators=(",", ":"))}')
+    return '\n'.join(lines) + '\n\n'
+
+
+class QuoteStreamer:
+    """Polls subscribed symbols once per ``interval`` and pushes the changed quotes.
+
+    Subscriptions are reference counted per stream symbol, so the upstream
+    work per tick is one gateway refresh of the distinct symbols however
+    many clients subscribe. ``resolve`` maps a stream symbol ('EUR/USD',
+    'EURUSD') to the gateway's upstream symbol ('EURUSD=X'); stream symbols
+    sharing an upstream symbol share its fetch. Each changed quote goes to
+    ``publish(symbol, payload)`` (e.g. a Socket.IO room emit) and to the
+    ``listen`` generators subscribed to it.
+    """
+
+    def __init__(self, gateway: MarketDataGateway, publish: Optional[Callable[[str, Dict], None]] = None,
+                 resolve: Optional[Callable[[str], str]] = None, interval: float = 2.0):
+        self.gateway = gateway
+        self.publish = publish
+        self.resolve = resolve or (lambda symbol: symbol)
+        self.interval = interval
+        self._subscribers: Dict[str, int] = {}
+        self._latest: Dict[str, Dict] = {}
+        self._listeners: List[Tuple[Set[str], queue.Queue]] = []
+        self._lock = threading.Lock()
+        self._poller: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+        self.counters = {'polls': 0, 'upstream_symbols': 0, 'published': 0, 'unchanged': 0, 'dropped': 0}
+
+    def subscribe(self, symbols: Iterable[str]):
+        with self._lock:
+            for symbol in symbols:
+                self._subscribers[symbol] = self._subscribers.get(symbol, 0) + 1
+        self._ensure_poller()
+
+    def unsubscribe(self, symbols: Iterable[str]):
+        with self._lock:
+            for symbol in symbols:
+                count = self._subscribers.get(symbol, 0) - 1
+                if count > 0:
+                    self._subscribers[symbol] = count
+                else:
+                    self._subscribers.pop(symbol, None)
+                    self._latest.pop(symbol, None)
+
+    def snapshot(self, symbols: Iterable[str]) -> List[Dict]:
+        """Last published tick of each symbol that has one, for clients that just subscribed"""
+        with self._lock:
+            return [self._latest[symbol] for symbol in symbols if symbol in self._latest]
+
+    def listen(self, symbols: Iterable[str], heartbeat: float = 15.0,
+               max_duration: Optional[float] = None) -> Iterator[Optional[Dict]]:
+        """Subscribe and yield ticks for symbols as they change, or None every ``heartbeat`` seconds without one.
+
+        Starts with the latest known ticks. Ends after ``max_duration``
+        seconds, or when the consumer closes the generator; either way the
+        subscription is released.
+        """
+        symbols = set(symbols)
+        updates: queue.Queue = queue.Queue(maxsize=LISTENER_QUEUE_SIZE)
+        listener = (symbols, updates)
+        with self._lock:
+            self._listeners.append(listener)
+        self.subscribe(symbols)
+        deadline = time.monotonic() + max_duration if max_duration else None
+        try:
+            yield from self.snapshot(symbols)
+            while deadline is None or time.monotonic() < deadline:
+                wait = heartbeat if deadline is None else max(min(heartbeat, deadline - time.monotonic()), 0)
+                try:
+                    yield updates.get(timeout=wait)
+                except queue.Empty:
+                    yield None
+        finally:
+            with self._lock:
+                self._listeners.remove(listener)
+            self.unsubscribe(symbols)
+
+    def poll_once(self) -> int:
+        """Refresh every subscribed symbol in one gateway call and push the changed ticks; returns how many"""
+        with self._lock:
+            upstream = {symbol: self.resolve(symbol) for symbol in self._subscribers}
+        if not upstream:
+            return 0
+        distinct = set(upstream.values())
+        quotes = self.gateway.refresh(distinct)
+
+        changed = []
+        with self._lock:
+            self.counters['polls'] += 1
+            self.counters['upstream_symbols'] += len(distinct)
+            for symbol, upstream_symbol in upstream.items():
+                quote = quotes.get(upstream_symbol)
+                if quote is None or symbol not in self._subscribers:
+                    continue
+                previous = self._latest.get(symbol)
+                if previous is not None and previous['price'] == quote.price \
+                        and previous['timestamp'] == quote.timestamp:
+                    self.counters['unchanged'] += 1
+                    continue
+                payload = quote_payload(symbol, quote)
+                self._latest[symbol] = payload
+                changed.append(payload)
+            self.counters['published'] += len(changed)
+            listeners = list(self._listeners)
+
+        for payload in changed:
+            if self.publish is not None:
+                try:
+                    self.publish(payload['symbol'], payload)
+                except Exception as e:
+                    logger.error(f"Quote publish failed for {payload['symbol']}: {e}")
+            for symbols, updates in listeners:
+                if payload['symbol'] in symbols:
+                    self._offer(updates, payload)
+        return len(changed)
+
+    def _offer(self, updates: queue.Queue, payload: Dict):
+        while True:
+            try:
+                updates.put_nowait(payload)
+                return
+            except queue.Full:
+                try:
+                    updates.get_nowait()
+                    with self._lock:
+                        self.counters['dropped'] += 1
+                except queue.Empty:
+                    pass
+
+    def _ensure_poller(self):
+        # Started on the first subscription, so each pre-forked worker polls only for its own clients
+        if self._poller is not None and self._poller.is_alive():
+            return
+        with self._lock:
+            if self._poller is None or not self._poller.is_alive():
+                self._stop.clear()
+                self._poller = threading.Thread(target=self._poll_loop, name='quote-stream', daemon=True)
+                self._poller.start()
+
+    def _poll_loop(self):
+        while not self._stop.is_set():
+            started = time.monotonic()
+            try:
+                self.poll_once()
+            except Exception as e:
+                logger.error(f"Quote stream poll failed: {e}")
+            self._stop.wait(max(self.interval - (time.monotonic() - started), 0))
+
+    def close(self):
+        self._stop.set()
+        if self._poller is not None:
+            self._poller.join(timeout=5)
+
+    def stats(self) -> Dict:
+        with self._lock:
+            return {**self.counters, 'symbols': len(self._subscribers), 'listeners': len(self._listeners)}
@@ -0,0 +1,269 @@
+#!/usr/bin/env python3
+"""
+Request Instrumentation
+Per-route latency histograms, sampled upstream call timings (yfinance, Binance, databases) and a
+Prometheus-style /metrics endpoint shared by the Flask services, plus non-blocking queue logging
+"""
+
+import time
+import queue
+import atexit
+import random
+import logging
+import threading
+from contextlib import contextmanager
+from functools import wraps
+from logging.handlers import QueueHandler, QueueListener
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
+from urllib.parse import urlsplit
+
+from flask import Flask, Response, g, request
+
+from log_stream import LatencyHistogram
+
+logger = logging.getLogger(__name__)
+access_logger = logging.getLogger('access')
+
+# Quantiles exported for every latency summary
+EXPORTED_QUANTILES = (0.5, 0.9, 0.95, 0.99)
+
+
+class RequestInstrumentation:
+    """Flask extension timing every request and the upstream calls made while serving it.
+
+    Each request adds one observation to a log-bucketed (HDR-style)
+    histogram for its route template and bumps a status counter: a few
+    dict operations under a lock, with no serialization on the request
+    path. Upstream calls are always counted, and a ``sample_rate``
+    fraction of them is timed. Only a ``log_sample_rate`` fraction of
+    requests is access-logged, plus every slow or failed one. Everything is
+    served in the Prometheus text format at ``metrics_path``.
+
+    Metrics are per process, so each gunicorn worker reports its own series.
+    """
+
+    def __init__(self, app: Optional[Flask] = None, service: Optional[str] = None, sample_rate: float = 1.0,
+                 log_sample_rate: float = 0.01, slow_request_ms: float = 1000.0, metrics_path: str = '/metrics'):
+        self.service = service
+        self.sample_rate = sample_rate
+        self.log_sample_rate = log_sample_rate
+        self.slow_request_ms = slow_request_ms
+        self.metrics_path = metrics_path
+        self._lock = threading.Lock()
+        self.request_latency: Dict[Tuple[str, str], LatencyHistogram] = {}
+        self.request_counts: Dict[Tuple[str, str, str], int] = {}
+        self.upstream_latency: Dict[Tuple[str, str], LatencyHistogram] = {}
+        self.upstream_counts: Dict[Tuple[str, str, str], int] = {}
+
+        if app:
+            self.init_app(app)
+
+    def init_app(self, app: Flask):
+        """Register the request hooks and the metrics endpoint"""
+        if self.service is None:
+            self.service = app.import_name
+        app.before_request(self._before_request)
+        app.after_request(self._after_request)
+        app.add_url_rule(self.metrics_path, 'request_instrumentation_metrics', self.metrics_view)
+        app.extensions['request_instrumentation'] = self
+
+    def _before_request(self):
+        g.instrumentation_started = time.perf_counter()
+
+    def _after_request(self, response: Response) -> Response:
+        started = g.pop('instrumentation_started', None)
+        if started is None:
+            return response
+        elapsed = time.perf_counter() - started
+        route = request.url_rule.rule if request.url_rule is not None else '<unmatched>'
+        if route == self.metrics_path:
+            return response
+        self.observe_request(request.method, route, response.status_code, elapsed)
+
+        elapsed_ms = elapsed * 1000
+        if response.status_code >= 500 or elapsed_ms >= self.slow_request_ms or random.random() < self.log_sample_rate:
+            access_logger.info(f"{request.method} {request.path} -> {response.status_code} in {elapsed_ms:.1f}ms")
+        return response
+
+    def observe_request(self, method: str, route: str, status_code: int, seconds: float):
+        with self._lock:
+            histogram = self.request_latency.get((method, route))
+            if histogram is None:
+                histogram = self.request_latency[(method, route)] = LatencyHistogram()
+            histogram.add(seconds)
+            key = (method, route, str(status_code))
+            self.request_counts[key] = self.request_counts.get(key, 0) + 1
+
+    def observe_upstream(self, upstream: str, operation: str, seconds: Optional[float], outcome: str = 'ok'):
+        """Count one upstream call; ``seconds`` is None when the call was not sampled for timing"""
+        with self._lock:
+            key = (upstream, operation, outcome)
+            self.upstream_counts[key] = self.upstream_counts.get(key, 0) + 1
+            if seconds is not None:
+                histogram = self.upstream_latency.get((upstream, operation))
+                if histogram is None:
+                    histogram = self.upstream_latency[(upstream, operation)] = LatencyHistogram()
+                histogram.add(seconds)
+
+    def _sampled(self) -> bool:
+        return self.sample_rate >= 1.0 or random.random() < self.sample_rate
+
+    @contextmanager
+    def upstream(self, upstream: str, operation: str = 'call') -> Iterator[None]:
+        """Time the enclosed upstream call; exceptions count as outcome="error" and propagate"""
+        sampled = self._sampled()
+        started = time.perf_counter()
+        outcome = 'ok'
+        try:
+            yield
+        except BaseException:
+            outcome = 'error'
+            raise
+        finally:
+            self.observe_upstream(upstream, operation, time.perf_counter() - started if sampled else None, outcome)
+
+    def timed(self, upstream: str, operation: Optional[str] = None) -> Callable:
+        """Decorator form of ``upstream``; the operation defaults to the function name"""
+        def decorator(func):
+            @wraps(func)
+            def wrapper(*args, **kwargs):
+                with self.upstream(upstream, operation or func.__name__):
+                    return func(*args, **kwargs)
+            return wrapper
+        return decorator
+
+    def track_requests_session(self, session):
+        """Record every HTTP call made through a requests Session, labelled by host and path"""
+        def record(response, *args, **kwargs):
+            url = urlsplit(response.url)
+            outcome = 'ok' if response.status_code < 400 else f'http_{response.status_code}'
+            seconds = response.elapsed.total_seconds() if self._sampled() else None
+            self.observe_upstream(url.hostname or 'unknown', url.path or '/', seconds, outcome)
+        session.hooks.setdefault('response', []).append(record)
+
+    def track_sqlalchemy(self, engine, upstream: str = 'db'):
+        """Record every statement run on a SQLAlchemy engine, labelled by its SQL verb"""
+        from sqlalchemy import event
+
+        @event.listens_for(engine, 'before_cursor_execute')
+        def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+            conn.info.setdefault('instrumentation_started', []).append(
+                time.perf_counter() if self._sampled() else None)
+
+        @event.listens_for(engine, 'after_cursor_execute')
+        def after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+            started = conn.info['instrumentation_started'].pop()
+            operation = statement.lstrip().split(None, 1)[0].upper() if statement.strip() else 'UNKNOWN'
+            self.observe_upstream(upstream, operation, time.perf_counter() - started if started is not None else None)
+
+        @event.listens_for(engine, 'handle_error')
+        def handle_error(context):
+            started = context.connection.info.get('instrumentation_started') if context.connection is not None else None
+            if started:
+                started.pop()
+            self.observe_upstream(upstream, 'error', None, 'error')
+
+    def metrics_view(self) -> Response:
+        return Response(self.render_prometheus(), mimetype='text/plain; version=0.0.4')
+
+    def render_prometheus(self) -> str:
+        """All series in the Prometheus text exposition format"""
+        with self._lock:
+            request_counts = sorted(self.request_counts.items())
+            request_latency = sorted((key, _quantiles(histogram)) for key, histogram in self.request_latency.items())
+            upstream_counts = sorted(self.upstream_counts.items())
+            upstream_latency = sorted((key, _quantiles(histogram)) for key, histogram in self.upstream_latency.items())
+
+        service = [('service', self.service or '')]
+        lines: List[str] = []
+        lines += _header('http_requests_total', 'counter', 'Requests handled, by route template and status')
+        for (method, route, status), count in request_counts:
+            lines.append(_sample('http_requests_total', service + [('method', method), ('route', route),
+                                                                   ('status', status)], count))
+        lines += _header('http_request_duration_seconds', 'summary',
+                         'Request latency per route from log-bucketed histograms (1% relative accuracy)')
+        for (method, route), stats in request_latency:
+            lines += _summary('http_request_duration_seconds', service + [('method', method), ('route', route)], stats)
+        lines += _header('upstream_calls_total', 'counter', 'Upstream calls, by upstream, operation and outcome')
+        for (upstream, operation, outcome), count in upstream_counts:
+            lines.append(_sample('upstream_calls_total', service + [('upstream', upstream), ('operation', operation),
+                                                                    ('outcome', outcome)], count))
+        lines += _header('upstream_call_duration_seconds', 'summary', 'Latency of the sampled upstream calls')
+        for (upstream, operation), stats in upstream_latency:
+            lines += _summary('upstream_call_duration_seconds',
+                              service + [('upstream', upstream), ('operation', operation)], stats)
+        return '\n'.join(lines) + '\n'
+
+
+def _quantiles(histogram: LatencyHistogram) -> Dict[str, float]:
+    stats = {str(q): histogram.percentile(q * 100) for q in EXPORTED_QUANTILES}
+    stats['sum'] = histogram.total
+    stats['count'] = histogram.count
+    return stats
+
+
+def _escape(value: str) -> str:
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _sample(name: str, labels: List[Tuple[str, str]], value: float) -> str:
+    rendered = ','.join(f'{key}="{_escape(label)}"' for key, label in labels)
+    return f'{name}{{{rendered}}} {value}'
+
+
+def _header(name: str, kind: str, help_text: str) -> List[str]:
+    return [f'# HELP {name} {help_text}', f'# TYPE {name} {kind}']
+
+
+def _summary(name: str, labels: List[Tuple[str, str]], stats: Dict[str, float]) -> List[str]:
+    lines = [_sample(name, labels + [('quantile', str(q))], stats[str(q)]) for q in EXPORTED_QUANTILES]
+    lines.append(_sample(f'{name}_sum', labels, stats['sum']))
+    lines.append(_sample(f'{name}_count', labels, stats['count']))
+    return lines
+
+
+class DroppingQueueHandler(QueueHandler):
+    """QueueHandler that never blocks the caller: when the queue is full the record is counted and dropped"""
+
+    def __init__(self, log_queue: queue.Queue):
+        super().__init__(log_queue)
+        self.dropped = 0
+
+    def enqueue(self, record: logging.LogRecord):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+
+# Logger name -> the queue handler installed on it and the listener draining its queue
+_queue_listeners: Dict[str, Tuple[DroppingQueueHandler, QueueListener]] = {}
+_queue_lock = threading.Lock()
+
+
+def install_queue_logging(target: Optional[logging.Logger] = None, max_queue: int = 10000) -> DroppingQueueHandler:
+    """Move a logger's handlers (the root logger's by default) behind a queue drained by a background thread.
+
+    Callers only build the message and enqueue the record; handler
+    formatting and file or console I/O happen on the listener thread. Safe
+    to call repeatedly: handlers added to the logger since the last call
+    join its existing listener.
+    """
+    target = target or logging.getLogger()
+    with _queue_lock:
+        if target.name not in _queue_listeners:
+            handler = DroppingQueueHandler(queue.Queue(max_queue))
+            listener = QueueListener(handler.queue, respect_handler_level=True)
+            listener.start()
+            atexit.register(listener.stop)
+            _queue_listeners[target.name] = (handler, listener)
+        handler, listener = _queue_listeners[target.name]
+
+        moved = [existing for existing in target.handlers if not isinstance(existing, QueueHandler)]
+        for existing in moved:
+            target.removeHandler(existing)
+        listener.handlers = listener.handlers + tuple(
+            existing for existing in moved if existing not in listener.handlers)
+        if handler not in target.handlers:
+            target.addHandler(handler)
+    return handler
@@ -0,0 +1,37 @@
+"""
+Bot storage
+Connections stay bounded by the pool however many threads use the storage
+"""
+
+import threading
+
+from bot_storage import BotStorage
+
+
+def test_many_threads_share_a_bounded_pool(tmp_path):
+    storage = BotStorage(str(tmp_path / 'bots.db'), max_connections=4)
+    storage.executescript('CREATE TABLE ticks (thread INTEGER, price REAL)')
+    start = threading.Barrier(32)
+    errors = []
+
+    def request(index):
+        try:
+            start.wait()
+            storage.execute('INSERT INTO ticks VALUES (?, ?)', (index, 1.0 + index))
+            assert storage.fetchone('SELECT price FROM ticks WHERE thread = ?', (index,)) == (1.0 + index,)
+        except Exception as e:
+            errors.append(e)
+
+    # Each round is a fresh set of short-lived threads, like a threaded server's request threads
+    for _ in range(5):
+        threads = [threading.Thread(target=request, args=(i,)) for i in range(32)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+    assert not errors
+    assert storage.fetchone('SELECT COUNT(*) FROM ticks') == (160,)
+    assert 1 <= storage.open_connections <= 4
+    storage.close()
+    assert storage.open_connections == 0
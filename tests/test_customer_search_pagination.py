@@ -0,0 +1,98 @@
+"""
+Customer search pagination
+Pages /customers/search by its (created_at, id) keyset, where ids are UUIDs and some customers have no created_at
+"""
+
+import uuid
+from datetime import datetime, timedelta
+
+import pytest
+
+pytest.importorskip('flask_sqlalchemy')
+pytest.importorskip('flask_socketio')
+pytest.importorskip('supabase')
+
+from flask import Flask
+
+import journal.models
+from journal.extensions import db
+from journal.models import User
+
+
+class SearchRiskPlan(db.Model):
+    """Just the columns /customers/search reads; this tree's models have no RiskPlan"""
+    __tablename__ = 'test_search_risk_plans'
+    id = db.Column(db.Integer, primary_key=True)
+    user_id = db.Column(db.String(36))
+
+
+@pytest.fixture
+def client(tmp_path, monkeypatch):
+    # The route reads profile fields that this tree's User model does not define
+    monkeypatch.setattr(journal.models, 'RiskPlan', SearchRiskPlan, raising=False)
+    monkeypatch.setattr(User, 'username', property(lambda user: user.first_name), raising=False)
+    monkeypatch.setattr(User, 'unique_id', property(lambda user: user.id.hex), raising=False)
+    monkeypatch.setattr(User, 'plan_type', None, raising=False)
+    from journal.dashboard_routes import dashboard_bp
+
+    app = Flask(__name__)
+    app.config['SQLALCHEMY_DATABASE_URI'] = f"sqlite:///{tmp_path / 'users.db'}"
+    db.init_app(app)
+    app.register_blueprint(dashboard_bp)
+    with app.app_context():
+        User.__table__.create(db.engine)
+        SearchRiskPlan.__table__.create(db.engine)
+        yield app.test_client()
+
+
+def add_user(created_at):
+    user_id = uuid.uuid4()
+    db.session.add(User(id=user_id, first_name='Ann', last_name='Lee', email=f'{user_id.hex}@example.com',
+                        password_hash='x', created_at=created_at))
+    db.session.flush()
+    if created_at is None:
+        # The column default fills in a None passed to the model, so clear it afterwards
+        db.session.execute(User.__table__.update().where(User.__table__.c.id == user_id).values(created_at=None))
+    db.session.commit()
+    return str(user_id)
+
+
+def search_all(client, limit):
+    pages, cursor = [], None
+    while True:
+        query = {'limit': limit, **({'cursor': cursor} if cursor else {})}
+        response = client.get('/customers/search', query_string=query)
+        assert response.status_code == 200, response.get_data(as_text=True)
+        body = response.get_json()
+        pages.append(body['customers'])
+        cursor = body['next_cursor']
+        if not cursor:
+            return pages
+
+
+def test_pages_include_customers_without_created_at(client):
+    start = datetime(2026, 1, 1)
+    dated = [add_user(start + timedelta(days=day)) for day in range(3)]
+    undated = [add_user(None) for _ in range(3)]
+
+    pages = search_all(client, 2)
+    assert [len(page) for page in pages] == [2, 2, 2]
+    customers = [customer for page in pages for customer in page]
+    assert sorted(customer['id'] for customer in customers) == sorted(dated + undated)
+    # Newest first, then the customers with no created_at
+    assert [customer['id'] for customer in customers[:3]] == dated[::-1]
+    assert all(customer['created_at'] is None for customer in customers[3:])
+
+
+def test_second_page_resumes_after_uuid_cursor(client):
+    # Identical created_at values make the UUID the deciding part of the cursor
+    ids = [add_user(datetime(2026, 1, 1)) for _ in range(5)]
+
+    pages = search_all(client, 3)
+    assert [len(page) for page in pages] == [3, 2]
+    assert sorted(customer['id'] for page in pages for customer in page) == sorted(ids)
+
+
+def test_malformed_cursor_is_rejected(client):
+    response = client.get('/customers/search', query_string={'cursor': 'not-a-cursor'})
+    assert response.status_code == 400
@@ -0,0 +1,52 @@
+"""
+Signal feed pagination
+Cursors that decode but carry an id of the wrong type are rejected as bad requests
+"""
+
+import uuid
+from datetime import datetime
+
+import pytest
+
+pytest.importorskip('flask_sqlalchemy')
+pytest.importorskip('flask_socketio')
+pytest.importorskip('supabase')
+
+from flask import Flask
+
+from journal.extensions import db
+from journal.models import SignalFeed
+from journal.pagination import decode_cursor, encode_cursor
+from journal.signal_feed_routes import signal_feed_bp
+from journal.user_signals_api import parse_signal_id
+
+
+@pytest.fixture
+def client(tmp_path):
+    app = Flask(__name__)
+    app.config['SQLALCHEMY_DATABASE_URI'] = f"sqlite:///{tmp_path / 'feed.db'}"
+    db.init_app(app)
+    app.register_blueprint(signal_feed_bp)
+    with app.app_context():
+        SignalFeed.__table__.create(db.engine)
+        yield app.test_client()
+
+
+@pytest.mark.parametrize('row_id', ['not-a-uuid', 42, None, [1]])
+def test_user_signal_cursor_needs_a_uuid_id(row_id):
+    with pytest.raises(ValueError):
+        decode_cursor(encode_cursor(datetime(2026, 1, 1), row_id), parse_signal_id)
+
+
+def test_user_signal_cursor_round_trips_a_uuid():
+    signal_id = uuid.uuid4()
+    assert decode_cursor(encode_cursor(datetime(2026, 1, 1), signal_id), parse_signal_id)[1] == signal_id
+
+
+def test_feed_rejects_cursor_with_non_integer_id(client):
+    cursor = encode_cursor(datetime(2026, 1, 1), 'abc')
+    response = client.get('/signals/feed', query_string={'cursor': cursor})
+    assert response.status_code == 400
+
+    cursor = encode_cursor(datetime(2026, 1, 1), 7)
+    assert client.get('/signals/feed', query_string={'cursor': cursor}).status_code == 200
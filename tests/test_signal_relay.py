@@ -0,0 +1,90 @@
+"""
+Signal relay
+Batches mixing valid, duplicate and invalid signals through /signals/relay/batch
+"""
+
+from datetime import datetime
+
+import pytest
+
+pytest.importorskip('flask_sqlalchemy')
+pytest.importorskip('flask_socketio')
+pytest.importorskip('supabase')
+
+from flask import Flask
+from sqlalchemy.dialects.postgresql import JSONB
+from sqlalchemy.ext.compiler import compiles
+
+from journal.extensions import db
+from journal.models import SignalFeed, SignalStatBucket, SignalStatusCount
+from journal.signal_models import Signal
+from journal.signal_feed_routes import signal_feed_bp
+
+
+@compiles(JSONB, 'sqlite')
+def _jsonb_on_sqlite(type_, compiler, **kw):
+    # signals.payload is JSONB; SQLite stores the same values as JSON
+    return 'JSON'
+
+
+@pytest.fixture
+def client(tmp_path):
+    app = Flask(__name__)
+    app.config['SQLALCHEMY_DATABASE_URI'] = f"sqlite:///{tmp_path / 'relay.db'}"
+    db.init_app(app)
+    app.register_blueprint(signal_feed_bp)
+    with app.app_context():
+        for table in (SignalFeed.__table__, Signal.__table__, SignalStatusCount.__table__, SignalStatBucket.__table__):
+            table.create(db.engine)
+        yield app.test_client()
+
+
+def item(key, **overrides):
+    signal = {
+        'id': key, 'pair': 'EURUSD', 'direction': 'BUY', 'entry': 1.0920, 'stopLoss': 1.0890,
+        'takeProfit': [1.0950], 'confidence': 90, 'timestamp': datetime(2026, 1, 1).isoformat() + 'Z',
+        'market': 'forex', 'timeframe': '1h', 'riskTier': 'low'
+    }
+    signal.update(overrides)
+    return {'uniqueKey': key, 'signal': {name: value for name, value in signal.items() if value is not None}}
+
+
+def test_mixed_batch_reports_each_item_and_keeps_the_valid_ones(client):
+    batch = [
+        item('ok-1'),
+        item('ok-2', direction='sell', riskTier='HIGH'),
+        item('ok-1'),
+        item('bad-direction', direction='LONG'),
+        item('bad-tier', riskTier='extreme'),
+        item('no-id', id=None),
+        item('no-timestamp', timestamp=None),
+        item('long-pair', pair='X' * 51),
+        {'uniqueKey': 'no-signal'},
+    ]
+    response = client.post('/signals/relay/batch', json={'signals': batch})
+    assert response.status_code == 200, response.get_data(as_text=True)
+    body = response.get_json()
+
+    assert [result['status'] for result in body['results']] == [
+        'created', 'created', 'duplicate', 'invalid', 'invalid', 'invalid', 'invalid', 'invalid', 'invalid'
+    ]
+    assert (body['created'], body['duplicate'], body['invalid']) == (2, 1, 6)
+    assert all(result['error'] for result in body['results'] if result['status'] == 'invalid')
+
+    assert {row.unique_key for row in SignalFeed.query.all()} == {'ok-1', 'ok-2'}
+    admin_rows = db.session.query(Signal.side, Signal.risk_tier).all()
+    assert sorted(tuple(row) for row in admin_rows) == [('BUY', 'low'), ('SELL', 'high')]
+
+
+def test_replayed_batch_is_all_duplicates(client):
+    batch = [item('a'), item('b')]
+    assert client.post('/signals/relay/batch', json=batch).get_json()['created'] == 2
+    replay = client.post('/signals/relay/batch', json=batch).get_json()
+    assert (replay['created'], replay['duplicate']) == (0, 2)
+    assert SignalFeed.query.count() == 2
+
+
+def test_single_relay_rejects_invalid_signal(client):
+    response = client.post('/signals/relay', json=item('bad', riskTier='extreme'))
+    assert response.status_code == 422
+    assert 'riskTier' in response.get_json()['error']
@@ -0,0 +1,103 @@
+"""
+Signal statistics
+Counters maintained by journal.signal_stats against a recount of the signal tables
+"""
+
+import uuid
+from datetime import datetime
+
+import pytest
+
+pytest.importorskip('flask_sqlalchemy')
+pytest.importorskip('flask_socketio')
+pytest.importorskip('supabase')
+
+from flask import Flask
+from sqlalchemy.dialects.postgresql import JSONB
+from sqlalchemy.ext.compiler import compiles
+
+from journal import signal_stats
+from journal.extensions import db
+from journal.models import SignalFeed, SignalStatBucket, SignalStatusCount
+from journal.signal_models import Signal
+from journal.signal_feed_routes import signal_feed_bp
+
+
+@compiles(JSONB, 'sqlite')
+def _jsonb_on_sqlite(type_, compiler, **kw):
+    # signals.payload is JSONB; SQLite stores the same values as JSON
+    return 'JSON'
+
+
+@pytest.fixture
+def app(tmp_path):
+    app = Flask(__name__)
+    app.config['SQLALCHEMY_DATABASE_URI'] = f"sqlite:///{tmp_path / 'stats.db'}"
+    db.init_app(app)
+    app.register_blueprint(signal_feed_bp)
+    with app.app_context():
+        for table in (SignalFeed.__table__, Signal.__table__, SignalStatusCount.__table__, SignalStatBucket.__table__):
+            table.create(db.engine)
+        yield app
+
+
+def relay(client, *keys, market='forex', risk_tier='low'):
+    batch = [{'uniqueKey': key, 'signal': {
+        'id': key, 'pair': 'EURUSD', 'direction': 'BUY', 'entry': 1.0920, 'stopLoss': 1.0890,
+        'takeProfit': [1.0950], 'confidence': 90, 'timestamp': datetime.utcnow().isoformat() + 'Z',
+        'market': market, 'timeframe': '1h', 'riskTier': risk_tier
+    }} for key in keys]
+    assert client.post('/signals/relay/batch', json=batch).get_json()['created'] == len(keys)
+
+
+def test_feed_counters_follow_relay_and_mark_taken(app):
+    client = app.test_client()
+    relay(client, 'a', 'b', 'c')
+    relay(client, 'd', market='crypto', risk_tier='high')
+    for signal_id, outcome, pnl in (('a', 'Target Hit', 40), ('b', 'Stop Loss Hit', -20)):
+        response = client.post('/signals/mark-taken', json={'signalId': signal_id, 'outcome': outcome, 'pnl': pnl})
+        assert response.status_code == 200
+
+    stats = client.get('/signals/stats').get_json()
+    assert (stats['total_signals'], stats['active_signals'], stats['taken_signals']) == (4, 2, 2)
+    assert stats['active_by_market'] == {'forex': 1, 'crypto': 1}
+    assert stats['outcome_stats'] == {'Target Hit': 1, 'Stop Loss Hit': 1}
+    assert stats['rolling']['7d'] == {'taken': 2, 'wins': 1, 'win_rate': 50.0, 'pnl': 20.0}
+
+    admin = signal_stats.admin_summary()
+    assert (admin['total_signals'], admin['recent_signals_24h'], admin['by_risk_tier']) == (4, 4, {'low': 3, 'high': 1})
+
+    signal_stats.rebuild()
+    assert client.get('/signals/stats').get_json() == stats
+
+
+def test_admin_archive_commits_counters_with_the_signal(app):
+    # The admin API writes signals through signal_models.db; it must be the session the counters use
+    signal = Signal.create_signal('EURUSD', 'buy', 1.0920, 1.0890, 1.0980, 'medium', {'market': 'forex'},
+                                  uuid.uuid4())
+    db.session.add(signal)
+    signal_stats.record_created(signal_stats.ADMIN, [signal_stats.admin_state(signal)])
+    db.session.commit()
+
+    signal = Signal.query.with_for_update().get(signal.id)
+    old_state = signal_stats.admin_state(signal)
+    signal.status = 'archived'
+    signal_stats.record_change(signal_stats.ADMIN, old_state, signal_stats.admin_state(signal))
+    db.session.commit()
+    db.session.remove()
+
+    stats = signal_stats.admin_summary()
+    assert (stats['total_signals'], stats['active_signals'], stats['archived_signals']) == (1, 0, 1)
+
+
+def test_counter_rows_are_upserted_in_primary_key_order(app, monkeypatch):
+    executed = []
+    monkeypatch.setattr(db.session, 'execute', lambda statement, rows=None: executed.append(rows))
+    states = [signal_stats.feed_state({'status': 'active', 'market': market, 'timestamp': datetime(2026, 1, day)})
+              for market, day in (('forex', 3), ('crypto', 1), ('indices', 2), ('commodities', 1))]
+    signal_stats.record_created(signal_stats.FEED, states)
+
+    count_rows, bucket_rows = executed
+    assert [row['market'] for row in count_rows] == ['commodities', 'crypto', 'forex', 'indices']
+    keys = [(row['bucket'], row['market']) for row in bucket_rows]
+    assert keys == sorted(keys)